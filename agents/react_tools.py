@@ -16,7 +16,7 @@ from prompts.youtube import get_answer as get_youtube_answer
 from prompts.youtube import get_chain as get_youtube_chain
 from services.composio_service import execute_toolkit_action, stringify_result
 from tools.github_crawler.repo_agent import run_github_repo_agent
-from tools.google_search.seach_agent import web_search_pipeline
+from tools.google_search.search_service import web_search
 from tools.website_context import markdown_fetcher
 from tools.gmail.fetch_latest_mails import get_latest_emails
 from tools.gmail.list_unread_emails import list_unread
@@ -243,7 +243,7 @@ async def _github_tool(
 
 async def _websearch_tool(query: str, max_results: int = 5) -> str:
     bounded = max(1, min(10, max_results))
-    results = await asyncio.to_thread(web_search_pipeline, query, None, bounded)
+    results = await web_search(query, max_results=bounded)
     if not results:
         return "No web results were found."
 
@@ -317,9 +317,7 @@ async def _gmail_tool(
             return f"Failed to fetch Gmail messages via Composio: {exc}"
 
     try:
-        messages = await asyncio.to_thread(
-            get_latest_emails, token, max_results=bounded
-        )
+        messages = await get_latest_emails(token, max_results=bounded)
         return _ensure_text({"messages": messages})
     except Exception as exc:
         return f"Failed to fetch Gmail messages: {exc}"
@@ -398,7 +396,7 @@ async def _gmail_list_unread_tool(
             return f"Failed to list unread messages via Composio: {exc}"
 
     try:
-        messages = await asyncio.to_thread(list_unread, token, bounded)
+        messages = await list_unread(token, bounded)
         if not messages:
             return "No unread messages found."
         return _ensure_text({"unread_messages": messages})
@@ -467,9 +465,7 @@ async def _calendar_tool(
             return f"Failed to fetch calendar events via Composio: {exc}"
 
     try:
-        events = await asyncio.to_thread(
-            get_calendar_events, token, max_results=bounded
-        )
+        events = await get_calendar_events(token, max_results=bounded)
         return _ensure_text({"events": events})
     except Exception as exc:
         return f"Failed to fetch calendar events: {exc}"
@@ -0,0 +1,257 @@
+"""Async Google REST client with keep-alive pooling and Gmail batch support.
+
+One `httpx.AsyncClient` is shared across requests so calls reuse TLS
+connections. Gmail message fetches go through the `multipart/mixed` batch
+endpoint (up to 100 sub-requests per HTTP call); if a batch fails, or some of
+its parts do, the affected messages are fetched with bounded concurrent GETs.
+All reads send `fields=` partial-response masks to keep payloads small.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+import uuid
+from typing import Any, Iterable, Optional
+from urllib.parse import urlencode
+
+import httpx
+
+from core.config import get_logger
+
+logger = get_logger(__name__)
+
+GMAIL_BASE = "https://gmail.googleapis.com/gmail/v1/users/me"
+GMAIL_BATCH_URL = "https://gmail.googleapis.com/batch/gmail/v1"
+CALENDAR_BASE = "https://www.googleapis.com/calendar/v3"
+
+BATCH_MAX = 100
+FALLBACK_CONCURRENCY = 8
+DEFAULT_TIMEOUT = 8.0
+
+# Partial-response masks
+MESSAGE_METADATA_FIELDS = "id,threadId,labelIds,snippet,internalDate,payload/headers"
+MESSAGE_LIST_FIELDS = "messages(id,threadId),nextPageToken"
+CALENDAR_EVENT_FIELDS = (
+    "items(id,status,htmlLink,summary,description,location,start,end,"
+    "organizer(email,displayName),attendees(email,responseStatus)),nextPageToken"
+)
+
+
+class GoogleAPIError(Exception):
+    def __init__(self, status_code: int, message: str) -> None:
+        super().__init__(f"{status_code} {message}")
+        self.status_code = status_code
+
+
+# ── multipart/mixed batch encoding ─────────────────────────────────────────────
+
+def build_batch_body(paths: list[str], boundary: str) -> bytes:
+    """Encode GET sub-requests (absolute paths incl. query) as a batch body."""
+    parts = []
+    for i, path in enumerate(paths):
+        parts.append(
+            f"--{boundary}\r\n"
+            "Content-Type: application/http\r\n"
+            f"Content-ID: <item{i}>\r\n"
+            "\r\n"
+            f"GET {path}\r\n"
+            "\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n")
+    return "".join(parts).encode("utf-8")
+
+
+def _split_head(block: str) -> tuple[str, str]:
+    m = re.search(r"\r?\n\r?\n", block)
+    if not m:
+        return block, ""
+    return block[: m.start()], block[m.end():]
+
+
+def parse_batch_response(content_type: str, body: bytes) -> dict[int, tuple[int, Any]]:
+    """Parse a multipart/mixed batch response.
+
+    Returns {item index: (status code, parsed JSON body or raw text)} keyed by
+    the `item<N>` Content-ID of the originating sub-request.
+    """
+    m = re.search(r'boundary="?([^";]+)"?', content_type)
+    if not m:
+        raise ValueError(f"Batch response has no boundary: {content_type!r}")
+    boundary = m.group(1)
+    text = body.decode("utf-8", errors="replace")
+
+    results: dict[int, tuple[int, Any]] = {}
+    for raw_part in text.split(f"--{boundary}"):
+        part = raw_part.strip("\r\n")
+        if not part or part == "--":
+            continue
+        part_headers, http_block = _split_head(part)
+        cid = re.search(r"Content-ID:\s*<response-item(\d+)>", part_headers, re.IGNORECASE)
+        if not cid:
+            continue
+        status_block, payload = _split_head(http_block.lstrip("\r\n"))
+        status_line = status_block.splitlines()[0] if status_block else ""
+        sm = re.match(r"HTTP/\d(?:\.\d)?\s+(\d{3})", status_line)
+        status = int(sm.group(1)) if sm else 0
+        payload = payload.strip()
+        try:
+            parsed: Any = json.loads(payload) if payload else {}
+        except ValueError:
+            parsed = payload
+        results[int(cid.group(1))] = (status, parsed)
+    return results
+
+
+# ── Client ─────────────────────────────────────────────────────────────────────
+
+class GoogleAPIClient:
+    def __init__(
+        self,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        fallback_concurrency: int = FALLBACK_CONCURRENCY,
+    ) -> None:
+        self._transport = transport
+        self._timeout = timeout
+        self._fallback_concurrency = fallback_concurrency
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                transport=self._transport,
+                timeout=self._timeout,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            )
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    # ── Generic requests ───────────────────────────────────────────────────────
+
+    async def request_json(self, method: str, url: str, token: str,
+                           params: Any = None, json_body: Any = None) -> Any:
+        resp = await self.client.request(
+            method, url, params=params, json=json_body,
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        if resp.status_code not in (200, 204):
+            raise GoogleAPIError(resp.status_code, resp.text)
+        return resp.json() if resp.content else {}
+
+    async def get_json(self, url: str, token: str, params: Any = None) -> Any:
+        return await self.request_json("GET", url, token, params=params)
+
+    # ── Gmail ──────────────────────────────────────────────────────────────────
+
+    async def gmail_list_message_ids(self, token: str, max_results: int = 10,
+                                     q: str = "", label_ids: Optional[list[str]] = None) -> list[str]:
+        params: list[tuple[str, Any]] = [("maxResults", max_results), ("fields", MESSAGE_LIST_FIELDS)]
+        if q:
+            params.append(("q", q))
+        for label in label_ids or []:
+            params.append(("labelIds", label))
+        data = await self.get_json(f"{GMAIL_BASE}/messages", token, params=params)
+        return [m["id"] for m in data.get("messages", [])]
+
+    async def gmail_get_messages(
+        self,
+        token: str,
+        message_ids: list[str],
+        format: str = "metadata",
+        metadata_headers: Iterable[str] = ("Subject", "From", "Date"),
+        fields: str = MESSAGE_METADATA_FIELDS,
+    ) -> list[dict[str, Any]]:
+        """Fetch messages in id order, batching up to 100 per HTTP request."""
+        params: list[tuple[str, Any]] = [("format", format), ("fields", fields)]
+        if format == "metadata":
+            params += [("metadataHeaders", h) for h in metadata_headers]
+        query = urlencode(params)
+
+        found: dict[str, dict[str, Any]] = {}
+        chunks = [message_ids[i:i + BATCH_MAX] for i in range(0, len(message_ids), BATCH_MAX)]
+        for chunk in chunks:
+            missing = chunk
+            try:
+                batch = await self._gmail_batch(token, chunk, query)
+                found.update(batch)
+                missing = [mid for mid in chunk if mid not in batch]
+            except Exception as exc:
+                logger.debug("Gmail batch request failed, falling back to concurrent gets: %s", exc)
+            if missing:
+                found.update(await self._gmail_get_concurrent(token, missing, params))
+        return [found[mid] for mid in message_ids if mid in found]
+
+    async def _gmail_batch(self, token: str, ids: list[str], query: str) -> dict[str, dict[str, Any]]:
+        boundary = f"batch_{uuid.uuid4().hex}"
+        paths = [f"/gmail/v1/users/me/messages/{mid}?{query}" for mid in ids]
+        resp = await self.client.post(
+            GMAIL_BATCH_URL,
+            content=build_batch_body(paths, boundary),
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Content-Type": f"multipart/mixed; boundary={boundary}",
+            },
+        )
+        if resp.status_code != 200:
+            raise GoogleAPIError(resp.status_code, resp.text)
+        parsed = parse_batch_response(resp.headers.get("content-type", ""), resp.content)
+        out: dict[str, dict[str, Any]] = {}
+        for idx, (status, payload) in parsed.items():
+            if status == 200 and isinstance(payload, dict) and 0 <= idx < len(ids):
+                out[ids[idx]] = payload
+        return out
+
+    async def _gmail_get_concurrent(self, token: str, ids: list[str],
+                                    params: list[tuple[str, Any]]) -> dict[str, dict[str, Any]]:
+        sem = asyncio.Semaphore(self._fallback_concurrency)
+
+        async def _one(mid: str) -> tuple[str, Optional[dict[str, Any]]]:
+            async with sem:
+                try:
+                    return mid, await self.get_json(f"{GMAIL_BASE}/messages/{mid}", token, params=params)
+                except Exception as exc:
+                    logger.debug("Gmail get %s failed: %s", mid, exc)
+                    return mid, None
+
+        pairs = await asyncio.gather(*(_one(mid) for mid in ids))
+        return {mid: data for mid, data in pairs if data is not None}
+
+    # ── Calendar ───────────────────────────────────────────────────────────────
+
+    async def calendar_list_events(self, token: str, time_min: str, max_results: int = 10,
+                                   calendar_id: str = "primary") -> list[dict[str, Any]]:
+        params = {
+            "maxResults": max_results,
+            "orderBy": "startTime",
+            "singleEvents": "true",
+            "timeMin": time_min,
+            "fields": CALENDAR_EVENT_FIELDS,
+        }
+        data = await self.get_json(f"{CALENDAR_BASE}/calendars/{calendar_id}/events", token, params=params)
+        return data.get("items", [])
+
+
+def message_headers(msg: dict[str, Any]) -> dict[str, str]:
+    """Lower-cased header name → value for a Gmail message resource."""
+    return {
+        h.get("name", "").lower(): h.get("value", "")
+        for h in msg.get("payload", {}).get("headers", [])
+    }
+
+
+# ── Module-level singleton ─────────────────────────────────────────────────────
+
+_google_client: Optional[GoogleAPIClient] = None
+
+
+def get_google_api() -> GoogleAPIClient:
+    global _google_client
+    if _google_client is None:
+        _google_client = GoogleAPIClient()
+    return _google_client
@@ -0,0 +1,80 @@
+"""kNN index profiles: HNSW engine, graph parameters and vector encoding.
+
+A profile decides how the `embedding` field of a memory index is built. The
+rest of the mapping (text and keyword fields) is the same in every profile,
+so any profile can serve any index, and moving between profiles is a reindex
+behind the index alias (see `OpenSearchClient.reindex`).
+
+  lucene-hnsw  — Lucene HNSW on float32 vectors; what the indices used before
+                 profiles existed. 768 dims come to ~3 KB of vector per doc.
+  lucene-sq    — Lucene HNSW on int7 scalar-quantized vectors (OpenSearch
+                 2.16+). About a quarter of the vector memory; full precision
+                 is kept on disk for rescoring.
+  faiss-hnsw   — Faiss HNSW on float32, with a wider graph. Needs 2.19+, the
+                 first release where Faiss supports cosine similarity.
+  faiss-fp16   — Faiss HNSW on fp16 scalar-quantized vectors (2.19+ for
+                 cosine). Half the vector memory and disk; recall loss is
+                 usually within noise for normalised text embeddings.
+
+`m` is the number of graph links per node, `ef_construction` the build-time
+beam and `ef_search` the default query-time beam. A query can still pass its
+own `ef_search`.
+"""
+from __future__ import annotations
+
+import copy
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from core.config import get_settings as _gs
+
+
+@dataclass(frozen=True)
+class IndexProfile:
+    name: str
+    engine: str                        # "lucene" | "faiss"
+    m: int = 16
+    ef_construction: int = 100
+    ef_search: int = 100
+    encoder: Optional[dict[str, Any]] = None
+    min_version: tuple[int, int] = (2, 0)
+
+    def method(self) -> dict[str, Any]:
+        parameters: dict[str, Any] = {"m": self.m, "ef_construction": self.ef_construction}
+        if self.engine == "faiss":
+            parameters["ef_search"] = self.ef_search
+        if self.encoder is not None:
+            parameters["encoder"] = self.encoder
+        return {"name": "hnsw", "space_type": "cosinesimil", "engine": self.engine,
+                "parameters": parameters}
+
+
+PROFILES: dict[str, IndexProfile] = {p.name: p for p in (
+    IndexProfile("lucene-hnsw", "lucene"),
+    IndexProfile("lucene-sq", "lucene", encoder={"name": "sq"}, min_version=(2, 16)),
+    IndexProfile("faiss-hnsw", "faiss", m=24, ef_construction=256, min_version=(2, 19)),
+    IndexProfile("faiss-fp16", "faiss", m=24, ef_construction=256,
+                 encoder={"name": "sq", "parameters": {"type": "fp16"}}, min_version=(2, 19)),
+)}
+DEFAULT_PROFILE = "lucene-hnsw"
+
+
+def get_index_profile(name: Optional[str] = None) -> IndexProfile:
+    """The named profile, or the configured one; unknown names raise ValueError."""
+    name = name or _gs().opensearch_index_profile or DEFAULT_PROFILE
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown index profile {name!r}; choose from {sorted(PROFILES)}") from None
+
+
+def index_body(mapping: dict[str, Any], profile: IndexProfile) -> dict[str, Any]:
+    """`mapping` with its embedding field built the way `profile` says.
+
+    The profile name is kept in the mapping `_meta`, so a live index reports
+    which profile it was built with.
+    """
+    body = copy.deepcopy(mapping)
+    body["mappings"]["properties"]["embedding"]["method"] = profile.method()
+    body["mappings"]["_meta"] = {"index_profile": profile.name}
+    return body
@@ -0,0 +1,531 @@
+"""In-process `VectorStore`: numpy kNN, a small BM25 inverted index, no cluster.
+
+Meant for development, offline benchmarks and small single-user installs
+(`VECTOR_STORE=local`). Index layouts come from the OpenSearch mappings, so the
+same fields are searchable, filterable and embedded in both stores.
+
+Per index, embeddings live in a memory-mapped float32 matrix
+(`<root>/<index>/vectors.npy`, unit-normalised rows) and documents in an
+append-only `ops.jsonl` that is replayed on open and compacted on close.
+kNN is brute-force cosine until an index passes `IVF_MIN_ROWS`, then an IVF
+coarse quantiser (k-means centroids, `IVF_NPROBE` lists probed) narrows the
+candidate rows; a per-query `ef_search` widens the probe the way it widens the
+HNSW beam in OpenSearch. Filters (see `search_filters`) are resolved to a row
+set before scoring — keyword terms from the inverted index, anything else by
+evaluating the filter on the stored documents — so filtered kNN is exact
+over the matching rows. Scores follow Lucene's conventions — `(1 + cos) / 2`
+for kNN, BM25 with k1=1.2, b=0.75 and best-fields max for text — and hybrid
+search uses the shared RRF fusion, so rankings are comparable with OpenSearch.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+import numpy as np
+
+from core.clients.opensearch import (
+    _ARTIFACT_MAPPING,
+    _CLAIM_MAPPING,
+    _ENTITY_MAPPING,
+    IDX_ARTIFACTS,
+    IDX_CLAIMS,
+    IDX_ENTITIES,
+    OpenSearchClient,
+)
+from core.clients.search_filters import And, Filter, FilterLike, Not, Or, Term, as_filter
+from core.clients.vector_store import HYBRID_TEXT_FIELDS, fuse_rrf
+from core.config import get_logger
+
+logger = get_logger(__name__)
+
+IVF_MIN_ROWS    = 20_000
+IVF_NPROBE      = 8
+IVF_EF_PER_LIST = 16       # a query's ef_search probes ef_search / 16 lists (at least IVF_NPROBE)
+IVF_REBUILD_AT  = 0.25     # rebuild once rows added since the last build exceed this share
+BM25_K1         = 1.2
+BM25_B          = 0.75
+
+_MAPPINGS = {IDX_CLAIMS: _CLAIM_MAPPING, IDX_ARTIFACTS: _ARTIFACT_MAPPING, IDX_ENTITIES: _ENTITY_MAPPING}
+
+# ── Analysis ───────────────────────────────────────────────────────────────────
+
+_WORD = re.compile(r"[a-z0-9]+")
+# Lucene's English stop set, which the `english` analyzer uses.
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for if in into is it no not of on or such that the "
+    "their then there these they this to was will with".split()
+)
+
+
+def _stem(tok: str) -> str:
+    # Light suffix stripping; close enough to Porter for ranking parity on short claims.
+    if len(tok) > 4 and tok.endswith("ies"):
+        return tok[:-3] + "i"
+    if len(tok) > 5 and tok.endswith("ing"):
+        return tok[:-3]
+    if len(tok) > 4 and tok.endswith("ed"):
+        return tok[:-2]
+    if len(tok) > 3 and tok.endswith("s") and not tok.endswith(("ss", "us")):
+        return tok[:-1]
+    return tok
+
+
+def analyze(text: str) -> list[str]:
+    return [_stem(t) for t in _WORD.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def _normalise(vec: Iterable[float]) -> np.ndarray:
+    v = np.asarray(vec, dtype=np.float32)
+    n = float(np.linalg.norm(v))
+    return v / n if n > 0 else v
+
+
+def _as_terms(value: Any) -> list[Any]:
+    return list(value) if isinstance(value, (list, tuple, set)) else [value]
+
+
+# ── IVF ────────────────────────────────────────────────────────────────────────
+
+class _IVF:
+    def __init__(self, vectors: np.ndarray, rows: np.ndarray, seed: int = 0) -> None:
+        nlist = max(1, int(math.sqrt(len(rows))))
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(rows, size=min(len(rows), nlist * 64), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(10):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[assign == c]
+                if len(members):
+                    centroids[c] = _normalise(members.mean(axis=0))
+        self.centroids = centroids
+        assign = np.argmax(vectors[rows] @ centroids.T, axis=1)
+        self.lists = [rows[assign == c] for c in range(nlist)]
+        self.built_rows = len(rows)
+
+    def probe(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        nearest = np.argsort(-(self.centroids @ query))[:nprobe]
+        return np.concatenate([self.lists[c] for c in nearest])
+
+
+# ── Index ──────────────────────────────────────────────────────────────────────
+
+class _LocalIndex:
+    def __init__(self, name: str, mapping: dict[str, Any], root: Optional[Path]) -> None:
+        props = mapping["mappings"]["properties"]
+        self.name = name
+        self.dim = props["embedding"]["dimension"]
+        self.text_fields = [f for f, p in props.items() if p["type"] == "text"]
+        self.keyword_fields = {f for f, p in props.items() if p["type"] in ("keyword", "boolean")}
+        self.keyword_fields |= {f"{f}.keyword" for f, p in props.items() if "keyword" in p.get("fields", {})}
+        self.dir = root / name if root else None
+
+        self.ids: list[Optional[str]] = []
+        self.rows: dict[str, int] = {}
+        self.docs: dict[str, dict[str, Any]] = {}
+        self.free: list[int] = []
+        self.vectors = np.zeros((0, self.dim), dtype=np.float32)
+        self.has_vec = np.zeros(0, dtype=bool)
+        self.postings: dict[str, dict[str, dict[int, int]]] = {f: defaultdict(dict) for f in self.text_fields}
+        self.lengths: dict[str, dict[int, int]] = {f: {} for f in self.text_fields}
+        self.keywords: dict[str, dict[Any, set[int]]] = {f: defaultdict(set) for f in self.keyword_fields}
+        self.ivf: Optional[_IVF] = None
+        self.ivf_pending = 0
+        self._log = None
+        if self.dir:
+            self._open()
+
+    # ── Persistence ────────────────────────────────────────────────────────────
+
+    def _open(self) -> None:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        vec_path, log_path = self.dir / "vectors.npy", self.dir / "ops.jsonl"
+        if vec_path.exists():
+            self.vectors = np.load(vec_path, mmap_mode="r+")
+            self.has_vec = np.zeros(len(self.vectors), dtype=bool)
+        if log_path.exists():
+            with log_path.open() as fh:
+                for line in fh:
+                    op = json.loads(line)
+                    self._remove(op["id"])
+                    if op["op"] == "put":
+                        self._put(op["id"], op["doc"], None, row=op["row"], has_vec=op["vec"])
+        self.free = [r for r, doc_id in enumerate(self.ids) if doc_id is None]
+        self.compact()
+
+    def _append(self, op: dict[str, Any]) -> None:
+        if self._log is not None:
+            self._log.write(json.dumps(op, default=str) + "\n")
+
+    def compact(self) -> None:
+        if not self.dir:
+            return
+        if self._log is not None:
+            self._log.close()
+        tmp = self.dir / "ops.jsonl.tmp"
+        with tmp.open("w") as fh:
+            for doc_id, doc in self.docs.items():
+                row = self.rows[doc_id]
+                fh.write(json.dumps({"op": "put", "id": doc_id, "row": row, "doc": doc,
+                                     "vec": bool(self.has_vec[row])}, default=str) + "\n")
+        os.replace(tmp, self.dir / "ops.jsonl")
+        self._log = (self.dir / "ops.jsonl").open("a")
+
+    def flush(self) -> None:
+        if self._log is not None:
+            self._log.flush()
+        if isinstance(self.vectors, np.memmap):
+            self.vectors.flush()
+
+    def close(self) -> None:
+        self.compact()
+        self.flush()
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def _grow(self, need: int) -> None:
+        cap = len(self.vectors)
+        if need <= cap:
+            return
+        new_cap = max(64, cap * 2, need)
+        if self.dir:
+            tmp = self.dir / "vectors.tmp.npy"
+            grown = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32, shape=(new_cap, self.dim))
+            grown[:cap] = self.vectors
+            grown.flush()
+            del grown
+            os.replace(tmp, self.dir / "vectors.npy")
+            self.vectors = np.load(self.dir / "vectors.npy", mmap_mode="r+")
+        else:
+            grown = np.zeros((new_cap, self.dim), dtype=np.float32)
+            grown[:cap] = self.vectors
+            self.vectors = grown
+        has_vec = np.zeros(new_cap, dtype=bool)
+        has_vec[: len(self.has_vec)] = self.has_vec
+        self.has_vec = has_vec
+
+    # ── Writes ─────────────────────────────────────────────────────────────────
+
+    def put(self, doc_id: str, body: dict[str, Any]) -> None:
+        doc = {k: v for k, v in body.items() if k != "embedding"}
+        emb = body.get("embedding")
+        self._remove(doc_id)
+        row = self._put(doc_id, doc, emb)
+        self._append({"op": "put", "id": doc_id, "row": row, "doc": doc, "vec": bool(self.has_vec[row])})
+
+    def _put(self, doc_id: str, doc: dict[str, Any], emb: Optional[list[float]],
+             row: Optional[int] = None, has_vec: Optional[bool] = None) -> int:
+        if row is None:
+            row = self.free.pop() if self.free else len(self.ids)
+        while len(self.ids) <= row:
+            self.ids.append(None)
+        self._grow(row + 1)
+        self.ids[row] = doc_id
+        self.rows[doc_id] = row
+        self.docs[doc_id] = doc
+        if emb:
+            self.vectors[row] = _normalise(emb)
+            self.has_vec[row] = True
+        elif has_vec is not None:
+            self.has_vec[row] = has_vec
+        else:
+            self.has_vec[row] = False
+        self._index_terms(row, doc)
+        self.ivf_pending += 1
+        return row
+
+    def update(self, doc_id: str, fields: dict[str, Any]) -> bool:
+        if doc_id not in self.docs:
+            return False
+        row = self.rows[doc_id]
+        doc = {**self.docs[doc_id], **{k: v for k, v in fields.items() if k != "embedding"}}
+        self._unindex_terms(row, self.docs[doc_id])
+        self.docs[doc_id] = doc
+        self._index_terms(row, doc)
+        if fields.get("embedding"):
+            self.vectors[row] = _normalise(fields["embedding"])
+            self.has_vec[row] = True
+        self._append({"op": "put", "id": doc_id, "row": row, "doc": doc, "vec": bool(self.has_vec[row])})
+        return True
+
+    def delete(self, doc_id: str) -> None:
+        if self._remove(doc_id):
+            self._append({"op": "del", "id": doc_id})
+
+    def _remove(self, doc_id: str) -> bool:
+        row = self.rows.pop(doc_id, None)
+        if row is None:
+            return False
+        self._unindex_terms(row, self.docs.pop(doc_id))
+        self.ids[row] = None
+        self.has_vec[row] = False
+        self.free.append(row)
+        return True
+
+    def _index_terms(self, row: int, doc: dict[str, Any]) -> None:
+        for f in self.text_fields:
+            if doc.get(f):
+                terms = analyze(str(doc[f]))
+                self.lengths[f][row] = len(terms)
+                for t in terms:
+                    self.postings[f][t][row] = self.postings[f][t].get(row, 0) + 1
+        for f in self.keyword_fields:
+            value = doc.get(f[: -len(".keyword")]) if f.endswith(".keyword") else doc.get(f)
+            if value is not None:
+                for v in _as_terms(value):
+                    self.keywords[f][v].add(row)
+
+    def _unindex_terms(self, row: int, doc: dict[str, Any]) -> None:
+        for f in self.text_fields:
+            if self.lengths[f].pop(row, None) is not None:
+                for t in set(analyze(str(doc[f]))):
+                    self.postings[f][t].pop(row, None)
+        for f in self.keyword_fields:
+            value = doc.get(f[: -len(".keyword")]) if f.endswith(".keyword") else doc.get(f)
+            if value is not None:
+                for v in _as_terms(value):
+                    self.keywords[f][v].discard(row)
+
+    # ── Reads ──────────────────────────────────────────────────────────────────
+
+    def allowed(self, filters: FilterLike) -> Optional[set[int]]:
+        """Rows matching the filter, or None for "no filter"."""
+        f = as_filter(filters)
+        return None if f is None else self._rows_for(f, None)
+
+    def _rows_for(self, f: Filter, within: Optional[set[int]]) -> set[int]:
+        if isinstance(f, Term) and f.field in self.keywords:
+            postings = self.keywords[f.field]
+            rows = set().union(*(postings.get(v, ()) for v in _as_terms(f.value)))
+            return rows if within is None else rows & within
+        if isinstance(f, And):
+            # Indexed terms first so scanned children only see their survivors.
+            children = sorted(f.children, key=lambda c: not (isinstance(c, Term) and c.field in self.keywords))
+            rows = within
+            for c in children:
+                rows = self._rows_for(c, rows)
+                if not rows:
+                    return set()
+            return rows
+        if isinstance(f, Or):
+            out: set[int] = set()
+            for c in f.children:
+                out |= self._rows_for(c, within)
+            return out
+        base = within if within is not None else set(self.rows.values())
+        if isinstance(f, Not):
+            return base - self._rows_for(f.child, base)
+        return {r for r in base if f.matches(self.docs[self.ids[r]])}
+
+    def source(self, row: int, fields: Optional[list[str]] = None,
+               with_embedding: bool = False) -> dict[str, Any]:
+        doc = self.docs[self.ids[row]]
+        if fields is not None:
+            out = {k: doc[k] for k in fields if k in doc}
+            with_embedding = "embedding" in fields
+        else:
+            out = dict(doc)
+        if with_embedding and self.has_vec[row]:
+            out["embedding"] = self.vectors[row].tolist()
+        return out
+
+    def knn(self, query: list[float], k: int, filters: FilterLike,
+            ivf_min_rows: int, nprobe: int) -> list[tuple[int, float]]:
+        q = _normalise(query)
+        n = len(self.ids)
+        allowed = self.allowed(filters)
+        if allowed is not None:
+            rows = np.fromiter(allowed, dtype=np.int64, count=len(allowed))
+            rows = rows[self.has_vec[rows]]
+        else:
+            live = np.flatnonzero(self.has_vec[:n])
+            rows = live
+            if len(live) >= ivf_min_rows:
+                if self.ivf is None or self.ivf_pending > IVF_REBUILD_AT * self.ivf.built_rows:
+                    self.ivf = _IVF(self.vectors, live)
+                    self.ivf_pending = 0
+                probed = self.ivf.probe(q, nprobe)
+                rows = probed[self.has_vec[probed]]
+        if len(rows) == 0:
+            return []
+        sims = self.vectors[rows] @ q
+        k = min(k, len(rows))
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top], kind="stable")]
+        return [(int(rows[i]), float((1.0 + sims[i]) / 2.0)) for i in top]
+
+    def bm25(self, query: str, fields: list[str], size: int,
+             filters: FilterLike) -> list[tuple[int, float]]:
+        terms = analyze(query)
+        allowed = self.allowed(filters)
+        best: dict[int, float] = {}
+        for spec in fields:
+            field, _, boost = spec.partition("^")
+            if field not in self.postings:
+                continue
+            boost_f = float(boost) if boost else 1.0
+            lengths = self.lengths[field]
+            n_docs = len(lengths)
+            if not n_docs:
+                continue
+            avgdl = sum(lengths.values()) / n_docs
+            scores: dict[int, float] = defaultdict(float)
+            for t in terms:
+                post = self.postings[field].get(t)
+                if not post:
+                    continue
+                idf = math.log(1 + (n_docs - len(post) + 0.5) / (len(post) + 0.5))
+                for row, tf in post.items():
+                    if allowed is not None and row not in allowed:
+                        continue
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[row] / avgdl)
+                    scores[row] += idf * tf / (tf + norm)
+            for row, s in scores.items():
+                s *= boost_f
+                if s > best.get(row, 0.0):
+                    best[row] = s
+        return sorted(best.items(), key=lambda x: (-x[1], x[0]))[:size]
+
+
+# ── Store ──────────────────────────────────────────────────────────────────────
+
+class LocalVectorStore:
+    """`VectorStore` backed by numpy; `path=None` keeps everything in memory."""
+
+    def __init__(self, path: Optional[str] = None, ivf_min_rows: int = IVF_MIN_ROWS,
+                 nprobe: int = IVF_NPROBE) -> None:
+        self._root = Path(path) if path else None
+        self.ivf_min_rows = ivf_min_rows
+        self.nprobe = nprobe
+        self._indices: dict[str, _LocalIndex] = {}
+        self._lock = threading.RLock()
+        self._open = False
+
+    @property
+    def connected(self) -> bool:
+        return self._open
+
+    def connect(self) -> None:
+        self._open = True
+
+    def close(self) -> None:
+        with self._lock:
+            for idx in self._indices.values():
+                idx.close()
+            self._indices.clear()
+            self._open = False
+
+    def ensure_indices(self) -> None:
+        for name in _MAPPINGS:
+            self._index(name)
+
+    def _index(self, name: str) -> _LocalIndex:
+        idx = self._indices.get(name)
+        if idx is None:
+            with self._lock:
+                idx = self._indices.get(name)
+                if idx is None:
+                    idx = self._indices[name] = _LocalIndex(name, _MAPPINGS[name], self._root)
+        return idx
+
+    # ── Documents ──────────────────────────────────────────────────────────────
+
+    def index_artifact(self, artifact_id: str, source_id: str, artifact_type: str,
+                       text: str, embedding: list[float], created_at: str = "") -> str:
+        doc = OpenSearchClient.artifact_document(artifact_id, source_id, artifact_type, text, embedding, created_at)
+        self.bulk_write([(IDX_ARTIFACTS, artifact_id, doc)])
+        return artifact_id
+
+    def bulk_index(self, index: str, docs: list[tuple[str, dict[str, Any]]],
+                   refresh: bool = True, chunk_size: int = 0) -> int:
+        return self.bulk_write([(index, doc_id, body) for doc_id, body in docs], refresh=refresh)
+
+    def bulk_write(self, ops: list[tuple[str, str, dict[str, Any]]],
+                   refresh: bool = True, chunk_size: int = 0) -> int:
+        with self._lock:
+            for index, doc_id, body in ops:
+                self._index(index).put(doc_id, body)
+            self._flush({op[0] for op in ops}, refresh)
+        return len(ops)
+
+    def bulk_actions(self, actions: list[dict[str, Any]], refresh: bool = True,
+                     chunk_size: int = 0) -> set[str]:
+        failed: set[str] = set()
+        with self._lock:
+            for a in actions:
+                idx = self._index(a["_index"])
+                op = a["_op_type"]
+                if op == "index":
+                    idx.put(a["_id"], a["_source"])
+                elif op == "update":
+                    if not idx.update(a["_id"], a["doc"]):
+                        failed.add(str(a["_id"]))
+                elif op == "delete":
+                    idx.delete(a["_id"])
+            self._flush({a["_index"] for a in actions}, refresh)
+        return failed
+
+    def delete_document(self, index: str, doc_id: str) -> None:
+        with self._lock:
+            self._index(index).delete(doc_id)
+
+    def update_document(self, index: str, doc_id: str, fields: dict[str, Any]) -> None:
+        with self._lock:
+            if not self._index(index).update(doc_id, fields):
+                raise KeyError(f"{index}/{doc_id} not found")
+
+    def _flush(self, indices: set[str], refresh: bool) -> None:
+        if refresh:
+            for name in indices:
+                self._index(name).flush()
+
+    # ── Reads ──────────────────────────────────────────────────────────────────
+
+    def get_document(self, index: str, doc_id: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            idx = self._index(index)
+            row = idx.rows.get(doc_id)
+            return None if row is None else idx.source(row, with_embedding=True)
+
+    def list_documents(self, index: str, size: int, filters: FilterLike = None,
+                       sort_desc: str | None = None,
+                       fields: list[str] | None = None) -> list[dict[str, Any]]:
+        with self._lock:
+            idx = self._index(index)
+            allowed = idx.allowed(filters)
+            rows = sorted(idx.rows.values()) if allowed is None else sorted(allowed)
+            if sort_desc:
+                rows.sort(key=lambda r: (idx.docs[idx.ids[r]].get(sort_desc) is not None,
+                                         str(idx.docs[idx.ids[r]].get(sort_desc) or "")), reverse=True)
+            return [{**idx.source(r, fields), "_id": idx.ids[r]} for r in rows[:size]]
+
+    def knn_search(self, index: str, embedding: list[float], k: int = 10,
+                   filters: FilterLike = None, ef_search: Optional[int] = None) -> list[dict[str, Any]]:
+        nprobe = max(self.nprobe, (ef_search or 0) // IVF_EF_PER_LIST)
+        with self._lock:
+            idx = self._index(index)
+            hits = idx.knn(embedding, k, filters, self.ivf_min_rows, nprobe)
+            return [{**idx.source(r), "_score": s, "_id": idx.ids[r]} for r, s in hits]
+
+    def text_search(self, index: str, query: str, fields: list[str],
+                    size: int = 10, filters: FilterLike = None) -> list[dict[str, Any]]:
+        with self._lock:
+            idx = self._index(index)
+            hits = idx.bm25(query, fields, size, filters)
+            return [{**idx.source(r), "_score": s, "_id": idx.ids[r]} for r, s in hits]
+
+    def hybrid_search(self, index: str, query_text: str, embedding: list[float],
+                      k: int = 10, filters: FilterLike = None,
+                      ef_search: Optional[int] = None) -> list[dict[str, Any]]:
+        vector_hits = self.knn_search(index, embedding, k=k * 2, filters=filters, ef_search=ef_search)
+        text_hits   = self.text_search(index, query_text, fields=HYBRID_TEXT_FIELDS,
+                                       size=k * 2, filters=filters)
+        return fuse_rrf(vector_hits, text_hits, k)
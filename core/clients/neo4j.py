@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import re
 from contextlib import asynccontextmanager
 from typing import Any, AsyncGenerator, Optional
 
@@ -12,6 +13,44 @@ from neo4j import (
 
 from core.config import get_settings as _gs
 
+CLAIM_BATCH_SIZE = 500
+SCHEMA_COMPONENT = "memory"
+SCHEMA_INDEX_WAIT_S = 300      # how long a schema step waits for its indexes to come online
+ENTITY_NAME_INDEX = "entity_names"
+
+# Versioned schema steps, applied in order by create_constraints(). Each
+# statement is IF NOT EXISTS, so a step interrupted halfway is safe to re-run.
+# The unique constraints on entity_id and claim_id already come with range
+# indexes, so those need no separate index.
+_SCHEMA_STEPS: list[tuple[int, list[str]]] = [
+    (1, [
+        "CREATE CONSTRAINT entity_id IF NOT EXISTS FOR (e:Entity) REQUIRE e.entity_id IS UNIQUE",
+        "CREATE CONSTRAINT claim_id  IF NOT EXISTS FOR (c:Claim)  REQUIRE c.claim_id  IS UNIQUE",
+        "CREATE INDEX entity_name    IF NOT EXISTS FOR (e:Entity) ON (e.canonical_name)",
+        "CREATE INDEX entity_type    IF NOT EXISTS FOR (e:Entity) ON (e.entity_type)",
+    ]),
+    (2, [
+        "CREATE RANGE INDEX source_id IF NOT EXISTS FOR (s:Source) ON (s.source_id)",
+        f"CREATE FULLTEXT INDEX {ENTITY_NAME_INDEX} IF NOT EXISTS "
+        "FOR (e:Entity) ON EACH [e.canonical_name, e.aliases] "
+        "OPTIONS {indexConfig: {`fulltext.analyzer`: 'standard-no-stop-words'}}",
+    ]),
+]
+SCHEMA_VERSION = _SCHEMA_STEPS[-1][0]
+
+_NAME_TOKEN = re.compile(r"\w+")
+
+
+def entity_name_query(name: str) -> str:
+    """Lucene query for an entity mention: exact phrase, then all words, then
+    all word prefixes, in decreasing boost. Empty when `name` has no words."""
+    tokens = _NAME_TOKEN.findall(name.lower())
+    if not tokens:
+        return ""
+    phrase = " ".join(tokens)
+    return (f'"{phrase}"^4 OR ({" AND ".join(tokens)})^2 '
+            f'OR ({" AND ".join(t + "*" for t in tokens)})')
+
 
 class Neo4jClient:
     def __init__(self) -> None:
@@ -44,16 +83,36 @@ class Neo4jClient:
 
     # ── Schema constraints ─────────────────────────────────────────────────────
 
-    async def create_constraints(self) -> None:
-        constraints = [
-            "CREATE CONSTRAINT entity_id IF NOT EXISTS FOR (e:Entity) REQUIRE e.entity_id IS UNIQUE",
-            "CREATE CONSTRAINT claim_id  IF NOT EXISTS FOR (c:Claim)  REQUIRE c.claim_id  IS UNIQUE",
-            "CREATE INDEX entity_name    IF NOT EXISTS FOR (e:Entity) ON (e.canonical_name)",
-            "CREATE INDEX entity_type    IF NOT EXISTS FOR (e:Entity) ON (e.entity_type)",
-        ]
+    async def create_constraints(self) -> int:
+        """Bring the schema up to SCHEMA_VERSION; returns the version reached.
+
+        The applied version is kept on a (:SchemaVersion) node, so restarts
+        skip steps that are already done. A step is recorded only once its
+        indexes are online; if they are still populating after
+        SCHEMA_INDEX_WAIT_S, db.awaitIndexes raises and the next start
+        runs the step again.
+        """
         async with self.session() as s:
-            for cypher in constraints:
-                await s.run(cypher)
+            result = await s.run(
+                "MATCH (v:SchemaVersion {component: $c}) RETURN v.version AS version",
+                c=SCHEMA_COMPONENT,
+            )
+            record = await result.single()
+            current = record["version"] if record else 0
+            for version, statements in _SCHEMA_STEPS:
+                if version <= current:
+                    continue
+                for cypher in statements:
+                    await s.run(cypher)
+                wait = await s.run("CALL db.awaitIndexes($timeout)", timeout=SCHEMA_INDEX_WAIT_S)
+                await wait.consume()
+                await s.run(
+                    "MERGE (v:SchemaVersion {component: $c}) "
+                    "SET v.version = $version, v.updated_at = datetime()",
+                    c=SCHEMA_COMPONENT, version=version,
+                )
+                current = version
+        return current
 
     # ── Entity CRUD ────────────────────────────────────────────────────────────
 
@@ -87,6 +146,24 @@ class Neo4jClient:
             record = await result.single()
             return record["node_id"]
 
+    async def upsert_entities_batch(self, rows: list[dict[str, Any]]) -> None:
+        """UNWIND variant of upsert_entity; rows carry entity_id, entity_type,
+        canonical_name, description and aliases."""
+        if not rows:
+            return
+        cypher = """
+        UNWIND $rows AS r
+        MERGE (e:Entity {entity_id: r.entity_id})
+        ON CREATE SET e.created_at = datetime()
+        SET e.entity_type    = r.entity_type,
+            e.canonical_name = r.canonical_name,
+            e.description    = r.description,
+            e.aliases        = r.aliases,
+            e.updated_at     = datetime()
+        """
+        async with self.session() as s:
+            await s.run(cypher, rows=rows)
+
     async def get_entity(self, entity_id: str) -> Optional[dict[str, Any]]:
         cypher = "MATCH (e:Entity {entity_id: $entity_id}) RETURN e"
         async with self.session() as s:
@@ -99,6 +176,11 @@ class Neo4jClient:
         async with self.session() as s:
             await s.run(cypher, entity_id=entity_id)
 
+    async def delete_entities_batch(self, entity_ids: list[str]) -> None:
+        cypher = "UNWIND $ids AS eid MATCH (e:Entity {entity_id: eid}) DETACH DELETE e"
+        async with self.session() as s:
+            await s.run(cypher, ids=entity_ids)
+
     # ── Claim nodes ────────────────────────────────────────────────────────────
 
     async def upsert_claim_node(
@@ -136,6 +218,42 @@ class Neo4jClient:
         async with self.session() as s:
             await s.run(cypher, claim_id=claim_id)
 
+    async def delete_claims_batch(self, claim_ids: list[str]) -> None:
+        cypher = "UNWIND $ids AS cid MATCH (c:Claim {claim_id: cid}) DETACH DELETE c"
+        async with self.session() as s:
+            await s.run(cypher, ids=claim_ids)
+
+    async def upsert_claims_batch(self, rows: list[dict[str, Any]],
+                                  batch_size: int = CLAIM_BATCH_SIZE) -> None:
+        """Upsert claim nodes with their SUBJECT/OBJECT/SUPPORTED_BY edges via UNWIND.
+
+        Each row: claim_id, claim_text, predicate, segment, confidence and
+        optional subject_id, object_id, source_id.
+        """
+        cypher = """
+        UNWIND $rows AS r
+        MERGE (c:Claim {claim_id: r.claim_id})
+        ON CREATE SET c.created_at = datetime()
+        SET c.claim_text  = r.claim_text,
+            c.predicate   = r.predicate,
+            c.segment     = r.segment,
+            c.confidence  = r.confidence,
+            c.updated_at  = datetime()
+        WITH c, r
+        OPTIONAL MATCH (se:Entity {entity_id: r.subject_id})
+        FOREACH (_ IN CASE WHEN se IS NULL THEN [] ELSE [1] END | MERGE (c)-[:SUBJECT]->(se))
+        WITH c, r
+        OPTIONAL MATCH (oe:Entity {entity_id: r.object_id})
+        FOREACH (_ IN CASE WHEN oe IS NULL THEN [] ELSE [1] END | MERGE (c)-[:OBJECT]->(oe))
+        WITH c, r
+        FOREACH (_ IN CASE WHEN r.source_id IS NULL THEN [] ELSE [1] END |
+            MERGE (s:Source {source_id: r.source_id})
+            MERGE (c)-[:SUPPORTED_BY]->(s))
+        """
+        async with self.session() as s:
+            for i in range(0, len(rows), batch_size):
+                await s.run(cypher, rows=rows[i:i + batch_size])
+
     # ── Relationships ──────────────────────────────────────────────────────────
 
     async def create_entity_relation(
@@ -167,6 +285,11 @@ class Neo4jClient:
         async with self.session() as s:
             await s.run(cypher, claim_id=claim_id, entity_id=entity_id)
 
+    async def delete_sources_batch(self, source_ids: list[str]) -> None:
+        cypher = "UNWIND $ids AS sid MATCH (s:Source {source_id: sid}) DETACH DELETE s"
+        async with self.session() as s:
+            await s.run(cypher, ids=source_ids)
+
     async def link_claim_to_source(self, claim_id: str, source_id: str) -> None:
         cypher = """
         MERGE (s:Source {source_id: $source_id})
@@ -177,6 +300,17 @@ class Neo4jClient:
         async with self.session() as s:
             await s.run(cypher, claim_id=claim_id, source_id=source_id)
 
+    async def link_claims_to_source(self, claim_ids: list[str], source_id: str) -> None:
+        cypher = """
+        MERGE (s:Source {source_id: $source_id})
+        WITH s
+        UNWIND $claim_ids AS cid
+        MATCH (c:Claim {claim_id: cid})
+        MERGE (c)-[:SUPPORTED_BY]->(s)
+        """
+        async with self.session() as s:
+            await s.run(cypher, claim_ids=claim_ids, source_id=source_id)
+
     async def create_claim_relation(
         self, from_claim_id: str, to_claim_id: str, rel_type: str
     ) -> None:
@@ -255,20 +389,53 @@ class Neo4jClient:
                 claims.append(dict(record))
         return claims
 
-    async def find_entity_by_name(self, name: str) -> list[dict[str, Any]]:
-        cypher = """
-        MATCH (e:Entity)
-        WHERE e.canonical_name =~ $pattern OR $name IN e.aliases
-        RETURN e.entity_id AS entity_id, e.canonical_name AS name,
-               e.entity_type AS type, e.description AS description
-        LIMIT 10
+    async def find_entity_by_name(self, name: str, limit: int = 10) -> list[dict[str, Any]]:
+        """Entities whose name or aliases match `name`, best full-text score first."""
+        return (await self.find_entities_by_names([name], limit)).get(name, [])
+
+    async def find_entities_by_names(self, names: list[str],
+                                     limit: int = 10) -> dict[str, list[dict[str, Any]]]:
+        """Batched `find_entity_by_name`: one round trip for every mention."""
+        queries = [{"name": n, "query": q} for n in dict.fromkeys(names) if (q := entity_name_query(n))]
+        if not queries:
+            return {}
+        cypher = f"""
+        UNWIND $queries AS q
+        CALL db.index.fulltext.queryNodes('{ENTITY_NAME_INDEX}', q.query, {{limit: $limit}})
+        YIELD node, score
+        RETURN q.name AS query_name, node.entity_id AS entity_id, node.canonical_name AS name,
+               node.entity_type AS type, node.description AS description, score
+        ORDER BY query_name, score DESC
         """
-        results = []
+        out: dict[str, list[dict[str, Any]]] = {}
         async with self.session() as s:
-            result = await s.run(cypher, pattern=f"(?i).*{name}.*", name=name)
+            result = await s.run(cypher, queries=queries, limit=limit)
             async for record in result:
-                results.append(dict(record))
-        return results
+                row = dict(record)
+                out.setdefault(row.pop("query_name"), []).append(row)
+        return out
+
+    async def entity_graph_edges(self) -> list[tuple[str, str, float]]:
+        """The weighted entity graph in one round trip, each pair once (a < b).
+
+        Weight is the number of direct entity relations plus the number of
+        claims linking both entities as subject/object.
+        """
+        cypher = """
+        CALL {
+            MATCH (a:Entity)-[r]-(b:Entity)
+            WHERE a.entity_id < b.entity_id
+            RETURN a.entity_id AS a, b.entity_id AS b, count(r) AS w
+          UNION ALL
+            MATCH (a:Entity)<-[:SUBJECT|OBJECT]-(c:Claim)-[:SUBJECT|OBJECT]->(b:Entity)
+            WHERE a.entity_id < b.entity_id
+            RETURN a.entity_id AS a, b.entity_id AS b, count(DISTINCT c) AS w
+        }
+        RETURN a, b, sum(w) AS weight
+        """
+        async with self.session() as s:
+            result = await s.run(cypher)
+            return [(r["a"], r["b"], float(r["weight"])) async for r in result]
 
     async def run_cypher(
         self, cypher: str, params: dict[str, Any] | None = None
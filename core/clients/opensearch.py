@@ -1,9 +1,18 @@
 from __future__ import annotations
+
+import time
+import uuid
+from datetime import datetime, timezone
 from typing import Any, Optional
 
-from opensearchpy import OpenSearch, RequestsHttpConnection
+from opensearchpy import NotFoundError, OpenSearch, RequestsHttpConnection, TransportError, helpers
+
+from core.clients.index_profiles import DEFAULT_PROFILE, IndexProfile, get_index_profile, index_body
+from core.clients.search_filters import FilterLike, filter_clauses
+from core.clients.vector_store import HYBRID_TEXT_FIELDS, RRF_K, fuse_rrf
+from core.config import get_logger, get_settings as _gs
 
-from core.config import get_settings as _gs
+logger = get_logger(__name__)
 
 EMBEDDING_DIM = 768  # Gemini embeddings pinned for index compatibility
 
@@ -12,6 +21,28 @@ IDX_CLAIMS    = "memory_claims"
 IDX_ARTIFACTS = "memory_artifacts"
 IDX_ENTITIES  = "memory_entities"
 
+BULK_CHUNK_SIZE = 500
+
+# The names above are aliases onto versioned physical indices, so a reindex
+# can swap the index behind one atomically. While a reindex copies into a new
+# index, `<alias>.next` points at it and every write is mirrored there too;
+# writers re-read the mirror aliases at most every MIRROR_REFRESH_S.
+NEXT_ALIAS_SUFFIX = ".next"
+MIRROR_REFRESH_S  = 5.0
+REINDEX_POLL_S    = 5.0
+
+# Search pipelines for the single-request `hybrid` query, newest first: the
+# RRF score ranker (2.19+) keeps scores on the same scale as fuse_rrf; the
+# normalization processor (2.10+) yields a [0, 1] blend instead.
+HYBRID_PIPELINE = "memory-hybrid"
+_HYBRID_PIPELINES: list[tuple[str, dict[str, Any]]] = [
+    ("rrf", {"phase_results_processors": [{"score-ranker-processor": {
+        "combination": {"technique": "rrf", "rank_constant": RRF_K}}}]}),
+    ("normalization", {"phase_results_processors": [{"normalization-processor": {
+        "normalization": {"technique": "min_max"},
+        "combination": {"technique": "arithmetic_mean", "parameters": {"weights": [0.5, 0.5]}}}}]}),
+]
+
 _CLAIM_MAPPING = {
     "settings": {"index": {"knn": True}},
     "mappings": {
@@ -90,9 +121,29 @@ _ENTITY_MAPPING = {
 }
 
 
+_MAPPINGS = {IDX_CLAIMS: _CLAIM_MAPPING, IDX_ARTIFACTS: _ARTIFACT_MAPPING, IDX_ENTITIES: _ENTITY_MAPPING}
+
+
+def physical_index_name(alias: str) -> str:
+    return f"{alias}-{datetime.now(timezone.utc):%Y%m%d%H%M%S}-{uuid.uuid4().hex[:6]}"
+
+
+def _hits(response: dict[str, Any]) -> list[dict[str, Any]]:
+    return [
+        {**hit["_source"], "_score": hit["_score"], "_id": hit["_id"]}
+        for hit in response["hits"]["hits"]
+    ]
+
+
 class OpenSearchClient:
     def __init__(self) -> None:
         self._client: Optional[OpenSearch] = None
+        # "rrf" | "normalization" (server-side pipeline) | "msearch"; None = not probed yet
+        self._hybrid_mode: Optional[str] = None
+        self._version: tuple[int, int] = (0, 0)
+        self._ef_search_ok = False          # knn method_parameters need 2.16+
+        self._mirrors: dict[str, str] = {}  # alias -> index being reindexed into
+        self._mirrors_checked = float("-inf")
 
     def connect(self) -> None:
         self._client = OpenSearch(
@@ -108,6 +159,10 @@ class OpenSearchClient:
             self._client.close()
             self._client = None
 
+    @property
+    def connected(self) -> bool:
+        return self._client is not None
+
     @property
     def client(self) -> OpenSearch:
         if not self._client:
@@ -117,23 +172,58 @@ class OpenSearchClient:
     # ── Index management ───────────────────────────────────────────────────────
 
     def ensure_indices(self) -> None:
-        for idx, mapping in [
-            (IDX_CLAIMS, _CLAIM_MAPPING),
-            (IDX_ARTIFACTS, _ARTIFACT_MAPPING),
-            (IDX_ENTITIES, _ENTITY_MAPPING),
-        ]:
-            if not self.client.indices.exists(index=idx):
-                self.client.indices.create(index=idx, body=mapping)
+        """Create any missing index, behind its alias, with the configured profile."""
+        self._probe_version()
+        profile = get_index_profile()
+        if self._version < profile.min_version:
+            logger.warning("Index profile %s needs OpenSearch %d.%d+; new indices use %s",
+                           profile.name, *profile.min_version, DEFAULT_PROFILE)
+            profile = get_index_profile(DEFAULT_PROFILE)
+        for alias, mapping in _MAPPINGS.items():
+            if not self.client.indices.exists(index=alias):
+                body = index_body(mapping, profile)
+                body["aliases"] = {alias: {}}
+                self.client.indices.create(index=physical_index_name(alias), body=body)
+        self.ensure_search_pipeline()
+
+    def _probe_version(self) -> None:
+        try:
+            number = self.client.info()["version"]["number"]
+            self._version = tuple(int(p) for p in number.split(".")[:2])
+            self._ef_search_ok = self._version >= (2, 16)
+        except Exception as exc:
+            logger.debug("OpenSearch version probe failed: %s", exc)
+
+    def ensure_search_pipeline(self) -> str:
+        """Install the best hybrid pipeline this cluster supports; returns the mode."""
+        if self._version == (0, 0):
+            self._probe_version()
+        if _gs().opensearch_hybrid == "msearch":
+            self._hybrid_mode = "msearch"
+            return self._hybrid_mode
+        for mode, body in _HYBRID_PIPELINES:
+            try:
+                self.client.transport.perform_request(
+                    "PUT", f"/_search/pipeline/{HYBRID_PIPELINE}", body=body)
+                self._hybrid_mode = mode
+                break
+            except Exception as exc:
+                logger.debug("Search pipeline %s unavailable: %s", mode, exc)
+        else:
+            self._hybrid_mode = "msearch"
+        logger.info("Hybrid search mode: %s", self._hybrid_mode)
+        return self._hybrid_mode
 
     # ── Documents ──────────────────────────────────────────────────────────────
 
-    def index_claim(self, claim_id: str, claim_text: str, embedding: list[float],
-                    segment: str, memory_class: str, tier: str, status: str,
-                    confidence: float, base_importance: float, trust_score: float,
-                    predicate: str = "", user_confirmed: bool = False,
-                    created_at: str = "", last_accessed_at: str = "",
-                    valid_from: str | None = None, valid_to: str | None = None) -> str:
-        doc = {
+    @staticmethod
+    def claim_document(claim_id: str, claim_text: str, embedding: list[float],
+                       segment: str, memory_class: str, tier: str, status: str,
+                       confidence: float, base_importance: float, trust_score: float,
+                       predicate: str = "", user_confirmed: bool = False,
+                       created_at: str = "", last_accessed_at: str = "",
+                       valid_from: str | None = None, valid_to: str | None = None) -> dict[str, Any]:
+        return {
             "claim_id": claim_id, "claim_text": claim_text, "embedding": embedding,
             "segment": segment, "memory_class": memory_class, "tier": tier,
             "status": status, "confidence": confidence, "base_importance": base_importance,
@@ -142,114 +232,418 @@ class OpenSearchClient:
             "last_accessed_at": last_accessed_at or None,
             "valid_from": valid_from, "valid_to": valid_to,
         }
+
+    @staticmethod
+    def artifact_document(artifact_id: str, source_id: str, artifact_type: str,
+                          text: str, embedding: list[float], created_at: str = "") -> dict[str, Any]:
+        return {
+            "artifact_id": artifact_id, "source_id": source_id,
+            "artifact_type": artifact_type, "text": text,
+            "embedding": embedding, "created_at": created_at or None,
+        }
+
+    def index_claim(self, claim_id: str, claim_text: str, embedding: list[float],
+                    segment: str, memory_class: str, tier: str, status: str,
+                    confidence: float, base_importance: float, trust_score: float,
+                    predicate: str = "", user_confirmed: bool = False,
+                    created_at: str = "", last_accessed_at: str = "",
+                    valid_from: str | None = None, valid_to: str | None = None) -> str:
+        doc = self.claim_document(
+            claim_id, claim_text, embedding, segment, memory_class, tier, status,
+            confidence, base_importance, trust_score, predicate=predicate,
+            user_confirmed=user_confirmed, created_at=created_at,
+            last_accessed_at=last_accessed_at, valid_from=valid_from, valid_to=valid_to,
+        )
         doc_id = claim_id
+        mirrors = self._mirror_targets()
         self.client.index(index=IDX_CLAIMS, id=doc_id, body=doc, refresh=True)
+        self._mirror(mirrors, [{"_op_type": "index", "_index": IDX_CLAIMS, "_id": doc_id, "_source": doc}])
         return doc_id
 
     def index_artifact(self, artifact_id: str, source_id: str, artifact_type: str,
                        text: str, embedding: list[float], created_at: str = "") -> str:
-        doc = {
-            "artifact_id": artifact_id, "source_id": source_id,
-            "artifact_type": artifact_type, "text": text,
-            "embedding": embedding, "created_at": created_at or None,
-        }
+        doc = self.artifact_document(artifact_id, source_id, artifact_type, text, embedding, created_at)
+        mirrors = self._mirror_targets()
         self.client.index(index=IDX_ARTIFACTS, id=artifact_id, body=doc, refresh=True)
+        self._mirror(mirrors, [{"_op_type": "index", "_index": IDX_ARTIFACTS, "_id": artifact_id, "_source": doc}])
         return artifact_id
 
-    def index_entity(self, entity_id: str, entity_type: str, canonical_name: str,
-                     description: str, aliases: list[str], embedding: list[float]) -> str:
-        doc = {
+    @staticmethod
+    def entity_document(entity_id: str, entity_type: str, canonical_name: str,
+                        description: str, aliases: list[str], embedding: list[float]) -> dict[str, Any]:
+        return {
             "entity_id": entity_id, "entity_type": entity_type,
             "canonical_name": canonical_name, "description": description,
             "aliases": aliases, "embedding": embedding,
         }
+
+    def bulk_index(self, index: str, docs: list[tuple[str, dict[str, Any]]],
+                   refresh: bool = True, chunk_size: int = BULK_CHUNK_SIZE) -> int:
+        """Index (doc_id, body) pairs with the _bulk API; refreshes once at the end."""
+        return self.bulk_write([(index, doc_id, body) for doc_id, body in docs],
+                               refresh=refresh, chunk_size=chunk_size)
+
+    def bulk_write(self, ops: list[tuple[str, str, dict[str, Any]]],
+                   refresh: bool = True, chunk_size: int = BULK_CHUNK_SIZE) -> int:
+        """Index (index, doc_id, body) triples, possibly across indices, in one _bulk call."""
+        if not ops:
+            return 0
+        actions = [
+            {"_op_type": "index", "_index": index, "_id": doc_id, "_source": body}
+            for index, doc_id, body in ops
+        ]
+        mirrors = self._mirror_targets()
+        indexed, errors = helpers.bulk(
+            self.client, actions, chunk_size=chunk_size, raise_on_error=False,
+        )
+        if errors:
+            logger.warning("Bulk write: %d of %d documents failed: %s",
+                           len(errors), len(ops), errors[:3])
+        if refresh:
+            self.client.indices.refresh(index=",".join(sorted({op[0] for op in ops})))
+        self._mirror(mirrors, actions)
+        return indexed
+
+    def bulk_actions(self, actions: list[dict[str, Any]], refresh: bool = True,
+                     chunk_size: int = BULK_CHUNK_SIZE) -> set[str]:
+        """Run raw index/update/delete actions in order; returns the _ids that failed.
+
+        Deleting a document that is already gone counts as success, so replays
+        of the same actions are idempotent.
+        """
+        if not actions:
+            return set()
+        mirrors = self._mirror_targets()
+        failed: set[str] = set()
+        for ok, item in helpers.streaming_bulk(
+            self.client, actions, chunk_size=chunk_size,
+            raise_on_error=False, raise_on_exception=False, yield_ok=False,
+        ):
+            op_type, info = next(iter(item.items()))
+            if ok or (op_type == "delete" and info.get("status") == 404):
+                continue
+            failed.add(str(info.get("_id")))
+        if failed:
+            logger.warning("Bulk actions: %d of %d documents failed", len(failed), len(actions))
+        if refresh:
+            self.client.indices.refresh(index=",".join(sorted({a["_index"] for a in actions})))
+        self._mirror(mirrors, [a for a in actions if str(a["_id"]) not in failed])
+        return failed
+
+    def index_entity(self, entity_id: str, entity_type: str, canonical_name: str,
+                     description: str, aliases: list[str], embedding: list[float]) -> str:
+        doc = self.entity_document(entity_id, entity_type, canonical_name, description, aliases, embedding)
+        mirrors = self._mirror_targets()
         self.client.index(index=IDX_ENTITIES, id=entity_id, body=doc, refresh=True)
+        self._mirror(mirrors, [{"_op_type": "index", "_index": IDX_ENTITIES, "_id": entity_id, "_source": doc}])
         return entity_id
 
     def delete_document(self, index: str, doc_id: str) -> None:
+        mirrors = self._mirror_targets()
         try:
             self.client.delete(index=index, id=doc_id)
         except Exception:
             pass
+        self._mirror(mirrors, [{"_op_type": "delete", "_index": index, "_id": doc_id}])
 
     def update_document(self, index: str, doc_id: str, fields: dict[str, Any]) -> None:
+        mirrors = self._mirror_targets()
         self.client.update(index=index, id=doc_id, body={"doc": fields}, refresh=True)
+        self._mirror(mirrors, [{"_op_type": "update", "_index": index, "_id": doc_id, "doc": fields}])
+
+    def get_document(self, index: str, doc_id: str) -> Optional[dict[str, Any]]:
+        try:
+            return self.client.get(index=index, id=doc_id)["_source"]
+        except NotFoundError:
+            return None
+
+    def list_documents(self, index: str, size: int, filters: FilterLike = None,
+                       sort_desc: str | None = None,
+                       fields: list[str] | None = None) -> list[dict[str, Any]]:
+        """Plain filtered listing (no scoring), newest first when `sort_desc` is given."""
+        body: dict[str, Any] = {
+            "size": size,
+            "query": {"bool": {"filter": filter_clauses(filters)}},
+        }
+        if sort_desc:
+            body["sort"] = [{sort_desc: "desc"}]
+        if fields is not None:
+            body["_source"] = fields
+        response = self.client.search(index=index, body=body)
+        return [{**hit["_source"], "_id": hit["_id"]} for hit in response["hits"]["hits"]]
+
+    # ── Reindex behind aliases ─────────────────────────────────────────────────
+
+    def _mirror_targets(self) -> dict[str, str]:
+        """Aliases being reindexed -> the index their writes are mirrored into.
+
+        Callers read this *before* their primary write, so a write that lands
+        on the old index before the swap is always mirrored to the new one.
+        """
+        now = time.monotonic()
+        if now - self._mirrors_checked >= MIRROR_REFRESH_S:
+            self._mirrors_checked = now
+            try:
+                found = self.client.indices.get_alias(name=f"*{NEXT_ALIAS_SUFFIX}")
+                self._mirrors = {
+                    name[: -len(NEXT_ALIAS_SUFFIX)]: index
+                    for index, info in found.items() for name in info["aliases"]
+                }
+            except NotFoundError:
+                self._mirrors = {}
+            except Exception as exc:
+                logger.debug("Mirror alias lookup failed: %s", exc)
+        return self._mirrors
+
+    def _mirror(self, mirrors: dict[str, str], actions: list[dict[str, Any]]) -> None:
+        """Repeat writes on the indices being reindexed into; best effort.
+
+        An update whose document has not been copied yet is sent as a full
+        index of the already-updated source document instead.
+        """
+        copies = [{**a, "_index": mirrors[a["_index"]]} for a in actions if a["_index"] in mirrors]
+        if not copies:
+            return
+        try:
+            missing: list[tuple[str, str]] = []
+            for ok, item in helpers.streaming_bulk(
+                self.client, copies, raise_on_error=False, raise_on_exception=False, yield_ok=False,
+            ):
+                op_type, info = next(iter(item.items()))
+                if op_type == "update" and info.get("status") == 404:
+                    missing.append((info["_index"], str(info["_id"])))
+                elif not (op_type == "delete" and info.get("status") == 404):
+                    logger.warning("Mirror write to %s failed: %s", info.get("_index"), info.get("error"))
+            sources = {target: alias for alias, target in mirrors.items()}
+            for target, doc_id in missing:
+                doc = self.get_document(sources[target], doc_id)
+                if doc is not None:
+                    self.client.index(index=target, id=doc_id, body=doc)
+        except Exception as exc:
+            logger.warning("Mirror write failed: %s", exc)
+
+    def _alias_indices(self, alias: str) -> list[str]:
+        try:
+            return sorted(self.client.indices.get_alias(name=alias))
+        except NotFoundError:
+            return []
+
+    def _doc_ids(self, index: str) -> set[str]:
+        return {h["_id"] for h in helpers.scan(
+            self.client, index=index, query={"query": {"match_all": {}}, "_source": False}, size=2000)}
+
+    def index_info(self) -> list[dict[str, Any]]:
+        """Per memory index: the physical index behind it, its profile, size and doc count."""
+        out = []
+        for alias in _MAPPINGS:
+            for index in self._alias_indices(alias) or [alias]:
+                if not self.client.indices.exists(index=index):
+                    continue
+                mapping = self.client.indices.get_mapping(index=index)[index]["mappings"]
+                stats = self.client.indices.stats(index=index, metric="docs,store")["indices"][index]["primaries"]
+                method = mapping["properties"]["embedding"].get("method", {})
+                out.append({
+                    "alias": alias, "index": index,
+                    "profile": mapping.get("_meta", {}).get("index_profile", DEFAULT_PROFILE),
+                    "engine": method.get("engine"), "parameters": method.get("parameters", {}),
+                    "docs": stats["docs"]["count"], "store_bytes": stats["store"]["size_in_bytes"],
+                    "reindexing_into": self._alias_indices(alias + NEXT_ALIAS_SUFFIX) or None,
+                })
+        return out
+
+    def reindex(self, alias: str, profile: IndexProfile, keep_old: bool = False) -> dict[str, Any]:
+        """Rebuild `alias` with `profile` and swap it in; reads and writes continue throughout.
+
+        1. Create the new index and point `<alias>.next` at it; after
+           2 x MIRROR_REFRESH_S every writer is mirroring into it.
+        2. Server-side `_reindex` with op_type=create, so documents the
+           mirror wrote already are never overwritten by older copies.
+        3. Reconcile ids (new index scanned first): copy what the snapshot
+           missed, drop what was deleted from the old index mid-copy.
+        4. One `_aliases` call moves the alias and drops `.next`.
+        """
+        if alias not in _MAPPINGS:
+            raise ValueError(f"Unknown memory index {alias!r}")
+        next_alias = alias + NEXT_ALIAS_SUFFIX
+        if self._alias_indices(next_alias):
+            raise RuntimeError(f"{alias} is already being reindexed")
+        self._probe_version()
+        if self._version < profile.min_version:
+            raise ValueError(f"Index profile {profile.name} needs OpenSearch "
+                             f"{profile.min_version[0]}.{profile.min_version[1]}+")
+        sources = self._alias_indices(alias)
+        source = sources[0] if sources else alias           # a pre-alias concrete index
+        target = physical_index_name(alias)
+        started = time.monotonic()
+
+        body = index_body(_MAPPINGS[alias], profile)
+        body["settings"]["index"].update({"refresh_interval": "-1", "number_of_replicas": 0})
+        self.client.indices.create(index=target, body=body)
+        self.client.indices.put_alias(index=target, name=next_alias)
+        try:
+            time.sleep(2 * MIRROR_REFRESH_S)
+            task = self.client.reindex(
+                body={"conflicts": "proceed", "source": {"index": source},
+                      "dest": {"index": target, "op_type": "create"}},
+                wait_for_completion=False,
+            )["task"]
+            while True:
+                status = self.client.tasks.get(task_id=task)
+                if status.get("completed"):
+                    break
+                time.sleep(REINDEX_POLL_S)
+            response = status.get("response", {})
+            if status.get("error") or response.get("failures"):
+                raise RuntimeError(f"_reindex failed: {status.get('error') or response['failures'][:3]}")
+
+            replicas = self.client.indices.get_settings(index=source)[source]["settings"]["index"].get(
+                "number_of_replicas", "1")
+            self.client.indices.put_settings(
+                index=target, body={"index": {"refresh_interval": None, "number_of_replicas": replicas}})
+            self.client.indices.refresh(index=target)
+
+            new_ids = self._doc_ids(target)
+            old_ids = self._doc_ids(source)
+            missing, extra = old_ids - new_ids, new_ids - old_ids
+            for i in range(0, len(missing), BULK_CHUNK_SIZE):
+                chunk = sorted(missing)[i:i + BULK_CHUNK_SIZE]
+                docs = self.client.mget(index=source, body={"ids": chunk})["docs"]
+                helpers.bulk(self.client, [
+                    {"_op_type": "create", "_index": target, "_id": d["_id"], "_source": d["_source"]}
+                    for d in docs if d.get("found")
+                ], raise_on_error=False)
+            helpers.bulk(self.client, [{"_op_type": "delete", "_index": target, "_id": i} for i in extra],
+                         raise_on_error=False)
+            self.client.indices.refresh(index=target)
+
+            swap: list[dict[str, Any]] = [{"remove": {"index": target, "alias": next_alias}},
+                                          {"add": {"index": target, "alias": alias}}]
+            if sources:
+                swap.insert(0, {"remove": {"index": source, "alias": alias}})
+            else:
+                swap.insert(0, {"remove_index": {"index": source}})     # frees the name for the alias
+            self.client.indices.update_aliases(body={"actions": swap})
+        except Exception:
+            self.client.indices.delete(index=target, ignore_unavailable=True)
+            raise
+
+        if sources and not keep_old:
+            self.client.indices.delete(index=source)
+        self._mirrors_checked = float("-inf")
+        result = {
+            "alias": alias, "profile": profile.name, "from": source, "to": target,
+            "copied": response.get("created", 0), "reconciled_missing": len(missing),
+            "reconciled_deleted": len(extra), "seconds": round(time.monotonic() - started, 1),
+            "old_index_kept": bool(sources) and keep_old,
+        }
+        logger.info("Reindexed %s", result)
+        return result
 
     # ── Vector search ──────────────────────────────────────────────────────────
 
-    def knn_search(self, index: str, embedding: list[float], k: int = 10,
-                   filters: dict[str, Any] | None = None) -> list[dict[str, Any]]:
-        knn_query: dict[str, Any] = {
-            "knn": {
-                "embedding": {
-                    "vector": embedding,
-                    "k": k,
-                }
-            }
+    def _knn_query(self, embedding: list[float], k: int, filters: FilterLike,
+                   ef_search: Optional[int] = None) -> dict[str, Any]:
+        knn: dict[str, Any] = {"vector": embedding, "k": k}
+        clauses = filter_clauses(filters)
+        if clauses:
+            # Lucene-engine efficient filtering: the filter is applied during
+            # the HNSW search, so k results still come back under a filter.
+            knn["filter"] = {"bool": {"filter": clauses}}
+        if ef_search and self._ef_search_ok:
+            knn["method_parameters"] = {"ef_search": max(ef_search, k)}
+        return {"knn": {"embedding": knn}}
+
+    @staticmethod
+    def _text_query(query: str, fields: list[str], filters: FilterLike) -> dict[str, Any]:
+        bool_query: dict[str, Any] = {
+            "must": [{"multi_match": {"query": query, "fields": fields, "type": "best_fields"}}]
         }
-        if filters:
-            query = {"bool": {"must": [knn_query], "filter": [{"term": filters}]}}
-        else:
-            query = knn_query
+        clauses = filter_clauses(filters)
+        if clauses:
+            bool_query["filter"] = clauses
+        return {"bool": bool_query}
 
+    def knn_search(self, index: str, embedding: list[float], k: int = 10,
+                   filters: FilterLike = None, ef_search: Optional[int] = None) -> list[dict[str, Any]]:
         response = self.client.search(
             index=index,
-            body={"size": k, "query": query, "_source": {"excludes": ["embedding"]}},
+            body={"size": k, "query": self._knn_query(embedding, k, filters, ef_search),
+                  "_source": {"excludes": ["embedding"]}},
         )
-        return [
-            {**hit["_source"], "_score": hit["_score"], "_id": hit["_id"]}
-            for hit in response["hits"]["hits"]
-        ]
+        return _hits(response)
 
     # ── BM25 / full-text search ────────────────────────────────────────────────
 
     def text_search(self, index: str, query: str, fields: list[str],
-                    size: int = 10, filters: dict[str, Any] | None = None) -> list[dict[str, Any]]:
-        must: list[dict] = [{"multi_match": {"query": query, "fields": fields, "type": "best_fields"}}]
-        body: dict[str, Any] = {
-            "size": size,
-            "query": {"bool": {"must": must}},
-            "_source": {"excludes": ["embedding"]},
-        }
-        if filters:
-            body["query"]["bool"]["filter"] = [{"term": filters}]
-        response = self.client.search(index=index, body=body)
-        return [
-            {**hit["_source"], "_score": hit["_score"], "_id": hit["_id"]}
-            for hit in response["hits"]["hits"]
-        ]
+                    size: int = 10, filters: FilterLike = None) -> list[dict[str, Any]]:
+        response = self.client.search(
+            index=index,
+            body={"size": size, "query": self._text_query(query, fields, filters),
+                  "_source": {"excludes": ["embedding"]}},
+        )
+        return _hits(response)
 
     # ── Hybrid search (RRF) ────────────────────────────────────────────────────
 
     def hybrid_search(self, index: str, query_text: str, embedding: list[float],
-                      k: int = 10, filters: dict[str, Any] | None = None) -> list[dict[str, Any]]:
-        vector_hits = self.knn_search(index, embedding, k=k * 2, filters=filters)
-        text_hits   = self.text_search(index, query_text,
-                                       fields=["claim_text^2", "text", "canonical_name", "description"],
-                                       size=k * 2, filters=filters)
-
-        # Reciprocal Rank Fusion
-        scores: dict[str, float] = {}
-        docs: dict[str, dict]    = {}
-        rrf_k = 60
-
-        for rank, hit in enumerate(vector_hits):
-            did = hit["_id"]
-            scores[did] = scores.get(did, 0) + 1 / (rrf_k + rank + 1)
-            docs[did] = hit
-
-        for rank, hit in enumerate(text_hits):
-            did = hit["_id"]
-            scores[did] = scores.get(did, 0) + 1 / (rrf_k + rank + 1)
-            docs[did] = hit
-
-        sorted_ids = sorted(scores, key=lambda x: scores[x], reverse=True)[:k]
-        results = []
-        for did in sorted_ids:
-            d = docs[did].copy()
-            d["_rrf_score"] = scores[did]
-            results.append(d)
-        return results
+                      k: int = 10, filters: FilterLike = None,
+                      ef_search: Optional[int] = None) -> list[dict[str, Any]]:
+        """kNN + BM25 fused by rank in one HTTP round trip.
+
+        Uses the server-side `hybrid` query when a search pipeline is
+        installed, otherwise sends both legs in one `_msearch` and fuses them
+        with fuse_rrf. A rejected pipeline request (400/404: pipeline deleted,
+        hybrid query unsupported) downgrades this client to `_msearch`;
+        connection errors propagate as before.
+        """
+        if self._hybrid_mode is None:
+            self.ensure_search_pipeline()
+        if self._hybrid_mode != "msearch":
+            try:
+                return self._hybrid_pipeline_search(index, query_text, embedding, k, filters, ef_search)
+            except TransportError as exc:
+                if exc.status_code not in (400, 404):
+                    raise
+                logger.warning("Hybrid pipeline search rejected, falling back to _msearch: %s", exc)
+                self._hybrid_mode = "msearch"
+        return self._hybrid_msearch(index, query_text, embedding, k, filters, ef_search)
+
+    def _hybrid_pipeline_search(self, index: str, query_text: str, embedding: list[float],
+                                k: int, filters: FilterLike,
+                                ef_search: Optional[int]) -> list[dict[str, Any]]:
+        body = {
+            "size": k,
+            "_source": {"excludes": ["embedding"]},
+            "query": {"hybrid": {"queries": [
+                self._text_query(query_text, HYBRID_TEXT_FIELDS, filters),
+                self._knn_query(embedding, k * 2, filters, ef_search),
+            ]}},
+        }
+        response = self.client.search(index=index, body=body,
+                                      params={"search_pipeline": HYBRID_PIPELINE})
+        hits = _hits(response)
+        # Callers read `_rrf_score` on the fuse_rrf scale (top hit ~ 1/RRF_K);
+        # a normalised [0, 1] blend is mapped onto it.
+        scale = 1.0 if self._hybrid_mode == "rrf" else 1.0 / RRF_K
+        for h in hits:
+            h["_rrf_score"] = h["_score"] * scale
+        return hits
+
+    def _hybrid_msearch(self, index: str, query_text: str, embedding: list[float],
+                        k: int, filters: FilterLike,
+                        ef_search: Optional[int]) -> list[dict[str, Any]]:
+        source = {"excludes": ["embedding"]}
+        body = [
+            {"index": index},
+            {"size": k * 2, "query": self._knn_query(embedding, k * 2, filters, ef_search), "_source": source},
+            {"index": index},
+            {"size": k * 2, "query": self._text_query(query_text, HYBRID_TEXT_FIELDS, filters), "_source": source},
+        ]
+        responses = self.client.msearch(body=body)["responses"]
+        for r in responses:
+            if "error" in r:
+                raise RuntimeError(f"hybrid _msearch leg failed: {r['error']}")
+        return fuse_rrf(_hits(responses[0]), _hits(responses[1]), k)
 
 
 # ── Module-level singleton ─────────────────────────────────────────────────────
@@ -0,0 +1,204 @@
+"""Filter DSL for `VectorStore` reads.
+
+Filters compose with `&`, `|` and `~`. They compile to OpenSearch query DSL
+(`to_query`), which is placed inside the `knn` clause for Lucene efficient
+filtering and into the bool filter of text queries. The same objects
+evaluate against plain documents (`matches`), which is how the local store
+applies them.
+
+A plain dict is still accepted everywhere a filter is: each key is a keyword
+field, each value a term or a list of terms (any of), and all keys must match.
+
+    Term("status", ["active", "provisional"]) & Term("segment", "core_identity")
+    Range("created_at", gte=start, lt=end) | Range("valid_from", gte=start, lt=end)
+"""
+from __future__ import annotations
+
+import operator
+from dataclasses import dataclass
+from functools import lru_cache
+from datetime import date, datetime, timezone
+from typing import Any, Optional, Union
+
+
+class Filter:
+    def to_query(self) -> dict[str, Any]:
+        raise NotImplementedError
+
+    def matches(self, doc: dict[str, Any]) -> bool:
+        raise NotImplementedError
+
+    def __and__(self, other: "Filter") -> "Filter":
+        return And((self, other))
+
+    def __or__(self, other: "Filter") -> "Filter":
+        return Or((self, other))
+
+    def __invert__(self) -> "Filter":
+        return Not(self)
+
+
+def _values(value: Any) -> tuple:
+    return tuple(value) if isinstance(value, (list, tuple, set, frozenset)) else (value,)
+
+
+@dataclass(frozen=True)
+class Term(Filter):
+    """Field equals the value, or any of the values when given a list."""
+    field: str
+    value: Any
+
+    def __post_init__(self) -> None:
+        if isinstance(self.value, (list, set, frozenset)):
+            object.__setattr__(self, "value", tuple(self.value))
+
+    def to_query(self) -> dict[str, Any]:
+        if isinstance(self.value, tuple):
+            return {"terms": {self.field: list(self.value)}}
+        return {"term": {self.field: self.value}}
+
+    def matches(self, doc: dict[str, Any]) -> bool:
+        have = doc.get(self.field)
+        if have is None:
+            return False
+        return not set(_values(have)).isdisjoint(_values(self.value))
+
+
+def _wire(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, (datetime, date)) else value
+
+
+@lru_cache(maxsize=65536)
+def _parse_datetime(value: str) -> datetime:
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def _coerce(value: Any, like: Any) -> Any:
+    """Bring a stored value to the bound's type so they compare."""
+    if isinstance(like, datetime):
+        if isinstance(value, str):
+            return _parse_datetime(value)
+        if isinstance(value, datetime) and value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value
+    if isinstance(like, (int, float)) and not isinstance(like, bool):
+        return float(value)
+    return value
+
+
+_RANGE_OPS = {"gte": operator.ge, "gt": operator.gt, "lte": operator.le, "lt": operator.lt}
+
+
+@dataclass(frozen=True)
+class Range(Filter):
+    field: str
+    gte: Any = None
+    gt: Any = None
+    lte: Any = None
+    lt: Any = None
+
+    def _bounds(self) -> dict[str, Any]:
+        return {op: v for op, v in (("gte", self.gte), ("gt", self.gt),
+                                    ("lte", self.lte), ("lt", self.lt)) if v is not None}
+
+    def to_query(self) -> dict[str, Any]:
+        return {"range": {self.field: {op: _wire(v) for op, v in self._bounds().items()}}}
+
+    def matches(self, doc: dict[str, Any]) -> bool:
+        have = doc.get(self.field)
+        if have is None or have == "":
+            return False
+        for op, bound in self._bounds().items():
+            if isinstance(bound, datetime) and bound.tzinfo is None:
+                bound = bound.replace(tzinfo=timezone.utc)
+            try:
+                if not _RANGE_OPS[op](_coerce(have, bound), bound):
+                    return False
+            except (TypeError, ValueError):
+                return False
+        return True
+
+
+@dataclass(frozen=True)
+class Exists(Filter):
+    field: str
+
+    def to_query(self) -> dict[str, Any]:
+        return {"exists": {"field": self.field}}
+
+    def matches(self, doc: dict[str, Any]) -> bool:
+        return doc.get(self.field) not in (None, "", [])
+
+
+@dataclass(frozen=True)
+class And(Filter):
+    children: tuple[Filter, ...]
+
+    def __post_init__(self) -> None:
+        flat: list[Filter] = []
+        for c in self.children:
+            flat.extend(c.children if isinstance(c, And) else (c,))
+        object.__setattr__(self, "children", tuple(flat))
+
+    def to_query(self) -> dict[str, Any]:
+        return {"bool": {"filter": [c.to_query() for c in self.children]}}
+
+    def matches(self, doc: dict[str, Any]) -> bool:
+        return all(c.matches(doc) for c in self.children)
+
+
+@dataclass(frozen=True)
+class Or(Filter):
+    children: tuple[Filter, ...]
+
+    def __post_init__(self) -> None:
+        flat: list[Filter] = []
+        for c in self.children:
+            flat.extend(c.children if isinstance(c, Or) else (c,))
+        object.__setattr__(self, "children", tuple(flat))
+
+    def to_query(self) -> dict[str, Any]:
+        return {"bool": {"should": [c.to_query() for c in self.children], "minimum_should_match": 1}}
+
+    def matches(self, doc: dict[str, Any]) -> bool:
+        return any(c.matches(doc) for c in self.children)
+
+
+@dataclass(frozen=True)
+class Not(Filter):
+    child: Filter
+
+    def to_query(self) -> dict[str, Any]:
+        return {"bool": {"must_not": [self.child.to_query()]}}
+
+    def matches(self, doc: dict[str, Any]) -> bool:
+        return not self.child.matches(doc)
+
+
+FilterLike = Union[Filter, dict[str, Any], None]
+
+
+def as_filter(filters: FilterLike) -> Optional[Filter]:
+    if filters is None or isinstance(filters, Filter):
+        return filters
+    terms = [Term(field, value) for field, value in filters.items()]
+    if not terms:
+        return None
+    return terms[0] if len(terms) == 1 else And(tuple(terms))
+
+
+def filter_clauses(filters: FilterLike) -> list[dict[str, Any]]:
+    """Clauses for a bool `filter` list; a top-level And is flattened."""
+    f = as_filter(filters)
+    if f is None:
+        return []
+    if isinstance(f, And):
+        return [c.to_query() for c in f.children]
+    return [f.to_query()]
+
+
+def time_window(start: datetime, end: Optional[datetime],
+                fields: tuple[str, ...] = ("created_at", "valid_from")) -> Filter:
+    """Documents whose timestamp in any of `fields` falls in [start, end), or from `start` on if `end` is None."""
+    return Or(tuple(Range(f, gte=start, lt=end) for f in fields))
@@ -0,0 +1,93 @@
+"""Search-store abstraction shared by OpenSearch and the in-process fallback.
+
+`VectorStore` is the surface the memory system uses: document writes, kNN,
+BM25 and their RRF fusion. `OpenSearchClient` implements it against a
+cluster; `LocalVectorStore` implements it with numpy for development, offline
+benchmarks and small single-user installs. `get_vector_store()` picks one from
+`settings.vector_store` ("opensearch" or "local").
+
+Read filters are `search_filters.Filter` trees (terms, ranges, and/or/not),
+or a plain dict mapping a keyword field to a value, or to a list of values
+meaning "any of", with all fields required. kNN filters are applied during
+the vector search, never after it. `ef_search` sizes the candidate beam per
+query; stores that cannot tune it per query ignore it.
+"""
+from __future__ import annotations
+
+from typing import Any, Optional, Protocol
+
+from core.clients.search_filters import FilterLike
+from core.config import get_settings as _gs
+
+RRF_K = 60
+HYBRID_TEXT_FIELDS = ["claim_text^2", "text", "canonical_name", "description"]
+
+
+class VectorStore(Protocol):
+    @property
+    def connected(self) -> bool: ...
+
+    def connect(self) -> None: ...
+    def close(self) -> None: ...
+    def ensure_indices(self) -> None: ...
+
+    # writes
+    def index_artifact(self, artifact_id: str, source_id: str, artifact_type: str,
+                       text: str, embedding: list[float], created_at: str = "") -> str: ...
+    def bulk_index(self, index: str, docs: list[tuple[str, dict[str, Any]]],
+                   refresh: bool = True) -> int: ...
+    def bulk_write(self, ops: list[tuple[str, str, dict[str, Any]]], refresh: bool = True) -> int: ...
+    def bulk_actions(self, actions: list[dict[str, Any]], refresh: bool = True) -> set[str]: ...
+    def delete_document(self, index: str, doc_id: str) -> None: ...
+    def update_document(self, index: str, doc_id: str, fields: dict[str, Any]) -> None: ...
+
+    # reads
+    def get_document(self, index: str, doc_id: str) -> Optional[dict[str, Any]]: ...
+    def list_documents(self, index: str, size: int, filters: FilterLike = None,
+                       sort_desc: str | None = None,
+                       fields: list[str] | None = None) -> list[dict[str, Any]]: ...
+    def knn_search(self, index: str, embedding: list[float], k: int = 10,
+                   filters: FilterLike = None, ef_search: Optional[int] = None) -> list[dict[str, Any]]: ...
+    def text_search(self, index: str, query: str, fields: list[str],
+                    size: int = 10, filters: FilterLike = None) -> list[dict[str, Any]]: ...
+    def hybrid_search(self, index: str, query_text: str, embedding: list[float],
+                      k: int = 10, filters: FilterLike = None,
+                      ef_search: Optional[int] = None) -> list[dict[str, Any]]: ...
+
+
+def fuse_rrf(vector_hits: list[dict[str, Any]], text_hits: list[dict[str, Any]],
+             k: int) -> list[dict[str, Any]]:
+    """Reciprocal Rank Fusion of two ranked hit lists; adds `_rrf_score`."""
+    scores: dict[str, float] = {}
+    docs: dict[str, dict]    = {}
+
+    for hits in (vector_hits, text_hits):
+        for rank, hit in enumerate(hits):
+            did = hit["_id"]
+            scores[did] = scores.get(did, 0) + 1 / (RRF_K + rank + 1)
+            docs[did] = hit
+
+    sorted_ids = sorted(scores, key=lambda x: scores[x], reverse=True)[:k]
+    results = []
+    for did in sorted_ids:
+        d = docs[did].copy()
+        d["_rrf_score"] = scores[did]
+        results.append(d)
+    return results
+
+
+# ── Module-level singleton ─────────────────────────────────────────────────────
+
+_store: Optional[VectorStore] = None
+
+
+def get_vector_store() -> VectorStore:
+    global _store
+    if _store is None:
+        if _gs().vector_store == "local":
+            from core.clients.local_vector_store import LocalVectorStore
+            _store = LocalVectorStore(_gs().vector_store_path)
+        else:
+            from core.clients.opensearch import get_opensearch
+            _store = get_opensearch()
+    return _store
@@ -68,6 +68,16 @@ class Settings(BaseSettings):
     # ── OpenSearch ────────────────────────────────────────────────────────────
     opensearch_host: str = "localhost"
     opensearch_port: int = 9201
+    opensearch_hybrid: str = "auto"            # "auto" (server-side pipeline if supported) | "msearch"
+    opensearch_index_profile: str = "lucene-hnsw"  # kNN build for new indices; see core/clients/index_profiles.py
+    vector_store: str = "opensearch"           # "opensearch" | "local" (in-process numpy)
+    vector_store_path: str = "data/vector_store"
+
+    # ── Embeddings ────────────────────────────────────────────────────────────
+    embedding_provider: str = "google"         # "google" | "onnx" (local CPU model)
+    embedding_model_path: str = "models/embedding"
+    embedding_batch_max: int = 32
+    embedding_batch_wait_ms: float = 5.0
 
     # ── Computed ──────────────────────────────────────────────────────────────
 
@@ -39,7 +39,7 @@ class MCPStreamableHTTPApp:
 async def lifespan(app: FastAPI):
     """Connect memory stores on startup, disconnect on shutdown."""
     from core.clients.neo4j import get_neo4j
-    from core.clients.opensearch import get_opensearch
+    from core.clients.vector_store import get_vector_store
     from core.db import init_db
 
     logger.info("Initialising memory stores...")
@@ -53,20 +53,20 @@ async def lifespan(app: FastAPI):
     try:
         neo4j = get_neo4j()
         await neo4j.connect()
-        await neo4j.create_constraints()
-        logger.info("Neo4j: connected")
+        schema = await neo4j.create_constraints()
+        logger.info("Neo4j: connected, schema v%d", schema)
 
     except Exception as exc:
         logger.warning("Neo4j init skipped: %s", exc)
 
     try:
-        os_client = get_opensearch()
-        os_client.connect()
-        os_client.ensure_indices()
-        logger.info("OpenSearch: connected, indices ready")
+        store = get_vector_store()
+        store.connect()
+        store.ensure_indices()
+        logger.info("Vector store (%s): connected, indices ready", type(store).__name__)
 
     except Exception as exc:
-        logger.warning("OpenSearch init skipped: %s", exc)
+        logger.warning("Vector store init skipped: %s", exc)
 
     try:
         from core.llm import reload_default_llm
@@ -78,32 +78,40 @@ async def lifespan(app: FastAPI):
         logger.warning("LLM default resolution skipped: %s", exc)
 
     try:
-        from apscheduler.schedulers.asyncio import AsyncIOScheduler
+        from memory.outbox import get_outbox_relay
 
+        get_outbox_relay().start()
+        logger.info("Memory outbox relay started")
+
+    except Exception as exc:
+        logger.warning("Outbox relay start skipped: %s", exc)
+
+    try:
+        from memory.retrieval.access_log import get_access_aggregator
+
+        get_access_aggregator().start()
+        logger.info("Retrieval access aggregator started")
+
+    except Exception as exc:
+        logger.warning("Access aggregator start skipped: %s", exc)
+
+    try:
+        from apscheduler.triggers.cron import CronTrigger
+        from apscheduler.triggers.interval import IntervalTrigger
+
+        from memory.forget import get_forget_runner
         from memory.maintenance.consolidation import ConsolidationRunner
+        from memory.maintenance.scheduler import get_job_scheduler
 
+        # Every worker runs a scheduler; a Postgres lease per job makes sure
+        # only one of them runs it.
         runner = ConsolidationRunner()
-        scheduler = AsyncIOScheduler()
-        scheduler.add_job(
-            runner.hourly,
-            "interval",
-            hours=1,
-            id="memory_hourly",
-        )
-        scheduler.add_job(
-            runner.nightly,
-            "cron",
-            hour=3,
-            id="memory_nightly",
-        )
-        scheduler.add_job(
-            runner.weekly,
-            "cron",
-            day_of_week="sun",
-            hour=4,
-            id="memory_weekly",
-        )
-        scheduler.start()
+        scheduler = get_job_scheduler()
+        scheduler.add_job("memory_hourly", runner.hourly, IntervalTrigger(hours=1))
+        scheduler.add_job("memory_nightly", runner.nightly, CronTrigger(hour=3))
+        scheduler.add_job("memory_weekly", runner.weekly, CronTrigger(day_of_week="sun", hour=4))
+        scheduler.add_job("memory_forget_resume", get_forget_runner().resume_stalled, IntervalTrigger(minutes=5))
+        await scheduler.start()
         app.state.scheduler = scheduler
         logger.info("Memory maintenance scheduler started")
 
@@ -113,7 +121,23 @@ async def lifespan(app: FastAPI):
     yield
 
     if hasattr(app.state, "scheduler"):
-        app.state.scheduler.shutdown(wait=False)
+        await app.state.scheduler.stop()
+    try:
+        from memory.outbox import get_outbox_relay
+
+        await get_outbox_relay().stop()
+
+    except Exception:
+        pass
+
+    try:
+        from memory.retrieval.access_log import get_access_aggregator
+
+        await get_access_aggregator().stop()
+
+    except Exception:
+        pass
+
     try:
         neo4j = get_neo4j()
         await neo4j.close()
@@ -122,8 +146,23 @@ async def lifespan(app: FastAPI):
         pass
 
     try:
-        os_client = get_opensearch()
-        os_client.close()
+        get_vector_store().close()
+
+    except Exception:
+        pass
+
+    try:
+        from tools.google_search.search_service import get_web_search_service
+
+        await get_web_search_service().aclose()
+
+    except Exception:
+        pass
+
+    try:
+        from core.clients.google_api import get_google_api
+
+        await get_google_api().close()
 
     except Exception:
         pass
@@ -1,5 +1,6 @@
 """Memory system FastAPI router — all tool endpoints."""
 from __future__ import annotations
+import asyncio
 from typing import Any, Optional
 from uuid import UUID
 
@@ -116,12 +117,61 @@ async def confirm_claim(claim_id: str):
 
 
 @router.post("/forget")
-async def forget(req: ForgetRequest):
-    """Delete memories by claim ID, entity ID, or text pattern."""
+async def forget(req: ForgetRequest, background_tasks: BackgroundTasks):
+    """
+    Queue a bulk forget by claim/entity ID, source, segment, time range or text pattern.
+    Returns the job; follow its progress at GET /forget/jobs/{job_id}.
+    """
+    try:
+        job = await get_service().forget(req)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
+    background_tasks.add_task(_forget_bg, job.job_id)
+    return job.model_dump()
+
+
+@router.get("/forget/jobs")
+async def forget_jobs(limit: int = 20):
+    """Recent forget jobs, newest first."""
+    try:
+        return [j.model_dump() for j in await get_service().forget_jobs(limit)]
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
+@router.get("/forget/jobs/{job_id}")
+async def forget_job(job_id: UUID):
+    """Progress of a forget job: phase, counts deleted so far, and status."""
+    try:
+        job = await get_service().forget_job(job_id)
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Forget job not found")
+    return job.model_dump()
+
+
+@router.post("/forget/jobs/{job_id}/resume")
+async def resume_forget_job(job_id: UUID, background_tasks: BackgroundTasks):
+    """Continue a failed or interrupted forget job from its last committed batch."""
     try:
-        return await get_service().forget(req)
+        job = await get_service().resume_forget_job(job_id)
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
+    if job is None:
+        raise HTTPException(status_code=404, detail="No unfinished forget job with that ID")
+    background_tasks.add_task(_forget_bg, job.job_id)
+    return job.model_dump()
+
+
+async def _forget_bg(job_id: UUID) -> None:
+    try:
+        await get_service().run_forget_job(job_id)
+    except Exception as exc:
+        from core.config import get_logger
+        get_logger(__name__).error("Forget job %s failed: %s", job_id, exc)
 
 
 # ── Feedback ───────────────────────────────────────────────────────────────────
@@ -310,20 +360,26 @@ def _parse_source_type(value: str | None) -> SourceType | None:
 async def ingest_gmail(body: dict, background_tasks: BackgroundTasks):
     """
     Trigger Gmail sync.
-    Body: {"credentials": {...oauth2 creds...}, "user_email": "...", "max_threads": 50}
+    Body: {"credentials": {...oauth2 creds...}, "user_email": "...", "max_threads": 50,
+           "full_resync": false}
+    After the first sync only messages added since the stored historyId are fetched;
+    `full_resync` ignores the stored cursor.
     """
     credentials = body.get("credentials", {})
     user_email  = body.get("user_email", "")
     max_threads = int(body.get("max_threads", 50))
+    full_resync = bool(body.get("full_resync", False))
     if not user_email:
         raise HTTPException(status_code=400, detail="user_email is required")
-    background_tasks.add_task(_ingest_gmail_bg, credentials, user_email, max_threads)
+    background_tasks.add_task(_ingest_gmail_bg, credentials, user_email, max_threads, full_resync)
     return {"status": "queued"}
 
 
-async def _ingest_gmail_bg(credentials: dict, user_email: str, max_threads: int) -> None:
+async def _ingest_gmail_bg(credentials: dict, user_email: str, max_threads: int,
+                           full_resync: bool = False) -> None:
     try:
-        result = await get_service().ingest_gmail(credentials, user_email, max_threads)
+        result = await get_service().ingest_gmail(credentials, user_email, max_threads,
+                                                  full_resync=full_resync)
         from core.config import get_logger
         get_logger(__name__).info("Gmail sync complete: %s", result)
     except Exception as exc:
@@ -356,6 +412,48 @@ async def _maintenance_bg(run_type: str) -> None:
         get_logger(__name__).error("Maintenance %s failed: %s", run_type, exc)
 
 
+@router.post("/maintenance/reindex")
+async def reindex(background_tasks: BackgroundTasks, body: dict):
+    """
+    Rebuild a search index with another kNN profile behind its alias.
+    Body: {"index": "memory_claims", "profile": "faiss-fp16", "keep_old": false}
+    """
+    from core.clients.index_profiles import PROFILES
+    from core.clients.opensearch import IDX_ARTIFACTS, IDX_CLAIMS, IDX_ENTITIES
+    index = body.get("index", IDX_CLAIMS)
+    profile = body.get("profile")
+    if index not in (IDX_CLAIMS, IDX_ARTIFACTS, IDX_ENTITIES):
+        raise HTTPException(status_code=400, detail="Invalid index")
+    if profile is not None and profile not in PROFILES:
+        raise HTTPException(status_code=400, detail=f"Invalid profile; choose from {sorted(PROFILES)}")
+    background_tasks.add_task(_reindex_bg, index, profile, bool(body.get("keep_old", False)))
+    return {"status": "queued", "index": index, "profile": profile}
+
+
+async def _reindex_bg(index: str, profile: Optional[str], keep_old: bool) -> None:
+    from core.config import get_logger
+    from memory.maintenance.reindex import reindex_index
+    try:
+        result = await reindex_index(index, profile, keep_old=keep_old)
+        get_logger(__name__).info("Reindex complete: %s", result)
+    except Exception as exc:
+        get_logger(__name__).error("Reindex of %s failed: %s", index, exc)
+
+
+@router.get("/maintenance/indices")
+async def index_info():
+    """Physical index, kNN profile, size and doc count behind each search index."""
+    from core.clients.opensearch import OpenSearchClient
+    from core.clients.vector_store import get_vector_store
+    store = get_vector_store()
+    if not isinstance(store, OpenSearchClient):
+        raise HTTPException(status_code=400, detail="Index info applies to the OpenSearch vector store only")
+    try:
+        return await asyncio.to_thread(store.index_info)
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
 @router.get("/maintenance/history")
 async def maintenance_history(limit: int = 20):
     """Return recent maintenance run history."""
@@ -377,6 +475,18 @@ async def maintenance_history(limit: int = 20):
             "claims_archived": r.claims_archived,
             "started_at": r.started_at.isoformat() if r.started_at else None,
             "finished_at": r.finished_at.isoformat() if r.finished_at else None,
+            "duration_ms": r.duration_ms,
+            "worker": r.worker,
         }
         for r in runs
     ]
+
+
+@router.get("/outbox/stats")
+async def outbox_stats():
+    """Outbox backlog and relay delivery/lag metrics."""
+    from memory.outbox import get_outbox_relay
+    try:
+        return await get_outbox_relay().stats()
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
@@ -0,0 +1,303 @@
+"""Bulk forget: remove everything a ForgetRequest matches from Postgres, OpenSearch and Neo4j.
+
+A request becomes a `forget_jobs` row, and a background task works through
+it in phases:
+
+1. claims
+2. explicit entities
+3. the artifacts of the forgotten sources
+4. the sources themselves
+
+Each batch selects up to `batch_size` ids after the job's keyset cursor, then
+runs one `DELETE ... RETURNING`. Foreign keys cascade the deletes to
+evidence and claim relations, and null out the log and feedback
+references. The same transaction also enqueues the search deletes and one
+UNWIND `DETACH DELETE` per store, and advances the job's cursor and
+counters. The outbox relay ships the search deletes as `_bulk` requests.
+So a job that dies mid-run resumes at the next batch, and the three stores
+never disagree about a batch that was committed.
+
+The job row is locked `FOR UPDATE SKIP LOCKED` for each batch, so resuming
+a job that is still running elsewhere just returns. Jobs left queued or
+running by a dead worker are picked up by `resume_stalled`, which runs on
+the maintenance scheduler.
+"""
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, AsyncContextManager, Awaitable, Callable, Optional, Sequence
+
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+
+from core.config import get_logger
+from core.clients.opensearch import IDX_ARTIFACTS, IDX_CLAIMS, IDX_ENTITIES
+from core.db import get_session
+from memory.outbox import enqueue_delete, enqueue_graph, get_outbox_relay
+from memory.retrieval.profile_cache import affects_profile, bump_profile_version
+from models.db.memory import ArtifactORM, ClaimORM, EntityORM, EvidenceORM, ForgetJobORM, SourceORM
+from models.memory import ForgetJobSchema, ForgetRequest
+
+logger = get_logger(__name__)
+
+BATCH_SIZE = 500
+STALL_S    = 300.0     # a queued/running job untouched this long has lost its worker
+
+QUEUED    = "queued"
+RUNNING   = "running"
+COMPLETED = "completed"
+FAILED    = "failed"
+
+
+# ── Selection ──────────────────────────────────────────────────────────────────
+
+def claim_filter(req: ForgetRequest) -> Optional[ColumnElement[bool]]:
+    """Claims the request forgets: its explicit IDs, plus claims matching every filter.
+
+    A source filter takes only the claims the forgotten sources are the sole
+    evidence for; claims also supported elsewhere keep that other evidence.
+    """
+    filters: list[ColumnElement[bool]] = []
+    if req.source_ids:
+        supported_elsewhere = (
+            select(EvidenceORM.evidence_id)
+            .where(EvidenceORM.claim_id == ClaimORM.claim_id, EvidenceORM.source_id.not_in(req.source_ids))
+            .exists()
+        )
+        filters.append(and_(
+            ClaimORM.claim_id.in_(select(EvidenceORM.claim_id).where(EvidenceORM.source_id.in_(req.source_ids))),
+            ~supported_elsewhere,
+        ))
+    if req.segments:
+        filters.append(ClaimORM.segment.in_([s.value for s in req.segments]))
+    if req.created_after is not None:
+        filters.append(ClaimORM.created_at >= req.created_after)
+    if req.created_before is not None:
+        filters.append(ClaimORM.created_at < req.created_before)
+    if req.pattern:
+        filters.append(ClaimORM.claim_text.icontains(req.pattern, autoescape=True))
+
+    clauses: list[ColumnElement[bool]] = []
+    if req.claim_ids:
+        clauses.append(ClaimORM.claim_id.in_(req.claim_ids))
+    if filters:
+        clauses.append(and_(*filters))
+    return or_(*clauses) if clauses else None
+
+
+# ── Phases ─────────────────────────────────────────────────────────────────────
+
+async def _claims_deleted(session: AsyncSession, job: ForgetJobORM, rows: Sequence[Any]) -> None:
+    ids = [str(r.claim_id) for r in rows]
+    for claim_id in ids:
+        enqueue_delete(session, IDX_CLAIMS, claim_id)
+    enqueue_graph(session, "delete_claims", str(job.job_id), ids=ids)
+    if any(affects_profile(r.memory_class, r.segment) for r in rows):
+        await bump_profile_version(session)
+    job.claims_deleted += len(ids)
+
+
+async def _entities_deleted(session: AsyncSession, job: ForgetJobORM, rows: Sequence[Any]) -> None:
+    ids = [str(r.entity_id) for r in rows]
+    for entity_id in ids:
+        enqueue_delete(session, IDX_ENTITIES, entity_id)
+    enqueue_graph(session, "delete_entities", str(job.job_id), ids=ids)
+    job.entities_deleted += len(ids)
+
+
+async def _artifacts_deleted(session: AsyncSession, job: ForgetJobORM, rows: Sequence[Any]) -> None:
+    for r in rows:
+        enqueue_delete(session, IDX_ARTIFACTS, str(r.artifact_id))
+    job.artifacts_deleted += len(rows)
+
+
+async def _sources_deleted(session: AsyncSession, job: ForgetJobORM, rows: Sequence[Any]) -> None:
+    enqueue_graph(session, "delete_sources", str(job.job_id), ids=[str(r.source_id) for r in rows])
+    job.sources_deleted += len(rows)
+
+
+@dataclass(frozen=True)
+class Phase:
+    name: str
+    key: Any                                                       # primary key column, also the keyset order
+    where: Callable[[ForgetRequest], Optional[ColumnElement[bool]]]
+    returning: tuple[Any, ...]
+    deleted: Callable[[AsyncSession, ForgetJobORM, Sequence[Any]], Awaitable[None]]
+
+
+PHASES: list[Phase] = [
+    Phase("claims", ClaimORM.claim_id, claim_filter,
+          (ClaimORM.memory_class, ClaimORM.segment), _claims_deleted),
+    Phase("entities", EntityORM.entity_id,
+          lambda req: EntityORM.entity_id.in_(req.entity_ids) if req.entity_ids else None,
+          (), _entities_deleted),
+    # Artifacts before their sources: the source delete would cascade to them
+    # without telling the search index.
+    Phase("artifacts", ArtifactORM.artifact_id,
+          lambda req: ArtifactORM.source_id.in_(req.source_ids) if req.source_ids else None,
+          (), _artifacts_deleted),
+    Phase("sources", SourceORM.source_id,
+          lambda req: SourceORM.source_id.in_(req.source_ids) if req.source_ids else None,
+          (), _sources_deleted),
+]
+_PHASE_INDEX = {p.name: i for i, p in enumerate(PHASES)}
+PHASE_DONE = "done"
+
+
+def batch_ids(phase: Phase, where: ColumnElement[bool], after: Optional[uuid.UUID], batch_size: int):
+    query = select(phase.key).where(where).order_by(phase.key).limit(batch_size)
+    if after is not None:
+        query = query.where(phase.key > after)
+    return query
+
+
+def batch_delete(phase: Phase, where: ColumnElement[bool], ids: Sequence[uuid.UUID]):
+    """Delete the batch, re-checking the filter; returns the key plus the phase's extra columns."""
+    return (
+        delete(phase.key.class_)
+        .where(phase.key.in_(ids), where)
+        .returning(phase.key, *phase.returning)
+        .execution_options(synchronize_session=False)
+    )
+
+
+# ── Runner ─────────────────────────────────────────────────────────────────────
+
+class ForgetRunner:
+    def __init__(
+        self,
+        batch_size: int = BATCH_SIZE,
+        session: Callable[[], AsyncContextManager[AsyncSession]] = get_session,
+    ) -> None:
+        self.batch_size = batch_size
+        self._session = session
+
+    async def create(self, req: ForgetRequest) -> ForgetJobSchema:
+        """Queue a job for `req`; raises ValueError when the request matches nothing by construction."""
+        where = claim_filter(req)
+        if where is None and not req.entity_ids and not req.source_ids:
+            raise ValueError("Forget request needs claim_ids, entity_ids, source_ids, segments, "
+                             "a time range or a pattern")
+        async with self._session() as session:
+            total = 0
+            if where is not None:
+                total = (await session.execute(select(func.count()).select_from(ClaimORM).where(where))).scalar_one()
+            job = ForgetJobORM(job_id=uuid.uuid4(), request=req.model_dump(mode="json"),
+                               status=QUEUED, phase=PHASES[0].name, total_claims=total,
+                               claims_deleted=0, entities_deleted=0, artifacts_deleted=0,
+                               sources_deleted=0, batches=0)
+            session.add(job)
+            await session.flush()
+            await session.refresh(job)
+            return ForgetJobSchema.model_validate(job)
+
+    async def run(self, job_id: uuid.UUID) -> None:
+        """Run batches until the job finishes, fails, or turns out to be running elsewhere."""
+        try:
+            while await self.step(job_id):
+                pass
+        except Exception as exc:
+            logger.error("Forget job %s failed: %s", job_id, exc)
+            async with self._session() as session:
+                await session.execute(
+                    update(ForgetJobORM)
+                    .where(ForgetJobORM.job_id == job_id, ForgetJobORM.status.in_([QUEUED, RUNNING]))
+                    .values(status=FAILED, error=str(exc), finished_at=func.now())
+                )
+
+    async def step(self, job_id: uuid.UUID) -> bool:
+        """Delete one batch; False once the job is finished or another worker holds it."""
+        async with self._session() as session:
+            job = (await session.execute(
+                select(ForgetJobORM)
+                .where(ForgetJobORM.job_id == job_id, ForgetJobORM.status.in_([QUEUED, RUNNING]))
+                .with_for_update(skip_locked=True)
+            )).scalar_one_or_none()
+            if job is None:
+                return False
+            phase = PHASES[_PHASE_INDEX[job.phase]]
+            where = phase.where(ForgetRequest.model_validate(job.request))
+            ids: Sequence[uuid.UUID] = []
+            if where is not None:
+                after = uuid.UUID(job.cursor) if job.cursor else None
+                ids = (await session.execute(batch_ids(phase, where, after, self.batch_size))).scalars().all()
+            rows = (await session.execute(batch_delete(phase, where, ids))).all() if ids else []
+            if rows:
+                await phase.deleted(session, job, rows)
+
+            job.status = RUNNING
+            job.batches += 1
+            if len(ids) == self.batch_size:
+                job.cursor = str(ids[-1])
+            else:
+                nxt = _PHASE_INDEX[phase.name] + 1
+                job.phase = PHASES[nxt].name if nxt < len(PHASES) else PHASE_DONE
+                job.cursor = None
+                if job.phase == PHASE_DONE:
+                    job.status = COMPLETED
+                    job.finished_at = func.now()
+            running = job.status == RUNNING
+        if rows:
+            get_outbox_relay().wake()
+        if not running:
+            logger.info("Forget job %s complete", job_id)
+        return running
+
+    # ── Resuming and progress ──────────────────────────────────────────────────
+
+    async def resume(self, job_id: uuid.UUID) -> Optional[ForgetJobSchema]:
+        """Re-queue a failed job at its cursor; returns None for unknown or finished jobs."""
+        async with self._session() as session:
+            job = (await session.execute(
+                select(ForgetJobORM).where(ForgetJobORM.job_id == job_id)
+            )).scalar_one_or_none()
+            if job is None or job.status == COMPLETED:
+                return None
+            if job.status == FAILED:
+                job.status, job.error, job.finished_at = QUEUED, None, None
+            await session.flush()
+            await session.refresh(job)
+            return ForgetJobSchema.model_validate(job)
+
+    async def resume_stalled(self) -> int:
+        """Run every queued or running job nobody has advanced for STALL_S."""
+        async with self._session() as session:
+            job_ids = (await session.execute(
+                select(ForgetJobORM.job_id)
+                .where(ForgetJobORM.status.in_([QUEUED, RUNNING]),
+                       ForgetJobORM.updated_at < func.now() - timedelta(seconds=STALL_S))
+                .order_by(ForgetJobORM.created_at)
+            )).scalars().all()
+        for job_id in job_ids:
+            logger.warning("Resuming stalled forget job %s", job_id)
+            await self.run(job_id)
+        return len(job_ids)
+
+    async def get(self, job_id: uuid.UUID) -> Optional[ForgetJobSchema]:
+        async with self._session() as session:
+            job = (await session.execute(
+                select(ForgetJobORM).where(ForgetJobORM.job_id == job_id)
+            )).scalar_one_or_none()
+            return ForgetJobSchema.model_validate(job) if job else None
+
+    async def recent(self, limit: int = 20) -> list[ForgetJobSchema]:
+        async with self._session() as session:
+            jobs = (await session.execute(
+                select(ForgetJobORM).order_by(ForgetJobORM.created_at.desc()).limit(limit)
+            )).scalars().all()
+            return [ForgetJobSchema.model_validate(j) for j in jobs]
+
+
+# ── Module-level singleton ─────────────────────────────────────────────────────
+
+_runner: Optional[ForgetRunner] = None
+
+
+def get_forget_runner() -> ForgetRunner:
+    global _runner
+    if _runner is None:
+        _runner = ForgetRunner()
+    return _runner
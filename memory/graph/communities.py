@@ -0,0 +1,321 @@
+"""Entity communities for global graph RAG summaries.
+
+The weekly run exports the weighted entity graph from Neo4j in one query,
+partitions it with Louvain modularity optimisation and keeps one summary
+artifact per community. Each summary sits under its own stable SYSTEM
+source (`external_id = "community:<key>"`) whose metadata records the
+members and their hash.
+
+Communities keep their key from run to run by matching each new community
+to the stored one it overlaps most (Jaccard >= MATCH_JACCARD). Only a
+community whose membership hash changed is summarised again. New
+communities get a source, and communities that dissolved are deleted
+together with their index documents. So the number of summaries tracks
+the graph instead of growing every week.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import random
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import delete, or_, select
+
+from core.clients.opensearch import IDX_ARTIFACTS, OpenSearchClient
+from core.config import get_logger
+from core.db import get_session
+from memory.outbox import enqueue_delete, enqueue_index, get_outbox_relay
+from models.db.memory import ArtifactORM, ClaimORM, EntityORM, SourceORM
+from models.memory import SourceType
+
+logger = get_logger(__name__)
+
+SUMMARY_VERSION      = "community_v2"   # part of the hash: bump to re-summarise everything
+MIN_COMMUNITY_SIZE   = 3
+MAX_COMMUNITIES      = 25
+MATCH_JACCARD        = 0.5
+CLAIMS_PER_SUMMARY   = 30
+SUMMARY_CONCURRENCY  = 4
+SOURCE_PREFIX        = "community:"
+ARTIFACT_TYPE        = "community_summary"
+
+# ── Louvain ────────────────────────────────────────────────────────────────────
+
+Graph = dict[str, dict[str, float]]
+
+
+def _build(edges: Iterable[tuple[str, str, float]]) -> Graph:
+    adj: Graph = defaultdict(dict)
+    for a, b, w in edges:
+        if w <= 0:
+            continue
+        if a == b:
+            adj[a][a] = adj[a].get(a, 0.0) + w
+        else:
+            adj[a][b] = adj[a].get(b, 0.0) + w
+            adj[b][a] = adj[b].get(a, 0.0) + w
+    return adj
+
+
+def _move_nodes(adj: Graph, resolution: float, rng: random.Random) -> tuple[dict[str, str], bool]:
+    """One Louvain level: move nodes between communities while modularity improves."""
+    degree = {u: sum(w for v, w in nbrs.items() if v != u) + 2 * nbrs.get(u, 0.0) for u, nbrs in adj.items()}
+    two_m = sum(degree.values())
+    comm = {u: u for u in adj}
+    total = dict(degree)
+    if two_m == 0:
+        return comm, False
+    order = sorted(adj)
+    improved, moved = False, True
+    while moved:
+        moved = False
+        rng.shuffle(order)
+        for u in order:
+            cu, ku = comm[u], degree[u]
+            links: dict[str, float] = defaultdict(float)
+            for v, w in adj[u].items():
+                if v != u:
+                    links[comm[v]] += w
+            total[cu] -= ku
+            best, best_gain = cu, links.get(cu, 0.0) - resolution * total[cu] * ku / two_m
+            for c, w in links.items():
+                gain = w - resolution * total[c] * ku / two_m
+                if gain > best_gain + 1e-12:
+                    best, best_gain = c, gain
+            total[best] += ku
+            if best != cu:
+                comm[u] = best
+                moved = improved = True
+    return comm, improved
+
+
+def _aggregate(adj: Graph, comm: dict[str, str]) -> Graph:
+    out: Graph = defaultdict(dict)
+    for u, nbrs in adj.items():
+        cu = comm[u]
+        for v, w in nbrs.items():
+            cv = comm[v]
+            if u == v:
+                out[cu][cu] = out[cu].get(cu, 0.0) + w
+            elif cu == cv:
+                out[cu][cu] = out[cu].get(cu, 0.0) + w / 2    # each internal edge is seen from both ends
+            else:
+                out[cu][cv] = out[cu].get(cv, 0.0) + w
+    return out
+
+
+def louvain(edges: Iterable[tuple[str, str, float]], resolution: float = 1.0,
+            seed: int = 0) -> list[list[str]]:
+    """Partition a weighted undirected graph; communities largest first, members sorted."""
+    adj = _build(edges)
+    rng = random.Random(seed)
+    members: dict[str, list[str]] = {u: [u] for u in adj}
+    while True:
+        comm, improved = _move_nodes(adj, resolution, rng)
+        if not improved:
+            break
+        merged: dict[str, list[str]] = defaultdict(list)
+        for node, c in comm.items():
+            merged[c].extend(members[node])
+        members = merged
+        adj = _aggregate(adj, comm)
+    return sorted((sorted(m) for m in members.values()), key=lambda m: (-len(m), m[0]))
+
+
+def membership_hash(members: Iterable[str]) -> str:
+    return hashlib.sha1("\n".join([SUMMARY_VERSION, *sorted(members)]).encode()).hexdigest()
+
+
+# ── Matching against the stored communities ───────────────────────────────────
+
+@dataclass
+class StoredCommunity:
+    key: str
+    members: frozenset[str]
+    membership_hash: str
+
+
+@dataclass
+class CommunityPlan:
+    unchanged: list[tuple[str, list[str]]] = field(default_factory=list)
+    changed:   list[tuple[str, list[str]]] = field(default_factory=list)
+    created:   list[tuple[str, list[str]]] = field(default_factory=list)
+    removed:   list[str]                   = field(default_factory=list)
+
+
+def plan_updates(stored: list[StoredCommunity], communities: list[list[str]]) -> CommunityPlan:
+    """Match new communities to stored ones by best Jaccard overlap, greedily."""
+    pairs = []
+    for i, members in enumerate(communities):
+        ms = set(members)
+        for s in stored:
+            overlap = len(ms & s.members)
+            if overlap:
+                jaccard = overlap / len(ms | s.members)
+                if jaccard >= MATCH_JACCARD:
+                    pairs.append((jaccard, i, s))
+    pairs.sort(key=lambda p: (-p[0], p[1], p[2].key))
+
+    plan = CommunityPlan()
+    taken_new: set[int] = set()
+    taken_old: set[str] = set()
+    for _, i, s in pairs:
+        if i in taken_new or s.key in taken_old:
+            continue
+        taken_new.add(i)
+        taken_old.add(s.key)
+        bucket = plan.unchanged if membership_hash(communities[i]) == s.membership_hash else plan.changed
+        bucket.append((s.key, communities[i]))
+    for i, members in enumerate(communities):
+        if i not in taken_new:
+            plan.created.append((uuid.uuid4().hex, members))
+    plan.removed = [s.key for s in stored if s.key not in taken_old]
+    return plan
+
+
+# ── Summaries ──────────────────────────────────────────────────────────────────
+
+class CommunitySummarizer:
+    def __init__(self, summarize: Optional[Callable[[str], str]] = None,
+                 min_size: int = MIN_COMMUNITY_SIZE, max_communities: int = MAX_COMMUNITIES) -> None:
+        self._summarize = summarize
+        self.min_size = min_size
+        self.max_communities = max_communities
+
+    def summarize(self, text: str) -> str:
+        if self._summarize is None:
+            from memory.ingestion.extractor import Extractor
+            extractor = Extractor()
+            self._summarize = lambda t: extractor.summarize(t, max_sentences=5)
+        return self._summarize(text)
+
+    async def run(self) -> dict:
+        from core.clients.neo4j import get_neo4j
+
+        edges = await get_neo4j().entity_graph_edges()
+        communities = [c for c in louvain(edges) if len(c) >= self.min_size][: self.max_communities]
+        stored = await self._load_stored()
+        plan = plan_updates(stored, communities)
+
+        todo = plan.changed + plan.created
+        inputs = await self._summary_inputs(todo)
+        semaphore = asyncio.Semaphore(SUMMARY_CONCURRENCY)
+
+        async def one(key: str, members: list[str]) -> tuple[str, list[str], Optional[str]]:
+            names, claims = inputs.get(key, ([], []))
+            if not claims:
+                return key, members, None
+            async with semaphore:
+                summary = await asyncio.to_thread(self.summarize, "\n".join(claims))
+            return key, members, f"[COMMUNITY: {', '.join(names[:6])}]\n{summary}"
+
+        written = await asyncio.gather(*(one(k, m) for k, m in todo))
+        await self._write(plan, [w for w in written if w[2] is not None])
+
+        stats = {
+            "edges": len(edges), "communities": len(communities),
+            "summarized": sum(1 for w in written if w[2] is not None),
+            "unchanged": len(plan.unchanged), "created": len(plan.created), "removed": len(plan.removed),
+        }
+        logger.info("Community summaries: %s", stats)
+        return stats
+
+    async def _load_stored(self) -> list[StoredCommunity]:
+        async with get_session() as session:
+            result = await session.execute(
+                select(SourceORM).where(
+                    SourceORM.source_type == SourceType.SYSTEM.value,
+                    SourceORM.external_id.like(f"{SOURCE_PREFIX}%"),
+                )
+            )
+            return [
+                StoredCommunity(
+                    key=s.external_id[len(SOURCE_PREFIX):],
+                    members=frozenset(s.metadata_.get("members", [])),
+                    membership_hash=s.metadata_.get("membership_hash", ""),
+                )
+                for s in result.scalars().all()
+            ]
+
+    async def _summary_inputs(self, todo: list[tuple[str, list[str]]]) -> dict[str, tuple[list[str], list[str]]]:
+        out: dict[str, tuple[list[str], list[str]]] = {}
+        async with get_session() as session:
+            for key, members in todo:
+                ids = [_uuid(m) for m in members if _uuid(m) is not None]
+                if not ids:
+                    continue
+                names = (await session.execute(
+                    select(EntityORM.canonical_name).where(EntityORM.entity_id.in_(ids))
+                    .order_by(EntityORM.canonical_name)
+                )).scalars().all()
+                claims = (await session.execute(
+                    select(ClaimORM.claim_text)
+                    .where(or_(ClaimORM.subject_entity_id.in_(ids), ClaimORM.object_entity_id.in_(ids)),
+                           ClaimORM.status == "active")
+                    .order_by(ClaimORM.base_importance.desc())
+                    .limit(CLAIMS_PER_SUMMARY)
+                )).scalars().all()
+                out[key] = (list(names), list(claims))
+        return out
+
+    async def _write(self, plan: CommunityPlan, summaries: list[tuple[str, list[str], str]]) -> None:
+        async with get_session() as session:
+            for key, members, text in summaries:
+                meta = {"members": members, "membership_hash": membership_hash(members),
+                        "summary_version": SUMMARY_VERSION}
+                source = (await session.execute(
+                    select(SourceORM).where(SourceORM.source_type == SourceType.SYSTEM.value,
+                                            SourceORM.external_id == SOURCE_PREFIX + key)
+                )).scalar_one_or_none()
+                if source is None:
+                    source = SourceORM(source_id=uuid.uuid4(), source_type=SourceType.SYSTEM.value,
+                                       external_id=SOURCE_PREFIX + key, trust_level=8)
+                    session.add(source)
+                source.title = text.split("\n", 1)[0]
+                source.metadata_ = meta
+                await session.flush()
+
+                artifact = (await session.execute(
+                    select(ArtifactORM).where(ArtifactORM.source_id == source.source_id,
+                                              ArtifactORM.artifact_type == ARTIFACT_TYPE)
+                )).scalar_one_or_none()
+                if artifact is None:
+                    artifact = ArtifactORM(artifact_id=uuid.uuid4(), source_id=source.source_id,
+                                           artifact_type=ARTIFACT_TYPE, text=text)
+                    session.add(artifact)
+                artifact.text = text
+                artifact.parser_version = SUMMARY_VERSION
+                await session.flush()
+                enqueue_index(session, IDX_ARTIFACTS, str(artifact.artifact_id), OpenSearchClient.artifact_document(
+                    str(artifact.artifact_id), str(source.source_id), ARTIFACT_TYPE, text, [],
+                ), embed_text=text)
+
+            # Dissolved communities, and the per-run segment summaries written
+            # before communities had stable sources.
+            doomed = or_(
+                SourceORM.external_id.in_([SOURCE_PREFIX + k for k in plan.removed]),
+                SourceORM.external_id.is_(None) & SourceORM.title.like("community_summary_%"),
+            )
+            rows = (await session.execute(
+                select(SourceORM.source_id, ArtifactORM.artifact_id)
+                .join(ArtifactORM, ArtifactORM.source_id == SourceORM.source_id, isouter=True)
+                .where(SourceORM.source_type == SourceType.SYSTEM.value, doomed)
+            )).all()
+            for _, artifact_id in rows:
+                if artifact_id is not None:
+                    enqueue_delete(session, IDX_ARTIFACTS, str(artifact_id))
+            if rows:
+                await session.execute(delete(SourceORM).where(
+                    SourceORM.source_id.in_({source_id for source_id, _ in rows})))
+        get_outbox_relay().wake()
+
+
+def _uuid(value: str) -> Optional[uuid.UUID]:
+    try:
+        return uuid.UUID(value)
+    except (TypeError, ValueError):
+        return None
@@ -9,9 +9,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.config import get_logger
 from core.clients.neo4j import get_neo4j
-from core.clients.opensearch import get_opensearch, IDX_ENTITIES
+from core.clients.opensearch import IDX_ENTITIES
+from core.clients.vector_store import get_vector_store
 from core.db import get_session
-from memory.ingestion.extractor import _EMBEDDINGS
+from memory.outbox import enqueue_delete, enqueue_graph, enqueue_update, get_outbox_relay
 from models.db.memory import ClaimORM, EntityORM
 
 logger = get_logger(__name__)
@@ -45,13 +46,13 @@ class EntityResolver:
         if len(entities) < 2:
             return []
 
-        # Fetch embeddings in bulk from OpenSearch
+        # Fetch embeddings from the vector store
         entity_embeddings: dict[str, list[float]] = {}
-        os_client = get_opensearch()
+        store = get_vector_store()
         for entity in entities:
             try:
-                hits = os_client.client.get(index=IDX_ENTITIES, id=str(entity.entity_id))
-                emb = hits["_source"].get("embedding")
+                doc = store.get_document(IDX_ENTITIES, str(entity.entity_id))
+                emb = doc.get("embedding") if doc else None
                 if emb:
                     entity_embeddings[str(entity.entity_id)] = emb
             except Exception:
@@ -111,28 +112,24 @@ class EntityResolver:
             )
 
             remove.status = "deleted"
-
-        # Neo4j: reroute edges and delete old node
-        neo4j = get_neo4j()
-        # transfer edges in neo4j
-        cypher = """
-        MATCH (old:Entity {entity_id: $old_id})
-        MATCH (keep:Entity {entity_id: $keep_id})
-        CALL apoc.refactor.mergeNodes([keep, old], {properties: 'combine', mergeRels: true})
-        YIELD node
-        RETURN node
-        """
-        try:
-            await neo4j.run_cypher(cypher, {"old_id": entity_id_remove, "keep_id": entity_id_keep})
-        except Exception as exc:
-            logger.warning("Neo4j APOC merge failed (non-fatal): %s", exc)
-            await neo4j.delete_entity(entity_id_remove)
-
-        # OpenSearch: delete old entity doc
-        try:
-            get_opensearch().delete_document(IDX_ENTITIES, entity_id_remove)
-        except Exception:
-            pass
+            enqueue_update(session, IDX_ENTITIES, entity_id_keep, {"aliases": merged_aliases})
+            enqueue_delete(session, IDX_ENTITIES, entity_id_remove)
+            enqueue_graph(session, "delete_entities", entity_id_remove, ids=[entity_id_remove])
+
+            # Neo4j: move the old node's edges onto the keeper before the commit
+            # releases the queued delete of the old node.
+            cypher = """
+            MATCH (old:Entity {entity_id: $old_id})
+            MATCH (keep:Entity {entity_id: $keep_id})
+            CALL apoc.refactor.mergeNodes([keep, old], {properties: 'combine', mergeRels: true})
+            YIELD node
+            RETURN node
+            """
+            try:
+                await get_neo4j().run_cypher(cypher, {"old_id": entity_id_remove, "keep_id": entity_id_keep})
+            except Exception as exc:
+                logger.warning("Neo4j APOC merge failed (non-fatal): %s", exc)
+        get_outbox_relay().wake()
 
         logger.info("Merged entity %s into %s", entity_id_remove, entity_id_keep)
 
@@ -104,13 +104,19 @@ class GraphOperations:
     # ── Relationship shortcuts ─────────────────────────────────────────────────
 
     async def mark_supersedes(self, new_claim_id: str, old_claim_id: str) -> None:
+        from memory.retrieval.profile_cache import affects_profile, bump_profile_version
+
         await self.create_claim_relation(new_claim_id, old_claim_id, ClaimRelationType.SUPERSEDES)
         async with get_session() as session:
-            await session.execute(
+            result = await session.execute(
                 update(ClaimORM)
                 .where(ClaimORM.claim_id == uuid.UUID(old_claim_id))
                 .values(status="superseded")
+                .returning(ClaimORM.memory_class, ClaimORM.segment)
             )
+            row = result.first()
+            if row is not None and affects_profile(row.memory_class, row.segment):
+                await bump_profile_version(session)
 
     async def mark_contradicts(self, claim_a_id: str, claim_b_id: str) -> None:
         await self.create_claim_relation(claim_a_id, claim_b_id, ClaimRelationType.CONTRADICTS)
@@ -3,12 +3,13 @@ from __future__ import annotations
 import uuid
 from typing import Any, Optional
 
-from sqlalchemy import select, text
+from sqlalchemy import Select, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.config import get_logger
 from core.clients.neo4j import get_neo4j
-from core.clients.opensearch import get_opensearch, IDX_CLAIMS
+from core.clients.opensearch import IDX_CLAIMS
+from core.clients.vector_store import get_vector_store
 from core.db import get_session
 from models.db.memory import ClaimORM, EntityORM
 from models.memory import ClaimSchema, EntitySchema, GraphExpandResult
@@ -35,8 +36,9 @@ class GraphTraversal:
         all_graph_edges: list[dict] = []
         graph_claim_ids: set[str] = set()
 
+        resolved = await neo4j.find_entities_by_names(seed_entity_names, limit=1)
         for name in seed_entity_names:
-            matches = await neo4j.find_entity_by_name(name)
+            matches = resolved.get(name)
             if not matches:
                 continue
 
@@ -143,7 +145,7 @@ class GraphTraversal:
         self, query_embedding: list[float], top_k: int = 5
     ) -> list[dict[str, Any]]:
         """Retrieve top-k community summary artifacts via vector search."""
-        hits = get_opensearch().knn_search(
+        hits = get_vector_store().knn_search(
             "memory_artifacts",
             embedding=query_embedding,
             k=top_k,
@@ -154,31 +156,13 @@ class GraphTraversal:
     async def get_procedural_memories(self) -> list[ClaimSchema]:
         """Always-loaded procedural/preference memories."""
         async with get_session() as session:
-            result = await session.execute(
-                select(ClaimORM)
-                .where(
-                    ClaimORM.memory_class.in_(["procedural", "semantic"]),
-                    ClaimORM.segment == "preferences_and_corrections",
-                    ClaimORM.status == "active",
-                )
-                .order_by(ClaimORM.base_importance.desc())
-                .limit(30)
-            )
+            result = await session.execute(procedural_memories_query())
             return [ClaimSchema.model_validate(c) for c in result.scalars().all()]
 
     async def get_profile_summary(self) -> str:
         """Build a compact profile summary from core_identity + skills claims."""
         async with get_session() as session:
-            result = await session.execute(
-                select(ClaimORM)
-                .where(
-                    ClaimORM.segment.in_(["core_identity", "skills_and_background"]),
-                    ClaimORM.status == "active",
-                    ClaimORM.tier.in_(["long_term", "permanent"]),
-                )
-                .order_by(ClaimORM.base_importance.desc())
-                .limit(20)
-            )
+            result = await session.execute(profile_claims_query())
             claims = result.scalars().all()
 
         if not claims:
@@ -186,3 +170,31 @@ class GraphTraversal:
 
         lines = [c.claim_text for c in claims]
         return "\n".join(f"- {line}" for line in lines)
+
+
+# Shared with memory.retrieval.profile_cache, which caches both result sets.
+
+def procedural_memories_query() -> Select:
+    return (
+        select(ClaimORM)
+        .where(
+            ClaimORM.memory_class.in_(["procedural", "semantic"]),
+            ClaimORM.segment == "preferences_and_corrections",
+            ClaimORM.status == "active",
+        )
+        .order_by(ClaimORM.base_importance.desc())
+        .limit(30)
+    )
+
+
+def profile_claims_query() -> Select:
+    return (
+        select(ClaimORM)
+        .where(
+            ClaimORM.segment.in_(["core_identity", "skills_and_background"]),
+            ClaimORM.status == "active",
+            ClaimORM.tier.in_(["long_term", "permanent"]),
+        )
+        .order_by(ClaimORM.base_importance.desc())
+        .limit(20)
+    )
@@ -1,18 +1,21 @@
 """Chat ingestion pipeline: processes a user/assistant turn into memory."""
 from __future__ import annotations
+import asyncio
 import uuid
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import select, func, text
+from sqlalchemy import Text, any_, bindparam, func, insert, select
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.config import get_logger
 from core.db import get_session
-from core.clients.neo4j import get_neo4j
-from core.clients.opensearch import get_opensearch, IDX_CLAIMS, IDX_ARTIFACTS
+from core.clients.opensearch import OpenSearchClient, IDX_CLAIMS, IDX_ARTIFACTS, IDX_ENTITIES
 from memory.ingestion.extractor import Extractor, EXTRACTOR_VERSION
-from memory.ingestion.memory_gate import MemoryGate, GateDecision
+from memory.ingestion.memory_gate import MemoryGate, GateDecision, GateResult
+from memory.outbox import enqueue_graph, enqueue_index, get_outbox_relay
+from memory.retrieval.profile_cache import affects_profile, bump_profile_version
 from models.memory import (
     ClaimStatus, EvidenceType, MemoryTier, SourceType, SEGMENT_DECAY_RATE,
 )
@@ -30,11 +33,48 @@ _gate      = MemoryGate()
 
 
 class ChatIngestionPipeline:
+    """Ingest one chat turn with a fixed number of Postgres round trips.
+
+    Extraction and gating run first, then every text the turn needs (the turn
+    itself, kept claims, candidate entities) is embedded in one call. Postgres
+    sees one entity lookup, one flush for source/artifact/new entities, one
+    multi-row claim INSERT ... RETURNING and one evidence INSERT. OpenSearch
+    and Neo4j writes are queued in the outbox within the same commit and
+    delivered in bulk by the relay.
+    """
+
     async def process(self, req: IngestChatRequest) -> dict:
         combined = f"User: {req.user_message}\n\nAssistant: {req.assistant_message}"
 
+        # 1. Extract entities and claims, then gate
+        result = await asyncio.to_thread(
+            _extractor.extract, combined, source_type="chat", trust_level=9,
+            context="Personal AI assistant conversation",
+        )
+        stats = {"entities": 0, "claims_auto": 0, "claims_provisional": 0, "claims_rejected": 0}
+        kept: list[tuple[CandidateClaim, GateResult, ClaimStatus]] = []
+        for cand, gate_result in _gate.evaluate_batch(result.claims, source_trust=result.source_trust, source_type="chat"):
+            if gate_result.decision == GateDecision.REJECT:
+                stats["claims_rejected"] += 1
+                continue
+            status = (ClaimStatus.ACTIVE if gate_result.decision == GateDecision.STORE_AUTO
+                      else ClaimStatus.PROVISIONAL)
+            kept.append((cand, gate_result, status))
+
+        # 2. One embedding call for the turn, kept claims and candidate entities
+        entity_cands = _dedupe_entities(result.entities)
+        texts = ([combined] + [cand.claim_text for cand, _, _ in kept]
+                 + [_entity_text(c) for c in entity_cands.values()])
+        embeddings = await asyncio.to_thread(_extractor.embed, texts)
+        embedding = embeddings[0]
+        claim_embs = embeddings[1:1 + len(kept)]
+        entity_embs = dict(zip(entity_cands, embeddings[1 + len(kept):]))
+
         async with get_session() as session:
-            # 1. Persist source record
+            # 3. Resolve entities with a single lookup; new ones are added, not flushed
+            entity_map, new_entities = await _resolve_entities(session, list(entity_cands.values()))
+            stats["entities"] = len(entity_map)
+
             source = SourceORM(
                 source_id=uuid.uuid4(),
                 source_type=SourceType.CHAT.value,
@@ -44,11 +84,6 @@ class ChatIngestionPipeline:
                 created_at=req.timestamp,
                 ingested_at=datetime.utcnow(),
             )
-            session.add(source)
-            await session.flush()
-
-            # 2. Embed and store artifact
-            embedding = _extractor.embed_one(combined)
             artifact = ArtifactORM(
                 artifact_id=uuid.uuid4(),
                 source_id=source.source_id,
@@ -56,113 +91,189 @@ class ChatIngestionPipeline:
                 text=combined,
                 parser_version=EXTRACTOR_VERSION,
             )
-            session.add(artifact)
+            session.add_all([source, artifact])
             await session.flush()
 
-            get_opensearch().index_artifact(
-                str(artifact.artifact_id), str(source.source_id),
-                "chat_turn", combined, embedding,
-                created_at=artifact.created_at.isoformat() if artifact.created_at else "",
-            )
-
-            # 3. Extract entities and claims
-            result = _extractor.extract(
-                combined, source_type="chat", trust_level=9,
-                context="Personal AI assistant conversation",
-            )
-
-            # 4. Resolve entities → ORM rows
-            entity_map: dict[str, uuid.UUID] = {}
-            for cand in result.entities:
-                eid = await _upsert_entity(session, cand)
-                entity_map[cand.canonical_name.lower()] = eid
-
-            # 5. Run gate and write claims
-            stats = {"entities": len(entity_map), "claims_auto": 0, "claims_provisional": 0, "claims_rejected": 0}
-            for cand, gate_result in _gate.evaluate_batch(result.claims, source_trust=result.source_trust, source_type="chat"):
-                if gate_result.decision == GateDecision.REJECT:
-                    stats["claims_rejected"] += 1
-                    continue
-
-                status = (ClaimStatus.ACTIVE if gate_result.decision == GateDecision.STORE_AUTO
-                          else ClaimStatus.PROVISIONAL)
-
-                # resolve entity IDs
+            # 4. One multi-row claim insert, one evidence insert
+            claim_rows: list[dict] = []
+            for cand, gate_result, status in kept:
                 subj_id = entity_map.get(cand.subject_name.lower())
                 obj_id  = entity_map.get(cand.object_name.lower()) if cand.object_name else None
-                obj_lit = cand.object_name if cand.object_name and not obj_id else None
-
-                tier = _infer_tier(cand)
-                decay = SEGMENT_DECAY_RATE.get(cand.segment, 0.01)
-
-                claim_orm = ClaimORM(
-                    claim_id=uuid.uuid4(),
-                    claim_text=cand.claim_text,
-                    subject_entity_id=subj_id,
-                    predicate=cand.predicate,
-                    object_entity_id=obj_id,
-                    object_literal=obj_lit,
-                    memory_class=cand.memory_class.value,
-                    tier=tier.value,
-                    segment=cand.segment.value,
-                    status=status.value,
-                    base_importance=gate_result.adjusted_importance,
-                    confidence=gate_result.adjusted_confidence,
-                    trust_score=result.source_trust,
-                    decay_rate=decay,
-                    valid_from=cand.valid_from,
-                    valid_to=cand.valid_to,
-                )
-                session.add(claim_orm)
-                await session.flush()
-
-                # evidence link
-                ev = EvidenceORM(
-                    evidence_id=uuid.uuid4(),
-                    claim_id=claim_orm.claim_id,
-                    source_id=source.source_id,
-                    artifact_id=artifact.artifact_id,
-                    evidence_type=cand.evidence_type.value,
-                    extractor_version=EXTRACTOR_VERSION,
-                    confidence=gate_result.adjusted_confidence,
-                )
-                session.add(ev)
-
-                # vector index
-                claim_emb = _extractor.embed_one(cand.claim_text)
-                os_id = get_opensearch().index_claim(
-                    str(claim_orm.claim_id), cand.claim_text, claim_emb,
-                    cand.segment.value, cand.memory_class.value, tier.value,
-                    status.value, gate_result.adjusted_confidence,
-                    gate_result.adjusted_importance, result.source_trust,
-                    predicate=cand.predicate,
-                )
-                claim_orm.opensearch_id = os_id
-
-                # neo4j
-                neo4j = get_neo4j()
-                await neo4j.upsert_claim_node(
-                    str(claim_orm.claim_id), cand.claim_text,
-                    predicate=cand.predicate, segment=cand.segment.value,
-                    confidence=gate_result.adjusted_confidence,
+                claim_id = uuid.uuid4()
+                claim_rows.append({
+                    "claim_id": claim_id,
+                    "claim_text": cand.claim_text,
+                    "subject_entity_id": subj_id,
+                    "predicate": cand.predicate,
+                    "object_entity_id": obj_id,
+                    "object_literal": cand.object_name if cand.object_name and not obj_id else None,
+                    "memory_class": cand.memory_class.value,
+                    "tier": _infer_tier(cand).value,
+                    "segment": cand.segment.value,
+                    "status": status.value,
+                    "base_importance": gate_result.adjusted_importance,
+                    "confidence": gate_result.adjusted_confidence,
+                    "trust_score": result.source_trust,
+                    "decay_rate": SEGMENT_DECAY_RATE.get(cand.segment, 0.01),
+                    "valid_from": cand.valid_from,
+                    "valid_to": cand.valid_to,
+                    "opensearch_id": str(claim_id),
+                })
+
+            created: dict[uuid.UUID, datetime] = {}
+            if claim_rows:
+                inserted = await session.execute(
+                    insert(ClaimORM).values(claim_rows).returning(ClaimORM.claim_id, ClaimORM.created_at)
                 )
-                if subj_id:
-                    await neo4j.link_claim_to_entity(str(claim_orm.claim_id), str(subj_id), "SUBJECT")
-                if obj_id:
-                    await neo4j.link_claim_to_entity(str(claim_orm.claim_id), str(obj_id), "OBJECT")
-                await neo4j.link_claim_to_source(str(claim_orm.claim_id), str(source.source_id))
+                created = {row.claim_id: row.created_at for row in inserted}
+                await session.execute(insert(EvidenceORM).values([
+                    {
+                        "evidence_id": uuid.uuid4(),
+                        "claim_id": row["claim_id"],
+                        "source_id": source.source_id,
+                        "artifact_id": artifact.artifact_id,
+                        "evidence_type": cand.evidence_type.value,
+                        "extractor_version": EXTRACTOR_VERSION,
+                        "confidence": row["confidence"],
+                    }
+                    for row, (cand, _, _) in zip(claim_rows, kept)
+                ]))
+
+            if any(affects_profile(cand.memory_class, cand.segment) for cand, _, _ in kept):
+                await bump_profile_version(session)
+
+            # 5. Search and graph mirrors go to the outbox, committed with the rows
+            aggregate = str(source.source_id)
+            enqueue_index(session, IDX_ARTIFACTS, str(artifact.artifact_id), OpenSearchClient.artifact_document(
+                str(artifact.artifact_id), aggregate, "chat_turn", combined,
+                embedding, created_at=req.timestamp.isoformat(),
+            ))
+            for row, emb in zip(claim_rows, claim_embs):
+                created_at = created.get(row["claim_id"])
+                enqueue_index(session, IDX_CLAIMS, row["opensearch_id"], OpenSearchClient.claim_document(
+                    row["opensearch_id"], row["claim_text"], emb,
+                    row["segment"], row["memory_class"], row["tier"], row["status"],
+                    row["confidence"], row["base_importance"], row["trust_score"],
+                    predicate=row["predicate"],
+                    created_at=created_at.isoformat() if created_at else "",
+                ))
+            for entity in new_entities:
+                enqueue_index(session, IDX_ENTITIES, str(entity.entity_id), OpenSearchClient.entity_document(
+                    str(entity.entity_id), entity.entity_type, entity.canonical_name,
+                    entity.description or "", list(entity.aliases or []),
+                    entity_embs[entity.canonical_name.lower()],
+                ))
 
-                if status == ClaimStatus.ACTIVE:
-                    stats["claims_auto"] += 1
-                else:
-                    stats["claims_provisional"] += 1
+            # New entities first (same aggregate) so claim edges can MATCH them
+            if new_entities:
+                enqueue_graph(session, "upsert_entities", aggregate, rows=[
+                    _entity_graph_row(e) for e in new_entities
+                ])
+            if claim_rows:
+                enqueue_graph(session, "upsert_claims", aggregate, rows=[
+                    {
+                        "claim_id": str(row["claim_id"]),
+                        "claim_text": row["claim_text"],
+                        "predicate": row["predicate"],
+                        "segment": row["segment"],
+                        "confidence": row["confidence"],
+                        "subject_id": str(row["subject_entity_id"]) if row["subject_entity_id"] else None,
+                        "object_id": str(row["object_entity_id"]) if row["object_entity_id"] else None,
+                        "source_id": aggregate,
+                    }
+                    for row in claim_rows
+                ])
 
+        get_outbox_relay().wake()
+        for _, _, status in kept:
+            key = "claims_auto" if status == ClaimStatus.ACTIVE else "claims_provisional"
+            stats[key] += 1
         logger.info("Chat ingested: %s", stats)
         return stats
 
 
-async def _upsert_entity(session: AsyncSession, cand: CandidateEntity) -> uuid.UUID:
-    """Find existing entity by name/alias or create a new one."""
+# ── Entity resolution ──────────────────────────────────────────────────────────
+
+def _entity_graph_row(entity: EntityORM) -> dict:
+    return {
+        "entity_id": str(entity.entity_id), "entity_type": entity.entity_type,
+        "canonical_name": entity.canonical_name, "description": entity.description or "",
+        "aliases": list(entity.aliases or []),
+    }
+
+
+def _entity_text(cand: CandidateEntity) -> str:
+    return f"{cand.canonical_name} {cand.description or ''} {' '.join(cand.aliases)}"
+
+
+def _dedupe_entities(cands: list[CandidateEntity]) -> dict[str, CandidateEntity]:
+    """Collapse candidates by lower-cased name, unioning aliases."""
+    out: dict[str, CandidateEntity] = {}
+    for cand in cands:
+        key = cand.canonical_name.lower()
+        prev = out.get(key)
+        if prev is None:
+            out[key] = cand.model_copy(update={"aliases": list(cand.aliases)})
+            continue
+        prev.aliases = list(dict.fromkeys(prev.aliases + cand.aliases))
+        if cand.description and not prev.description:
+            prev.description = cand.description
+    return out
+
+
+async def _resolve_entities(
+    session: AsyncSession, cands: list[CandidateEntity],
+) -> tuple[dict[str, uuid.UUID], list[EntityORM]]:
+    """Map candidate names to entity ids with one `lower(canonical_name) = ANY(...)` query.
+
+    Existing entities get aliases/description merged in place. Unknown names
+    become new EntityORM rows, added to the session (flushed with the caller's
+    next flush) and returned so the caller can mirror them to the other stores.
+    """
+    by_name = _dedupe_entities(cands)
+    if not by_name:
+        return {}, []
+
+    rows = await session.execute(
+        select(EntityORM)
+        .where(func.lower(EntityORM.canonical_name)
+               == any_(bindparam("names", list(by_name), type_=ARRAY(Text))))
+        .order_by(EntityORM.created_at)
+    )
+    existing: dict[str, EntityORM] = {}
+    for entity in rows.scalars():
+        existing.setdefault(entity.canonical_name.lower(), entity)
+
+    entity_map: dict[str, uuid.UUID] = {}
+    new_entities: list[EntityORM] = []
+    for key, cand in by_name.items():
+        entity = existing.get(key)
+        if entity is not None:
+            entity.aliases = list(set(entity.aliases or []) | set(cand.aliases))
+            if cand.description and not entity.description:
+                entity.description = cand.description
+        else:
+            entity = EntityORM(
+                entity_id=uuid.uuid4(),
+                entity_type=cand.entity_type.value,
+                canonical_name=cand.canonical_name,
+                description=cand.description,
+                aliases=list(cand.aliases),
+            )
+            session.add(entity)
+            new_entities.append(entity)
+        entity_map[key] = entity.entity_id  # type: ignore[assignment]
+    return entity_map, new_entities
+
+
+async def _upsert_entity(session: AsyncSession, cand: CandidateEntity,
+                         aggregate_id: Optional[str] = None) -> uuid.UUID:
+    """Find existing entity by name/alias or create a new one.
+
+    New entities are mirrored through the outbox; pass the caller's source id
+    as `aggregate_id` so the graph upsert is delivered before that source's
+    claim edges.
+    """
     result = await session.execute(
         select(EntityORM).where(
             EntityORM.canonical_name.ilike(cand.canonical_name)
@@ -187,21 +298,13 @@ async def _upsert_entity(session: AsyncSession, cand: CandidateEntity) -> uuid.U
     session.add(entity)
     await session.flush()
 
-    # neo4j mirror
-    neo4j = get_neo4j()
-    await neo4j.upsert_entity(
-        str(entity.entity_id), cand.entity_type.value,
-        cand.canonical_name, cand.description or "", cand.aliases,
-    )
-
-    # opensearch
-    emb = _extractor.embed_one(
-        f"{cand.canonical_name} {cand.description or ''} {' '.join(cand.aliases)}"
-    )
-    get_opensearch().index_entity(
-        str(entity.entity_id), cand.entity_type.value, cand.canonical_name,
-        cand.description or "", cand.aliases, emb,
-    )
+    entity_id = str(entity.entity_id)
+    enqueue_graph(session, "upsert_entities", aggregate_id or entity_id, rows=[_entity_graph_row(entity)])
+    # The relay embeds the entity text when it delivers the document.
+    enqueue_index(session, IDX_ENTITIES, entity_id, OpenSearchClient.entity_document(
+        entity_id, cand.entity_type.value, cand.canonical_name,
+        cand.description or "", cand.aliases, [],
+    ), embed_text=_entity_text(cand))
 
     return entity.entity_id  # type: ignore[return-value]
 
@@ -0,0 +1,310 @@
+"""Token-aware semantic chunker.
+
+Splits text into sections at headings, packs paragraphs (then sentences) into
+chunks close to a target token count, keeps tables together, merges small
+sections up to the target size under a combined label, and carries a
+sentence-aligned token overlap between consecutive chunks of the same section.
+Tokens are counted with tiktoken `cl100k_base`, the encoding used by the
+context assembler.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Pattern
+
+import tiktoken
+
+_ENC = tiktoken.get_encoding("cl100k_base")
+
+# Markdown headings, numbered headings ("2.1 Results") and short ALL-CAPS lines.
+_DEFAULT_HEADING = re.compile(
+    r"^\s*(?:#{1,6}\s+\S.*|\d+(?:\.\d+)*\.?\s+[A-Z][^.!?]{0,80}|[A-Z][A-Z0-9 &/,\-]{2,60})\s*$",
+)
+_TABLE_ROW = re.compile(r"^\s*\|.*\||\t.*\t")
+# Latin sentence ends need whitespace and a capital after them; CJK full-width
+# ends (。！？) split right after any closing bracket, since CJK text does not
+# put spaces between sentences.
+_SENTENCE_END = re.compile(
+    r"(?<=[.!?])[\"')\]]*\s+(?=[A-Z0-9\"'(\[])"
+    r"|(?:(?<=[。！？])|(?<=[。！？][」』）”’]))(?![。！？」』）”’])\s*(?=\S)"
+)
+
+
+@lru_cache(maxsize=8192)
+def count_tokens(text: str) -> int:
+    return len(_ENC.encode(text))
+
+
+@dataclass
+class Chunk:
+    text: str
+    section: str
+    char_start: int
+    char_end: int
+    token_count: int
+
+
+@dataclass
+class _Block:
+    text: str
+    start: int
+    end: int
+    tokens: int
+    is_table: bool = False
+
+
+@dataclass
+class _Section:
+    title: str
+    blocks: list[_Block]
+    has_heading: bool = False       # blocks[0] is the heading line
+
+    @property
+    def tokens(self) -> int:
+        return sum(b.tokens for b in self.blocks)
+
+    @property
+    def body_tokens(self) -> int:
+        return self.tokens - (self.blocks[0].tokens if self.has_heading and self.blocks else 0)
+
+
+class TokenChunker:
+    def __init__(
+        self,
+        target_tokens: int = 350,
+        max_tokens: int = 500,
+        min_section_tokens: int = 80,
+        overlap_tokens: int = 40,
+        heading_pattern: Optional[Pattern[str]] = None,
+        default_section: str = "document",
+    ) -> None:
+        if not 0 <= overlap_tokens < target_tokens <= max_tokens:
+            raise ValueError("expected 0 <= overlap_tokens < target_tokens <= max_tokens")
+        self.target_tokens = target_tokens
+        self.max_tokens = max_tokens
+        self.min_section_tokens = min_section_tokens
+        self.overlap_tokens = overlap_tokens
+        self.heading_pattern = heading_pattern or _DEFAULT_HEADING
+        self.default_section = default_section
+
+    def split(self, text: str) -> list[Chunk]:
+        sections = self._merge_small(self._sections(text))
+        chunks: list[Chunk] = []
+        for section in sections:
+            chunks.extend(self._pack(section, text))
+        return chunks
+
+    # ── Structure ──────────────────────────────────────────────────────────────
+
+    def _sections(self, text: str) -> list[_Section]:
+        sections: list[_Section] = [_Section(self.default_section, [])]
+        for block in _paragraph_blocks(text, self.heading_pattern):
+            first_line = block.text.split("\n", 1)[0]
+            if not block.is_table and self.heading_pattern.match(first_line):
+                title = _normalize_title(first_line)
+                if sections[-1].blocks or sections[-1].title != self.default_section:
+                    sections.append(_Section(title, [], has_heading=True))
+                else:
+                    sections[-1].title, sections[-1].has_heading = title, True
+            sections[-1].blocks.append(block)
+        return [s for s in sections if s.blocks]
+
+    def _merge_small(self, sections: list[_Section]) -> list[_Section]:
+        """Merge consecutive small sections up to `target_tokens`, keeping every part's label.
+
+        A bare heading (say "Part II" straight before "Introduction") goes
+        with the section after it. A section under `min_section_tokens`, or
+        one following such a section, joins its predecessor while the pair
+        still fits in `target_tokens`. The merged section is labelled with
+        all of its parts' titles ("education+skills"), and each part keeps
+        its heading line in the text.
+        """
+        merged: list[_Section] = []
+        carry: list[_Block] = []            # bare headings waiting for the section they introduce
+        for section in sections:
+            blocks = carry + section.blocks
+            carry = []
+            if section.has_heading and section.body_tokens == 0:
+                carry = blocks
+                continue
+            prev = merged[-1] if merged else None
+            tokens = sum(b.tokens for b in blocks)
+            if (
+                prev is not None
+                and (prev.tokens < self.min_section_tokens or tokens < self.min_section_tokens)
+                and prev.tokens + tokens <= self.target_tokens
+            ):
+                prev.blocks.extend(blocks)
+                prev.title = _merge_labels(prev.title, section.title)
+                continue
+            merged.append(_Section(section.title, blocks, section.has_heading))
+        if carry:
+            if merged:
+                merged[-1].blocks.extend(carry)
+            else:
+                merged.append(_Section(_normalize_title(carry[0].text), carry, has_heading=True))
+        return merged
+
+    # ── Packing ────────────────────────────────────────────────────────────────
+
+    def _pack(self, section: _Section, source: str) -> list[Chunk]:
+        units: list[_Block] = []
+        for block in section.blocks:
+            if block.tokens <= self.max_tokens:
+                units.append(block)
+            elif block.is_table:
+                units.extend(_split_lines(block, self.max_tokens))
+            else:
+                units.extend(_split_sentences(block, self.max_tokens))
+
+        chunks: list[Chunk] = []
+        current: list[_Block] = []
+        current_tokens = 0
+        overlap: list[_Block] = []
+
+        def _emit() -> None:
+            nonlocal current, current_tokens, overlap
+            text = _join(overlap + current, source)
+            chunks.append(Chunk(
+                text=text,
+                section=section.title,
+                char_start=current[0].start,
+                char_end=current[-1].end,
+                token_count=count_tokens(text),
+            ))
+            overlap = self._tail(current)
+            current, current_tokens = [], 0
+
+        for unit in units:
+            overlap_tokens = sum(b.tokens for b in overlap)
+            if current and current_tokens + unit.tokens + overlap_tokens > self.target_tokens:
+                _emit()
+            # A near-max unit opening a chunk drops the overlap rather than break max_tokens.
+            if not current and overlap and unit.tokens + sum(b.tokens for b in overlap) > self.max_tokens:
+                overlap = []
+            current.append(unit)
+            current_tokens += unit.tokens
+        if current:
+            _emit()
+        return chunks
+
+    def _tail(self, blocks: list[_Block]) -> list[_Block]:
+        """Trailing sentences of the previous chunk, up to `overlap_tokens`."""
+        if not self.overlap_tokens or not blocks:
+            return []
+        last = blocks[-1]
+        if last.is_table:
+            return []
+        tail: list[_Block] = []
+        budget = self.overlap_tokens
+        for sent in reversed(_split_sentences(last, self.max_tokens)):
+            if sent.tokens > budget:
+                break
+            tail.insert(0, sent)
+            budget -= sent.tokens
+        if not tail:
+            return []
+        return [_Block(" ".join(b.text for b in tail), tail[0].start, tail[-1].end,
+                       self.overlap_tokens - budget)]
+
+
+# ── Helpers ────────────────────────────────────────────────────────────────────
+
+def _normalize_title(line: str) -> str:
+    title = line.strip().lstrip("#").strip().lower()
+    title = re.sub(r"[^a-z0-9]+", "_", title).strip("_")
+    return title[:48] or "section"
+
+
+def _merge_labels(left: str, right: str) -> str:
+    labels = left.split("+")
+    return left if right in labels else f"{left}+{right}"
+
+
+def _join(blocks: list[_Block], source: str) -> str:
+    """Join blocks, keeping the original separator kind (space, line, paragraph)."""
+    parts = [blocks[0].text]
+    for prev, block in zip(blocks, blocks[1:]):
+        gap = source[prev.end:block.start] if prev.end <= block.start else "\n\n"
+        parts.append("\n\n" if gap.count("\n") > 1 else "\n" if "\n" in gap else " ")
+        parts.append(block.text)
+    return "".join(parts)
+
+
+def _paragraph_blocks(text: str, heading_pattern: Pattern[str]) -> list[_Block]:
+    """Blank-line separated paragraphs; headings and table runs become their own blocks."""
+    blocks: list[_Block] = []
+    lines = text.splitlines(keepends=True)
+    buf: list[str] = []
+    buf_start = 0
+    buf_table = False
+    pos = 0
+
+    def _flush() -> None:
+        nonlocal buf
+        raw = "".join(buf)
+        stripped = raw.strip()
+        if stripped:
+            start = buf_start + raw.index(stripped[0])
+            blocks.append(_Block(stripped, start, start + len(stripped), count_tokens(stripped), buf_table))
+        buf = []
+
+    for line in lines:
+        is_blank = not line.strip()
+        is_table = bool(_TABLE_ROW.match(line))
+        if is_blank or (buf and is_table != buf_table):
+            _flush()
+        if not is_blank:
+            if not buf:
+                buf_start, buf_table = pos, is_table
+            buf.append(line)
+            # A short heading line stands alone even without a blank line after it.
+            if not is_table and len(buf) == 1 and heading_pattern.match(line) and len(line) < 90:
+                _flush()
+        pos += len(line)
+    _flush()
+    return blocks
+
+
+def _split_sentences(block: _Block, max_tokens: int) -> list[_Block]:
+    out: list[_Block] = []
+    cursor = 0
+    pieces = _SENTENCE_END.split(block.text)
+    for piece in pieces:
+        idx = block.text.find(piece, cursor)
+        cursor = idx + len(piece)
+        piece = piece.strip()
+        if not piece:
+            continue
+        start = block.start + idx
+        tokens = count_tokens(piece)
+        if tokens <= max_tokens:
+            out.append(_Block(piece, start, start + len(piece), tokens))
+        else:
+            out.extend(_split_tokens(piece, start, max_tokens))
+    return out
+
+
+def _split_lines(block: _Block, max_tokens: int) -> list[_Block]:
+    out: list[_Block] = []
+    offset = 0
+    for line in block.text.split("\n"):
+        start = block.start + offset
+        offset += len(line) + 1
+        if line.strip():
+            out.append(_Block(line, start, start + len(line), count_tokens(line), is_table=True))
+    return out
+
+
+def _split_tokens(text: str, start: int, max_tokens: int) -> list[_Block]:
+    """Last resort for run-on text with no sentence boundaries."""
+    ids = _ENC.encode(text)
+    out: list[_Block] = []
+    offset = 0
+    for i in range(0, len(ids), max_tokens):
+        piece = _ENC.decode(ids[i:i + max_tokens])
+        out.append(_Block(piece, start + offset, start + offset + len(piece), min(max_tokens, len(ids) - i)))
+        offset += len(piece)
+    return out
@@ -1,38 +1,62 @@
 """Document ingestion pipeline: PDF, DOCX, plain text.
-Handles resume detection and section-aware chunking.
+Handles resume detection and token-aware, section-aware chunking;
+extraction runs concurrently across chunks, Postgres writes are batched and
+search/graph mirrors are queued in the outbox (see memory.outbox).
 """
 from __future__ import annotations
+import asyncio
+import hashlib
 import io
 import re
+import unicodedata
 import uuid
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
 
 from core.config import get_logger
 from core.db import get_session
-from core.clients.neo4j import get_neo4j
-from core.clients.opensearch import get_opensearch
+from core.clients.opensearch import IDX_ARTIFACTS, IDX_CLAIMS, OpenSearchClient
 from memory.ingestion.chat import _upsert_entity, _infer_tier
+from memory.ingestion.chunker import Chunk, TokenChunker
 from memory.ingestion.extractor import Extractor, EXTRACTOR_VERSION
 from memory.ingestion.memory_gate import MemoryGate, GateDecision
+from memory.outbox import enqueue_graph, enqueue_index, get_outbox_relay
+from memory.retrieval.profile_cache import affects_profile, bump_profile_version
 from models.memory import ClaimStatus, EvidenceType, MemoryTier, SourceType, SEGMENT_DECAY_RATE
 from models.db.memory import ArtifactORM, ClaimORM, EntityORM, EvidenceORM, SourceORM
-from models.memory import IngestDocumentResult
+from models.memory import CandidateClaim, ExtractionResult, IngestDocumentResult
+from services.app_state import DEFAULT_USER_ID
 
 logger = get_logger(__name__)
 
 _extractor = Extractor()
 _gate      = MemoryGate()
 
-CHUNK_SIZE   = 1200  # chars
-CHUNK_OVERLAP = 200
+# Chunk sizes in cl100k tokens; each chunk costs one extraction call.
+CHUNK_TOKENS         = 350
+CHUNK_MAX_TOKENS     = 500
+CHUNK_OVERLAP_TOKENS = 40
+MIN_SECTION_TOKENS   = 80      # smaller sections merge with a neighbour up to the chunk target
+RESUME_CHUNK_TOKENS         = 220
+RESUME_CHUNK_MAX_TOKENS     = 320
+RESUME_CHUNK_OVERLAP_TOKENS = 20
+
+EXTRACT_CONCURRENCY = 4
+
+# progress(stage, done, total) with stage in embed_chunks/extract/embed_claims/write
+ProgressCallback = Callable[[str, int, int], None]
 
 # Resume section headers (regex patterns)
 _RESUME_SECTIONS = re.compile(
     r"^\s*(education|experience|skills?|projects?|publications?|certifications?|awards?|summary|objective|interests?)\s*$",
     re.IGNORECASE | re.MULTILINE,
 )
+_RESUME_HEADING = re.compile(_RESUME_SECTIONS.pattern, re.IGNORECASE)
 
 
 def _extract_text_pdf(data: bytes) -> str:
@@ -43,24 +67,14 @@ def _extract_text_pdf(data: bytes) -> str:
 def _extract_text_docx(data: bytes) -> str:
     from docx import Document
     doc = Document(io.BytesIO(data))
-    return "\n".join(p.text for p in doc.paragraphs)
+    # Blank lines between paragraphs so the chunker can see their boundaries.
+    return "\n\n".join(p.text for p in doc.paragraphs if p.text.strip())
 
 
 def _extract_text_plain(data: bytes) -> str:
     return data.decode("utf-8", errors="replace")
 
 
-def _split_chunks(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> list[str]:
-    """Split text into overlapping character-level chunks."""
-    chunks = []
-    start = 0
-    while start < len(text):
-        end = min(start + chunk_size, len(text))
-        chunks.append(text[start:end])
-        start += chunk_size - overlap
-    return [c for c in chunks if c.strip()]
-
-
 def _is_resume(text: str, filename: str = "") -> bool:
     fn = filename.lower()
     if any(kw in fn for kw in ("resume", "cv", "curriculum")):
@@ -69,19 +83,75 @@ def _is_resume(text: str, filename: str = "") -> bool:
     return len(matches) >= 3
 
 
-def _split_resume_sections(text: str) -> list[tuple[str, str]]:
-    """Return list of (section_title, section_text) pairs."""
-    boundaries = [(m.start(), m.group().strip()) for m in _RESUME_SECTIONS.finditer(text)]
-    if not boundaries:
-        return [("full", text)]
-    sections = []
-    for i, (start, title) in enumerate(boundaries):
-        end = boundaries[i + 1][0] if i + 1 < len(boundaries) else len(text)
-        sections.append((title.lower(), text[start:end]))
-    return sections
+def _report(progress: Optional[ProgressCallback], stage: str, done: int, total: int) -> None:
+    if progress is None:
+        return
+    try:
+        progress(stage, done, total)
+    except Exception as exc:
+        logger.debug("Progress callback failed: %s", exc)
+
+
+def _duplicate_result(source_id: uuid.UUID) -> IngestDocumentResult:
+    return IngestDocumentResult(
+        source_id=source_id, artifacts_created=0, entities_created=0,
+        claims_created=0, claims_provisional=0, deduplicated=True,
+    )
+
+
+def _chunker(is_resume: bool) -> TokenChunker:
+    if is_resume:
+        return TokenChunker(
+            target_tokens=RESUME_CHUNK_TOKENS, max_tokens=RESUME_CHUNK_MAX_TOKENS,
+            overlap_tokens=RESUME_CHUNK_OVERLAP_TOKENS, min_section_tokens=MIN_SECTION_TOKENS,
+            heading_pattern=_RESUME_HEADING, default_section="header",
+        )
+    return TokenChunker(
+        target_tokens=CHUNK_TOKENS, max_tokens=CHUNK_MAX_TOKENS,
+        overlap_tokens=CHUNK_OVERLAP_TOKENS, min_section_tokens=MIN_SECTION_TOKENS,
+    )
+
+
+def content_checksum(text: str) -> str:
+    """SHA-256 over NFKC-normalized, whitespace-collapsed text."""
+    normalized = " ".join(unicodedata.normalize("NFKC", text).split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _ReusedChunk:
+    artifact_id: uuid.UUID
+    claims: list[tuple[uuid.UUID, str, float]]   # (claim_id, evidence_type, confidence)
+
+
+@dataclass
+class _PendingClaim:
+    cand: CandidateClaim
+    gate: Any
+    chunk_index: int
+    status: ClaimStatus
+    tier: MemoryTier
+    source_trust: float
 
 
 class DocumentIngestionPipeline:
+    """Staged document ingestion.
+
+    Chunks are embedded in one batch, extracted concurrently under a semaphore,
+    and every resulting claim is embedded in one batch and written to Postgres,
+    OpenSearch and Neo4j in bulk. Claims keep chunk order, then extractor order,
+    so ids, evidence links and artifact spans are deterministic for a given
+    extraction output.
+    """
+
+    def __init__(
+        self,
+        extractor: Optional[Extractor] = None,
+        extract_concurrency: int = EXTRACT_CONCURRENCY,
+    ) -> None:
+        self._extractor = extractor or _extractor
+        self._extract_concurrency = max(1, extract_concurrency)
+
     async def ingest_bytes(
         self,
         data: bytes,
@@ -95,6 +165,8 @@ class DocumentIngestionPipeline:
         raw_uri: Optional[str] = None,
         metadata: Optional[dict] = None,
         context_label: Optional[str] = None,
+        progress: Optional[ProgressCallback] = None,
+        user_id: str = DEFAULT_USER_ID,
     ) -> IngestDocumentResult:
         # ── Extract raw text ──────────────────────────────────────────────────
         if mimetype == "application/pdf" or filename.endswith(".pdf"):
@@ -119,165 +191,223 @@ class DocumentIngestionPipeline:
             SourceType.GOOGLE_PROFILE,
             SourceType.RESUME_PDF,
         }
+        source_label = context_label or ("resume" if is_resume else source_type.value.replace("_", " "))
+
+        # ── Content-addressed dedup ───────────────────────────────────────────
+        checksum = content_checksum(raw_text)
+        existing = await self._find_source(user_id, checksum)
+        if existing is not None:
+            logger.info("Skipping ingestion of %s: identical content already stored as source %s",
+                        filename, existing)
+            return _duplicate_result(existing)
+
+        # ── Stage 1: chunk + batch-embed ──────────────────────────────────────
+        chunks = [c for c in _chunker(is_resume).split(raw_text) if c.text.strip()]
+        chunk_hashes = [content_checksum(c.text) for c in chunks]
+        reused = await self._find_reusable_chunks(user_id, chunk_hashes)
+        to_extract = [i for i, h in enumerate(chunk_hashes) if h not in reused]
+        chunk_embs = await self._embed([c.text for c in chunks])
+        _report(progress, "embed_chunks", len(chunks), len(chunks))
+
+        # ── Stage 2: concurrent extraction (document summary alongside) ───────
+        results, summary = await asyncio.gather(
+            self._extract_all([chunks[i] for i in to_extract], source_type.value,
+                              trust_level, source_label, progress),
+            self._summarize(raw_text),
+        )
 
-        async with get_session() as session:
-            # ── Persist source ────────────────────────────────────────────────
-            source = SourceORM(
-                source_id=uuid.uuid4(),
-                source_type=source_type.value,
-                external_id=external_id,
-                title=title or filename,
-                author=author,
-                trust_level=trust_level,
-                raw_uri=raw_uri,
-                checksum=str(hash(data)),
-                ingested_at=datetime.utcnow(),
-                metadata_=metadata or {},
+        # ── Stage 3: gate + batch-embed claims ────────────────────────────────
+        pending: list[_PendingClaim] = []
+        for idx, result in zip(to_extract, results):
+            for cand, gate_result in _gate.evaluate_batch(
+                result.claims, source_trust=result.source_trust, source_type=source_type.value
+            ):
+                if gate_result.decision == GateDecision.REJECT:
+                    continue
+                status = (ClaimStatus.ACTIVE if gate_result.decision == GateDecision.STORE_AUTO
+                          else ClaimStatus.PROVISIONAL)
+                # Profile source claims are durable but still decay unless confirmed.
+                tier = MemoryTier.LONG_TERM if profile_source else _infer_tier(cand)
+                pending.append(_PendingClaim(cand, gate_result, idx, status, tier, result.source_trust))
+
+        claim_embs = await self._embed([p.cand.claim_text for p in pending] + ([summary] if summary else []))
+        sum_emb = claim_embs.pop() if summary else None
+        _report(progress, "embed_claims", len(pending), len(pending))
+
+        # ── Stage 4: batched writes ───────────────────────────────────────────
+        try:
+            return await self._write(
+                chunks, chunk_hashes, chunk_embs, reused, results, pending, claim_embs,
+                summary, sum_emb, progress,
+                SourceORM(
+                    source_id=uuid.uuid4(),
+                    user_id=user_id,
+                    source_type=source_type.value,
+                    external_id=external_id,
+                    title=title or filename,
+                    author=author,
+                    trust_level=trust_level,
+                    raw_uri=raw_uri,
+                    checksum=checksum,
+                    ingested_at=datetime.utcnow(),
+                    metadata_=metadata or {},
+                ),
             )
+        except IntegrityError:
+            # A concurrent ingest of the same content won the unique index.
+            existing = await self._find_source(user_id, checksum, release_forgotten=False)
+            if existing is None:
+                raise
+            return _duplicate_result(existing)
+
+    async def _write(
+        self,
+        chunks: list[Chunk],
+        chunk_hashes: list[str],
+        chunk_embs: list[list[float]],
+        reused: dict[str, _ReusedChunk],
+        results: list[ExtractionResult],
+        pending: list[_PendingClaim],
+        claim_embs: list[list[float]],
+        summary: Optional[str],
+        sum_emb: Optional[list[float]],
+        progress: Optional[ProgressCallback],
+        source: SourceORM,
+    ) -> IngestDocumentResult:
+        claims_auto = 0
+        claims_provisional = 0
+        entity_map: dict[str, uuid.UUID] = {}
+        async with get_session() as session:
             session.add(source)
             await session.flush()
 
-            # ── Chunk and index artifacts ─────────────────────────────────────
-            if is_resume:
-                sections = _split_resume_sections(raw_text)
-                chunks: list[tuple[str, str]] = [
-                    (sec_title, chunk)
-                    for sec_title, sec_text in sections
-                    for chunk in _split_chunks(sec_text, chunk_size=800, overlap=100)
-                ]
-            else:
-                chunks = [("document", c) for c in _split_chunks(raw_text)]
-
-            artifacts_created = 0
-            entities_created = 0
-            claims_auto = 0
-            claims_provisional = 0
-            entity_map: dict[str, uuid.UUID] = {}
-
-            for sec_title, chunk_text in chunks:
-                if not chunk_text.strip():
-                    continue
-
-                chunk_emb = _extractor.embed_one(chunk_text)
-                char_start = raw_text.find(chunk_text[:80])
-                artifact = ArtifactORM(
+            artifacts = [
+                ArtifactORM(
                     artifact_id=uuid.uuid4(),
                     source_id=source.source_id,
-                    artifact_type=f"chunk_{sec_title}",
-                    text=chunk_text,
-                    char_start=char_start if char_start >= 0 else None,
-                    char_end=(char_start + len(chunk_text)) if char_start >= 0 else None,
+                    artifact_type=f"chunk_{chunk.section}",
+                    text=chunk.text,
+                    content_hash=chunk_hash,
+                    char_start=chunk.char_start,
+                    char_end=chunk.char_end,
                     parser_version=EXTRACTOR_VERSION,
                 )
-                session.add(artifact)
-                await session.flush()
-
-                get_opensearch().index_artifact(
-                    str(artifact.artifact_id), str(source.source_id),
-                    artifact.artifact_type, chunk_text, chunk_emb,
-                )
-                artifacts_created += 1
-
-                # context hints for resume
-                source_label = context_label or ("resume" if is_resume else source_type.value.replace("_", " "))
-                context = f"This is from a {source_label} section: {sec_title}"
-                result = _extractor.extract(
-                    chunk_text,
-                    source_type=source_type.value,
-                    trust_level=trust_level,
-                    context=context,
-                )
+                for chunk, chunk_hash in zip(chunks, chunk_hashes)
+            ]
+            session.add_all(artifacts)
+            await session.flush()
+            aggregate = str(source.source_id)
+            for a, emb in zip(artifacts, chunk_embs):
+                enqueue_index(session, IDX_ARTIFACTS, str(a.artifact_id), OpenSearchClient.artifact_document(
+                    str(a.artifact_id), aggregate, a.artifact_type, a.text, emb,
+                ))
 
+            for result in results:
                 for cand in result.entities:
                     name_key = cand.canonical_name.lower()
                     if name_key not in entity_map:
-                        eid = await _upsert_entity(session, cand)
-                        entity_map[name_key] = eid
-                        entities_created += 1
-
-                for cand, gate_result in _gate.evaluate_batch(
-                    result.claims, source_trust=result.source_trust, source_type=source_type.value
-                ):
-                    if gate_result.decision == GateDecision.REJECT:
-                        continue
-
-                    status = (ClaimStatus.ACTIVE if gate_result.decision == GateDecision.STORE_AUTO
-                              else ClaimStatus.PROVISIONAL)
-
-                    # Profile source claims are durable but still decay unless confirmed.
-                    tier = MemoryTier.LONG_TERM if profile_source else _infer_tier(cand)
-                    decay = SEGMENT_DECAY_RATE.get(cand.segment, 0.01)
-
-                    subj_id = entity_map.get(cand.subject_name.lower())
-                    obj_id  = entity_map.get(cand.object_name.lower()) if cand.object_name else None
-                    obj_lit = cand.object_name if cand.object_name and not obj_id else None
-
-                    claim_orm = ClaimORM(
-                        claim_id=uuid.uuid4(),
-                        claim_text=cand.claim_text,
-                        subject_entity_id=subj_id,
-                        predicate=cand.predicate,
-                        object_entity_id=obj_id,
-                        object_literal=obj_lit,
-                        memory_class=cand.memory_class.value,
-                        tier=tier.value,
-                        segment=cand.segment.value,
-                        status=status.value,
-                        base_importance=gate_result.adjusted_importance,
-                        confidence=gate_result.adjusted_confidence,
-                        trust_score=result.source_trust,
-                        decay_rate=decay,
-                        valid_from=cand.valid_from,
-                        valid_to=cand.valid_to,
-                    )
-                    session.add(claim_orm)
-                    await session.flush()
-
-                    ev = EvidenceORM(
+                        entity_map[name_key] = await _upsert_entity(session, cand, aggregate)
+
+            claim_rows: list[ClaimORM] = []
+            for p in pending:
+                cand = p.cand
+                subj_id = entity_map.get(cand.subject_name.lower())
+                obj_id  = entity_map.get(cand.object_name.lower()) if cand.object_name else None
+                obj_lit = cand.object_name if cand.object_name and not obj_id else None
+                claim_rows.append(ClaimORM(
+                    claim_id=uuid.uuid4(),
+                    claim_text=cand.claim_text,
+                    subject_entity_id=subj_id,
+                    predicate=cand.predicate,
+                    object_entity_id=obj_id,
+                    object_literal=obj_lit,
+                    memory_class=cand.memory_class.value,
+                    tier=p.tier.value,
+                    segment=cand.segment.value,
+                    status=p.status.value,
+                    base_importance=p.gate.adjusted_importance,
+                    confidence=p.gate.adjusted_confidence,
+                    trust_score=p.source_trust,
+                    decay_rate=SEGMENT_DECAY_RATE.get(cand.segment, 0.01),
+                    valid_from=cand.valid_from,
+                    valid_to=cand.valid_to,
+                ))
+            session.add_all(claim_rows)
+            await session.flush()
+
+            session.add_all([
+                EvidenceORM(
+                    evidence_id=uuid.uuid4(),
+                    claim_id=claim.claim_id,
+                    source_id=source.source_id,
+                    artifact_id=artifacts[p.chunk_index].artifact_id,
+                    span_start=artifacts[p.chunk_index].char_start,
+                    span_end=artifacts[p.chunk_index].char_end,
+                    evidence_type=p.cand.evidence_type.value,
+                    extractor_version=EXTRACTOR_VERSION,
+                    confidence=p.gate.adjusted_confidence,
+                )
+                for p, claim in zip(pending, claim_rows)
+            ])
+
+            # Unchanged chunks point new evidence at the claims already extracted from them.
+            reused_links: list[uuid.UUID] = []
+            for artifact, chunk_hash in zip(artifacts, chunk_hashes):
+                prior = reused.get(chunk_hash)
+                if prior is None:
+                    continue
+                for claim_id, evidence_type, confidence in prior.claims:
+                    session.add(EvidenceORM(
                         evidence_id=uuid.uuid4(),
-                        claim_id=claim_orm.claim_id,
+                        claim_id=claim_id,
                         source_id=source.source_id,
                         artifact_id=artifact.artifact_id,
                         span_start=artifact.char_start,
                         span_end=artifact.char_end,
-                        evidence_type=cand.evidence_type.value,
+                        evidence_type=evidence_type,
                         extractor_version=EXTRACTOR_VERSION,
-                        confidence=gate_result.adjusted_confidence,
-                    )
-                    session.add(ev)
-
-                    # vector index
-                    claim_emb = _extractor.embed_one(cand.claim_text)
-                    get_opensearch().index_claim(
-                        str(claim_orm.claim_id), cand.claim_text, claim_emb,
-                        cand.segment.value, cand.memory_class.value, tier.value,
-                        status.value, gate_result.adjusted_confidence,
-                        gate_result.adjusted_importance, result.source_trust,
-                        predicate=cand.predicate,
-                    )
-
-                    # neo4j
-                    neo4j = get_neo4j()
-                    await neo4j.upsert_claim_node(
-                        str(claim_orm.claim_id), cand.claim_text,
-                        predicate=cand.predicate, segment=cand.segment.value,
-                        confidence=gate_result.adjusted_confidence,
-                    )
-                    if subj_id:
-                        await neo4j.link_claim_to_entity(str(claim_orm.claim_id), str(subj_id), "SUBJECT")
-                    if obj_id:
-                        await neo4j.link_claim_to_entity(str(claim_orm.claim_id), str(obj_id), "OBJECT")
-                    await neo4j.link_claim_to_source(str(claim_orm.claim_id), str(source.source_id))
-
-                    if status == ClaimStatus.ACTIVE:
-                        claims_auto += 1
-                    else:
-                        claims_provisional += 1
+                        confidence=confidence,
+                    ))
+                    reused_links.append(claim_id)
+
+            for claim, emb in zip(claim_rows, claim_embs):
+                enqueue_index(session, IDX_CLAIMS, str(claim.claim_id), OpenSearchClient.claim_document(
+                    str(claim.claim_id), claim.claim_text, emb,
+                    claim.segment, claim.memory_class, claim.tier, claim.status,
+                    claim.confidence, claim.base_importance, claim.trust_score,
+                    predicate=claim.predicate,
+                ))
+            enqueue_graph(session, "upsert_claims", aggregate, rows=[
+                {
+                    "claim_id": str(claim.claim_id),
+                    "claim_text": claim.claim_text,
+                    "predicate": claim.predicate,
+                    "segment": claim.segment,
+                    "confidence": claim.confidence,
+                    "subject_id": str(claim.subject_entity_id) if claim.subject_entity_id else None,
+                    "object_id": str(claim.object_entity_id) if claim.object_entity_id else None,
+                    "source_id": aggregate,
+                }
+                for claim in claim_rows
+            ])
+            if reused_links:
+                enqueue_graph(
+                    session, "link_claims_to_source", aggregate,
+                    claim_ids=[str(cid) for cid in dict.fromkeys(reused_links)], source_id=aggregate,
+                )
+            if any(affects_profile(p.cand.memory_class, p.cand.segment) for p in pending):
+                await bump_profile_version(session)
+            for p in pending:
+                if p.status == ClaimStatus.ACTIVE:
+                    claims_auto += 1
+                else:
+                    claims_provisional += 1
+            _report(progress, "write", len(claim_rows), len(claim_rows))
+
+            artifacts_created = len(artifacts)
 
             # Full-document summary artifact
-            if len(raw_text) > 500:
-                summary = _extractor.summarize(raw_text, max_sentences=5)
-                sum_emb = _extractor.embed_one(summary)
+            if summary:
                 sum_artifact = ArtifactORM(
                     artifact_id=uuid.uuid4(),
                     source_id=source.source_id,
@@ -287,20 +417,127 @@ class DocumentIngestionPipeline:
                 )
                 session.add(sum_artifact)
                 await session.flush()
-                get_opensearch().index_artifact(
-                    str(sum_artifact.artifact_id), str(source.source_id),
-                    "document_summary", summary, sum_emb,
-                )
+                enqueue_index(session, IDX_ARTIFACTS, str(sum_artifact.artifact_id), OpenSearchClient.artifact_document(
+                    str(sum_artifact.artifact_id), aggregate, "document_summary", summary, sum_emb,
+                ))
                 artifacts_created += 1
 
+        get_outbox_relay().wake()
         return IngestDocumentResult(
             source_id=source.source_id,
             artifacts_created=artifacts_created,
-            entities_created=entities_created,
+            entities_created=len(entity_map),
             claims_created=claims_auto,
             claims_provisional=claims_provisional,
+            chunks_reused=sum(1 for h in chunk_hashes if h in reused),
         )
 
+    # ── Dedup lookups ──────────────────────────────────────────────────────────
+
+    async def _find_source(self, user_id: str, checksum: str, release_forgotten: bool = True) -> Optional[uuid.UUID]:
+        """The stored source with this content, unless every claim it backed was forgotten.
+
+        A forget deletes claims and, through the cascade, their evidence. A
+        source left with no evidence gives up its checksum so the same content
+        can be ingested again.
+        """
+        async with get_session() as session:
+            source_id = (await session.execute(
+                select(SourceORM.source_id)
+                .where(SourceORM.user_id == user_id)
+                .where(SourceORM.checksum == checksum)
+                .limit(1)
+            )).scalar_one_or_none()
+            if source_id is None or not release_forgotten:
+                return source_id
+            has_evidence = (await session.execute(
+                select(EvidenceORM.evidence_id).where(EvidenceORM.source_id == source_id).limit(1)
+            )).first() is not None
+            if has_evidence:
+                return source_id
+            await session.execute(
+                update(SourceORM).where(SourceORM.source_id == source_id).values(checksum=None)
+            )
+        logger.info("Source %s has no remaining claims; releasing its checksum for re-ingest", source_id)
+        return None
+
+    async def _find_reusable_chunks(self, user_id: str, hashes: list[str]) -> dict[str, _ReusedChunk]:
+        """Earliest stored artifact per chunk hash (same extractor version) that still has live claims.
+
+        An artifact whose claims were all forgotten or archived is not reused;
+        its chunk is extracted again.
+        """
+        if not hashes:
+            return {}
+        async with get_session() as session:
+            artifacts = (await session.execute(
+                select(ArtifactORM.content_hash, ArtifactORM.artifact_id)
+                .join(SourceORM, SourceORM.source_id == ArtifactORM.source_id)
+                .where(SourceORM.user_id == user_id)
+                .where(ArtifactORM.content_hash.in_(set(hashes)))
+                .where(ArtifactORM.parser_version == EXTRACTOR_VERSION)
+                .order_by(ArtifactORM.created_at, ArtifactORM.artifact_id)
+            )).all()
+            if not artifacts:
+                return {}
+
+            evidence = (await session.execute(
+                select(EvidenceORM.artifact_id, EvidenceORM.claim_id,
+                       EvidenceORM.evidence_type, EvidenceORM.confidence)
+                .join(ClaimORM, ClaimORM.claim_id == EvidenceORM.claim_id)
+                .where(EvidenceORM.artifact_id.in_([a.artifact_id for a in artifacts]))
+                .where(ClaimORM.status.in_([ClaimStatus.ACTIVE.value, ClaimStatus.PROVISIONAL.value]))
+                .order_by(EvidenceORM.created_at, EvidenceORM.evidence_id)
+            )).all()
+        claims: dict[uuid.UUID, list[tuple[uuid.UUID, str, float]]] = {}
+        for artifact_id, claim_id, evidence_type, confidence in evidence:
+            claims.setdefault(artifact_id, []).append((claim_id, evidence_type, confidence))
+        reused: dict[str, _ReusedChunk] = {}
+        for chunk_hash, artifact_id in artifacts:
+            if chunk_hash not in reused and artifact_id in claims:
+                reused[chunk_hash] = _ReusedChunk(artifact_id, claims[artifact_id])
+        return reused
+
+    # ── Stages ─────────────────────────────────────────────────────────────────
+
+    async def _embed(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        return await asyncio.to_thread(self._extractor.embed, texts)
+
+    async def _summarize(self, raw_text: str) -> Optional[str]:
+        if len(raw_text) <= 500:
+            return None
+        return await asyncio.to_thread(self._extractor.summarize, raw_text, 5)
+
+    async def _extract_all(
+        self,
+        chunks: list[Chunk],
+        source_type: str,
+        trust_level: int,
+        source_label: str,
+        progress: Optional[ProgressCallback] = None,
+    ) -> list[ExtractionResult]:
+        """Run extraction per chunk under a semaphore; results keep chunk order."""
+        sem = asyncio.Semaphore(self._extract_concurrency)
+        done = 0
+
+        async def _one(chunk: Chunk) -> ExtractionResult:
+            nonlocal done
+            async with sem:
+                result = await asyncio.to_thread(
+                    self._extractor.extract,
+                    chunk.text,
+                    source_type=source_type,
+                    trust_level=trust_level,
+                    context=f"This is from a {source_label} section: {chunk.section}",
+                )
+            done += 1
+            _report(progress, "extract", done, len(chunks))
+            return result
+
+        return list(await asyncio.gather(*(_one(c) for c in chunks)))
+
     async def ingest_text(
         self,
         text: str,
@@ -311,6 +548,7 @@ class DocumentIngestionPipeline:
         author: Optional[str] = None,
         trust_level: int = 8,
         metadata: Optional[dict] = None,
+        user_id: str = DEFAULT_USER_ID,
     ) -> IngestDocumentResult:
         return await self.ingest_bytes(
             text.encode("utf-8"),
@@ -323,4 +561,5 @@ class DocumentIngestionPipeline:
             external_id=external_id,
             metadata=metadata,
             context_label=source_type.value.replace("_", " "),
+            user_id=user_id,
         )
@@ -0,0 +1,228 @@
+"""Embedding providers: a small registry plus dynamic micro-batching.
+
+`settings.embedding_provider` selects the backend:
+
+  google  — Gemini `gemini-embedding-2` over the network (default)
+  onnx    — CPU-only sentence-embedding model from `settings.embedding_model_path`
+            (a directory holding `model.onnx` and `tokenizer.json`); needs the
+            `local-embeddings` extra (onnxruntime, tokenizers)
+
+Every provider returns `EMBEDDING_DIM`-wide vectors so the search indices keep
+one mapping. Vectors from different providers live in different spaces, though:
+switching providers on an existing install means re-embedding the indices.
+
+`EmbeddingBatcher` merges concurrent query embeddings on the event loop into
+one provider call, cut when `max_batch` texts are waiting or the oldest has
+waited `max_wait_ms`; up to `max_inflight` batches run at once.
+"""
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from typing import Callable, Optional, Protocol
+
+import numpy as np
+
+from core.clients.opensearch import EMBEDDING_DIM
+from core.config import get_logger, get_settings
+
+logger = get_logger(__name__)
+
+
+class EmbeddingProvider(Protocol):
+    dim: int
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]: ...
+    def embed_queries(self, texts: list[str]) -> list[list[float]]: ...
+    def embed_query(self, text: str) -> list[float]: ...
+
+
+# ── Providers ──────────────────────────────────────────────────────────────────
+
+class GoogleEmbeddingProvider:
+    def __init__(self, dim: int = EMBEDDING_DIM) -> None:
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+        self.dim = dim
+        self._client = GoogleGenerativeAIEmbeddings(
+            model="gemini-embedding-2",
+            output_dimensionality=dim,
+            google_api_key=get_settings().google_api_key,
+        )
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._client.embed_documents(texts)
+
+    def embed_queries(self, texts: list[str]) -> list[list[float]]:
+        return self._client.embed_documents(texts, task_type="RETRIEVAL_QUERY")
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._client.embed_query(text)
+
+
+def fit_dimension(vectors: np.ndarray, dim: int, seed: int = 0) -> np.ndarray:
+    """Zero-pad narrower vectors; project wider ones with a fixed random matrix.
+
+    Padding leaves cosine similarity untouched. The projection is a seeded
+    Gaussian (Johnson–Lindenstrauss) map, identical across processes, so
+    stored and query vectors stay comparable.
+    """
+    native = vectors.shape[1]
+    if native < dim:
+        out = np.zeros((len(vectors), dim), dtype=np.float32)
+        out[:, :native] = vectors
+    elif native > dim:
+        proj = np.random.default_rng(seed).normal(size=(native, dim)).astype(np.float32)
+        out = vectors @ (proj / np.sqrt(dim))
+    else:
+        out = vectors.astype(np.float32, copy=False)
+    norms = np.linalg.norm(out, axis=1, keepdims=True)
+    return out / np.maximum(norms, 1e-12)
+
+
+class OnnxEmbeddingProvider:
+    """Mean-pooled sentence embeddings from an exported transformer, on CPU."""
+
+    def __init__(self, model_dir: str, dim: int = EMBEDDING_DIM, max_length: int = 256,
+                 threads: int = 0) -> None:
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as exc:
+            raise RuntimeError(
+                "The onnx embedding provider needs the 'local-embeddings' extra "
+                "(onnxruntime, tokenizers)"
+            ) from exc
+
+        path = Path(model_dir)
+        if not (path / "model.onnx").exists():
+            raise RuntimeError(f"No model.onnx under embedding_model_path={model_dir!r}")
+        self.dim = dim
+        self._tokenizer = Tokenizer.from_file(str(path / "tokenizer.json"))
+        self._tokenizer.enable_truncation(max_length=max_length)
+        self._tokenizer.enable_padding()
+        opts = ort.SessionOptions()
+        if threads:
+            opts.intra_op_num_threads = threads
+        self._session = ort.InferenceSession(str(path / "model.onnx"), opts,
+                                             providers=["CPUExecutionProvider"])
+        self._inputs = {i.name for i in self._session.get_inputs()}
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        enc = self._tokenizer.encode_batch(texts)
+        ids = np.array([e.ids for e in enc], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in enc], dtype=np.int64)
+        feeds = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self._inputs:
+            feeds["token_type_ids"] = np.zeros_like(ids)
+        hidden = self._session.run(None, {k: v for k, v in feeds.items() if k in self._inputs})[0]
+        m = mask[..., None].astype(np.float32)
+        pooled = (hidden * m).sum(axis=1) / np.maximum(m.sum(axis=1), 1e-9)
+        return fit_dimension(pooled.astype(np.float32), self.dim).tolist()
+
+    def embed_queries(self, texts: list[str]) -> list[list[float]]:
+        return self.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+
+# ── Registry ───────────────────────────────────────────────────────────────────
+
+_PROVIDERS: dict[str, Callable[[], EmbeddingProvider]] = {
+    "google": lambda: GoogleEmbeddingProvider(),
+    "onnx": lambda: OnnxEmbeddingProvider(get_settings().embedding_model_path),
+}
+
+
+def register_embedding_provider(name: str, factory: Callable[[], EmbeddingProvider]) -> None:
+    _PROVIDERS[name] = factory
+
+
+# ── Micro-batching ─────────────────────────────────────────────────────────────
+
+class EmbeddingBatcher:
+    def __init__(self, embed: Callable[[list[str]], list[list[float]]],
+                 max_batch: int = 32, max_wait_ms: float = 5.0, max_inflight: int = 4) -> None:
+        self._embed = embed
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._full = asyncio.Event()
+        self._slots = asyncio.Semaphore(max_inflight)
+        self._flusher: Optional[asyncio.Task] = None
+        self._inflight: set[asyncio.Task] = set()
+        self.batches = 0
+        self.texts = 0
+
+    async def embed_one(self, text: str) -> list[float]:
+        fut = asyncio.get_running_loop().create_future()
+        self._pending.append((text, fut))
+        if len(self._pending) >= self.max_batch:
+            self._full.set()
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._collect())
+        return await fut
+
+    async def _collect(self) -> None:
+        """Cut batches until nothing is pending; each runs as its own task."""
+        while self._pending:
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self.max_wait)
+            except asyncio.TimeoutError:
+                pass
+            await self._slots.acquire()
+            self._full.clear()
+            batch, self._pending = self._pending[: self.max_batch], self._pending[self.max_batch:]
+            if len(self._pending) >= self.max_batch:
+                self._full.set()
+            self.batches += 1
+            self.texts += len(batch)
+            task = asyncio.create_task(self._run(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _run(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        try:
+            vectors = await asyncio.to_thread(self._embed, [t for t, _ in batch])
+        except Exception as exc:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(exc)
+            return
+        finally:
+            self._slots.release()
+        for (_, fut), vec in zip(batch, vectors):
+            if not fut.done():
+                fut.set_result(vec)
+
+
+# ── Module-level singletons ────────────────────────────────────────────────────
+
+_provider: Optional[EmbeddingProvider] = None
+_batcher: Optional[EmbeddingBatcher] = None
+
+
+def get_embedding_provider() -> EmbeddingProvider:
+    global _provider
+    if _provider is None:
+        name = get_settings().embedding_provider
+        if name not in _PROVIDERS:
+            raise RuntimeError(f"Unknown embedding_provider {name!r}; known: {sorted(_PROVIDERS)}")
+        _provider = _PROVIDERS[name]()
+        logger.info("Embedding provider: %s (%d dims)", name, _provider.dim)
+    return _provider
+
+
+def get_embedding_batcher() -> EmbeddingBatcher:
+    global _batcher
+    if _batcher is None:
+        s = get_settings()
+        _batcher = EmbeddingBatcher(
+            lambda texts: get_embedding_provider().embed_queries(texts),
+            max_batch=s.embedding_batch_max,
+            max_wait_ms=s.embedding_batch_wait_ms,
+        )
+    return _batcher
@@ -5,10 +5,10 @@ import re
 from typing import Any
 
 from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
 
-from core.config import get_settings, get_logger
+from core.config import get_logger
 from core.llm import llm
+from memory.ingestion.embeddings import get_embedding_batcher, get_embedding_provider
 from prompts.memory import EXTRACTION_SYSTEM_PROMPT
 from models.memory import (
     EntityType, MemoryClass, MemorySegment, EvidenceType,
@@ -19,12 +19,6 @@ from models.memory import (
 
 logger = get_logger(__name__)
 
-_EMBEDDINGS = GoogleGenerativeAIEmbeddings(
-    model="gemini-embedding-2",
-    output_dimensionality=768,
-    google_api_key=get_settings().google_api_key,
-)
-
 EXTRACTOR_VERSION = "1.0.0"
 
 def _clean_json(raw: str) -> str:
@@ -40,10 +34,14 @@ class Extractor:
         self._llm = llm
 
     def embed(self, texts: list[str]) -> list[list[float]]:
-        return _EMBEDDINGS.embed_documents(texts)
+        return get_embedding_provider().embed_documents(texts)
 
     def embed_one(self, text: str) -> list[float]:
-        return _EMBEDDINGS.embed_query(text)
+        return get_embedding_provider().embed_query(text)
+
+    async def aembed_one(self, text: str) -> list[float]:
+        """Query embedding via the shared micro-batcher (for request paths)."""
+        return await get_embedding_batcher().embed_one(text)
 
     def extract(self, text: str, source_type: str = "chat",
                 trust_level: int = 5, context: str = "") -> ExtractionResult:
@@ -1,25 +1,34 @@
 """Gmail ingestion pipeline.
 Fetches threads via the Gmail API, reconstructs threads,
 and extracts entities/claims with trust-aware classification.
+Syncs are incremental via the mailbox historyId.
 """
 from __future__ import annotations
+import asyncio
 import base64
 import re
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from email import message_from_bytes
-from typing import Any, Optional
+from typing import Any, Callable, Optional
+
+from sqlalchemy import select
 
 from core.config import get_logger
 from core.db import get_session
-from core.clients.neo4j import get_neo4j
-from core.clients.opensearch import get_opensearch
+from core.clients.opensearch import IDX_ARTIFACTS, IDX_CLAIMS, OpenSearchClient
 from memory.ingestion.chat import _upsert_entity, _infer_tier
 from memory.ingestion.extractor import Extractor, EXTRACTOR_VERSION
 from memory.ingestion.memory_gate import MemoryGate, GateDecision
+from memory.outbox import enqueue_graph, enqueue_index, get_outbox_relay
+from memory.retrieval.profile_cache import affects_profile, bump_profile_version
 from models.memory import ClaimStatus, MemoryTier, SourceType, SEGMENT_DECAY_RATE
 from models.db.memory import ArtifactORM, ClaimORM, EvidenceORM, SourceORM
 from models.memory import GmailSyncResult
+from services.app_state import AppStateService
 
 logger = get_logger(__name__)
 
@@ -30,6 +39,12 @@ _gate      = MemoryGate()
 _OUTGOING_TRUST = 9   # emails the user sent — high trust for user intent
 _INCOMING_TRUST = 4   # emails received — treat as external data
 
+_FETCH_CONCURRENCY   = 4
+_MAX_THREAD_RETRIES  = 5     # syncs a failing thread is retried on before it is given up
+
+# Yielded by _fetch_threads for a thread Gmail answers 404/410 for (deleted since listing).
+_GONE = object()
+
 
 def _build_gmail_service(credentials_json: dict[str, Any]):
     """Build Gmail API service from OAuth credentials dict."""
@@ -83,7 +98,7 @@ def _parse_message(msg_data: dict[str, Any]) -> dict[str, Any]:
     body = _strip_quoted(raw_body)
 
     ts_ms = int(msg_data.get("internalDate", 0))
-    ts = datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc) if ts_ms else datetime.utcnow()
+    ts = datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc) if ts_ms else datetime.now(timezone.utc)
 
     return {
         "message_id": msg_data.get("id", ""),
@@ -97,9 +112,57 @@ def _parse_message(msg_data: dict[str, Any]) -> dict[str, Any]:
     }
 
 
+@dataclass
+class _KnownThread:
+    source_id: uuid.UUID
+    message_ids: set[str]
+    history_id: Optional[str]
+    # Sources written before message ids were recorded: messages dated up to
+    # their latest ingested_at are treated as already extracted.
+    legacy_cutoff: Optional[datetime] = None
+
+    def is_known(self, message: dict[str, Any]) -> bool:
+        if message["message_id"] in self.message_ids:
+            return True
+        return self.legacy_cutoff is not None and message["date"] <= self.legacy_cutoff
+
+
+def _history_state_key(user_email: str) -> str:
+    return f"gmail_history:{user_email}"
+
+
+def _http_status(exc: Exception) -> Optional[str]:
+    status = getattr(getattr(exc, "resp", None), "status", None) or getattr(exc, "status_code", None)
+    return str(status) if status is not None else None
+
+
+def _is_history_expired(exc: Exception) -> bool:
+    # users.history.list answers 404 once startHistoryId is older than Gmail retains.
+    return _http_status(exc) == "404"
+
+
 class GmailIngestionPipeline:
-    def __init__(self, user_email: str) -> None:
+    """Incremental Gmail sync.
+
+    The last mailbox `historyId` is persisted per account in app_settings; later
+    syncs ask `users.history.list` for the delta and only fetch threads with
+    unseen messages. An expired history id falls back to a full `threads.list`
+    resync, which still skips threads whose messages are already stored.
+
+    The cursor always advances. Threads that fail to fetch or process are
+    kept next to it and fetched again on the next `_MAX_THREAD_RETRIES`
+    syncs; a thread Gmail no longer has (404/410) is skipped, not retried.
+    """
+
+    def __init__(
+        self,
+        user_email: str,
+        service_factory: Optional[Callable[[], Any]] = None,
+        fetch_concurrency: int = _FETCH_CONCURRENCY,
+    ) -> None:
         self.user_email = user_email.lower()
+        self._service_factory = service_factory
+        self._fetch_concurrency = max(1, fetch_concurrency)
 
     def _is_outgoing(self, from_addr: str) -> bool:
         return self.user_email in from_addr.lower()
@@ -109,91 +172,298 @@ class GmailIngestionPipeline:
         credentials_json: dict[str, Any],
         max_threads: int = 50,
         label_ids: Optional[list[str]] = None,
+        full_resync: bool = False,
     ) -> GmailSyncResult:
-        service = _build_gmail_service(credentials_json)
+        factory = self._service_factory or (lambda: _build_gmail_service(credentials_json))
+        service = factory()
+        state_svc = AppStateService()
+        state_key = _history_state_key(self.user_email)
+
+        state = await state_svc.get_setting(state_key) or {}
+        start_history_id = None if full_resync else state.get("history_id")
+        retry: dict[str, int] = dict(state.get("retry_threads") or {})
+
+        thread_ids: list[str] = []
+        new_history_id: Optional[str] = None
+        did_full = True
+        if start_history_id:
+            try:
+                thread_ids, new_history_id = await asyncio.to_thread(
+                    self._list_history, service, str(start_history_id), label_ids,
+                )
+                did_full = False
+            except Exception as exc:
+                if not _is_history_expired(exc):
+                    raise
+                logger.info("Gmail history id %s expired for %s, running full resync",
+                            start_history_id, self.user_email)
+
+        thread_hist: dict[str, Optional[str]] = {}
+        if did_full:
+            # Read the mailbox position before listing so nothing lands in between.
+            profile = await asyncio.to_thread(
+                lambda: service.users().getProfile(userId="me").execute()
+            )
+            new_history_id = profile.get("historyId")
+            thread_metas = await asyncio.to_thread(self._list_threads, service, max_threads, label_ids)
+            thread_ids = [t["id"] for t in thread_metas]
+            thread_hist = {t["id"]: t.get("historyId") for t in thread_metas}
+        thread_ids += [tid for tid in retry if tid not in thread_ids]
+
+        known = await self._load_known_threads(thread_ids)
+        to_fetch = [
+            tid for tid in thread_ids
+            if not (tid in known and thread_hist.get(tid) and known[tid].history_id == thread_hist[tid])
+        ]
+        threads_skipped = len(thread_ids) - len(to_fetch)
+
         threads_processed = 0
         entities_created = 0
         claims_created = 0
         claims_provisional = 0
-
-        # List threads
-        list_params: dict[str, Any] = {"userId": "me", "maxResults": max_threads}
-        if label_ids:
-            list_params["labelIds"] = label_ids
-
-        thread_list = service.users().threads().list(**list_params).execute()
-        threads = thread_list.get("threads", [])
-
-        for thread_meta in threads:
-            thread_id = thread_meta["id"]
+        failed: list[str] = []
+
+        async for thread_id, thread_data in self._fetch_threads(factory, service, to_fetch):
+            if thread_data is _GONE:
+                threads_skipped += 1
+                continue
+            if thread_data is None:
+                failed.append(thread_id)
+                continue
             try:
-                stats = await self._process_thread(service, thread_id)
-                entities_created  += stats["entities"]
-                claims_created    += stats["claims_auto"]
-                claims_provisional+= stats["claims_provisional"]
-                threads_processed += 1
+                stats = await self._process_thread(thread_data, known.get(thread_id))
             except Exception as exc:
                 logger.warning("Failed to process thread %s: %s", thread_id, exc)
+                failed.append(thread_id)
+                continue
+            if stats is None:
+                threads_skipped += 1
+                continue
+            entities_created  += stats["entities"]
+            claims_created    += stats["claims_auto"]
+            claims_provisional+= stats["claims_provisional"]
+            threads_processed += 1
+
+        # Advance the cursor even past failures, so one bad thread cannot pin the
+        # sync to the same delta until the history id expires. Failed threads are
+        # fetched again next time; the message-id check keeps that idempotent.
+        next_retry: dict[str, int] = {}
+        for tid in failed:
+            attempts = retry.get(tid, 0) + 1
+            if attempts >= _MAX_THREAD_RETRIES:
+                logger.warning("Giving up on Gmail thread %s after %d failed syncs", tid, attempts)
+            else:
+                next_retry[tid] = attempts
+        history_id = new_history_id or start_history_id
+        if history_id:
+            await state_svc.set_setting(state_key, {
+                "history_id": str(history_id),
+                "retry_threads": next_retry,
+                "synced_at": datetime.now(timezone.utc).isoformat(),
+            })
 
         return GmailSyncResult(
             threads_processed=threads_processed,
             entities_created=entities_created,
             claims_created=claims_created,
             claims_provisional=claims_provisional,
+            threads_skipped=threads_skipped,
+            threads_failed=len(failed),
+            full_resync=did_full,
+            history_id=str(new_history_id) if new_history_id else None,
         )
 
-    async def _process_thread(self, service: Any, thread_id: str) -> dict:
-        thread_data = service.users().threads().get(
-            userId="me", id=thread_id, format="full"
-        ).execute()
+    # ── Listing ────────────────────────────────────────────────────────────────
 
-        messages = [_parse_message(m) for m in thread_data.get("messages", [])]
-        if not messages:
+    @staticmethod
+    def _list_threads(service: Any, max_threads: int, label_ids: Optional[list[str]]) -> list[dict]:
+        list_params: dict[str, Any] = {"userId": "me", "maxResults": max_threads}
+        if label_ids:
+            list_params["labelIds"] = label_ids
+        thread_list = service.users().threads().list(**list_params).execute()
+        return thread_list.get("threads", [])
+
+    @staticmethod
+    def _list_history(service: Any, start_history_id: str,
+                      label_ids: Optional[list[str]]) -> tuple[list[str], Optional[str]]:
+        """Thread ids with added messages since `start_history_id`, in first-seen order.
+
+        history.list takes a single labelId, so the first label narrows the
+        request and the added messages are matched against all of `label_ids`
+        here, as threads.list does in a full sync.
+        """
+        wanted = set(label_ids or [])
+        params: dict[str, Any] = {
+            "userId": "me",
+            "startHistoryId": start_history_id,
+            "historyTypes": ["messageAdded"],
+        }
+        if label_ids:
+            params["labelId"] = label_ids[0]
+
+        thread_ids: dict[str, None] = {}
+        history_id: Optional[str] = start_history_id
+        page_token: Optional[str] = None
+        while True:
+            if page_token:
+                params["pageToken"] = page_token
+            resp = service.users().history().list(**params).execute()
+            for record in resp.get("history", []):
+                for added in record.get("messagesAdded", []):
+                    message = added.get("message", {})
+                    tid = message.get("threadId")
+                    if tid and wanted <= set(message.get("labelIds") or []):
+                        thread_ids[tid] = None
+            history_id = resp.get("historyId", history_id)
+            page_token = resp.get("nextPageToken")
+            if not page_token:
+                break
+        return list(thread_ids), history_id
+
+    async def _load_known_threads(self, thread_ids: list[str]) -> dict[str, _KnownThread]:
+        if not thread_ids:
+            return {}
+        async with get_session() as session:
+            rows = (await session.execute(
+                select(SourceORM.source_id, SourceORM.external_id, SourceORM.metadata_, SourceORM.ingested_at)
+                .where(SourceORM.source_type == SourceType.EMAIL.value)
+                .where(SourceORM.external_id.in_(thread_ids))
+            )).all()
+        known: dict[str, _KnownThread] = {}
+        for source_id, external_id, meta, ingested_at in rows:
+            meta = meta or {}
+            entry = known.setdefault(
+                external_id, _KnownThread(source_id, set(), meta.get("thread_history_id")),
+            )
+            if "message_ids" in meta:
+                entry.message_ids.update(meta["message_ids"])
+            elif ingested_at is not None:
+                if ingested_at.tzinfo is None:
+                    ingested_at = ingested_at.replace(tzinfo=timezone.utc)
+                entry.legacy_cutoff = max(entry.legacy_cutoff or ingested_at, ingested_at)
+        return known
+
+    async def _fetch_threads(self, factory: Callable[[], Any], service: Any, thread_ids: list[str]):
+        """Fetch threads concurrently, yielding (thread_id, data | _GONE | None) in input order."""
+        if not thread_ids:
+            return
+        loop = asyncio.get_running_loop()
+        sem = asyncio.Semaphore(self._fetch_concurrency)
+        # googleapiclient services are not thread-safe; each worker thread gets its own.
+        pool: list[Any] = [service]
+        local = threading.local()
+
+        def _get(thread_id: str) -> dict[str, Any]:
+            svc = getattr(local, "service", None)
+            if svc is None:
+                svc = pool.pop() if pool else factory()
+                local.service = svc
+            return svc.users().threads().get(userId="me", id=thread_id, format="full").execute()
+
+        async def _one(thread_id: str) -> Optional[dict[str, Any]]:
+            async with sem:
+                try:
+                    return await loop.run_in_executor(executor, _get, thread_id)
+                except Exception as exc:
+                    if _http_status(exc) in ("404", "410"):
+                        logger.info("Gmail thread %s is gone, skipping", thread_id)
+                        return _GONE
+                    logger.warning("Failed to fetch thread %s: %s", thread_id, exc)
+                    return None
+
+        with ThreadPoolExecutor(max_workers=self._fetch_concurrency) as executor:
+            tasks = [asyncio.ensure_future(_one(tid)) for tid in thread_ids]
+            try:
+                for thread_id, task in zip(thread_ids, tasks):
+                    yield thread_id, await task
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+    # ── Processing ─────────────────────────────────────────────────────────────
+
+    async def _process_thread(self, thread_data: dict[str, Any],
+                              known: Optional[_KnownThread] = None) -> Optional[dict]:
+        """Ingest a fetched thread; returns None when it has no unseen messages."""
+        thread_id = thread_data.get("id", "")
+        all_messages = [_parse_message(m) for m in thread_data.get("messages", [])]
+        if not all_messages:
             return {"entities": 0, "claims_auto": 0, "claims_provisional": 0}
-
-        subject = messages[0].get("subject", "")
-        participants = list({m["from_addr"] for m in messages} | {m["to_addr"] for m in messages})
+        messages = [m for m in all_messages if not (known and known.is_known(m))]
+        sync_meta = {
+            "message_ids": [m["message_id"] for m in all_messages],
+            "thread_history_id": thread_data.get("historyId"),
+        }
+        if not messages:
+            if known is not None and known.legacy_cutoff is not None:
+                # Backfill the ids so later syncs no longer rely on the cutoff.
+                async with get_session() as session:
+                    source = await session.get(SourceORM, known.source_id)
+                    if source is not None:
+                        source.metadata_ = {**(source.metadata_ or {}), **sync_meta}
+            return None
+
+        subject = all_messages[0].get("subject", "")
+        participants = list({m["from_addr"] for m in all_messages} | {m["to_addr"] for m in all_messages})
         participants = [p for p in participants if p]
 
         # Build thread text for summarization
         thread_text = f"Subject: {subject}\n\n"
-        for m in messages:
+        for m in all_messages:
             direction = "User" if self._is_outgoing(m["from_addr"]) else "Contact"
             thread_text += f"[{direction}] {m['from_addr']} ({m['date'].date()}):\n{m['body']}\n\n"
 
         async with get_session() as session:
-            # Source per thread
-            source = SourceORM(
-                source_id=uuid.uuid4(),
-                source_type=SourceType.EMAIL.value,
-                external_id=thread_id,
-                title=subject or f"Thread {thread_id}",
-                author=messages[0]["from_addr"] if messages else None,
-                trust_level=_INCOMING_TRUST,
-                ingested_at=datetime.utcnow(),
-            )
-            session.add(source)
+            # Source per thread; new replies are appended to the existing one
+            source = await session.get(SourceORM, known.source_id) if known else None
+            if source is not None:
+                source.metadata_ = {**(source.metadata_ or {}), **sync_meta}
+            else:
+                source = SourceORM(
+                    source_id=uuid.uuid4(),
+                    source_type=SourceType.EMAIL.value,
+                    external_id=thread_id,
+                    title=subject or f"Thread {thread_id}",
+                    author=all_messages[0]["from_addr"],
+                    trust_level=_INCOMING_TRUST,
+                    ingested_at=datetime.utcnow(),
+                    metadata_=sync_meta,
+                )
+                session.add(source)
             await session.flush()
 
             entity_map: dict[str, uuid.UUID] = {}
             stats = {"entities": 0, "claims_auto": 0, "claims_provisional": 0}
+            profile_changed = False
 
-            # Summary artifact
+            # Summary artifact covers the whole thread; on a delta the existing one is rewritten
             summary_text = _extractor.summarize(thread_text, max_sentences=4)
-            sum_emb = _extractor.embed_one(summary_text)
-            sum_artifact = ArtifactORM(
-                artifact_id=uuid.uuid4(),
-                source_id=source.source_id,
-                artifact_type="thread_summary",
-                text=summary_text,
-                parser_version=EXTRACTOR_VERSION,
-            )
-            session.add(sum_artifact)
+            sum_artifact = None
+            if known is not None:
+                sum_artifact = (await session.execute(
+                    select(ArtifactORM)
+                    .where(ArtifactORM.source_id == source.source_id)
+                    .where(ArtifactORM.artifact_type == "thread_summary")
+                    .limit(1)
+                )).scalar_one_or_none()
+            if sum_artifact is not None:
+                sum_artifact.text = summary_text
+                sum_artifact.parser_version = EXTRACTOR_VERSION
+            else:
+                sum_artifact = ArtifactORM(
+                    artifact_id=uuid.uuid4(),
+                    source_id=source.source_id,
+                    artifact_type="thread_summary",
+                    text=summary_text,
+                    parser_version=EXTRACTOR_VERSION,
+                )
+                session.add(sum_artifact)
             await session.flush()
-            get_opensearch().index_artifact(
-                str(sum_artifact.artifact_id), str(source.source_id),
-                "thread_summary", summary_text, sum_emb,
-            )
+            # Search/graph mirrors go through the outbox; the relay embeds in batches.
+            aggregate = str(source.source_id)
+            enqueue_index(session, IDX_ARTIFACTS, str(sum_artifact.artifact_id), OpenSearchClient.artifact_document(
+                str(sum_artifact.artifact_id), aggregate, "thread_summary", summary_text, [],
+            ), embed_text=summary_text)
 
             # Process each message individually with appropriate trust level
             for msg in messages:
@@ -212,12 +482,10 @@ class GmailIngestionPipeline:
                 session.add(msg_artifact)
                 await session.flush()
 
-                msg_emb = _extractor.embed_one(msg["body"])
-                get_opensearch().index_artifact(
-                    str(msg_artifact.artifact_id), str(source.source_id),
-                    "email_message", msg["body"], msg_emb,
+                enqueue_index(session, IDX_ARTIFACTS, str(msg_artifact.artifact_id), OpenSearchClient.artifact_document(
+                    str(msg_artifact.artifact_id), aggregate, "email_message", msg["body"], [],
                     created_at=msg["date"].isoformat(),
-                )
+                ), embed_text=msg["body"])
 
                 context = (
                     f"Email thread subject: {subject}. "
@@ -235,7 +503,7 @@ class GmailIngestionPipeline:
                 for cand in result.entities:
                     name_key = cand.canonical_name.lower()
                     if name_key not in entity_map:
-                        eid = await _upsert_entity(session, cand)
+                        eid = await _upsert_entity(session, cand, aggregate)
                         entity_map[name_key] = eid
                         stats["entities"] += 1
 
@@ -287,30 +555,34 @@ class GmailIngestionPipeline:
                     )
                     session.add(ev)
 
-                    claim_emb = _extractor.embed_one(cand.claim_text)
-                    get_opensearch().index_claim(
-                        str(claim_orm.claim_id), cand.claim_text, claim_emb,
+                    claim_id = str(claim_orm.claim_id)
+                    claim_orm.opensearch_id = claim_id
+                    enqueue_index(session, IDX_CLAIMS, claim_id, OpenSearchClient.claim_document(
+                        claim_id, cand.claim_text, [],
                         cand.segment.value, cand.memory_class.value, tier.value,
                         status.value, gate_result.adjusted_confidence,
                         gate_result.adjusted_importance, result.source_trust,
                         predicate=cand.predicate,
-                    )
-
-                    neo4j = get_neo4j()
-                    await neo4j.upsert_claim_node(
-                        str(claim_orm.claim_id), cand.claim_text,
-                        predicate=cand.predicate, segment=cand.segment.value,
-                        confidence=gate_result.adjusted_confidence,
-                    )
-                    if subj_id:
-                        await neo4j.link_claim_to_entity(str(claim_orm.claim_id), str(subj_id), "SUBJECT")
-                    if obj_id:
-                        await neo4j.link_claim_to_entity(str(claim_orm.claim_id), str(obj_id), "OBJECT")
-                    await neo4j.link_claim_to_source(str(claim_orm.claim_id), str(source.source_id))
-
+                    ), embed_text=cand.claim_text)
+                    enqueue_graph(session, "upsert_claims", aggregate, rows=[{
+                        "claim_id": claim_id,
+                        "claim_text": cand.claim_text,
+                        "predicate": cand.predicate,
+                        "segment": cand.segment.value,
+                        "confidence": gate_result.adjusted_confidence,
+                        "subject_id": str(subj_id) if subj_id else None,
+                        "object_id": str(obj_id) if obj_id else None,
+                        "source_id": aggregate,
+                    }])
+
+                    profile_changed |= affects_profile(cand.memory_class, cand.segment)
                     if status == ClaimStatus.ACTIVE:
                         stats["claims_auto"] += 1
                     else:
                         stats["claims_provisional"] += 1
 
+            if profile_changed:
+                await bump_profile_version(session)
+
+        get_outbox_relay().wake()
         return stats
@@ -7,11 +7,20 @@ Decision ladder (cheapest to most expensive):
   4. Judge (expensive LLM) — final call on unresolved conflicts
 
 Only the top 5% of ambiguous cases reach the Judge.
+
+The nightly review (`MaintenanceAgentPipeline.review`) packs
+REVIEW_BATCH_SIZE claims into each agent prompt and asks for one JSON
+verdict per claim ID. Prompts run concurrently, with at most
+REVIEW_CONCURRENCY LLM calls in flight. A claim missing from a reply gets
+the same fallback as a parse error on the single-claim path. Fallback
+verdicts carry `fallback=True`, so callers can review those claims again.
 """
 from __future__ import annotations
+import asyncio
+import hashlib
 import json
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from enum import Enum
 from typing import Any, Optional
 
@@ -23,6 +32,10 @@ from models.db.memory import ClaimORM
 
 logger = get_logger(__name__)
 
+REVIEW_BATCH_SIZE   = 10     # claims per agent prompt
+REVIEW_CONCURRENCY  = 4      # agent prompts in flight
+REVIEW_HASH_VERSION = "review_v1"
+
 
 class AgentDecision(str, Enum):
     KEEP        = "keep"
@@ -40,6 +53,7 @@ class AgentVerdict:
     reasoning: str
     confidence: float
     merge_target_id: Optional[str] = None
+    fallback: bool = False      # stand-in after an LLM error, parse error or missing reply item
 
 
 def _clean(raw: str) -> str:
@@ -50,6 +64,20 @@ def _clean(raw: str) -> str:
     return raw.strip()
 
 
+def _text(resp: Any) -> str:
+    content = resp.content
+    if isinstance(content, list):
+        content = " ".join(p if isinstance(p, str) else p.get("text", "") for p in content)
+    return _clean(str(content))
+
+
+def _by_id(raw: str, key: str) -> dict[str, dict[str, Any]]:
+    """Items of a multi-claim reply (`{key: [...]}` or a bare list), keyed by claim ID."""
+    data = json.loads(raw)
+    items = data.get(key, []) if isinstance(data, dict) else data
+    return {str(item["id"]): item for item in items if isinstance(item, dict) and "id" in item}
+
+
 def _claim_summary(claim: ClaimORM) -> str:
     return (
         f"ID: {claim.claim_id}\n"
@@ -63,9 +91,22 @@ def _claim_summary(claim: ClaimORM) -> str:
     )
 
 
+def claim_review_hash(claim: ClaimORM) -> str:
+    """Hash of everything the agents see; an unchanged hash means an unchanged verdict."""
+    return hashlib.sha1(f"{REVIEW_HASH_VERSION}\n{_claim_summary(claim)}".encode()).hexdigest()
+
+
+def _many(claims: list[ClaimORM], notes: Optional[dict[str, str]] = None) -> str:
+    notes = notes or {}
+    return "\n\n".join(
+        f"--- Memory {i + 1} ---\n{notes.get(str(c.claim_id), '')}{_claim_summary(c)}"
+        for i, c in enumerate(claims)
+    )
+
+
 # ── Curator ────────────────────────────────────────────────────────────────────
 
-_CURATOR_SYSTEM = """You are the Curator agent for a personal AI memory system.
+_CURATOR_RULES = """You are the Curator agent for a personal AI memory system.
 Review the given memory claim and recommend an action.
 
 Available actions: keep, archive, delete, promote, demote, flag_review
@@ -76,42 +117,89 @@ Rules:
 - Promote if the claim has high access count and retrieval success.
 - Flag for review if you are uncertain — do not guess on important claims.
 - Delete only clearly duplicated or provably false claims.
+"""
 
+_CURATOR_SYSTEM = _CURATOR_RULES + """
 Respond ONLY with JSON:
 {"decision": "action", "reasoning": "brief reason", "confidence": 0.0-1.0}"""
 
+_CURATOR_BATCH_SYSTEM = _CURATOR_RULES + """
+You are given several memories; judge each one on its own.
+Respond ONLY with JSON, one verdict per memory ID:
+{"verdicts": [{"id": "memory ID", "decision": "action", "reasoning": "brief reason", "confidence": 0.0-1.0}]}"""
+
+
+def _curator_verdict(data: dict[str, Any]) -> AgentVerdict:
+    return AgentVerdict(
+        decision=AgentDecision(data.get("decision", "keep")),
+        reasoning=data.get("reasoning", ""),
+        confidence=float(data.get("confidence", 0.5)),
+    )
+
+
+_CURATOR_FALLBACK = AgentVerdict(decision=AgentDecision.KEEP, reasoning="Parse error — keeping", confidence=0.5,
+                                 fallback=True)
+
 
 class CuratorAgent:
+    def __init__(self, model: Any = None) -> None:
+        self._model = model
+
     def evaluate(self, claim: ClaimORM) -> AgentVerdict:
         prompt = f"Evaluate this memory:\n\n{_claim_summary(claim)}"
         messages = [SystemMessage(content=_CURATOR_SYSTEM), HumanMessage(content=prompt)]
         try:
-            resp = llm.invoke(messages)
-            content = resp.content
-            if isinstance(content, list):
-                content = " ".join(p if isinstance(p, str) else p.get("text", "") for p in content)
-            data = json.loads(_clean(str(content)))
-            return AgentVerdict(
-                decision=AgentDecision(data.get("decision", "keep")),
-                reasoning=data.get("reasoning", ""),
-                confidence=float(data.get("confidence", 0.5)),
-            )
+            return _curator_verdict(json.loads(_text((self._model or llm).invoke(messages))))
         except Exception as exc:
             logger.debug("Curator LLM error: %s", exc)
-            return AgentVerdict(decision=AgentDecision.KEEP, reasoning="Parse error — keeping", confidence=0.5)
+            return _CURATOR_FALLBACK
+
+    async def evaluate_many(self, claims: list[ClaimORM]) -> dict[str, AgentVerdict]:
+        prompt = f"Evaluate these memories:\n\n{_many(claims)}"
+        messages = [SystemMessage(content=_CURATOR_BATCH_SYSTEM), HumanMessage(content=prompt)]
+        try:
+            items = _by_id(_text(await (self._model or llm).ainvoke(messages)), "verdicts")
+        except Exception as exc:
+            logger.debug("Curator LLM error: %s", exc)
+            items = {}
+        out = {}
+        for claim in claims:
+            try:
+                out[str(claim.claim_id)] = _curator_verdict(items[str(claim.claim_id)])
+            except (KeyError, ValueError, TypeError):
+                out[str(claim.claim_id)] = _CURATOR_FALLBACK
+        return out
 
 
 # ── Skeptic ────────────────────────────────────────────────────────────────────
 
-_SKEPTIC_SYSTEM = """You are the Skeptic agent for a personal AI memory system.
+_SKEPTIC_RULES = """You are the Skeptic agent for a personal AI memory system.
 A Curator has proposed a potentially destructive action (archive, delete, or promote to permanent).
 Challenge it if there is any good reason to keep the memory or question the promotion.
+"""
 
+_SKEPTIC_SYSTEM = _SKEPTIC_RULES + """
 Respond ONLY with JSON:
 {"agree": true|false, "reasoning": "brief counter-argument if disagreeing", "confidence": 0.0-1.0}"""
 
+_SKEPTIC_BATCH_SYSTEM = _SKEPTIC_RULES + """
+You are given several memories, each with its own Curator proposal; judge each one on its own.
+Respond ONLY with JSON, one answer per memory ID:
+{"answers": [{"id": "memory ID", "agree": true|false, "reasoning": "brief counter-argument if disagreeing", "confidence": 0.0-1.0}]}"""
+
+_SKEPTIC_FALLBACK = {"agree": True, "reasoning": "Parse error — defaulting to agree", "confidence": 0.5,
+                     "fallback": True}
+
+
+def _proposal(verdict: AgentVerdict) -> str:
+    return (f"Curator proposed: {verdict.decision} (confidence={verdict.confidence:.2f})\n"
+            f"Reason: {verdict.reasoning}\n")
+
 
 class SkepticAgent:
+    def __init__(self, model: Any = None) -> None:
+        self._model = model
+
     def challenge(self, claim: ClaimORM, curator_verdict: AgentVerdict) -> dict[str, Any]:
         prompt = (
             f"Curator proposed: {curator_verdict.decision} "
@@ -121,56 +209,96 @@ class SkepticAgent:
         )
         messages = [SystemMessage(content=_SKEPTIC_SYSTEM), HumanMessage(content=prompt)]
         try:
-            resp = llm.invoke(messages)
-            content = resp.content
-            if isinstance(content, list):
-                content = " ".join(p if isinstance(p, str) else p.get("text", "") for p in content)
-            return json.loads(_clean(str(content)))
+            return json.loads(_text((self._model or llm).invoke(messages)))
+        except Exception:
+            return dict(_SKEPTIC_FALLBACK)
+
+    async def challenge_many(self, claims: list[ClaimORM],
+                             curator: dict[str, AgentVerdict]) -> dict[str, dict[str, Any]]:
+        notes = {str(c.claim_id): _proposal(curator[str(c.claim_id)]) for c in claims}
+        prompt = f"Challenge these proposals:\n\n{_many(claims, notes)}"
+        messages = [SystemMessage(content=_SKEPTIC_BATCH_SYSTEM), HumanMessage(content=prompt)]
+        try:
+            items = _by_id(_text(await (self._model or llm).ainvoke(messages)), "answers")
         except Exception:
-            return {"agree": True, "reasoning": "Parse error — defaulting to agree", "confidence": 0.5}
+            items = {}
+        return {str(c.claim_id): items.get(str(c.claim_id), dict(_SKEPTIC_FALLBACK)) for c in claims}
 
 
 # ── Judge ──────────────────────────────────────────────────────────────────────
 
-_JUDGE_SYSTEM = """You are the Judge agent for a personal AI memory system.
+_JUDGE_RULES = """You are the Judge agent for a personal AI memory system.
 The Curator and Skeptic have disagreed. Make the final binding decision.
 Be conservative — when in doubt, keep or flag, never delete important memories.
+"""
 
+_JUDGE_SYSTEM = _JUDGE_RULES + """
 Respond ONLY with JSON:
 {"decision": "action", "reasoning": "full reasoning", "confidence": 0.0-1.0}"""
 
+_JUDGE_BATCH_SYSTEM = _JUDGE_RULES + """
+You are given several disputed memories; decide each one on its own.
+Respond ONLY with JSON, one decision per memory ID:
+{"decisions": [{"id": "memory ID", "decision": "action", "reasoning": "full reasoning", "confidence": 0.0-1.0}]}"""
+
+_JUDGE_FALLBACK = AgentVerdict(decision=AgentDecision.FLAG_REVIEW, reasoning="Judge parse error", confidence=0.3,
+                               fallback=True)
+
+
+def _judge_verdict(data: dict[str, Any]) -> AgentVerdict:
+    return AgentVerdict(
+        decision=AgentDecision(data.get("decision", "keep")),
+        reasoning=data.get("reasoning", ""),
+        confidence=float(data.get("confidence", 0.7)),
+    )
+
+
+def _dispute(curator: AgentVerdict, skeptic_response: dict[str, Any]) -> str:
+    return (f"Curator proposed: {curator.decision} — '{curator.reasoning}'\n"
+            f"Skeptic disagreed: '{skeptic_response.get('reasoning', '')}'\n")
+
 
 class JudgeAgent:
+    def __init__(self, model: Any = None) -> None:
+        self._model = model
+
     def adjudicate(self, claim: ClaimORM, curator: AgentVerdict,
                    skeptic_response: dict[str, Any]) -> AgentVerdict:
-        prompt = (
-            f"Curator proposed: {curator.decision} — '{curator.reasoning}'\n"
-            f"Skeptic disagreed: '{skeptic_response.get('reasoning', '')}'\n\n"
-            f"Memory:\n{_claim_summary(claim)}"
-        )
+        prompt = f"{_dispute(curator, skeptic_response)}\nMemory:\n{_claim_summary(claim)}"
         messages = [SystemMessage(content=_JUDGE_SYSTEM), HumanMessage(content=prompt)]
         try:
-            resp = llm.invoke(messages)
-            content = resp.content
-            if isinstance(content, list):
-                content = " ".join(p if isinstance(p, str) else p.get("text", "") for p in content)
-            data = json.loads(_clean(str(content)))
-            return AgentVerdict(
-                decision=AgentDecision(data.get("decision", "keep")),
-                reasoning=data.get("reasoning", ""),
-                confidence=float(data.get("confidence", 0.7)),
-            )
+            return _judge_verdict(json.loads(_text((self._model or llm).invoke(messages))))
+        except Exception:
+            return _JUDGE_FALLBACK
+
+    async def adjudicate_many(self, claims: list[ClaimORM], curator: dict[str, AgentVerdict],
+                              skeptic: dict[str, dict[str, Any]]) -> dict[str, AgentVerdict]:
+        notes = {str(c.claim_id): _dispute(curator[str(c.claim_id)], skeptic[str(c.claim_id)]) for c in claims}
+        prompt = f"Decide these disputes:\n\n{_many(claims, notes)}"
+        messages = [SystemMessage(content=_JUDGE_BATCH_SYSTEM), HumanMessage(content=prompt)]
+        try:
+            items = _by_id(_text(await (self._model or llm).ainvoke(messages)), "decisions")
         except Exception:
-            return AgentVerdict(decision=AgentDecision.FLAG_REVIEW, reasoning="Judge parse error", confidence=0.3)
+            items = {}
+        out = {}
+        for claim in claims:
+            try:
+                out[str(claim.claim_id)] = _judge_verdict(items[str(claim.claim_id)])
+            except (KeyError, ValueError, TypeError):
+                out[str(claim.claim_id)] = _JUDGE_FALLBACK
+        return out
 
 
 # ── Pipeline ───────────────────────────────────────────────────────────────────
 
 class MaintenanceAgentPipeline:
-    def __init__(self) -> None:
-        self._curator  = CuratorAgent()
-        self._skeptic  = SkepticAgent()
-        self._judge    = JudgeAgent()
+    def __init__(self, model: Any = None, batch_size: int = REVIEW_BATCH_SIZE,
+                 concurrency: int = REVIEW_CONCURRENCY) -> None:
+        self._curator  = CuratorAgent(model)
+        self._skeptic  = SkepticAgent(model)
+        self._judge    = JudgeAgent(model)
+        self.batch_size  = batch_size
+        self.concurrency = concurrency
 
     def run_claim(self, claim: ClaimORM) -> AgentVerdict:
         """Run the full decision ladder for a single claim."""
@@ -183,6 +311,59 @@ class MaintenanceAgentPipeline:
         curator_verdict = self._curator.evaluate(claim)
 
         # Step 3: Skeptic only for destructive or high-stakes decisions
+        if self._needs_skeptic(claim, curator_verdict):
+            skeptic_resp = self._skeptic.challenge(claim, curator_verdict)
+
+            # Step 4: Judge if disagreement and high confidence on both sides
+            if self._needs_judge(curator_verdict, skeptic_resp):
+                return self._judge.adjudicate(claim, curator_verdict, skeptic_resp)
+            return self._after_skeptic(curator_verdict, skeptic_resp)
+
+        return curator_verdict
+
+    async def review(self, claims: list[ClaimORM]) -> dict[str, AgentVerdict]:
+        """The decision ladder for many claims, batched per agent and run concurrently."""
+        verdicts: dict[str, AgentVerdict] = {}
+        pending = []
+        for claim in claims:
+            fast = self._fast_rules(claim)
+            if fast is not None:
+                verdicts[str(claim.claim_id)] = fast
+            else:
+                pending.append(claim)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def limited(call):
+            async with semaphore:
+                return await call
+
+        async def chunk(batch: list[ClaimORM]) -> dict[str, AgentVerdict]:
+            curator = await limited(self._curator.evaluate_many(batch))
+            contested = [c for c in batch if self._needs_skeptic(c, curator[str(c.claim_id)])]
+            skeptic = await limited(self._skeptic.challenge_many(contested, curator)) if contested else {}
+            disputed = [c for c in contested
+                        if self._needs_judge(curator[str(c.claim_id)], skeptic[str(c.claim_id)])]
+            judged = await limited(self._judge.adjudicate_many(disputed, curator, skeptic)) if disputed else {}
+
+            out = {}
+            for claim in batch:
+                cid = str(claim.claim_id)
+                if cid in judged:
+                    out[cid] = judged[cid]
+                elif cid in skeptic:
+                    out[cid] = self._after_skeptic(curator[cid], skeptic[cid])
+                else:
+                    out[cid] = curator[cid]
+            return out
+
+        batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+        for result in await asyncio.gather(*(chunk(b) for b in batches)):
+            verdicts.update(result)
+        return verdicts
+
+    @staticmethod
+    def _needs_skeptic(claim: ClaimORM, curator_verdict: AgentVerdict) -> bool:
         destructive = curator_verdict.decision in (
             AgentDecision.DELETE, AgentDecision.ARCHIVE,
         )
@@ -190,23 +371,25 @@ class MaintenanceAgentPipeline:
             curator_verdict.decision == AgentDecision.PROMOTE
             and claim.segment == "preferences_and_corrections"
         )
-        if destructive or high_stakes:
-            skeptic_resp = self._skeptic.challenge(claim, curator_verdict)
-            skeptic_agrees = bool(skeptic_resp.get("agree", True))
-            skeptic_conf   = float(skeptic_resp.get("confidence", 0.5))
-
-            # Step 4: Judge if disagreement and high confidence on both sides
-            if not skeptic_agrees and skeptic_conf >= 0.6 and curator_verdict.confidence >= 0.6:
-                return self._judge.adjudicate(claim, curator_verdict, skeptic_resp)
-
-            if not skeptic_agrees:
-                return AgentVerdict(
-                    decision=AgentDecision.FLAG_REVIEW,
-                    reasoning=f"Skeptic disagreed: {skeptic_resp.get('reasoning', '')}",
-                    confidence=min(curator_verdict.confidence, skeptic_conf),
-                )
-
-        return curator_verdict
+        return destructive or high_stakes
+
+    @staticmethod
+    def _needs_judge(curator_verdict: AgentVerdict, skeptic_resp: dict[str, Any]) -> bool:
+        return (not bool(skeptic_resp.get("agree", True))
+                and float(skeptic_resp.get("confidence", 0.5)) >= 0.6
+                and curator_verdict.confidence >= 0.6)
+
+    @staticmethod
+    def _after_skeptic(curator_verdict: AgentVerdict, skeptic_resp: dict[str, Any]) -> AgentVerdict:
+        if bool(skeptic_resp.get("agree", True)):
+            if skeptic_resp.get("fallback"):
+                return replace(curator_verdict, fallback=True)
+            return curator_verdict
+        return AgentVerdict(
+            decision=AgentDecision.FLAG_REVIEW,
+            reasoning=f"Skeptic disagreed: {skeptic_resp.get('reasoning', '')}",
+            confidence=min(curator_verdict.confidence, float(skeptic_resp.get("confidence", 0.5))),
+        )
 
     def _fast_rules(self, claim: ClaimORM) -> Optional[AgentVerdict]:
         """Deterministic rules that don't require LLM."""
@@ -241,10 +424,14 @@ class MaintenanceAgentPipeline:
 
         return None
 
-    async def run_batch(self, claims: list[ClaimORM]) -> dict[str, list[str]]:
-        """Process a batch and return grouped IDs by decision."""
+    async def run_batch(self, claims: list[ClaimORM]) -> tuple[dict[str, list[str]], set[str]]:
+        """Process a batch; return IDs grouped by decision, and the IDs whose verdict is a fallback."""
         results: dict[str, list[str]] = {d.value: [] for d in AgentDecision}
+        fallbacks: set[str] = set()
+        verdicts = await self.review(claims)
         for claim in claims:
-            verdict = self.run_claim(claim)
+            verdict = verdicts[str(claim.claim_id)]
             results[verdict.decision.value].append(str(claim.claim_id))
-        return results
+            if verdict.fallback:
+                fallbacks.add(str(claim.claim_id))
+        return results, fallbacks
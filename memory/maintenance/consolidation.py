@@ -10,23 +10,26 @@ import uuid
 from datetime import datetime, timezone
 from typing import Optional
 
-from sqlalchemy import select, update
+from sqlalchemy import Integer, case, cast, func, literal, select, tuple_, update
 
 from core.config import get_logger
 from core.db import get_session
-from core.clients.opensearch import get_opensearch
 from memory.graph.entity_resolution import EntityResolver
 from memory.graph.traversal import GraphTraversal
 from memory.ingestion.extractor import Extractor
-from memory.maintenance.agents import MaintenanceAgentPipeline, AgentDecision
+from memory.maintenance.agents import MaintenanceAgentPipeline, AgentDecision, claim_review_hash
 from memory.maintenance.decay import DecayEngine
 from memory.maintenance.dedup import DeduplicationEngine
 from memory.maintenance.promotion import PromotionEngine
+from memory.maintenance.scheduler import current_worker
+from memory.retrieval.profile_cache import affects_profile, bump_profile_version
 from models.memory import ClaimStatus
 from models.db.memory import ClaimORM, MaintenanceRunORM
 
 logger = get_logger(__name__)
 
+REVIEW_SCAN_FACTOR = 20     # look at most this many claims per review slot before giving up
+
 _decay      = DecayEngine()
 _dedup      = DeduplicationEngine()
 _promotion  = PromotionEngine()
@@ -42,6 +45,7 @@ async def _start_run(run_type: str) -> uuid.UUID:
             run_id=uuid.uuid4(),
             run_type=run_type,
             status="running",
+            worker=current_worker.get(),
             started_at=datetime.now(timezone.utc),
         )
         session.add(run)
@@ -49,6 +53,7 @@ async def _start_run(run_type: str) -> uuid.UUID:
 
 
 async def _finish_run(run_id: uuid.UUID, stats: dict, error: Optional[str] = None) -> None:
+    finished_at = datetime.now(timezone.utc)
     async with get_session() as session:
         await session.execute(
             update(MaintenanceRunORM)
@@ -59,7 +64,10 @@ async def _finish_run(run_id: uuid.UUID, stats: dict, error: Optional[str] = Non
                 claims_updated=stats.get("claims_updated", 0),
                 claims_archived=stats.get("claims_archived", 0),
                 error=error,
-                finished_at=datetime.now(timezone.utc),
+                finished_at=finished_at,
+                duration_ms=cast(
+                    func.extract("epoch", literal(finished_at) - MaintenanceRunORM.started_at) * 1000, Integer,
+                ),
             )
         )
 
@@ -83,10 +91,10 @@ class ConsolidationRunner:
         stats = {}
         try:
             dedup_stats = await _dedup.run(batch_size=100)
-            promo_stats = await _promotion.run(batch_size=100)
+            promo_stats = await _promotion.run()
             stats = {
                 "claims_reviewed": dedup_stats.get("duplicates_found", 0),
-                "claims_updated": promo_stats.get("promoted", 0),
+                "claims_updated": promo_stats.get("promoted", 0) + promo_stats.get("demoted", 0),
                 "claims_archived": dedup_stats.get("merged", 0),
             }
             await _finish_run(run_id, stats)
@@ -110,7 +118,7 @@ class ConsolidationRunner:
             dedup_stats = await _dedup.run(batch_size=300)
 
             # 4. Promotion pass
-            promo_stats = await _promotion.run(batch_size=300)
+            promo_stats = await _promotion.run()
 
             # 5. Agent review on stale provisional claims
             agent_reviewed = await self._agent_review_batch(batch_size=50)
@@ -155,107 +163,82 @@ class ConsolidationRunner:
     # ── Internal helpers ─────────────────────────────────────────────────────
 
     async def _agent_review_batch(self, batch_size: int = 50) -> int:
-        """Run Curator/Skeptic/Judge pipeline on provisional and borderline claims."""
-        async with get_session() as session:
-            result = await session.execute(
-                select(ClaimORM)
-                .where(ClaimORM.status.in_(["provisional", "stale"]))
-                .order_by(ClaimORM.created_at.asc())
-                .limit(batch_size)
-            )
-            claims = result.scalars().all()
-
+        """Run Curator/Skeptic/Judge pipeline on provisional and borderline claims.
+
+        Claims whose review hash matches the one stored at their last review
+        are skipped; the agents would see exactly what they saw then. A claim
+        that only got a fallback verdict keeps its old hash and is reviewed
+        again on the next run.
+        """
+        claims, hashes = await self._claims_to_review(batch_size)
         if not claims:
             return 0
 
-        decision_map = await _agents.run_batch(list(claims))
+        decision_map, fallbacks = await _agents.run_batch(claims)
+        reviewed = [{"claim_id": cid, "review_hash": h} for cid, h in hashes.items()
+                    if str(cid) not in fallbacks]
+
+        def ids(decision: AgentDecision) -> list[uuid.UUID]:
+            return [uuid.UUID(cid) for cid in decision_map.get(decision.value, [])]
 
         # Apply decisions
         async with get_session() as session:
-            for decision_str, claim_ids in decision_map.items():
-                if not claim_ids:
-                    continue
-
-                if decision_str == AgentDecision.ARCHIVE.value:
-                    await session.execute(
-                        update(ClaimORM)
-                        .where(ClaimORM.claim_id.in_(
-                            [uuid.UUID(cid) for cid in claim_ids]
-                        ))
-                        .values(status=ClaimStatus.ARCHIVED.value)
+            if archived := ids(AgentDecision.ARCHIVE):
+                await session.execute(
+                    update(ClaimORM)
+                    .where(ClaimORM.claim_id.in_(archived))
+                    .values(status=ClaimStatus.ARCHIVED.value)
+                )
+            changed = set(ids(AgentDecision.ARCHIVE)) | set(ids(AgentDecision.PROMOTE))
+            if any(c.claim_id in changed and affects_profile(c.memory_class, c.segment) for c in claims):
+                await bump_profile_version(session)
+            if promoted := ids(AgentDecision.PROMOTE):
+                # Bump tier: provisional→active and short_term→long_term
+                await session.execute(
+                    update(ClaimORM)
+                    .where(ClaimORM.claim_id.in_(promoted))
+                    .values(
+                        status=case((ClaimORM.status == "provisional", ClaimStatus.ACTIVE.value),
+                                    else_=ClaimORM.status),
+                        tier=case((ClaimORM.tier == "short_term", "long_term"), else_=ClaimORM.tier),
                     )
-                elif decision_str == AgentDecision.PROMOTE.value:
-                    # Bump tier: provisional→active and short_term→long_term
-                    for cid in claim_ids:
-                        r = await session.execute(
-                            select(ClaimORM).where(ClaimORM.claim_id == uuid.UUID(cid))
-                        )
-                        c = r.scalar_one_or_none()
-                        if c:
-                            if c.status == "provisional":
-                                c.status = ClaimStatus.ACTIVE.value
-                            if c.tier == "short_term":
-                                c.tier = "long_term"
+                )
+            if reviewed:
+                await session.execute(update(ClaimORM), reviewed)
 
         return len(claims)
 
-    async def _generate_community_summaries(self) -> dict:
-        """Generate summary artifacts for top-N entity communities via simple clustering."""
-        # Simple approach: group claims by segment and summarise each
-        from core.db import get_session
-        from models.db.memory import ClaimORM, ArtifactORM, SourceORM
-        from models.memory import SourceType
-        import uuid
-
-        segments = [
-            "core_identity", "skills_and_background", "projects_and_goals",
-            "people_and_relationships", "preferences_and_corrections",
-        ]
-        summaries_created = 0
-
-        for segment in segments:
-            async with get_session() as session:
-                result = await session.execute(
+    async def _claims_to_review(self, batch_size: int) -> tuple[list[ClaimORM], dict[uuid.UUID, str]]:
+        """Up to `batch_size` reviewable claims that changed since their last review, oldest first."""
+        claims: list[ClaimORM] = []
+        hashes: dict[uuid.UUID, str] = {}
+        after = None
+        scanned = 0
+        async with get_session() as session:
+            while len(claims) < batch_size and scanned < batch_size * REVIEW_SCAN_FACTOR:
+                query = (
                     select(ClaimORM)
-                    .where(ClaimORM.segment == segment, ClaimORM.status == "active")
-                    .order_by(ClaimORM.base_importance.desc())
-                    .limit(30)
-                )
-                claims = result.scalars().all()
-
-            if not claims:
-                continue
-
-            combined = "\n".join(c.claim_text for c in claims)
-            summary = _extractor.summarize(combined, max_sentences=5)
-            summary_text = f"[{segment.upper()} SUMMARY]\n{summary}"
-            emb = _extractor.embed_one(summary_text)
-
-            async with get_session() as session:
-                # Upsert a synthetic source for summaries
-                source = SourceORM(
-                    source_id=uuid.uuid4(),
-                    source_type=SourceType.SYSTEM.value,
-                    title=f"community_summary_{segment}",
-                    trust_level=8,
+                    .where(ClaimORM.status.in_(["provisional", "stale"]))
+                    .order_by(ClaimORM.created_at.asc(), ClaimORM.claim_id.asc())
+                    .limit(batch_size * 2)
                 )
-                session.add(source)
-                await session.flush()
-
-                artifact = ArtifactORM(
-                    artifact_id=uuid.uuid4(),
-                    source_id=source.source_id,
-                    artifact_type="community_summary",
-                    text=summary_text,
-                    parser_version="consolidation_v1",
-                )
-                session.add(artifact)
-                await session.flush()
+                if after is not None:
+                    query = query.where(tuple_(ClaimORM.created_at, ClaimORM.claim_id) > after)
+                rows = (await session.execute(query)).scalars().all()
+                if not rows:
+                    break
+                for claim in rows:
+                    h = claim_review_hash(claim)
+                    if claim.review_hash != h and len(claims) < batch_size:
+                        claims.append(claim)
+                        hashes[claim.claim_id] = h
+                scanned += len(rows)
+                after = (rows[-1].created_at, rows[-1].claim_id)
+        return claims, hashes
 
-                get_opensearch().index_artifact(
-                    str(artifact.artifact_id), str(source.source_id),
-                    "community_summary", summary_text, emb,
-                )
-                summaries_created += 1
+    async def _generate_community_summaries(self) -> dict:
+        """Summarise the entity communities whose membership changed since the last run."""
+        from memory.graph.communities import CommunitySummarizer
 
-        return {"summaries_created": summaries_created}
+        summarizer = CommunitySummarizer(lambda text: _extractor.summarize(text, max_sentences=5))
+        return await summarizer.run()
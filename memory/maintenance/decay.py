@@ -8,7 +8,9 @@ from sqlalchemy import select, update, and_
 
 from core.config import get_logger
 from core.db import get_session
-from core.clients.opensearch import get_opensearch, IDX_CLAIMS
+from core.clients.opensearch import IDX_CLAIMS
+from memory.outbox import enqueue_update, get_outbox_relay
+from memory.retrieval.profile_cache import affects_profile, bump_profile_version
 from models.memory import ClaimStatus, MemoryTier, TIER_DECAY_RATE
 from models.db.memory import ClaimORM
 
@@ -36,6 +38,7 @@ class DecayEngine:
         now = datetime.now(timezone.utc)
         stale_ids: list = []
         checked = 0
+        profile_changed = False
 
         async with get_session() as session:
             result = await session.execute(
@@ -52,16 +55,17 @@ class DecayEngine:
             for claim in claims:
                 w = _effective_weight(claim, now)
                 if w < STALE_THRESHOLD:
+                    # Only active claims appear in the cached profile snapshot.
+                    profile_changed |= (claim.status == ClaimStatus.ACTIVE.value
+                                        and affects_profile(claim.memory_class, claim.segment))
                     claim.status = ClaimStatus.STALE.value
                     stale_ids.append(str(claim.claim_id))
+                    enqueue_update(session, IDX_CLAIMS, str(claim.claim_id), {"status": "stale"})
+            if profile_changed:
+                await bump_profile_version(session)
 
-        # Sync stale status to OpenSearch
-        os_client = get_opensearch()
-        for cid in stale_ids:
-            try:
-                os_client.update_document(IDX_CLAIMS, cid, {"status": "stale"})
-            except Exception:
-                pass
+        if stale_ids:
+            get_outbox_relay().wake()
 
         logger.info("Decay: checked=%d, stale=%d", checked, len(stale_ids))
         return {"checked": checked, "marked_stale": len(stale_ids)}
@@ -84,13 +88,10 @@ class DecayEngine:
             for claim in claims:
                 claim.status = ClaimStatus.ARCHIVED.value
                 archived_ids.append(str(claim.claim_id))
+                enqueue_update(session, IDX_CLAIMS, str(claim.claim_id), {"status": "archived"})
 
-        os_client = get_opensearch()
-        for cid in archived_ids:
-            try:
-                os_client.update_document(IDX_CLAIMS, cid, {"status": "archived"})
-            except Exception:
-                pass
+        if archived_ids:
+            get_outbox_relay().wake()
 
         logger.info("Archive: %d stale claims archived", len(archived_ids))
         return {"archived": len(archived_ids)}
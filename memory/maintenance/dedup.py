@@ -7,9 +7,12 @@ import numpy as np
 from sqlalchemy import select, update
 
 from core.config import get_logger
-from core.clients.opensearch import get_opensearch, IDX_CLAIMS
+from core.clients.opensearch import IDX_CLAIMS
+from core.clients.vector_store import get_vector_store
 from core.db import get_session
 from memory.graph.operations import GraphOperations
+from memory.outbox import enqueue_update, get_outbox_relay
+from memory.retrieval.profile_cache import affects_profile, bump_profile_version
 from models.memory import ClaimStatus, ClaimRelationType
 from models.db.memory import ClaimORM, EvidenceORM
 
@@ -28,25 +31,20 @@ def _cosine(a: list[float], b: list[float]) -> float:
 class DeduplicationEngine:
     async def run(self, batch_size: int = 200) -> dict:
         """Find near-duplicate active claims and merge lower-confidence one into higher."""
-        os_client = get_opensearch()
-
         # Fetch recent active claims with their embeddings
-        response = os_client.client.search(
-            index=IDX_CLAIMS,
-            body={
-                "size": batch_size,
-                "query": {"term": {"status": "active"}},
-                "_source": ["claim_id", "embedding", "confidence", "base_importance"],
-                "sort": [{"created_at": "desc"}],
-            },
+        hits = get_vector_store().list_documents(
+            IDX_CLAIMS,
+            size=batch_size,
+            filters={"status": "active"},
+            sort_desc="created_at",
+            fields=["claim_id", "embedding", "confidence", "base_importance"],
         )
-        hits = response["hits"]["hits"]
         if len(hits) < 2:
             return {"duplicates_found": 0, "merged": 0}
 
         ids   = [h["_id"] for h in hits]
-        embs  = [h["_source"].get("embedding", []) for h in hits]
-        confs = [h["_source"].get("confidence", 0.5) for h in hits]
+        embs  = [h.get("embedding", []) for h in hits]
+        confs = [h.get("confidence", 0.5) for h in hits]
 
         duplicates: list[tuple[int, int]] = []
         for i in range(len(ids)):
@@ -89,17 +87,16 @@ class DeduplicationEngine:
                 .values(support_count=ClaimORM.support_count + 1)
             )
             # Mark duplicate as superseded
-            await session.execute(
+            dropped = (await session.execute(
                 update(ClaimORM)
                 .where(ClaimORM.claim_id == uuid.UUID(drop_id))
                 .values(status=ClaimStatus.SUPERSEDED.value)
-            )
+                .returning(ClaimORM.memory_class, ClaimORM.segment)
+            )).first()
+            if dropped is not None and affects_profile(dropped.memory_class, dropped.segment):
+                await bump_profile_version(session)
+            enqueue_update(session, IDX_CLAIMS, drop_id, {"status": "superseded"})
+        get_outbox_relay().wake()
 
         # Graph relation
         await _graph_ops.create_claim_relation(keep_id, drop_id, ClaimRelationType.SUPERSEDES)
-
-        # OpenSearch: mark stale
-        try:
-            get_opensearch().update_document(IDX_CLAIMS, drop_id, {"status": "superseded"})
-        except Exception:
-            pass
@@ -1,17 +1,33 @@
-"""Promotion and demotion engine: adjusts claim tiers based on usage and signals."""
+"""Promotion and demotion engine: adjusts claim tiers based on usage and signals.
+
+The rules are SQL predicates, applied by one `UPDATE ... RETURNING` per
+keyset batch of claim ids, so every eligible claim in the store is
+considered on each run. The new tier is a CASE over the row's values
+before the update, so a claim moves at most one step per run: short-term
+cannot jump straight to permanent, and a just-demoted claim is not
+promoted back in the same run. Tier changes go to OpenSearch through the
+outbox, which ships them as one `_bulk` request.
+"""
 from __future__ import annotations
-from datetime import datetime, timezone
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Sequence
 
-from sqlalchemy import select, update
+from sqlalchemy import Float, Select, Update, and_, case, cast, func, not_, or_, select, update
+from sqlalchemy.sql.elements import ColumnElement
 
 from core.config import get_logger
-from core.clients.opensearch import get_opensearch, IDX_CLAIMS
+from core.clients.opensearch import IDX_CLAIMS
 from core.db import get_session
+from memory.outbox import enqueue_update, get_outbox_relay
+from memory.retrieval.profile_cache import affects_profile, bump_profile_version
 from models.memory import MemoryTier, ClaimStatus
 from models.db.memory import ClaimORM
 
 logger = get_logger(__name__)
 
+BATCH_SIZE = 1000
+
 # Promotion thresholds
 _PROMOTE_ST_TO_LT = {
     "min_access_count": 3,
@@ -24,105 +40,129 @@ _PROMOTE_LT_TO_PERM = {
     "min_confidence": 0.75,
     "requires_user_confirmed": False,  # if True, only promote user-confirmed
 }
+_AUTO_CONFIRM_CONFIDENCE = 0.8     # permanent promotions at or above this are marked user-confirmed
 
 # Demotion: LT → ST if not accessed for N days and low hit rate
 _DEMOTE_LT_DAYS      = 30
 _DEMOTE_HIT_RATE_MAX = 0.1   # retrieval_hit_count / access_count
 
 
+# ── Rules ──────────────────────────────────────────────────────────────────────
+
+def _promotes_to_long_term() -> ColumnElement[bool]:
+    th = _PROMOTE_ST_TO_LT
+    return and_(
+        ClaimORM.tier == MemoryTier.SHORT_TERM.value,
+        ClaimORM.access_count >= th["min_access_count"],
+        ClaimORM.retrieval_hit_count >= th["min_retrieval_hits"],
+        ClaimORM.confidence >= th["min_confidence"],
+    )
+
+
+def _promotes_to_permanent() -> ColumnElement[bool]:
+    th = _PROMOTE_LT_TO_PERM
+    rule = and_(
+        ClaimORM.tier == MemoryTier.LONG_TERM.value,
+        ClaimORM.access_count >= th["min_access_count"],
+        ClaimORM.retrieval_hit_count >= th["min_retrieval_hits"],
+        ClaimORM.confidence >= th["min_confidence"],
+        ClaimORM.contradiction_count == 0,
+    )
+    if th["requires_user_confirmed"]:
+        rule = and_(rule, ClaimORM.user_confirmed.is_(True))
+    return rule
+
+
+def _demotes_to_short_term(now: datetime) -> ColumnElement[bool]:
+    last = func.coalesce(ClaimORM.last_accessed_at, ClaimORM.created_at)
+    accesses = case((ClaimORM.access_count > 1, ClaimORM.access_count), else_=1)
+    return and_(
+        ClaimORM.tier == MemoryTier.LONG_TERM.value,
+        not_(_promotes_to_permanent()),                  # promotion wins over demotion
+        last <= now - timedelta(days=_DEMOTE_LT_DAYS),
+        cast(ClaimORM.retrieval_hit_count, Float) / cast(accesses, Float) < _DEMOTE_HIT_RATE_MAX,
+    )
+
+
+def batch_ids(after: Optional[uuid.UUID], batch_size: int) -> Select:
+    """The next keyset batch of claims that may change tier (permanent never auto-demotes)."""
+    query = (
+        select(ClaimORM.claim_id)
+        .where(
+            ClaimORM.status.in_([ClaimStatus.ACTIVE.value, ClaimStatus.PROVISIONAL.value]),
+            ClaimORM.tier != MemoryTier.PERMANENT.value,
+        )
+        .order_by(ClaimORM.claim_id)
+        .limit(batch_size)
+    )
+    if after is not None:
+        query = query.where(ClaimORM.claim_id > after)
+    return query
+
+
+def tier_update(claim_ids: Sequence[uuid.UUID], now: datetime) -> Update:
+    """Move every claim in `claim_ids` that a rule matches.
+
+    Returns (claim_id, tier, user_confirmed, memory_class, segment) per moved claim.
+    """
+    to_long_term, to_permanent, to_short_term = (
+        _promotes_to_long_term(), _promotes_to_permanent(), _demotes_to_short_term(now),
+    )
+    return (
+        update(ClaimORM)
+        .where(ClaimORM.claim_id.in_(claim_ids), or_(to_long_term, to_permanent, to_short_term))
+        .values(
+            tier=case(
+                (to_long_term, MemoryTier.LONG_TERM.value),
+                (to_permanent, MemoryTier.PERMANENT.value),
+                else_=MemoryTier.SHORT_TERM.value,
+            ),
+            # Auto-confirm high-confidence permanent promotions
+            user_confirmed=case(
+                (and_(to_permanent, ClaimORM.confidence >= _AUTO_CONFIRM_CONFIDENCE), True),
+                else_=ClaimORM.user_confirmed,
+            ),
+        )
+        .returning(ClaimORM.claim_id, ClaimORM.tier, ClaimORM.user_confirmed,
+                   ClaimORM.memory_class, ClaimORM.segment)
+        .execution_options(synchronize_session=False)
+    )
+
+
+# ── Engine ─────────────────────────────────────────────────────────────────────
+
 class PromotionEngine:
-    async def run(self, batch_size: int = 300) -> dict:
+    async def run(self, batch_size: int = BATCH_SIZE) -> dict:
         now = datetime.now(timezone.utc)
         promoted = 0
         demoted  = 0
-
-        async with get_session() as session:
-            result = await session.execute(
-                select(ClaimORM)
-                .where(
-                    ClaimORM.status.in_([ClaimStatus.ACTIVE.value, ClaimStatus.PROVISIONAL.value]),
-                )
-                .limit(batch_size)
-            )
-            claims = result.scalars().all()
-
-            for claim in claims:
-                current_tier = MemoryTier(claim.tier)
-                new_tier = self._evaluate_tier(claim, current_tier, now)
-
-                if new_tier != current_tier:
-                    claim.tier = new_tier.value
-                    if new_tier.value > current_tier.value:  # comparing str — use index
-                        promoted += 1
-                    else:
+        scanned  = 0
+        after: Optional[uuid.UUID] = None
+
+        while True:
+            async with get_session() as session:
+                ids = (await session.execute(batch_ids(after, batch_size))).scalars().all()
+                if not ids:
+                    break
+                changed = (await session.execute(tier_update(ids, now))).all()
+                # Moving in or out of long_term changes which claims the profile shows.
+                if any(affects_profile(r.memory_class, r.segment) for r in changed):
+                    await bump_profile_version(session)
+                for claim_id, tier, user_confirmed, _, _ in changed:
+                    if tier == MemoryTier.SHORT_TERM.value:
                         demoted += 1
+                    else:
+                        promoted += 1
+                    # Sync tier changes to OpenSearch
+                    enqueue_update(session, IDX_CLAIMS, str(claim_id),
+                                   {"tier": tier, "user_confirmed": user_confirmed})
+            scanned += len(ids)
+            after = ids[-1]
+            if len(ids) < batch_size:
+                break
 
-                    # Auto-confirm high-confidence permanent promotions
-                    if new_tier == MemoryTier.PERMANENT and claim.confidence >= 0.8:
-                        claim.user_confirmed = True
-
-        # Sync tier changes to OpenSearch
         if promoted + demoted > 0:
-            await self._sync_os_tiers(batch_size)
-
-        logger.info("Promotion: promoted=%d, demoted=%d", promoted, demoted)
-        return {"promoted": promoted, "demoted": demoted}
-
-    def _evaluate_tier(self, claim: ClaimORM, current_tier: MemoryTier,
-                       now: datetime) -> MemoryTier:
-        # Permanent never auto-demotes
-        if current_tier == MemoryTier.PERMANENT:
-            return MemoryTier.PERMANENT
-
-        access = claim.access_count
-        hits   = claim.retrieval_hit_count
-        conf   = claim.confidence
-
-        # ── Promotion ────────────────────────────────────────────────────────
-        if current_tier == MemoryTier.SHORT_TERM:
-            th = _PROMOTE_ST_TO_LT
-            if (access >= th["min_access_count"]
-                    and hits >= th["min_retrieval_hits"]
-                    and conf >= th["min_confidence"]):
-                return MemoryTier.LONG_TERM
-
-        if current_tier == MemoryTier.LONG_TERM:
-            th = _PROMOTE_LT_TO_PERM
-            confirmed_ok = (not th["requires_user_confirmed"] or claim.user_confirmed)
-            if (access >= th["min_access_count"]
-                    and hits >= th["min_retrieval_hits"]
-                    and conf >= th["min_confidence"]
-                    and confirmed_ok
-                    and claim.contradiction_count == 0):
-                return MemoryTier.PERMANENT
-
-        # ── Demotion ─────────────────────────────────────────────────────────
-        if current_tier == MemoryTier.LONG_TERM:
-            last = claim.last_accessed_at or claim.created_at
-            if last:
-                if last.tzinfo is None:
-                    last = last.replace(tzinfo=timezone.utc)
-                idle_days = (now - last).days
-                hit_rate = hits / max(access, 1)
-                if idle_days >= _DEMOTE_LT_DAYS and hit_rate < _DEMOTE_HIT_RATE_MAX:
-                    return MemoryTier.SHORT_TERM
-
-        return current_tier
-
-    async def _sync_os_tiers(self, limit: int) -> None:
-        """Re-sync tier field to OpenSearch for recently updated claims."""
-        async with get_session() as session:
-            result = await session.execute(
-                select(ClaimORM)
-                .where(ClaimORM.status == ClaimStatus.ACTIVE.value)
-                .order_by(ClaimORM.updated_at.desc())
-                .limit(limit)
-            )
-            for claim in result.scalars().all():
-                try:
-                    get_opensearch().update_document(
-                        IDX_CLAIMS, str(claim.claim_id),
-                        {"tier": claim.tier, "user_confirmed": claim.user_confirmed},
-                    )
-                except Exception:
-                    pass
+            get_outbox_relay().wake()
+
+        logger.info("Promotion: scanned=%d, promoted=%d, demoted=%d", scanned, promoted, demoted)
+        return {"scanned": scanned, "promoted": promoted, "demoted": demoted}
@@ -0,0 +1,34 @@
+"""Rebuild a memory search index with another kNN profile, without downtime.
+
+The copy, mirroring and alias swap live in `OpenSearchClient.reindex`; this
+wraps it as a maintenance run so it shows up in the run history. It is run
+on demand (`POST /api/memory/maintenance/reindex`), not on a schedule.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Optional
+
+from core.clients.index_profiles import get_index_profile
+from core.clients.opensearch import OpenSearchClient
+from core.clients.vector_store import get_vector_store
+from core.config import get_logger
+from memory.maintenance.consolidation import _finish_run, _start_run
+
+logger = get_logger(__name__)
+
+
+async def reindex_index(index: str, profile: Optional[str] = None, keep_old: bool = False) -> dict[str, Any]:
+    store = get_vector_store()
+    if not isinstance(store, OpenSearchClient):
+        raise RuntimeError("Reindexing applies to the OpenSearch vector store only")
+    target_profile = get_index_profile(profile)
+    run_id = await _start_run(f"reindex:{index}")
+    try:
+        result = await asyncio.to_thread(store.reindex, index, target_profile, keep_old)
+    except Exception as exc:
+        await _finish_run(run_id, {}, str(exc))
+        logger.error("Reindex of %s to %s failed: %s", index, target_profile.name, exc)
+        raise
+    await _finish_run(run_id, {})
+    return result
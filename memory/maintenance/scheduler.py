@@ -0,0 +1,271 @@
+"""Process-safe scheduling of the periodic maintenance jobs.
+
+Every uvicorn worker runs a JobScheduler, but each job runs on one worker
+only. Each job has a `scheduled_jobs` row holding its next due time and a
+lease.
+
+Claiming a job. Workers poll the table. A worker claims a due job whose
+lease is free or expired with `SELECT ... FOR UPDATE SKIP LOCKED`, then
+writes itself into `leased_by` and moves `leased_until` forward. Lease
+times are compared on the database clock, so clock skew between workers
+does not matter.
+
+Running a job. While the job runs, the owner renews the lease every
+lease/3. When the job ends, the owner writes the next fire time from the
+job's APScheduler trigger and clears the lease. If the owner loses its
+lease to another worker, it cancels its own run.
+
+Crashes and shutdown. If a worker dies mid-run, its lease expires while
+the job is still due, and the next worker to poll takes the job over and
+runs it again. The takeover marks the dead worker's unfinished
+maintenance runs `abandoned`. On a clean shutdown, running jobs are
+cancelled and their leases released without moving the due time, so
+another worker picks them up on its next poll.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import socket
+import uuid
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Optional, Protocol
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from core.config import get_logger
+from core.db import get_session
+from models.db.memory import MaintenanceRunORM, ScheduledJobORM
+
+logger = get_logger(__name__)
+
+LEASE_S         = 120.0
+POLL_INTERVAL_S = 15.0
+DISTANT_FUTURE  = datetime(9999, 1, 1, tzinfo=timezone.utc)   # trigger has no further fire time
+
+# Set while a scheduled job runs, so `_start_run` can record which worker ran it.
+current_worker: ContextVar[Optional[str]] = ContextVar("maintenance_worker", default=None)
+
+
+@dataclass
+class Lease:
+    job_id: str
+    due: datetime
+    previous_owner: Optional[str] = None     # set when taking over a lease that was never released
+
+
+class LeaseStore(Protocol):
+    async def register(self, due: dict[str, datetime]) -> None: ...
+    async def acquire(self, job_id: str, owner: str, lease_s: float) -> Optional[Lease]: ...
+    async def renew(self, job_id: str, owner: str, lease_s: float) -> bool: ...
+    async def release(self, job_id: str, owner: str, next_run_at: Optional[datetime],
+                      status: str, error: Optional[str] = None) -> None: ...
+    async def abandon_runs(self, owner: str) -> int: ...
+
+
+class PostgresLeaseStore:
+    async def register(self, due: dict[str, datetime]) -> None:
+        """Add rows for jobs seen for the first time; existing rows keep their due time."""
+        if not due:
+            return
+        async with get_session() as session:
+            await session.execute(
+                pg_insert(ScheduledJobORM)
+                .values([{"job_id": job_id, "next_run_at": at} for job_id, at in due.items()])
+                .on_conflict_do_nothing(index_elements=["job_id"])
+            )
+
+    async def acquire(self, job_id: str, owner: str, lease_s: float) -> Optional[Lease]:
+        async with get_session() as session:
+            job = (await session.execute(
+                select(ScheduledJobORM)
+                .where(
+                    ScheduledJobORM.job_id == job_id,
+                    ScheduledJobORM.next_run_at <= func.now(),
+                    or_(ScheduledJobORM.leased_until.is_(None), ScheduledJobORM.leased_until < func.now()),
+                )
+                .with_for_update(skip_locked=True)
+            )).scalar_one_or_none()
+            if job is None:
+                return None
+            lease = Lease(job_id, job.next_run_at, job.leased_by)
+            job.leased_by = owner
+            job.leased_until = func.now() + timedelta(seconds=lease_s)
+            job.last_started_at = func.now()
+        return lease
+
+    async def renew(self, job_id: str, owner: str, lease_s: float) -> bool:
+        async with get_session() as session:
+            result = await session.execute(
+                update(ScheduledJobORM)
+                .where(ScheduledJobORM.job_id == job_id, ScheduledJobORM.leased_by == owner)
+                .values(leased_until=func.now() + timedelta(seconds=lease_s))
+                .returning(ScheduledJobORM.job_id)
+            )
+            return result.first() is not None
+
+    async def release(self, job_id: str, owner: str, next_run_at: Optional[datetime],
+                      status: str, error: Optional[str] = None) -> None:
+        values: dict[str, Any] = {
+            "leased_by": None, "leased_until": None, "last_finished_at": func.now(),
+            "last_status": status, "last_error": error,
+        }
+        if next_run_at is not None:
+            values["next_run_at"] = next_run_at
+        async with get_session() as session:
+            await session.execute(
+                update(ScheduledJobORM)
+                .where(ScheduledJobORM.job_id == job_id, ScheduledJobORM.leased_by == owner)
+                .values(**values)
+            )
+
+    async def abandon_runs(self, owner: str) -> int:
+        async with get_session() as session:
+            result = await session.execute(
+                update(MaintenanceRunORM)
+                .where(MaintenanceRunORM.worker == owner, MaintenanceRunORM.status == "running")
+                .values(status="abandoned", error="worker lease expired", finished_at=func.now())
+            )
+            return result.rowcount or 0
+
+
+def next_fire_time(trigger: Any, previous: Optional[datetime], now: datetime) -> datetime:
+    """The trigger's first fire time after `now`; missed fire times coalesce into one run."""
+    nxt = trigger.get_next_fire_time(previous, now)
+    while nxt is not None and nxt <= now:
+        nxt = trigger.get_next_fire_time(nxt, now)
+    return nxt or DISTANT_FUTURE
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+@dataclass
+class ScheduledJob:
+    job_id: str
+    func: Callable[[], Awaitable[Any]]
+    trigger: Any                              # an apscheduler trigger
+
+
+class JobScheduler:
+    def __init__(
+        self,
+        store: Optional[LeaseStore] = None,
+        worker_id: Optional[str] = None,
+        lease_s: float = LEASE_S,
+        poll_interval: float = POLL_INTERVAL_S,
+    ) -> None:
+        self.store: LeaseStore = store or PostgresLeaseStore()
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_s = lease_s
+        self.poll_interval = poll_interval
+        self._jobs: dict[str, ScheduledJob] = {}
+        self._running: dict[str, asyncio.Task] = {}
+        self._stopping = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def add_job(self, job_id: str, func: Callable[[], Awaitable[Any]], trigger: Any) -> None:
+        self._jobs[job_id] = ScheduledJob(job_id, func, trigger)
+
+    # ── Lifecycle ──────────────────────────────────────────────────────────────
+
+    async def start(self) -> None:
+        now = datetime.now(timezone.utc)
+        await self.store.register({j.job_id: next_fire_time(j.trigger, None, now) for j in self._jobs.values()})
+        if self._task is None or self._task.done():
+            self._stopping.clear()
+            self._task = asyncio.create_task(self.run(), name=f"maintenance-scheduler-{self.worker_id}")
+
+    async def stop(self) -> None:
+        """Stop polling; cancel running jobs and hand their leases back, still due."""
+        self._stopping.set()
+        for task in list(self._running.values()):
+            task.cancel()
+        await asyncio.gather(*self._running.values(), return_exceptions=True)
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    async def run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await self.tick()
+            except Exception as exc:
+                logger.warning("Scheduler poll failed: %s", exc)
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def tick(self) -> list[str]:
+        """Claim and start every due job this worker is not already running."""
+        started = []
+        for job in self._jobs.values():
+            if job.job_id in self._running or self._stopping.is_set():
+                continue
+            lease = await self.store.acquire(job.job_id, self.worker_id, self.lease_s)
+            if lease is None:
+                continue
+            self._running[job.job_id] = asyncio.create_task(
+                self._execute(job, lease), name=f"maintenance-job-{job.job_id}",
+            )
+            started.append(job.job_id)
+        return started
+
+    # ── Running a job ──────────────────────────────────────────────────────────
+
+    async def _execute(self, job: ScheduledJob, lease: Lease) -> None:
+        token = current_worker.set(self.worker_id)
+        heartbeat = asyncio.create_task(self._heartbeat(job.job_id, asyncio.current_task()))
+        status, error, next_run_at = "completed", None, None
+        try:
+            if lease.previous_owner is not None:
+                abandoned = await self.store.abandon_runs(lease.previous_owner)
+                logger.warning("Job %s: lease of %s expired; taking over (%d runs abandoned)",
+                               job.job_id, lease.previous_owner, abandoned)
+            await job.func()
+        except asyncio.CancelledError:
+            status = "interrupted"
+        except Exception as exc:
+            status, error = "failed", str(exc)
+            logger.error("Scheduled job %s failed: %s", job.job_id, exc)
+        finally:
+            heartbeat.cancel()
+            current_worker.reset(token)
+            self._running.pop(job.job_id, None)
+        if status != "interrupted":
+            next_run_at = next_fire_time(job.trigger, lease.due, datetime.now(timezone.utc))
+        try:
+            await self.store.release(job.job_id, self.worker_id, next_run_at, status, error)
+        except Exception as exc:
+            logger.warning("Job %s: lease release failed, it will expire instead: %s", job.job_id, exc)
+
+    async def _heartbeat(self, job_id: str, job_task: Optional[asyncio.Task]) -> None:
+        while True:
+            await asyncio.sleep(self.lease_s / 3)
+            try:
+                held = await self.store.renew(job_id, self.worker_id, self.lease_s)
+            except Exception as exc:
+                logger.warning("Job %s: lease renewal failed: %s", job_id, exc)
+                continue
+            if not held:
+                logger.error("Job %s: lease lost to another worker; cancelling this run", job_id)
+                if job_task is not None:
+                    job_task.cancel()
+                return
+
+
+# ── Module-level singleton ─────────────────────────────────────────────────────
+
+_scheduler: Optional[JobScheduler] = None
+
+
+def get_job_scheduler() -> JobScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = JobScheduler()
+    return _scheduler
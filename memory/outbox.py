@@ -0,0 +1,507 @@
+"""Transactional outbox for OpenSearch / Neo4j mirrors of Postgres writes.
+
+Writers add `memory_outbox` rows in the same session (and so the same commit)
+as the claims, entities and artifacts they describe, instead of calling the
+search index and graph inline. `OutboxRelay` drains due rows in event order
+and applies them as one `_bulk` request plus coalesced UNWIND writes.
+
+Every API worker starts a relay, but only one drains at a time: the relays
+compete for a lease on the `memory_outbox_relay` row of `scheduled_jobs`
+(the maintenance scheduler's lease table), and the holder renews it while it
+runs. A single drainer is what keeps the mirrors ordered: with parallel
+drainers a later delete for a document could land while an earlier index for
+it is still in flight, and the index would bring the document back. Because
+the leader is the only reader, rows are read and settled in two short
+transactions and no row lock is held during the calls to the sinks.
+
+Every op is idempotent (index/update/delete by id, MERGE in Cypher), so a
+failed batch is simply retried with exponential backoff; rows that keep
+failing are parked as `dead`. A search row is held back while an earlier row
+for the same document is waiting out a retry backoff; graph rows are ordered
+sink-wide (entity upserts, claim edges and deletes depend on each other across
+aggregates), so any graph row in backoff holds back the graph rows after it.
+"""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional, Protocol
+
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from core.config import get_logger
+from core.db import get_session
+from models.db.memory import OutboxEventORM
+
+logger = get_logger(__name__)
+
+SINK_SEARCH = "opensearch"
+SINK_GRAPH  = "neo4j"
+
+STATUS_PENDING = "pending"
+STATUS_DEAD    = "dead"
+
+BATCH_SIZE      = 200
+MAX_ATTEMPTS    = 8
+POLL_INTERVAL_S = 1.0
+BACKOFF_BASE_S  = 2.0
+BACKOFF_MAX_S   = 300.0
+LEASE_JOB_ID    = "memory_outbox_relay"
+LEASE_S         = 30.0
+
+
+class SearchSink(Protocol):
+    def bulk_actions(self, actions: list[dict[str, Any]], refresh: bool = True) -> set[str]: ...
+
+
+class GraphSink(Protocol):
+    async def upsert_entities_batch(self, rows: list[dict[str, Any]]) -> None: ...
+    async def upsert_claims_batch(self, rows: list[dict[str, Any]]) -> None: ...
+    async def link_claims_to_source(self, claim_ids: list[str], source_id: str) -> None: ...
+    async def delete_claims_batch(self, claim_ids: list[str]) -> None: ...
+    async def delete_entities_batch(self, entity_ids: list[str]) -> None: ...
+    async def delete_sources_batch(self, source_ids: list[str]) -> None: ...
+
+
+class RelayLeaseStore(Protocol):
+    """The part of the maintenance scheduler's LeaseStore the relay uses."""
+    async def register(self, due: dict[str, datetime]) -> None: ...
+    async def acquire(self, job_id: str, owner: str, lease_s: float) -> Optional[Any]: ...
+    async def renew(self, job_id: str, owner: str, lease_s: float) -> bool: ...
+    async def release(self, job_id: str, owner: str, next_run_at: Optional[datetime],
+                      status: str, error: Optional[str] = None) -> None: ...
+
+
+# ── Writers ────────────────────────────────────────────────────────────────────
+
+def enqueue(session: AsyncSession, sink: str, op: str, aggregate_id: str,
+            payload: dict[str, Any]) -> None:
+    session.add(OutboxEventORM(sink=sink, op=op, aggregate_id=aggregate_id, payload=payload))
+
+
+def enqueue_index(session: AsyncSession, index: str, doc_id: str, doc: dict[str, Any],
+                  embed_text: Optional[str] = None) -> None:
+    """Index `doc`; when `embed_text` is given the relay fills `doc["embedding"]`."""
+    payload: dict[str, Any] = {"index": index, "id": doc_id, "doc": doc}
+    if embed_text is not None:
+        payload["embed_text"] = embed_text
+    enqueue(session, SINK_SEARCH, "index", doc_id, payload)
+
+
+def enqueue_update(session: AsyncSession, index: str, doc_id: str, fields: dict[str, Any]) -> None:
+    enqueue(session, SINK_SEARCH, "update", doc_id, {"index": index, "id": doc_id, "fields": fields})
+
+
+def enqueue_delete(session: AsyncSession, index: str, doc_id: str) -> None:
+    enqueue(session, SINK_SEARCH, "delete", doc_id, {"index": index, "id": doc_id})
+
+
+def enqueue_graph(session: AsyncSession, op: str, aggregate_id: str, **payload: Any) -> None:
+    """Graph op: upsert_entities / upsert_claims (rows), link_claims_to_source
+    (claim_ids, source_id), delete_claims / delete_entities / delete_sources (ids)."""
+    if op not in _GRAPH_OPS:
+        raise ValueError(f"Unknown graph outbox op: {op}")
+    enqueue(session, SINK_GRAPH, op, aggregate_id, payload)
+
+
+# ── Graph op dispatch ──────────────────────────────────────────────────────────
+
+async def _graph_upsert_entities(graph: GraphSink, events: list[OutboxEventORM]) -> None:
+    await graph.upsert_entities_batch([r for e in events for r in e.payload["rows"]])
+
+
+async def _graph_upsert_claims(graph: GraphSink, events: list[OutboxEventORM]) -> None:
+    await graph.upsert_claims_batch([r for e in events for r in e.payload["rows"]])
+
+
+async def _graph_link_source(graph: GraphSink, events: list[OutboxEventORM]) -> None:
+    for e in events:
+        await graph.link_claims_to_source(e.payload["claim_ids"], e.payload["source_id"])
+
+
+async def _graph_delete_claims(graph: GraphSink, events: list[OutboxEventORM]) -> None:
+    await graph.delete_claims_batch([i for e in events for i in e.payload["ids"]])
+
+
+async def _graph_delete_entities(graph: GraphSink, events: list[OutboxEventORM]) -> None:
+    await graph.delete_entities_batch([i for e in events for i in e.payload["ids"]])
+
+
+async def _graph_delete_sources(graph: GraphSink, events: list[OutboxEventORM]) -> None:
+    await graph.delete_sources_batch([i for e in events for i in e.payload["ids"]])
+
+
+_GRAPH_OPS = {
+    "upsert_entities":       _graph_upsert_entities,
+    "upsert_claims":         _graph_upsert_claims,
+    "link_claims_to_source": _graph_link_source,
+    "delete_claims":         _graph_delete_claims,
+    "delete_entities":       _graph_delete_entities,
+    "delete_sources":        _graph_delete_sources,
+}
+
+
+def _search_action(event: OutboxEventORM) -> dict[str, Any]:
+    p = event.payload
+    if event.op == "index":
+        return {"_op_type": "index", "_index": p["index"], "_id": p["id"], "_source": p["doc"]}
+    if event.op == "update":
+        return {"_op_type": "update", "_index": p["index"], "_id": p["id"], "doc": p["fields"]}
+    if event.op == "delete":
+        return {"_op_type": "delete", "_index": p["index"], "_id": p["id"]}
+    raise ValueError(f"Unknown search outbox op: {event.op}")
+
+
+# ── Relay ──────────────────────────────────────────────────────────────────────
+
+@dataclass
+class OutboxMetrics:
+    batches: int = 0
+    delivered: int = 0
+    retried: int = 0
+    dead: int = 0
+    last_lag_s: float = 0.0
+    max_lag_s: float = 0.0
+    last_batch_s: float = 0.0
+    last_error: Optional[str] = None
+
+
+class OutboxRelay:
+    def __init__(
+        self,
+        search: Optional[SearchSink] = None,
+        graph: Optional[GraphSink] = None,
+        embed: Optional[Callable[[list[str]], list[list[float]]]] = None,
+        batch_size: int = BATCH_SIZE,
+        max_attempts: int = MAX_ATTEMPTS,
+        poll_interval: float = POLL_INTERVAL_S,
+        lease_store: Optional[RelayLeaseStore] = None,
+        worker_id: Optional[str] = None,
+        lease_s: float = LEASE_S,
+    ) -> None:
+        self._search = search
+        self._graph = graph
+        self._embed = embed
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.metrics = OutboxMetrics()
+        self._lease_store = lease_store
+        if worker_id is None:
+            from memory.maintenance.scheduler import default_worker_id
+            worker_id = default_worker_id()
+        self.worker_id = worker_id
+        self.lease_s = lease_s
+        self._leader = False
+        self._registered = False
+        self._last_acquire = float("-inf")
+        self._wake = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._drain_task: Optional[asyncio.Task] = None
+
+    # Sinks resolve lazily so constructing a relay never touches the stores.
+    @property
+    def search(self) -> SearchSink:
+        if self._search is None:
+            from core.clients.vector_store import get_vector_store
+            self._search = get_vector_store()
+        return self._search
+
+    @property
+    def graph(self) -> GraphSink:
+        if self._graph is None:
+            from core.clients.neo4j import get_neo4j
+            self._graph = get_neo4j()
+        return self._graph
+
+    @property
+    def lease_store(self) -> RelayLeaseStore:
+        if self._lease_store is None:
+            from memory.maintenance.scheduler import PostgresLeaseStore
+            self._lease_store = PostgresLeaseStore()
+        return self._lease_store
+
+    def _embed_texts(self, texts: list[str]) -> list[list[float]]:
+        if self._embed is None:
+            from memory.ingestion.extractor import Extractor
+            self._embed = Extractor().embed
+        return self._embed(texts)
+
+    # ── Lifecycle ──────────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._stopping.clear()
+            self._task = asyncio.create_task(self.run(), name="memory-outbox-relay")
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        self._wake.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    def wake(self) -> None:
+        """Nudge the loop after a commit instead of waiting for the next poll."""
+        self._wake.set()
+
+    @property
+    def is_leader(self) -> bool:
+        return self._leader
+
+    async def run(self) -> None:
+        try:
+            while not self._stopping.is_set():
+                handled = 0
+                try:
+                    if self._leader or await self._try_lead():
+                        handled = await self._drain_as_leader()
+                except Exception as exc:
+                    logger.warning("Outbox relay batch failed: %s", exc)
+                    self.metrics.last_error = str(exc)
+                if handled >= self.batch_size:
+                    continue
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+        finally:
+            await self._resign()
+
+    # ── Leadership ─────────────────────────────────────────────────────────────
+
+    async def _try_lead(self) -> bool:
+        """Take the drain lease if it is free or expired; followers retry every lease/3."""
+        now = asyncio.get_running_loop().time()
+        if now - self._last_acquire < self.lease_s / 3:
+            return False
+        self._last_acquire = now
+        if not self._registered:
+            await self.lease_store.register({LEASE_JOB_ID: datetime.now(timezone.utc)})
+            self._registered = True
+        lease = await self.lease_store.acquire(LEASE_JOB_ID, self.worker_id, self.lease_s)
+        if lease is None:
+            return False
+        if lease.previous_owner is not None:
+            logger.warning("Outbox relay lease of %s expired; %s takes over draining",
+                           lease.previous_owner, self.worker_id)
+        self._leader = True
+        self._heartbeat_task = asyncio.create_task(self._heartbeat(), name="memory-outbox-lease")
+        return True
+
+    async def _drain_as_leader(self) -> int:
+        # A separate task, so losing the lease can cancel the batch in flight.
+        self._drain_task = asyncio.create_task(self.drain_once())
+        try:
+            await asyncio.wait({self._drain_task})
+        finally:
+            if not self._drain_task.done():
+                self._drain_task.cancel()
+        task, self._drain_task = self._drain_task, None
+        if task.cancelled():
+            return 0
+        return task.result()
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease_s / 3)
+            try:
+                held = await self.lease_store.renew(LEASE_JOB_ID, self.worker_id, self.lease_s)
+            except Exception as exc:
+                logger.warning("Outbox relay lease renewal failed: %s", exc)
+                continue
+            if not held:
+                logger.error("Outbox relay lost its lease to another worker; stopping this drain")
+                self._leader = False
+                if self._drain_task is not None:
+                    self._drain_task.cancel()
+                return
+
+    async def _resign(self) -> None:
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        if not self._leader:
+            return
+        self._leader = False
+        try:
+            await self.lease_store.release(LEASE_JOB_ID, self.worker_id, None, "released")
+        except Exception as exc:
+            logger.warning("Outbox relay lease release failed, it will expire instead: %s", exc)
+
+    # ── Draining ───────────────────────────────────────────────────────────────
+
+    async def drain_once(self) -> int:
+        """Deliver one batch of due events; returns how many rows were handled.
+
+        Only the lease holder may call this: the batch is read and settled in
+        separate transactions, with no row locks held while the sinks are called.
+        """
+        started = asyncio.get_running_loop().time()
+        async with get_session() as session:
+            earlier = aliased(OutboxEventORM)
+            blocked = (
+                select(earlier.event_id)
+                .where(
+                    earlier.sink == OutboxEventORM.sink,
+                    or_(earlier.sink == SINK_GRAPH, earlier.aggregate_id == OutboxEventORM.aggregate_id),
+                    earlier.status == STATUS_PENDING,
+                    earlier.event_id < OutboxEventORM.event_id,
+                    earlier.next_attempt_at > func.now(),
+                )
+                .exists()
+            )
+            result = await session.execute(
+                select(OutboxEventORM)
+                .where(
+                    OutboxEventORM.status == STATUS_PENDING,
+                    OutboxEventORM.next_attempt_at <= func.now(),
+                    ~blocked,
+                )
+                .order_by(OutboxEventORM.event_id)
+                .limit(self.batch_size)
+            )
+            events = list(result.scalars().all())
+        if not events:
+            return 0
+
+        failures, deferred = await self.deliver(events)
+        self._settle(events, failures, deferred)
+        delivered = [e.event_id for e in events
+                     if e.event_id not in failures and e.event_id not in deferred]
+        async with get_session() as session:
+            # The rows are detached; adding them back writes the retry state _settle set.
+            session.add_all([e for e in events if e.event_id in failures])
+            if delivered:
+                await session.execute(
+                    delete(OutboxEventORM).where(OutboxEventORM.event_id.in_(delivered))
+                )
+
+        self.metrics.batches += 1
+        self.metrics.last_batch_s = asyncio.get_running_loop().time() - started
+        return len(events)
+
+    async def deliver(self, events: list[OutboxEventORM]) -> tuple[dict[int, str], set[int]]:
+        """Apply events to the sinks in event order.
+
+        Returns (failed event_id -> error, deferred event_ids). Deferred events
+        were not attempted because an earlier graph write in the batch failed;
+        they stay pending without spending a retry.
+        """
+        failures: dict[int, str] = {}
+        deferred: set[int] = set()
+        search_events = [e for e in events if e.sink == SINK_SEARCH]
+        graph_events  = [e for e in events if e.sink == SINK_GRAPH]
+
+        if search_events:
+            try:
+                await self._fill_embeddings(search_events)
+                failed_ids = await asyncio.to_thread(
+                    self.search.bulk_actions, [_search_action(e) for e in search_events],
+                )
+                for e in search_events:
+                    if e.payload["id"] in failed_ids:
+                        failures[e.event_id] = "bulk item failed"
+            except Exception as exc:
+                for e in search_events:
+                    failures[e.event_id] = f"search: {exc}"
+
+        # Consecutive events with the same op become one UNWIND call; the
+        # first failure defers the rest so graph writes stay in event order.
+        groups: list[list[OutboxEventORM]] = []
+        for e in graph_events:
+            if groups and groups[-1][0].op == e.op:
+                groups[-1].append(e)
+            else:
+                groups.append([e])
+        for i, group in enumerate(groups):
+            try:
+                await _GRAPH_OPS[group[0].op](self.graph, group)
+            except Exception as exc:
+                for e in group:
+                    failures[e.event_id] = f"graph {group[0].op}: {exc}"
+                deferred.update(e.event_id for g in groups[i + 1:] for e in g)
+                break
+        return failures, deferred
+
+    async def _fill_embeddings(self, events: list[OutboxEventORM]) -> None:
+        todo = [e for e in events if e.op == "index" and "embed_text" in e.payload
+                and not e.payload["doc"].get("embedding")]
+        if not todo:
+            return
+        embs = await asyncio.to_thread(self._embed_texts, [e.payload["embed_text"] for e in todo])
+        for e, emb in zip(todo, embs):
+            e.payload = {**e.payload, "doc": {**e.payload["doc"], "embedding": emb}}
+
+    def _settle(self, events: list[OutboxEventORM], failures: dict[int, str],
+                deferred: set[int]) -> None:
+        now = datetime.now(timezone.utc)
+        lags: list[float] = []
+        for e in events:
+            error = failures.get(e.event_id)
+            if e.event_id in deferred:
+                continue
+            if error is None:
+                if e.created_at is not None:
+                    lags.append((now - e.created_at).total_seconds())
+                continue
+            e.attempts += 1
+            e.last_error = error[:2000]
+            if e.attempts >= self.max_attempts:
+                e.status = STATUS_DEAD
+                self.metrics.dead += 1
+                logger.error("Outbox event %s (%s/%s) is dead after %d attempts: %s",
+                             e.event_id, e.sink, e.op, e.attempts, error)
+            else:
+                backoff = min(BACKOFF_BASE_S * 2 ** (e.attempts - 1), BACKOFF_MAX_S)
+                e.next_attempt_at = now + timedelta(seconds=backoff)
+                self.metrics.retried += 1
+        if lags:
+            self.metrics.delivered += len(lags)
+            self.metrics.last_lag_s = max(lags)
+            self.metrics.max_lag_s = max(self.metrics.max_lag_s, self.metrics.last_lag_s)
+        if failures:
+            self.metrics.last_error = next(iter(failures.values()))
+
+    # ── Introspection ──────────────────────────────────────────────────────────
+
+    async def stats(self) -> dict[str, Any]:
+        async with get_session() as session:
+            result = await session.execute(
+                select(
+                    OutboxEventORM.status,
+                    func.count(),
+                    func.min(OutboxEventORM.created_at),
+                ).group_by(OutboxEventORM.status)
+            )
+            rows = {status: (count, oldest) for status, count, oldest in result.all()}
+        pending, oldest = rows.get(STATUS_PENDING, (0, None))
+        return {
+            "pending": pending,
+            "dead": rows.get(STATUS_DEAD, (0, None))[0],
+            "oldest_pending_age_s": (
+                (datetime.now(timezone.utc) - oldest).total_seconds() if oldest else 0.0
+            ),
+            "running": self._task is not None and not self._task.done(),
+            "leader": self._leader,
+            "worker": self.worker_id,
+            **asdict(self.metrics),
+        }
+
+
+# ── Module-level singleton ─────────────────────────────────────────────────────
+
+_relay: Optional[OutboxRelay] = None
+
+
+def get_outbox_relay() -> OutboxRelay:
+    global _relay
+    if _relay is None:
+        _relay = OutboxRelay()
+    return _relay
@@ -1,4 +1,4 @@
-from .query_planner import QueryPlanner, QueryPlan
+from .query_planner import QueryPlanner, QueryPlan, get_query_planner
 from .hybrid import HybridRetriever
 from .scoring import score_claim, apply_redundancy_penalty
 from .context_assembler import ContextAssembler
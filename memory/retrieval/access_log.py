@@ -0,0 +1,243 @@
+"""In-process aggregation of retrieval bookkeeping.
+
+Every search used to insert one `retrieval_log` row per result and bump each
+returned claim's `access_count` / `last_accessed_at` row by row, all inside the
+request. `AccessAggregator.record` now just folds the hits into memory;
+a background loop flushes them periodically as one multi-row INSERT into
+`retrieval_log` and one `UPDATE claims ... FROM (VALUES ...)`, and once more on
+shutdown.
+
+`record` never awaits, so concurrent searches on the event loop cannot
+interleave inside it, and a flush swaps the buffers out before its first await.
+
+Counters and log rows are written in separate transactions, so a bad log row
+never holds the counters back. Log rows whose claim has been deleted since the
+search get a NULL `claim_id`, as the foreign key's ON DELETE SET NULL would
+have done. A batch that fails on a transient error (connection lost, timeout)
+is merged back so the next flush carries it; any other error drops the batch,
+since retrying it would only fail the same way.
+"""
+from __future__ import annotations
+
+import asyncio
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterable, Optional
+
+from sqlalchemy import DateTime, Float, Integer, Text, column, func, insert, literal, select, update, values
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import get_logger
+from core.db import get_session
+from models.db.memory import ClaimORM, RetrievalLogORM
+
+logger = get_logger(__name__)
+
+FLUSH_INTERVAL_S = 5.0
+FLUSH_AT_ROWS    = 500       # wake the loop early once this many log rows are buffered
+MAX_PENDING_LOGS = 20_000    # beyond this, log rows are dropped (counters are kept)
+
+
+@dataclass
+class AccessDelta:
+    count: int
+    last_accessed_at: datetime
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _is_transient(exc: BaseException) -> bool:
+    """Errors worth retrying the same batch for; everything else would fail again."""
+    if isinstance(exc, DBAPIError):
+        return exc.connection_invalidated or isinstance(exc, (OperationalError, InterfaceError))
+    return isinstance(exc, (ConnectionError, TimeoutError, OSError))
+
+
+class AccessAggregator:
+    def __init__(
+        self,
+        session_factory: Callable[[], Any] = get_session,
+        clock: Callable[[], datetime] = _utcnow,
+        flush_interval: float = FLUSH_INTERVAL_S,
+    ) -> None:
+        self._session_factory = session_factory
+        self._clock = clock
+        self.flush_interval = flush_interval
+        self._access: dict[uuid.UUID, AccessDelta] = {}
+        self._logs: list[dict[str, Any]] = []
+        self.dropped_logs = 0
+        self.dropped_claims = 0
+        self._wake = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    # ── Recording ──────────────────────────────────────────────────────────────
+
+    def record(self, query: str, hits: Iterable[tuple[uuid.UUID, float]], log: bool = True) -> None:
+        """Buffer one search's returned claims as (claim_id, score) pairs.
+
+        Access counters are always bumped; `log=False` skips the retrieval_log rows.
+        """
+        now = self._clock()
+        for claim_id, score in hits:
+            delta = self._access.get(claim_id)
+            if delta is None:
+                self._access[claim_id] = AccessDelta(1, now)
+            else:
+                delta.count += 1
+                delta.last_accessed_at = max(delta.last_accessed_at, now)
+            if not log:
+                continue
+            if len(self._logs) < MAX_PENDING_LOGS:
+                self._logs.append({
+                    "retrieval_id": uuid.uuid4(),
+                    "query_text": query,
+                    "claim_id": claim_id,
+                    "retrieval_score": score,
+                    "created_at": now,
+                })
+            else:
+                self.dropped_logs += 1
+        if len(self._logs) >= FLUSH_AT_ROWS:
+            self._wake.set()
+
+    def drain(self) -> tuple[list[dict[str, Any]], dict[uuid.UUID, AccessDelta]]:
+        """Take everything buffered so far, leaving empty buffers behind."""
+        logs, access = self._logs, self._access
+        self._logs, self._access = [], {}
+        return logs, access
+
+    def _restore(self, logs: list[dict[str, Any]], access: dict[uuid.UUID, AccessDelta]) -> None:
+        self._logs = (logs + self._logs)[:MAX_PENDING_LOGS]
+        for claim_id, delta in access.items():
+            cur = self._access.get(claim_id)
+            if cur is None:
+                self._access[claim_id] = delta
+            else:
+                cur.count += delta.count
+                cur.last_accessed_at = max(cur.last_accessed_at, delta.last_accessed_at)
+
+    # ── Flushing ───────────────────────────────────────────────────────────────
+
+    async def flush(self) -> int:
+        """Write buffered rows and counters; returns how many claims were bumped.
+
+        Raises the first transient error after requeueing its batch.
+        """
+        logs, access = self.drain()
+        if not logs and not access:
+            return 0
+        retry: Optional[Exception] = None
+        bumped = 0
+        if access:
+            try:
+                async with self._session_factory() as session:
+                    await self.write_access(session, access)
+                bumped = len(access)
+            except Exception as exc:
+                retry = self._requeue_or_drop(exc, [], access)
+        if logs:
+            try:
+                async with self._session_factory() as session:
+                    await self.write_logs(session, logs)
+            except Exception as exc:
+                retry = self._requeue_or_drop(exc, logs, {}) or retry
+        if retry is not None:
+            raise retry
+        return bumped
+
+    def _requeue_or_drop(self, exc: Exception, logs: list[dict[str, Any]],
+                         access: dict[uuid.UUID, AccessDelta]) -> Optional[Exception]:
+        if _is_transient(exc):
+            self._restore(logs, access)
+            return exc
+        self.dropped_logs += len(logs)
+        self.dropped_claims += len(access)
+        logger.error("Access-log flush dropped %d log rows and %d claim counters: %s",
+                     len(logs), len(access), exc)
+        return None
+
+    @staticmethod
+    async def write_access(session: AsyncSession, access: dict[uuid.UUID, AccessDelta]) -> None:
+        v = values(
+            column("claim_id", UUID(as_uuid=True)),
+            column("n", Integer),
+            column("ts", DateTime(timezone=True)),
+            name="v",
+        ).data([(cid, d.count, d.last_accessed_at) for cid, d in access.items()])
+        await session.execute(
+            update(ClaimORM)
+            .where(ClaimORM.claim_id == v.c.claim_id)
+            .values(
+                access_count=ClaimORM.access_count + v.c.n,
+                last_accessed_at=func.greatest(ClaimORM.last_accessed_at, v.c.ts),
+            )
+        )
+
+    @staticmethod
+    async def write_logs(session: AsyncSession, logs: list[dict[str, Any]]) -> None:
+        v = values(
+            column("retrieval_id", UUID(as_uuid=True)),
+            column("query_text", Text),
+            column("claim_id", UUID(as_uuid=True)),
+            column("retrieval_score", Float),
+            column("created_at", DateTime(timezone=True)),
+            name="v",
+        ).data([(r["retrieval_id"], r["query_text"], r["claim_id"], r["retrieval_score"], r["created_at"])
+                for r in logs])
+        # The outer join turns ids of claims deleted since the search into NULL.
+        await session.execute(
+            insert(RetrievalLogORM).from_select(
+                ["retrieval_id", "query_text", "claim_id", "returned", "retrieval_score", "created_at"],
+                select(v.c.retrieval_id, v.c.query_text, ClaimORM.claim_id, literal(True),
+                       v.c.retrieval_score, v.c.created_at)
+                .select_from(v.outerjoin(ClaimORM, ClaimORM.claim_id == v.c.claim_id)),
+            )
+        )
+
+    # ── Lifecycle ──────────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._stopping.clear()
+            self._task = asyncio.create_task(self.run(), name="memory-access-aggregator")
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        self._wake.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as exc:
+            logger.warning("Final access-log flush failed: %s", exc)
+
+    async def run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as exc:
+                logger.warning("Access-log flush failed, will retry: %s", exc)
+
+
+# ── Module-level singleton ─────────────────────────────────────────────────────
+
+_aggregator: Optional[AccessAggregator] = None
+
+
+def get_access_aggregator() -> AccessAggregator:
+    global _aggregator
+    if _aggregator is None:
+        _aggregator = AccessAggregator()
+    return _aggregator
@@ -2,14 +2,15 @@
 
 from __future__ import annotations
 
+from dataclasses import dataclass
 from typing import Any, Optional
 
-import tiktoken
-
 from core.config import get_logger
-from memory.graph.traversal import GraphTraversal
+from memory.ingestion.chunker import count_tokens
+from memory.retrieval.profile_cache import ProfileCache, get_profile_cache
 from memory.retrieval.query_planner import QueryPlan
 from models.memory import (
+    ArtifactSchema,
     ClaimSchema,
     ContextPackage,
     MemorySearchResult,
@@ -17,12 +18,6 @@ from models.memory import (
 
 logger = get_logger(__name__)
 
-_ENC = tiktoken.get_encoding("cl100k_base")
-
-
-def _count_tokens(text: str) -> int:
-    return len(_ENC.encode(text))
-
 
 def _claim_to_line(c: ClaimSchema, include_meta: bool = False) -> str:
     line = c.claim_text
@@ -31,20 +26,33 @@ def _claim_to_line(c: ClaimSchema, include_meta: bool = False) -> str:
     return line
 
 
-# Token budgets as fractions of total
+def _graph_text(item: dict[str, Any]) -> str:
+    return item.get("text") or item.get("claim_text") or str(item)
+
+
+# Token budgets as fractions of total, in packing priority order. Whatever a
+# section leaves unspent is carried forward to the next one.
 _BUDGET = {
     "procedural": 0.15,
-    "graph": 0.25,
+    "profile": 0.15,
     "semantic": 0.25,
+    "graph": 0.25,
     "evidence": 0.20,
-    "profile": 0.15,
 }
 
 
+@dataclass
+class _Candidate:
+    section: str
+    tokens: int
+    item: Any
+
+
 class ContextAssembler:
-    def __init__(self, total_token_budget: int = 3000) -> None:
+    def __init__(self, total_token_budget: int = 3000,
+                 profile_cache: Optional[ProfileCache] = None) -> None:
         self.budget = total_token_budget
-        self._traversal = GraphTraversal()
+        self._profile_cache = profile_cache or get_profile_cache()
 
     async def assemble(
         self,
@@ -53,87 +61,78 @@ class ContextAssembler:
         search_results: list[MemorySearchResult],
         graph_context: Optional[list[dict[str, Any]]] = None,
         include_profile: bool = True,
+        evidence: Optional[list[ArtifactSchema]] = None,
     ) -> ContextPackage:
-
-        budgets = {k: int(v * self.budget) for k, v in _BUDGET.items()}
-        used: dict[str, int] = {k: 0 for k in budgets}
-
-        # 1. Procedural memories (always first)
-        procedural_claims = await self._traversal.get_procedural_memories()
-        procedural_packed: list[ClaimSchema] = []
-        for c in procedural_claims:
-            line = _claim_to_line(c)
-            tokens = _count_tokens(line)
-            if used["procedural"] + tokens <= budgets["procedural"]:
-                procedural_packed.append(c)
-                used["procedural"] += tokens
-
-        # 2. Profile summary
-        profile_summary = ""
+        # Procedural memories and profile come from the versioned cache with
+        # their rendered lines and token counts already computed.
+        snapshot = await self._profile_cache.get()
+
+        candidates: list[_Candidate] = [
+            _Candidate("procedural", line.tokens, c)
+            for c, line in zip(snapshot.procedural, snapshot.procedural_lines)
+        ]
         if include_profile:
-            raw_profile = await self._traversal.get_profile_summary()
-            if raw_profile:
-                tokens = _count_tokens(raw_profile)
-                if tokens <= budgets["profile"]:
-                    profile_summary = raw_profile
-                    used["profile"] = tokens
-                else:
-                    # truncate
-                    lines = raw_profile.splitlines()
-                    kept = []
-                    tok_count = 0
-                    for line in lines:
-                        lt = _count_tokens(line)
-                        if tok_count + lt > budgets["profile"]:
-                            break
-                        kept.append(line)
-                        tok_count += lt
-                    profile_summary = "\n".join(kept)
-                    used["profile"] = tok_count
-
-        # 3. Semantic search results
-        semantic_packed: list[MemorySearchResult] = []
-        for res in sorted(search_results, key=lambda r: r.score, reverse=True):
-            line = _claim_to_line(res.claim)
-            tokens = _count_tokens(line)
-            if used["semantic"] + tokens <= budgets["semantic"]:
-                semantic_packed.append(res)
-                used["semantic"] += tokens
-            else:
-                break
-
-        # 4. Graph context
-        graph_packed: list[dict[str, Any]] = []
-        if graph_context:
-            for item in graph_context:
-                text = item.get("text") or item.get("claim_text") or str(item)
-                tokens = _count_tokens(text)
-                if used["graph"] + tokens <= budgets["graph"]:
-                    graph_packed.append(item)
-                    used["graph"] += tokens
-                else:
-                    break
-
+            candidates += [_Candidate("profile", line.tokens, line.text) for line in snapshot.profile_lines]
+        candidates += [
+            _Candidate("semantic", count_tokens(_claim_to_line(r.claim)), r)
+            for r in sorted(search_results, key=lambda r: r.score, reverse=True)
+        ]
+        candidates += [
+            _Candidate("graph", count_tokens(_graph_text(item)), item)
+            for item in graph_context or []
+        ]
+        candidates += [
+            _Candidate("evidence", count_tokens(a.text), a)
+            for a in evidence or []
+        ]
+
+        packed, used = self._pack(candidates)
         total_used = sum(used.values())
         logger.debug(
-            "Context assembled: procedural=%d, semantic=%d, graph=%d, profile=%d, total_tokens≈%d",
-            len(procedural_packed),
-            len(semantic_packed),
-            len(graph_packed),
-            bool(profile_summary),
+            "Context assembled: procedural=%d, semantic=%d, graph=%d, evidence=%d, profile=%d, total_tokens≈%d",
+            len(packed["procedural"]),
+            len(packed["semantic"]),
+            len(packed["graph"]),
+            len(packed["evidence"]),
+            len(packed["profile"]),
             total_used,
         )
 
         return ContextPackage(
-            procedural_memories=procedural_packed,
-            semantic_facts=semantic_packed,
-            graph_context=graph_packed,
-            source_evidence=[],
-            profile_summary=profile_summary,
+            procedural_memories=packed["procedural"],
+            semantic_facts=packed["semantic"],
+            graph_context=packed["graph"],
+            source_evidence=packed["evidence"],
+            profile_summary="\n".join(packed["profile"]),
             total_tokens_estimate=total_used,
             query_type=plan.query_type,
         )
 
+    def _pack(self, candidates: list[_Candidate]) -> tuple[dict[str, list], dict[str, int]]:
+        """Greedy single pass over section-ordered candidates.
+
+        Each section may spend its own share plus whatever earlier sections
+        left over; items that do not fit are skipped rather than ending the
+        section, so a long line cannot starve shorter ones behind it.
+        """
+        shares = {k: int(v * self.budget) for k, v in _BUDGET.items()}
+        packed: dict[str, list] = {k: [] for k in _BUDGET}
+        used: dict[str, int] = {k: 0 for k in _BUDGET}
+
+        queues: dict[str, list[_Candidate]] = {k: [] for k in _BUDGET}
+        for cand in candidates:
+            queues[cand.section].append(cand)
+
+        carry = 0
+        for section, share in shares.items():
+            allowance = share + carry
+            for cand in queues[section]:
+                if used[section] + cand.tokens <= allowance:
+                    packed[section].append(cand.item)
+                    used[section] += cand.tokens
+            carry = allowance - used[section]
+        return packed, used
+
     def format_for_prompt(self, pkg: ContextPackage) -> str:
         """Render the context package as a structured text block for the LLM."""
         sections: list[str] = []
@@ -159,4 +158,8 @@ class ContextAssembler:
             )
             sections.append(f"## Graph Context\n{lines}")
 
+        if pkg.source_evidence:
+            lines = "\n\n".join(a.text for a in pkg.source_evidence)
+            sections.append(f"## Source Evidence\n{lines}")
+
         return "\n\n".join(sections)
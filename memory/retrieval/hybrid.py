@@ -4,28 +4,48 @@ from __future__ import annotations
 
 import uuid
 from datetime import datetime, timezone
-from typing import Any
+from sqlalchemy import select
 
-from core.clients.opensearch import IDX_CLAIMS, get_opensearch
+from core.clients.opensearch import IDX_CLAIMS
+from core.clients.search_filters import Filter, Term, time_window
+from core.clients.vector_store import get_vector_store
 from core.config import get_logger
 from core.db import get_session
 from memory.graph.traversal import GraphTraversal
 from memory.ingestion.extractor import Extractor
-from memory.retrieval.query_planner import QueryPlanner
-from memory.retrieval.scoring import score_claim
-from models.db.memory import ClaimORM, RetrievalLogORM
+from memory.retrieval.access_log import get_access_aggregator
+from memory.retrieval.profile_cache import get_profile_cache
+from memory.retrieval.query_planner import QueryPlan, get_query_planner
+from memory.retrieval.scoring import rank_claims
+from models.db.memory import ClaimORM
 from models.memory import (
     ClaimSchema,
     MemorySearchRequest,
     MemorySearchResult,
+    QueryType,
 )
 
 logger = get_logger(__name__)
 
 _extractor = Extractor()
-_planner = QueryPlanner()
 _traversal = GraphTraversal()
 
+# Per query class: (candidates fetched per result, HNSW ef_search). Chat and
+# action turns want a few close hits fast; relational and temporal queries
+# rank more loosely related claims, so they fetch deeper and search wider.
+_KNN_PROFILES: dict[QueryType, tuple[int, int]] = {
+    QueryType.CONVERSATIONAL:       (2, 64),
+    QueryType.ACTION_TASK:          (2, 64),
+    QueryType.PREFERENCE_SENSITIVE: (3, 100),
+    QueryType.PROFILE:              (3, 100),
+    QueryType.FACTUAL_RECALL:       (3, 100),
+    QueryType.EMAIL_SPECIFIC:       (3, 100),
+    QueryType.PLANNING:             (3, 128),
+    QueryType.RELATIONAL:           (4, 128),
+    QueryType.TEMPORAL:             (4, 160),
+}
+_DEFAULT_KNN_PROFILE = (3, 100)
+
 
 class HybridRetriever:
     async def search(
@@ -33,27 +53,15 @@ class HybridRetriever:
         request: MemorySearchRequest,
         log_query: bool = True,
     ) -> list[MemorySearchResult]:
-        plan = _planner.plan(request.query)
-        query_emb = _extractor.embed_one(request.query)
+        plan = await get_query_planner().aplan(request.query)
+        query_emb = await _extractor.aembed_one(request.query)
 
         # 1. Always load procedural memories
-        procedural = await _traversal.get_procedural_memories()
-
-        # 2. Vector + BM25 hybrid search on claims index
-        os_filters: dict[str, Any] = {"status": "active"}
-        if request.tier_filter:
-            os_filters = {}  # complex filters need bool query; handled below
+        procedural = await get_profile_cache().procedural_memories()
 
-        hits = get_opensearch().hybrid_search(
-            IDX_CLAIMS,
-            request.query,
-            query_emb,
-            k=request.top_k * 3,
-        )
-
-        # post-filter if tier/segment filters requested
-        if request.tier_filter or request.segment_filter or request.memory_class_filter:
-            hits = self._apply_filters(hits, request)
+        # 2. Vector + BM25 hybrid search on claims index, filtered inside the search
+        statuses = ["active"] + (["provisional"] if request.include_provisional else [])
+        hits = self._candidates(request, plan, query_emb)
 
         # 3. Fetch full ORM objects from Postgres
         hit_ids = [uuid.UUID(h["_id"]) for h in hits if h.get("_id")]
@@ -65,10 +73,7 @@ class HybridRetriever:
                 result = await session.execute(
                     select(ClaimORM).where(
                         ClaimORM.claim_id.in_(hit_ids),
-                        ClaimORM.status.in_(
-                            ["active"]
-                            + (["provisional"] if request.include_provisional else [])
-                        ),
+                        ClaimORM.status.in_(statuses),
                     )
                 )
                 orm_claims = list(result.scalars().all())
@@ -80,97 +85,64 @@ class HybridRetriever:
             for gc in graph_result.claims:
                 graph_claim_ids.add(str(gc.claim_id))
 
-        # 5. Score all candidates
-        now = datetime.now(timezone.utc)
-        scored: list[tuple[ClaimORM, float]] = []
-        for claim in orm_claims:
-            cid = str(claim.claim_id)
-            rrf = rrf_map.get(cid, 0.0)
-            graph_rel = 0.4 if cid in graph_claim_ids else 0.0
-            s = score_claim(claim, rrf_score=rrf, graph_relevance=graph_rel, now=now)
-            scored.append((claim, s))
+        # 5. Score all candidates in one vectorised pass
+        rrf = [rrf_map.get(str(c.claim_id), 0.0) for c in orm_claims]
+        graph_rel = [0.4 if str(c.claim_id) in graph_claim_ids else 0.0 for c in orm_claims]
+        scores, order = rank_claims(orm_claims, graph_relevance=graph_rel, rrf_score=rrf,
+                                    now=datetime.now(timezone.utc))
 
         # 6. Redundancy penalty
         # (embeddings already in opensearch; skip fetching for perf — penalty uses score diff)
-        scored = sorted(scored, key=lambda x: x[1], reverse=True)
+        scored: list[tuple[ClaimORM, float]] = [(orm_claims[i], float(scores[i])) for i in order]
 
         # 7. Include procedural memories at top (they're always injected)
         procedural_ids = {str(c.claim_id) for c in procedural}
-        final_claims = [c for c, _ in scored if str(c.claim_id) not in procedural_ids]
-        final_claims = final_claims[: request.top_k]
-
-        # 8. Log retrieval
-        if log_query:
-            await self._log_retrieval(request.query, final_claims)
-
-        # 9. Update access counts
-        await self._bump_access(final_claims)
-
-        # 10. Build results
-        results: list[MemorySearchResult] = []
-        for c, s in scored:
-            if c in final_claims:
-                results.append(
-                    MemorySearchResult(
-                        claim=ClaimSchema.model_validate(c),
-                        score=round(s, 4),
-                    )
-                )
+        final = [(c, s) for c, s in scored if str(c.claim_id) not in procedural_ids]
+        final = final[: request.top_k]
 
-        return results
-
-    def _apply_filters(
-        self, hits: list[dict], request: MemorySearchRequest
-    ) -> list[dict]:
-        out = []
-        tier_vals = (
-            {t.value for t in request.tier_filter} if request.tier_filter else None
-        )
-        seg_vals = (
-            {s.value for s in request.segment_filter}
-            if request.segment_filter
-            else None
-        )
-        class_vals = (
-            {c.value for c in request.memory_class_filter}
-            if request.memory_class_filter
-            else None
+        # 8-9. Retrieval log rows and access counters are aggregated in-process
+        # and flushed in the background, off the request path.
+        get_access_aggregator().record(
+            request.query, [(c.claim_id, s) for c, s in final], log=log_query
         )
 
-        for h in hits:
-            if tier_vals and h.get("tier") not in tier_vals:
-                continue
-            if seg_vals and h.get("segment") not in seg_vals:
-                continue
-            if class_vals and h.get("memory_class") not in class_vals:
-                continue
-            out.append(h)
-        return out
-
-    async def _log_retrieval(self, query: str, claims: list[ClaimORM]) -> None:
-        async with get_session() as session:
-            for claim in claims:
-                log = RetrievalLogORM(
-                    query_text=query,
-                    claim_id=claim.claim_id,
-                    returned=True,
-                )
-                session.add(log)
-
-    async def _bump_access(self, claims: list[ClaimORM]) -> None:
-        if not claims:
-            return
-        ids = [c.claim_id for c in claims]
-        async with get_session() as session:
-            await session.execute(select(ClaimORM).where(ClaimORM.claim_id.in_(ids)))
-            for claim in (
-                (
-                    await session.execute(
-                        select(ClaimORM).where(ClaimORM.claim_id.in_(ids))
-                    )
-                )
-                .scalars()
-                .all()
-            ):
-                claim.access_count += 1
-                claim.last_accessed_at = datetime.now(timezone.utc)
+        # 10. Build results
+        return [
+            MemorySearchResult(claim=ClaimSchema.model_validate(c), score=round(s, 4))
+            for c, s in final
+        ]
+
+    def _candidates(self, request: MemorySearchRequest, plan: QueryPlan,
+                    query_emb: list[float]) -> list[dict]:
+        depth, ef_search = _KNN_PROFILES.get(plan.query_type, _DEFAULT_KNN_PROFILE)
+        k = request.top_k * depth
+        store = get_vector_store()
+        filters = self._search_filters(request)
+        if plan.time_range is None:
+            return store.hybrid_search(IDX_CLAIMS, request.query, query_emb, k=k,
+                                       filters=filters, ef_search=ef_search)
+
+        # A dated query searches its window first. Claims often carry no date
+        # of their own, so a thin window is topped up from the whole store.
+        hits = store.hybrid_search(IDX_CLAIMS, request.query, query_emb, k=k,
+                                   filters=filters & time_window(*plan.time_range), ef_search=ef_search)
+        if len(hits) < request.top_k:
+            seen = {h["_id"] for h in hits}
+            rest = store.hybrid_search(IDX_CLAIMS, request.query, query_emb, k=k,
+                                       filters=filters, ef_search=ef_search)
+            hits += [h for h in rest if h["_id"] not in seen][: k - len(hits)]
+        return hits
+
+    @staticmethod
+    def _search_filters(request: MemorySearchRequest) -> Filter:
+        # Index status can trail Postgres (agent review promotes provisional
+        # claims without a reindex), so both live statuses pass here and the
+        # ORM query above makes the final call.
+        f: Filter = Term("status", ["active", "provisional"])
+        if request.tier_filter:
+            f &= Term("tier", [t.value for t in request.tier_filter])
+        if request.segment_filter:
+            f &= Term("segment", [s.value for s in request.segment_filter])
+        if request.memory_class_filter:
+            f &= Term("memory_class", [c.value for c in request.memory_class_filter])
+        return f
@@ -0,0 +1,154 @@
+"""Per-user versioned cache for procedural memories and the profile summary.
+
+Both result sets are read on every retrieval and context assembly but change
+rarely. Writers that touch profile-shaping claims (procedural class, or the
+core_identity / preferences / skills segments) call `bump_profile_version`
+inside their own transaction; readers compare the stored counter with the
+cached snapshot's and rebuild lazily on mismatch. The version is always read
+before the claims, so a snapshot can only ever be tagged older than its data,
+never newer.
+
+Rendered lines and token counts are computed once per rebuild, so the context
+assembler packs from precomputed numbers instead of re-encoding each turn.
+"""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import get_logger
+from core.db import get_session
+from memory.graph.traversal import procedural_memories_query, profile_claims_query
+from memory.ingestion.chunker import count_tokens
+from models.db.memory import MemoryCacheVersionORM
+from models.memory import ClaimSchema, MemoryClass, MemorySegment
+from services.app_state import DEFAULT_USER_ID
+
+logger = get_logger(__name__)
+
+PROFILE_SEGMENTS = frozenset({
+    MemorySegment.CORE_IDENTITY.value,
+    MemorySegment.PREFERENCES.value,
+    MemorySegment.SKILLS.value,
+})
+
+
+def affects_profile(memory_class: Any, segment: Any) -> bool:
+    """True when a claim of this class/segment can appear in a cached snapshot."""
+    memory_class = getattr(memory_class, "value", memory_class)
+    segment = getattr(segment, "value", segment)
+    return memory_class == MemoryClass.PROCEDURAL.value or segment in PROFILE_SEGMENTS
+
+
+async def bump_profile_version(session: AsyncSession, user_id: str = DEFAULT_USER_ID) -> None:
+    """Invalidate cached snapshots; commits (or rolls back) with the caller's write."""
+    stmt = pg_insert(MemoryCacheVersionORM).values(user_id=user_id, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[MemoryCacheVersionORM.user_id],
+        set_={"version": MemoryCacheVersionORM.version + 1, "updated_at": func.now()},
+    )
+    await session.execute(stmt)
+
+
+@dataclass(frozen=True)
+class RenderedLine:
+    text: str
+    tokens: int
+
+
+@dataclass
+class ProfileSnapshot:
+    version: int
+    procedural: list[ClaimSchema] = field(default_factory=list)
+    procedural_lines: list[RenderedLine] = field(default_factory=list)
+    profile_lines: list[RenderedLine] = field(default_factory=list)
+    profile_text: str = ""
+    profile_tokens: int = 0
+
+
+def _build_snapshot(version: int, procedural: list[ClaimSchema], profile_texts: list[str]) -> ProfileSnapshot:
+    profile_lines = [RenderedLine(f"- {t}", count_tokens(f"- {t}")) for t in profile_texts]
+    profile_text = "\n".join(line.text for line in profile_lines)
+    return ProfileSnapshot(
+        version=version,
+        procedural=procedural,
+        procedural_lines=[RenderedLine(c.claim_text, count_tokens(c.claim_text)) for c in procedural],
+        profile_lines=profile_lines,
+        profile_text=profile_text,
+        profile_tokens=count_tokens(profile_text) if profile_text else 0,
+    )
+
+
+class ProfileCache:
+    def __init__(self, session_factory: Callable[[], Any] = get_session) -> None:
+        self._session_factory = session_factory
+        self._snapshots: dict[str, ProfileSnapshot] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, user_id: str = DEFAULT_USER_ID) -> ProfileSnapshot:
+        # Claims are not partitioned by user yet, so every caller passes the
+        # default id; the key is here so per-user data can slot in later.
+        async with self._session_factory() as session:
+            version = await self._version(session, user_id)
+            snap = self._snapshots.get(user_id)
+            if snap is not None and snap.version == version:
+                self.hits += 1
+                return snap
+
+            lock = self._locks.setdefault(user_id, asyncio.Lock())
+            async with lock:
+                snap = self._snapshots.get(user_id)
+                if snap is not None and snap.version == version:
+                    self.hits += 1
+                    return snap
+                self.misses += 1
+                procedural = [
+                    ClaimSchema.model_validate(c)
+                    for c in (await session.execute(procedural_memories_query())).scalars().all()
+                ]
+                profile_texts = [
+                    c.claim_text
+                    for c in (await session.execute(profile_claims_query())).scalars().all()
+                ]
+                snap = _build_snapshot(version, procedural, profile_texts)
+                self._snapshots[user_id] = snap
+                logger.debug("Profile cache rebuilt for %s at version %d", user_id, version)
+                return snap
+
+    async def procedural_memories(self, user_id: str = DEFAULT_USER_ID) -> list[ClaimSchema]:
+        return (await self.get(user_id)).procedural
+
+    async def profile_summary(self, user_id: str = DEFAULT_USER_ID) -> str:
+        return (await self.get(user_id)).profile_text
+
+    def clear(self, user_id: Optional[str] = None) -> None:
+        if user_id is None:
+            self._snapshots.clear()
+        else:
+            self._snapshots.pop(user_id, None)
+
+    @staticmethod
+    async def _version(session: AsyncSession, user_id: str) -> int:
+        result = await session.execute(
+            select(MemoryCacheVersionORM.version).where(MemoryCacheVersionORM.user_id == user_id)
+        )
+        return result.scalar_one_or_none() or 0
+
+
+# ── Module-level singleton ─────────────────────────────────────────────────────
+
+_profile_cache: Optional[ProfileCache] = None
+
+
+def get_profile_cache() -> ProfileCache:
+    global _profile_cache
+    if _profile_cache is None:
+        _profile_cache = ProfileCache()
+    return _profile_cache
@@ -1,19 +1,47 @@
-"""Query understanding and retrieval strategy planning."""
+"""Query understanding and retrieval strategy planning.
+
+Planning is rule-based first. Entity mentions come from a token trie over the
+canonical names and aliases of active entities. Time ranges come from a small
+date-expression parser. The query type comes from weighted keyword rules. The
+LLM planner only runs when the rules are unsure: no cue at all in a long
+query, or two intents tied. When it does run, its classification wins, and
+the rule-based entities and time range are merged in.
+
+Plans are cached per normalised query. The cache is cleared whenever the
+entity set changes. Plans with a relative time range are only reused on the
+day they were made. Ranges that run up to the present ("today", "last 3
+days", "recently") have no end, so a plan reused hours later still covers
+claims written since. Cached plans are shared, so callers must treat them as
+read-only.
+"""
 
 from __future__ import annotations
 
+import asyncio
+import calendar
 import json
 import re
+import time
+from collections import OrderedDict
 from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Optional
 
 from langchain_core.messages import HumanMessage, SystemMessage
+from sqlalchemy import func, select
 
 from core.config import get_logger
+from core.db import get_session
 from core.llm import llm
-from models.memory import QueryType
+from models.db.memory import EntityORM
+from models.memory import MemorySegment, QueryType
 
 logger = get_logger(__name__)
 
+ESCALATE_BELOW   = 0.6     # heuristic confidence under which the LLM is asked
+CACHE_SIZE       = 1024
+REFRESH_INTERVAL = 30.0    # seconds between entity watermark checks
+
 _SYSTEM = """You are a retrieval planner for a personal AI memory system.
 Given a user query, classify it and extract signals for retrieval.
 
@@ -44,105 +72,487 @@ class QueryPlan:
     query_type: QueryType = QueryType.CONVERSATIONAL
     entity_mentions: list[str] = field(default_factory=list)
     time_constraint: str = "none"
+    time_range: Optional[tuple[datetime, Optional[datetime]]] = None    # end None: up to now
     needs_graph_traversal: bool = False
     needs_email_context: bool = False
     needs_resume_context: bool = False
     preference_sensitive: bool = False
     suggested_segments: list[str] = field(default_factory=list)
     suggested_predicates: list[str] = field(default_factory=list)
+    confidence: float = 1.0
+    source: str = "rules"                      # "rules" | "llm"
+
+
+# ── Tokens ─────────────────────────────────────────────────────────────────────
+
+_TOKEN = re.compile(r"\w+(?:['.&-]\w+)*[+#]*")
+
+
+def _tokens(text: str) -> list[str]:
+    out = []
+    for tok in _TOKEN.findall(text.lower()):
+        if tok.endswith("'s"):
+            tok = tok[:-2]
+        out.append(tok)
+    return out
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(_tokens(query))
+
+
+# ── Entity trie ────────────────────────────────────────────────────────────────
+
+# Single-token names that are ordinary words in queries would match everywhere.
+_SKIP_NAMES = frozenset({
+    "i", "me", "my", "you", "your", "we", "us", "it", "he", "she", "they", "them",
+    "user", "the", "a", "an", "this", "that", "what", "who", "when", "where",
+    "today", "yesterday", "work", "home", "email", "project", "meeting",
+})
+_END = ""
+
+
+class EntityTrie:
+    """Token-level trie of entity names; longest match wins, left to right."""
+
+    def __init__(self) -> None:
+        self._root: dict[str, Any] = {}
+        self.size = 0
+
+    def add(self, name: str, canonical: str) -> None:
+        toks = _tokens(name)
+        if not toks or (len(toks) == 1 and (toks[0] in _SKIP_NAMES or len(toks[0]) < 2)):
+            return
+        node = self._root
+        for tok in toks:
+            node = node.setdefault(tok, {})
+        if _END not in node:
+            self.size += 1
+        node[_END] = canonical
+
+    def find(self, tokens: list[str]) -> list[tuple[str, int, int]]:
+        """(canonical name, start, end) token spans, without overlaps."""
+        found: list[tuple[str, int, int]] = []
+        i = 0
+        while i < len(tokens):
+            node, match, end = self._root, None, i
+            for j in range(i, len(tokens)):
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+                if _END in node:
+                    match, end = node[_END], j + 1
+            if match is None:
+                i += 1
+                continue
+            found.append((match, i, end))
+            i = end
+        return found
+
+
+class EntityGazetteer:
+    """Entity names cached in a trie, reloaded when the entity table changes.
+
+    The watermark is (row count, newest updated_at) of active entities, which
+    moves on every insert, rename, alias change or merge.
+    """
+
+    def __init__(self, session_factory: Callable[[], Any] = get_session,
+                 refresh_interval: float = REFRESH_INTERVAL,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self._session_factory = session_factory
+        self._clock = clock
+        self.refresh_interval = refresh_interval
+        self.trie = EntityTrie()
+        self._watermark: Optional[tuple] = None
+        self._checked_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def load(self, rows: list[tuple[str, list[str]]]) -> None:
+        trie = EntityTrie()
+        for canonical, aliases in rows:
+            trie.add(canonical, canonical)
+            for alias in aliases or ():
+                trie.add(alias, canonical)
+        self.trie = trie
+
+    async def refresh(self) -> bool:
+        """Reload if the watermark moved; True when the trie was replaced."""
+        now = self._clock()
+        if self._checked_at is not None and now - self._checked_at < self.refresh_interval:
+            return False
+        async with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.refresh_interval:
+                return False
+            self._checked_at = now
+            active = EntityORM.status == "active"
+            async with self._session_factory() as session:
+                watermark = tuple((await session.execute(
+                    select(func.count(), func.max(EntityORM.updated_at)).where(active)
+                )).one())
+                if watermark == self._watermark:
+                    return False
+                rows = (await session.execute(
+                    select(EntityORM.canonical_name, EntityORM.aliases).where(active)
+                )).all()
+            self.load([(r.canonical_name, r.aliases) for r in rows])
+            self._watermark = watermark
+            logger.debug("Entity gazetteer reloaded: %d names", self.trie.size)
+            return True
+
+
+# ── Time expressions ───────────────────────────────────────────────────────────
+
+_MONTHS = {name.lower(): i for i, name in enumerate(calendar.month_name) if name}
+_MONTHS.update({name.lower(): i for i, name in enumerate(calendar.month_abbr) if name})
+_MONTHS["sept"] = 9
+_WEEKDAYS = {name.lower(): i for i, name in enumerate(calendar.day_name)}
+_NUMBERS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+            "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10, "few": 3, "couple": 2}
+_UNIT_DAYS = {"day": 1, "week": 7, "month": 30, "year": 365}
+
+_NUM = r"(\d+|a|an|one|two|three|four|five|six|seven|eight|nine|ten|few|couple(?: of)?)"
+_RE_ISO      = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+_RE_AGO      = re.compile(rf"\b{_NUM} (day|week|month|year)s? ago\b")
+_RE_LAST_N   = re.compile(rf"\b(?:last|past) (?:{_NUM} )?(day|week|month|year)s?\b")
+_RE_CALENDAR = re.compile(r"\b(this|last|previous) (week|month|year)\b")
+_RE_WEEKDAY  = re.compile(r"\b(?:on |last )?(monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b")
+_RE_MONTH    = re.compile(
+    r"\b(in |on |during |since |last |this )?("
+    + "|".join(sorted(_MONTHS, key=len, reverse=True))
+    + r")\b(?: (\d{1,2})(?:st|nd|rd|th)?\b)?(?:,? (\d{4})\b)?"
+)
+_RE_YEAR     = re.compile(r"\b(?:in|during|since|of) ((?:19|20)\d{2})\b")
+_RE_TODAY    = re.compile(r"\b(today|tonight|this morning|this afternoon|this evening)\b")
+_RE_RECENT   = re.compile(r"\b(recently|lately|these days|nowadays|the other day)\b")
+
+
+def _day_start(d: date) -> datetime:
+    return datetime(d.year, d.month, d.day, tzinfo=timezone.utc)
+
+
+def _month_range(year: int, month: int) -> tuple[datetime, datetime]:
+    start = datetime(year, month, 1, tzinfo=timezone.utc)
+    end = datetime(year + month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
+    return start, end
+
+
+def _until(end: datetime, now: datetime) -> Optional[datetime]:
+    """`end`, or None (open) when the range would reach the present."""
+    return end if end < now else None
+
+
+def _count(word: str) -> int:
+    word = word.removesuffix(" of")
+    return int(word) if word.isdigit() else _NUMBERS.get(word, 1)
+
+
+def parse_time_range(text: str, now: datetime) -> Optional[tuple[str, datetime, Optional[datetime]]]:
+    """Find the first date expression in `text`.
+
+    Returns `(time_constraint, start, end)` with a half-open UTC range, or None.
+    `end` is None when the range runs up to the present. `text` is expected
+    lower-cased.
+    """
+    today = now.date()
+
+    m = _RE_ISO.search(text)
+    if m:
+        try:
+            d = date(int(m[1]), int(m[2]), int(m[3]))
+        except ValueError:
+            d = None
+        if d:
+            return "specific_date", _day_start(d), _day_start(d + timedelta(days=1))
+
+    m = _RE_TODAY.search(text)
+    if m:
+        return "recent", _day_start(today), None
+    if "yesterday" in text:
+        return "recent", _day_start(today - timedelta(days=1)), _day_start(today)
+
+    m = _RE_AGO.search(text)
+    if m:
+        unit = _UNIT_DAYS[m[2]]
+        centre = now - timedelta(days=_count(m[1]) * unit)
+        half = timedelta(days=max(unit / 2, 1))
+        return "past", centre - half, _until(centre + half, now)
+
+    m = _RE_LAST_N.search(text)
+    if m and (m[1] or not _RE_CALENDAR.search(text)):
+        n = _count(m[1]) if m[1] else 1
+        return "recent", now - timedelta(days=n * _UNIT_DAYS[m[2]]), None
+
+    m = _RE_CALENDAR.search(text)
+    if m:
+        this = m[1] == "this"
+        if m[2] == "week":
+            monday = today - timedelta(days=today.weekday())
+            start = monday if this else monday - timedelta(days=7)
+            end = None if this else _day_start(monday)
+            return ("recent" if this else "past"), _day_start(start), end
+        if m[2] == "month":
+            year, month = today.year, today.month
+            if not this:
+                year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+            start, end = _month_range(year, month)
+            return ("recent" if this else "past"), start, _until(end, now)
+        year = today.year if this else today.year - 1
+        start = datetime(year, 1, 1, tzinfo=timezone.utc)
+        return ("recent" if this else "past"), start, _until(datetime(year + 1, 1, 1, tzinfo=timezone.utc), now)
+
+    m = _RE_MONTH.search(text)
+    # "may" and "march" are also verbs: only trust them with a preposition, day or year
+    if m and (m[1] or m[3] or m[4] or m[2] not in ("may", "march", "mar", "jun", "jan")):
+        month = _MONTHS[m[2]]
+        year = int(m[4]) if m[4] else today.year
+        if not m[4] and (month > today.month or (m[1] == "last " and month == today.month)):
+            year -= 1
+        if m[3]:
+            try:
+                d = date(year, month, int(m[3]))
+                return "specific_date", _day_start(d), _day_start(d + timedelta(days=1))
+            except ValueError:
+                pass
+        start, end = _month_range(year, month)
+        return "specific_date", start, end
+
+    m = _RE_YEAR.search(text)
+    if m:
+        year = int(m[1])
+        return ("specific_date", datetime(year, 1, 1, tzinfo=timezone.utc),
+                datetime(year + 1, 1, 1, tzinfo=timezone.utc))
+
+    m = _RE_WEEKDAY.search(text)
+    if m:
+        back = (today.weekday() - _WEEKDAYS[m[1]]) % 7 or 7
+        d = today - timedelta(days=back)
+        return "specific_date", _day_start(d), _day_start(d + timedelta(days=1))
+
+    if _RE_RECENT.search(text):
+        return "recent", now - timedelta(days=30), None
+    return None
+
+
+# ── Intent rules ───────────────────────────────────────────────────────────────
+
+def _rx(*phrases: str) -> re.Pattern:
+    return re.compile(r"\b(?:" + "|".join(phrases) + r")\b")
+
+
+# (query type, pattern, weight); a query's score per type is the sum of weights
+_INTENT_RULES: list[tuple[QueryType, re.Pattern, float]] = [
+    (QueryType.EMAIL_SPECIFIC, _rx(r"e-?mails?", "gmail", "inbox", r"recruiters?", r"repl(?:y|ied|ies)",
+                                   r"(?:sent|received|got) (?:me|an?|the)", "thread", r"mail(?:ed)?"), 2.0),
+    (QueryType.PROFILE, _rx("resume", "cv", "experience", "worked at", r"degrees?", "studied",
+                            "education", "background", "qualifications?", "about me", "who am i",
+                            "my skills"), 2.0),
+    (QueryType.PREFERENCE_SENSITIVE, _rx(r"prefer(?:s|red|ence|ences)?", "don't", "do not", "always", "never",
+                                         "stop", "remember (?:that|to)", r"settings?", r"favou?rite", "dislike",
+                                         "i like", "i hate", "i love", "instead of"), 2.0),
+    (QueryType.RELATIONAL, _rx("who", "knows?", "works? with", r"colleagues?", r"friends?",
+                               r"connect(?:ed|ion)", r"relationships?", r"manager", "team ?mates?",
+                               "introduced", "family", "sister", "brother", "mother", "father", "wife",
+                               "husband", "partner"), 1.5),
+    (QueryType.TEMPORAL, _rx("when", "last time", r"dates?", "ago", "history", "timeline", "first time",
+                             "how long", "since when", "what day"), 1.5),
+    (QueryType.PLANNING, _rx(r"projects?", r"tasks?", r"goals?", r"deadlines?", "working on", "roadmap",
+                             "next steps?", "todo", "to-do", r"milestones?", r"plan(?:s|ning)?", "priorit(?:y|ies)"),
+     1.5),
+    (QueryType.ACTION_TASK, _rx("draft", "write (?:a|an|me)", "send", "schedule", "book", "remind me",
+                                "create", "set up", "sign up", "fill (?:in|out)", "apply to"), 2.0),
+    (QueryType.FACTUAL_RECALL, _rx("what", "where", "which", "tell me", "how many", "how much",
+                                   "did i", "do i", "have i", "what's"), 1.0),
+]
+
+_SEGMENTS: dict[QueryType, list[str]] = {
+    QueryType.EMAIL_SPECIFIC: [MemorySegment.COMMUNICATIONS.value],
+    QueryType.PROFILE: [MemorySegment.SKILLS.value, MemorySegment.CORE_IDENTITY.value],
+    QueryType.PREFERENCE_SENSITIVE: [MemorySegment.PREFERENCES.value],
+    QueryType.RELATIONAL: [MemorySegment.PEOPLE.value],
+    QueryType.TEMPORAL: [MemorySegment.CONTEXTUAL.value],
+    QueryType.PLANNING: [MemorySegment.PROJECTS.value],
+}
+
+_SMALL_TALK = _rx("hi", "hello", "hey", "thanks", "thank you", "ok", "okay", "cool", "great",
+                  "good (?:morning|night|evening)", "bye", "lol", "nice", "sure", "yes", "no")
+
+
+def heuristic_plan(query: str, trie: Optional[EntityTrie] = None,
+                   now: Optional[datetime] = None) -> QueryPlan:
+    """Rule-based plan with a confidence in [0, 1]."""
+    now = now or datetime.now(timezone.utc)
+    toks = _tokens(query)
+    text = " ".join(toks)
+
+    spans = trie.find(toks) if trie else []
+    entities = list(dict.fromkeys(name for name, _, _ in spans))
+    when = parse_time_range(text, now)
+
+    # intent cues inside an entity name ("the browser project") are not intent
+    if spans:
+        covered = {k for _, i, j in spans for k in range(i, j)}
+        text = " ".join(t for k, t in enumerate(toks) if k not in covered)
+
+    scores: dict[QueryType, float] = {}
+    for qt, pattern, weight in _INTENT_RULES:
+        hits = len(pattern.findall(text))
+        if hits:
+            scores[qt] = scores.get(qt, 0.0) + weight * min(hits, 2)
+    if entities and QueryType.RELATIONAL in scores:
+        scores[QueryType.RELATIONAL] += 1.0
+    if when and QueryType.TEMPORAL in scores:
+        scores[QueryType.TEMPORAL] += 1.0
+
+    ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+    if not ranked:
+        short = len(toks) <= 4 or bool(_SMALL_TALK.match(text))
+        if entities or when:
+            qt, confidence = QueryType.FACTUAL_RECALL, 0.7
+        else:
+            qt, confidence = QueryType.CONVERSATIONAL, (0.9 if short else 0.3)
+    else:
+        qt, top = ranked[0]
+        second = ranked[1][1] if len(ranked) > 1 else 0.0
+        confidence = min(1.0, 0.5 + 0.25 * (top - second))
+
+    segments = list(_SEGMENTS.get(qt, []))
+    pref = qt == QueryType.PREFERENCE_SENSITIVE or QueryType.PREFERENCE_SENSITIVE in scores
+    if pref and MemorySegment.PREFERENCES.value not in segments:
+        segments.append(MemorySegment.PREFERENCES.value)
+
+    return QueryPlan(
+        query_type=qt,
+        entity_mentions=entities,
+        time_constraint=when[0] if when else "none",
+        time_range=(when[1], when[2]) if when else None,
+        needs_graph_traversal=qt == QueryType.RELATIONAL or (bool(entities) and qt != QueryType.CONVERSATIONAL),
+        needs_email_context=qt == QueryType.EMAIL_SPECIFIC,
+        needs_resume_context=qt == QueryType.PROFILE,
+        preference_sensitive=pref,
+        suggested_segments=segments,
+        confidence=round(confidence, 3),
+    )
+
+
+# ── Planner ────────────────────────────────────────────────────────────────────
+
+def _llm_plan(query: str) -> dict[str, Any]:
+    messages = [SystemMessage(content=_SYSTEM), HumanMessage(content=query)]
+    content = llm.invoke(messages).content
+    if isinstance(content, list):
+        content = " ".join(p if isinstance(p, str) else p.get("text", "") for p in content)
+    return json.loads(_clean(str(content)))
+
+
+def _merge(rules: QueryPlan, data: dict[str, Any]) -> QueryPlan:
+    """LLM classification wins; rule-found entities and time range are kept."""
+    entities = list(rules.entity_mentions)
+    seen = {e.lower() for e in entities}
+    for e in data.get("entity_mentions") or []:
+        if isinstance(e, str) and e.lower() not in seen:
+            seen.add(e.lower())
+            entities.append(e)
+    return QueryPlan(
+        query_type=QueryType(data.get("query_type", "conversational")),
+        entity_mentions=entities,
+        time_constraint=rules.time_constraint if rules.time_range else data.get("time_constraint", "none"),
+        time_range=rules.time_range,
+        needs_graph_traversal=bool(data.get("needs_graph_traversal", False)),
+        needs_email_context=bool(data.get("needs_email_context", False)),
+        needs_resume_context=bool(data.get("needs_resume_context", False)),
+        preference_sensitive=bool(data.get("preference_sensitive", False)),
+        suggested_segments=data.get("suggested_segments", []),
+        suggested_predicates=data.get("suggested_predicates", []),
+        confidence=rules.confidence,
+        source="llm",
+    )
 
 
 class QueryPlanner:
+    def __init__(self, gazetteer: Optional[EntityGazetteer] = None,
+                 llm_plan: Callable[[str], dict[str, Any]] = _llm_plan,
+                 escalate_below: float = ESCALATE_BELOW,
+                 cache_size: int = CACHE_SIZE) -> None:
+        self.gazetteer = gazetteer or EntityGazetteer()
+        self._llm_plan = llm_plan
+        self.escalate_below = escalate_below
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, tuple[QueryPlan, date]] = OrderedDict()
+        self.requests = 0
+        self.cache_hits = 0
+        self.escalations = 0
+        self.llm_failures = 0
+
+    async def aplan(self, query: str) -> QueryPlan:
+        """Plan on the request path: refreshes entities, escalates off-loop."""
+        try:
+            if await self.gazetteer.refresh():
+                self._cache.clear()
+        except Exception as exc:
+            logger.debug("Entity gazetteer refresh failed, keeping previous names: %s", exc)
+        key, plan, rules = self._begin(query)
+        if plan is not None:
+            return plan
+        if rules.confidence < self.escalate_below:
+            rules = await asyncio.to_thread(self._escalate, query, rules)
+        return self._finish(key, rules)
+
     def plan(self, query: str) -> QueryPlan:
-        """Classify query and build retrieval plan using cheap LLM call."""
-        messages = [SystemMessage(content=_SYSTEM), HumanMessage(content=query)]
+        """Synchronous variant; uses whatever entity names are already loaded."""
+        key, plan, rules = self._begin(query)
+        if plan is not None:
+            return plan
+        if rules.confidence < self.escalate_below:
+            rules = self._escalate(query, rules)
+        return self._finish(key, rules)
+
+    def _begin(self, query: str) -> tuple[str, Optional[QueryPlan], Optional[QueryPlan]]:
+        self.requests += 1
+        key = normalize_query(query)
+        now = datetime.now(timezone.utc)
+        cached = self._cache.get(key)
+        if cached is not None and (cached[0].time_range is None or cached[1] == now.date()):
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return key, cached[0], None
+        return key, None, heuristic_plan(query, self.gazetteer.trie, now)
+
+    def _escalate(self, query: str, rules: QueryPlan) -> QueryPlan:
+        self.escalations += 1
         try:
-            resp = llm.invoke(messages)
-            content = resp.content
-            if isinstance(content, list):
-                content = " ".join(
-                    p if isinstance(p, str) else p.get("text", "") for p in content
-                )
-            data = json.loads(_clean(str(content)))
+            return _merge(rules, self._llm_plan(query))
         except Exception as exc:
-            logger.debug("QueryPlanner LLM failed, using heuristics: %s", exc)
-            return self._heuristic_plan(query)
-
-        return QueryPlan(
-            query_type=QueryType(data.get("query_type", "conversational")),
-            entity_mentions=data.get("entity_mentions", []),
-            time_constraint=data.get("time_constraint", "none"),
-            needs_graph_traversal=bool(data.get("needs_graph_traversal", False)),
-            needs_email_context=bool(data.get("needs_email_context", False)),
-            needs_resume_context=bool(data.get("needs_resume_context", False)),
-            preference_sensitive=bool(data.get("preference_sensitive", False)),
-            suggested_segments=data.get("suggested_segments", []),
-            suggested_predicates=data.get("suggested_predicates", []),
-        )
-
-    def _heuristic_plan(self, query: str) -> QueryPlan:
-        """Fallback: regex/keyword-based planning."""
-        q = query.lower()
-        qt = QueryType.CONVERSATIONAL
-        entity_mentions: list[str] = []
-        needs_graph = False
-        needs_email = False
-        needs_resume = False
-        pref_sensitive = False
-        segments: list[str] = []
-
-        if any(
-            w in q for w in ("email", "gmail", "recruiter", "reply", "sent", "received")
-        ):
-            qt = QueryType.EMAIL_SPECIFIC
-            needs_email = True
-            segments.append("communications_and_commitments")
-
-        elif any(
-            w in q
-            for w in ("resume", "cv", "experience", "worked at", "degree", "studied")
-        ):
-            qt = QueryType.PROFILE
-            needs_resume = True
-            segments += ["skills_and_background", "core_identity"]
-
-        elif any(
-            w in q
-            for w in (
-                "prefer",
-                "don't",
-                "always",
-                "never",
-                "stop",
-                "remember",
-                "setting",
-            )
-        ):
-            qt = QueryType.PREFERENCE_SENSITIVE
-            pref_sensitive = True
-            segments.append("preferences_and_corrections")
-
-        elif any(w in q for w in ("who", "knows", "works with", "colleague", "friend")):
-            qt = QueryType.RELATIONAL
-            needs_graph = True
-            segments.append("people_and_relationships")
-
-        elif any(w in q for w in ("when", "last time", "date", "ago", "history")):
-            qt = QueryType.TEMPORAL
-
-        elif any(w in q for w in ("project", "task", "goal", "deadline", "working on")):
-            qt = QueryType.PLANNING
-            segments.append("projects_and_goals")
-
-        elif any(w in q for w in ("what", "who", "where", "tell me", "what is")):
-            qt = QueryType.FACTUAL_RECALL
-
-        return QueryPlan(
-            query_type=qt,
-            entity_mentions=entity_mentions,
-            needs_graph_traversal=needs_graph,
-            needs_email_context=needs_email,
-            needs_resume_context=needs_resume,
-            preference_sensitive=pref_sensitive,
-            suggested_segments=segments,
-        )
+            self.llm_failures += 1
+            logger.debug("QueryPlanner LLM failed, keeping rule-based plan: %s", exc)
+            return rules
+
+    def _finish(self, key: str, plan: QueryPlan) -> QueryPlan:
+        self._cache[key] = (plan, datetime.now(timezone.utc).date())
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return plan
+
+    def stats(self) -> dict[str, Any]:
+        planned = self.requests - self.cache_hits
+        return {
+            "requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "escalations": self.escalations,
+            "llm_failures": self.llm_failures,
+            "escalation_rate": round(self.escalations / planned, 4) if planned else 0.0,
+            "llm_calls_per_request": round(self.escalations / self.requests, 4) if self.requests else 0.0,
+            "known_entity_names": self.gazetteer.trie.size,
+        }
+
+
+# ── Module-level singleton ─────────────────────────────────────────────────────
+
+_planner: Optional[QueryPlanner] = None
+
+
+def get_query_planner() -> QueryPlanner:
+    global _planner
+    if _planner is None:
+        _planner = QueryPlanner()
+    return _planner
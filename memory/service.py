@@ -7,21 +7,24 @@ from typing import Any, Optional
 from sqlalchemy import select, update, or_
 
 from core.config import get_logger
-from core.clients.neo4j import get_neo4j
-from core.clients.opensearch import get_opensearch, IDX_CLAIMS, IDX_ARTIFACTS, IDX_ENTITIES
+from core.clients.opensearch import OpenSearchClient, IDX_CLAIMS, IDX_ARTIFACTS
+from core.clients.vector_store import get_vector_store
 from core.db import get_session
 from memory.graph.traversal import GraphTraversal
 from memory.ingestion.chat import ChatIngestionPipeline
 from memory.ingestion.document import DocumentIngestionPipeline
 from memory.ingestion.gmail import GmailIngestionPipeline
 from memory.maintenance.consolidation import ConsolidationRunner
+from memory.forget import get_forget_runner
+from memory.outbox import enqueue_graph, enqueue_index, enqueue_update, get_outbox_relay
+from memory.retrieval.profile_cache import affects_profile, bump_profile_version, get_profile_cache
 from models.memory import ClaimStatus
 from models.db.memory import (
     ArtifactORM, ClaimORM, EntityORM, EvidenceORM, SourceORM,
     FeedbackEventORM, RetrievalLogORM,
 )
 from models.memory import (
-    ArtifactSchema, ClaimSchema, ContextPackage, EntitySchema, ForgetRequest,
+    ArtifactSchema, ClaimSchema, ContextPackage, EntitySchema, ForgetJobSchema, ForgetRequest,
     GraphExpandRequest, GraphExpandResult, GmailSyncResult,
     ComposioProfileResult, IngestChatRequest, IngestComposioAeroLeadsRequest,
     IngestComposioLinkedInRequest, IngestDocumentResult, IngestProfileRequest,
@@ -32,10 +35,13 @@ from models.memory import (
 )
 from memory.retrieval.context_assembler import ContextAssembler
 from memory.retrieval.hybrid import HybridRetriever
-from memory.retrieval.query_planner import QueryPlanner
+from memory.retrieval.query_planner import get_query_planner
 
 logger = get_logger(__name__)
 
+# Top-ranked results whose source artifacts are offered to the evidence band.
+_EVIDENCE_CLAIMS = 5
+
 
 def _source_schema(source: SourceORM) -> SourceSchema:
     return SourceSchema(
@@ -57,7 +63,6 @@ class MemoryService:
     def __init__(self) -> None:
         self._retriever   = HybridRetriever()
         self._assembler   = ContextAssembler()
-        self._planner     = QueryPlanner()
         self._traversal   = GraphTraversal()
         self._consolidation = ConsolidationRunner()
         self._chat_pipe   = ChatIngestionPipeline()
@@ -69,7 +74,7 @@ class MemoryService:
         return await self._retriever.search(request)
 
     async def get_context(self, query: str, token_budget: int = 3000) -> ContextPackage:
-        plan = self._planner.plan(query)
+        plan = await get_query_planner().aplan(query)
         req = MemorySearchRequest(query=query, top_k=15)
         results = await self._retriever.search(req, log_query=True)
 
@@ -82,8 +87,29 @@ class MemoryService:
             graph_context = [{"claim_text": c.claim_text, "segment": c.segment}
                              for c in gr.claims]
 
+        evidence = await self._evidence_for(results[:_EVIDENCE_CLAIMS])
+
         assembler = ContextAssembler(total_token_budget=token_budget)
-        return await assembler.assemble(query, plan, results, graph_context=graph_context)
+        return await assembler.assemble(query, plan, results,
+                                        graph_context=graph_context, evidence=evidence)
+
+    async def _evidence_for(self, results: list[MemorySearchResult]) -> list[ArtifactSchema]:
+        """Source artifacts behind the top results, in result rank order."""
+        if not results:
+            return []
+        rank = {r.claim.claim_id: i for i, r in enumerate(results)}
+        async with get_session() as session:
+            rows = (await session.execute(
+                select(ArtifactORM, EvidenceORM.claim_id)
+                .join(EvidenceORM, EvidenceORM.artifact_id == ArtifactORM.artifact_id)
+                .where(EvidenceORM.claim_id.in_(list(rank)))
+            )).all()
+        best: dict[uuid.UUID, tuple[int, ArtifactORM]] = {}
+        for artifact, claim_id in rows:
+            r = rank[claim_id]
+            if artifact.artifact_id not in best or r < best[artifact.artifact_id][0]:
+                best[artifact.artifact_id] = (r, artifact)
+        return [ArtifactSchema.model_validate(a) for _, a in sorted(best.values(), key=lambda x: x[0])]
 
     async def explain(self, claim_id: str) -> dict[str, Any]:
         cid = uuid.UUID(claim_id)
@@ -116,12 +142,10 @@ class MemoryService:
     # ── Write ──────────────────────────────────────────────────────────────────
 
     async def store_claim(self, req: StoreClaimRequest) -> ClaimSchema:
-        from memory.ingestion.extractor import Extractor, EXTRACTOR_VERSION
         from models.memory import SEGMENT_DECAY_RATE
         from models.db.memory import SourceORM
         from models.memory import SourceType
 
-        ext = Extractor()
         async with get_session() as session:
             # synthetic source for manual claims
             source = SourceORM(
@@ -133,8 +157,9 @@ class MemoryService:
             session.add(source)
             await session.flush()
 
+            claim_id = uuid.uuid4()
             claim = ClaimORM(
-                claim_id=uuid.uuid4(),
+                claim_id=claim_id,
                 claim_text=req.claim_text,
                 predicate=req.predicate,
                 object_literal=req.object_literal,
@@ -147,28 +172,35 @@ class MemoryService:
                 trust_score=1.0,
                 decay_rate=SEGMENT_DECAY_RATE.get(req.segment, 0.01),
                 user_confirmed=req.user_confirmed,
+                opensearch_id=str(claim_id),
             )
             session.add(claim)
             await session.flush()
 
-            emb = ext.embed_one(req.claim_text)
-            os_id = get_opensearch().index_claim(
-                str(claim.claim_id), req.claim_text, emb,
+            # Search and graph mirrors ride the same commit; the relay embeds the text.
+            enqueue_index(session, IDX_CLAIMS, str(claim_id), OpenSearchClient.claim_document(
+                str(claim_id), req.claim_text, [],
                 req.segment.value, req.memory_class.value, req.tier.value,
                 ClaimStatus.ACTIVE.value, req.confidence, req.base_importance, 1.0,
                 predicate=req.predicate or "",
                 user_confirmed=req.user_confirmed,
-            )
-            claim.opensearch_id = os_id
-
-            neo4j = get_neo4j()
-            await neo4j.upsert_claim_node(
-                str(claim.claim_id), req.claim_text,
-                predicate=req.predicate or "", segment=req.segment.value,
-                confidence=req.confidence,
-            )
-
-            return ClaimSchema.model_validate(claim)
+            ), embed_text=req.claim_text)
+            enqueue_graph(session, "upsert_claims", str(claim_id), rows=[{
+                "claim_id": str(claim_id),
+                "claim_text": req.claim_text,
+                "predicate": req.predicate or "",
+                "segment": req.segment.value,
+                "confidence": req.confidence,
+                "subject_id": None,
+                "object_id": None,
+                "source_id": None,
+            }])
+            if affects_profile(req.memory_class, req.segment):
+                await bump_profile_version(session)
+
+            result = ClaimSchema.model_validate(claim)
+        get_outbox_relay().wake()
+        return result
 
     async def update_claim(self, claim_id: str, req: UpdateClaimRequest) -> ClaimSchema:
         cid = uuid.UUID(claim_id)
@@ -190,13 +222,16 @@ class MemoryService:
             if not claim:
                 raise ValueError(f"Claim {claim_id} not found")
 
-            # sync to opensearch
-            try:
-                get_opensearch().update_document(IDX_CLAIMS, claim_id, updates)
-            except Exception:
-                pass
+            # sync to opensearch via the outbox
+            enqueue_update(session, IDX_CLAIMS, claim_id, {
+                k: v.isoformat() if isinstance(v, datetime) else v for k, v in updates.items()
+            })
+            if affects_profile(claim.memory_class, claim.segment):
+                await bump_profile_version(session)
 
-            return ClaimSchema.model_validate(claim)
+            result = ClaimSchema.model_validate(claim)
+        get_outbox_relay().wake()
+        return result
 
     async def confirm_claim(self, claim_id: str) -> ClaimSchema:
         return await self.update_claim(claim_id, UpdateClaimRequest(
@@ -204,57 +239,21 @@ class MemoryService:
             status=ClaimStatus.ACTIVE,
         ))
 
-    async def forget(self, req: ForgetRequest) -> dict:
-        deleted_claims = 0
-        deleted_entities = 0
+    async def forget(self, req: ForgetRequest) -> ForgetJobSchema:
+        """Queue a bulk forget; run it with `run_forget_job`."""
+        return await get_forget_runner().create(req)
 
-        async with get_session() as session:
-            # pattern-based claim deletion
-            if req.pattern:
-                result = await session.execute(
-                    select(ClaimORM)
-                    .where(ClaimORM.claim_text.ilike(f"%{req.pattern}%"))
-                    .limit(100)
-                )
-                for claim in result.scalars().all():
-                    claim.status = ClaimStatus.DELETED.value
-                    try:
-                        get_opensearch().update_document(IDX_CLAIMS, str(claim.claim_id), {"status": "deleted"})
-                    except Exception:
-                        pass
-                    deleted_claims += 1
-
-            # explicit claim IDs
-            if req.claim_ids:
-                result = await session.execute(
-                    select(ClaimORM).where(ClaimORM.claim_id.in_(req.claim_ids))
-                )
-                for claim in result.scalars().all():
-                    claim.status = ClaimStatus.DELETED.value
-                    try:
-                        get_opensearch().delete_document(IDX_CLAIMS, str(claim.claim_id))
-                    except Exception:
-                        pass
-                    neo4j = get_neo4j()
-                    await neo4j.delete_claim_node(str(claim.claim_id))
-                    deleted_claims += 1
-
-            # explicit entity IDs
-            if req.entity_ids:
-                result = await session.execute(
-                    select(EntityORM).where(EntityORM.entity_id.in_(req.entity_ids))
-                )
-                for entity in result.scalars().all():
-                    entity.status = "deleted"
-                    try:
-                        get_opensearch().delete_document(IDX_ENTITIES, str(entity.entity_id))
-                    except Exception:
-                        pass
-                    neo4j = get_neo4j()
-                    await neo4j.delete_entity(str(entity.entity_id))
-                    deleted_entities += 1
-
-        return {"deleted_claims": deleted_claims, "deleted_entities": deleted_entities}
+    async def run_forget_job(self, job_id: uuid.UUID) -> None:
+        await get_forget_runner().run(job_id)
+
+    async def resume_forget_job(self, job_id: uuid.UUID) -> Optional[ForgetJobSchema]:
+        return await get_forget_runner().resume(job_id)
+
+    async def forget_job(self, job_id: uuid.UUID) -> Optional[ForgetJobSchema]:
+        return await get_forget_runner().get(job_id)
+
+    async def forget_jobs(self, limit: int = 20) -> list[ForgetJobSchema]:
+        return await get_forget_runner().recent(limit)
 
     # ── Graph ──────────────────────────────────────────────────────────────────
 
@@ -285,13 +284,13 @@ class MemoryService:
         )
 
     async def get_profile_summary(self) -> str:
-        return await self._traversal.get_profile_summary()
+        return await get_profile_cache().profile_summary()
 
     async def search_document_facts(self, req: DocumentFactSearchRequest) -> list[DocumentFactResult]:
         from memory.ingestion.extractor import Extractor
-        query_emb = Extractor().embed_one(req.query)
+        query_emb = await Extractor().aembed_one(req.query)
 
-        hits = get_opensearch().hybrid_search(IDX_ARTIFACTS, req.query, query_emb, k=req.top_k * 3)
+        hits = get_vector_store().hybrid_search(IDX_ARTIFACTS, req.query, query_emb, k=req.top_k * 3)
         artifact_ids = [uuid.UUID(h["_id"]) for h in hits if h.get("_id")]
         score_map = {h["_id"]: float(h.get("_rrf_score", h.get("_score", 0.0))) for h in hits}
         allowed_types = {st.value for st in req.source_types} if req.source_types else None
@@ -483,9 +482,10 @@ class MemoryService:
         )
 
     async def ingest_gmail(self, credentials_json: dict, user_email: str,
-                           max_threads: int = 50) -> GmailSyncResult:
+                           max_threads: int = 50, full_resync: bool = False) -> GmailSyncResult:
         pipeline = GmailIngestionPipeline(user_email=user_email)
-        return await pipeline.sync(credentials_json, max_threads=max_threads)
+        return await pipeline.sync(credentials_json, max_threads=max_threads,
+                                   full_resync=full_resync)
 
     # ── Feedback ───────────────────────────────────────────────────────────────
 
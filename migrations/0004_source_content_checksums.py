@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+
+async def upgrade(conn: AsyncConnection) -> None:
+    await conn.execute(text("ALTER TABLE sources ADD COLUMN IF NOT EXISTS user_id TEXT NOT NULL DEFAULT 'default'"))
+    await conn.execute(text("ALTER TABLE artifacts ADD COLUMN IF NOT EXISTS content_hash TEXT"))
+
+    # Checksums written before this migration were str(hash(data)), which Python
+    # salts per process; they can never match again, so drop them.
+    await conn.execute(text("UPDATE sources SET checksum = NULL WHERE checksum !~ '^[0-9a-f]{64}$'"))
+
+    await conn.execute(
+        text(
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS uq_sources_user_checksum
+            ON sources (user_id, checksum)
+            WHERE checksum IS NOT NULL
+            """
+        )
+    )
+    await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_artifacts_content_hash ON artifacts (content_hash)"))
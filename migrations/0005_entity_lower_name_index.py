@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+
+async def upgrade(conn: AsyncConnection) -> None:
+    # Entity resolution matches lower(canonical_name) = ANY(:names) in one query per turn.
+    await conn.execute(
+        text("CREATE INDEX IF NOT EXISTS idx_entities_canonical_lower ON entities (lower(canonical_name))")
+    )
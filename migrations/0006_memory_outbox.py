@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+
+async def upgrade(conn: AsyncConnection) -> None:
+    # Table itself comes from create_all (OutboxEventORM); these serve the relay's
+    # "due and not blocked by an earlier event in backoff" poll.
+    await conn.execute(
+        text(
+            """
+            CREATE INDEX IF NOT EXISTS idx_memory_outbox_due
+            ON memory_outbox (next_attempt_at, event_id)
+            WHERE status = 'pending'
+            """
+        )
+    )
+    await conn.execute(
+        text(
+            """
+            CREATE INDEX IF NOT EXISTS idx_memory_outbox_aggregate
+            ON memory_outbox (aggregate_id, event_id)
+            WHERE status = 'pending'
+            """
+        )
+    )
+    await conn.execute(
+        text(
+            """
+            CREATE INDEX IF NOT EXISTS idx_memory_outbox_sink
+            ON memory_outbox (sink, event_id)
+            WHERE status = 'pending'
+            """
+        )
+    )
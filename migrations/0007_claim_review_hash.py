@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+
+async def upgrade(conn: AsyncConnection) -> None:
+    # Set by the nightly agent review; a claim whose hash still matches is not
+    # sent to the agents again.
+    await conn.execute(text("ALTER TABLE claims ADD COLUMN IF NOT EXISTS review_hash TEXT"))
+    await conn.execute(
+        text(
+            """
+            CREATE INDEX IF NOT EXISTS idx_claims_review_queue
+            ON claims (created_at, claim_id)
+            WHERE status IN ('provisional', 'stale')
+            """
+        )
+    )
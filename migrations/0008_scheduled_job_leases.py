@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+
+async def upgrade(conn: AsyncConnection) -> None:
+    # scheduled_jobs itself comes from create_all (ScheduledJobORM).
+    await conn.execute(text("ALTER TABLE maintenance_runs ADD COLUMN IF NOT EXISTS worker TEXT"))
+    await conn.execute(text("ALTER TABLE maintenance_runs ADD COLUMN IF NOT EXISTS duration_ms INTEGER"))
+    await conn.execute(
+        text(
+            """
+            CREATE INDEX IF NOT EXISTS idx_maintenance_runs_running_worker
+            ON maintenance_runs (worker)
+            WHERE status = 'running'
+            """
+        )
+    )
@@ -4,8 +4,8 @@ from datetime import datetime
 from typing import Optional
 
 from sqlalchemy import (
-    Boolean, Column, DateTime, Float, ForeignKey, Integer,
-    SmallInteger, String, Text, UniqueConstraint, func,
+    BigInteger, Boolean, Column, DateTime, Float, ForeignKey, Index, Integer,
+    SmallInteger, String, Text, UniqueConstraint, func, text,
 )
 from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID
 from sqlalchemy.orm import DeclarativeBase, relationship
@@ -21,8 +21,13 @@ def _uuid():
 
 class SourceORM(Base):
     __tablename__ = "sources"
+    __table_args__ = (
+        Index("uq_sources_user_checksum", "user_id", "checksum", unique=True,
+              postgresql_where=text("checksum IS NOT NULL")),
+    )
 
     source_id   = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id     = Column(Text, nullable=False, default="default", server_default="default")
     source_type = Column(String(32), nullable=False)
     external_id = Column(Text)
     title       = Column(Text)
@@ -45,6 +50,7 @@ class ArtifactORM(Base):
     source_id        = Column(UUID(as_uuid=True), ForeignKey("sources.source_id", ondelete="CASCADE"), nullable=False)
     artifact_type    = Column(Text, nullable=False)
     text             = Column(Text, nullable=False)
+    content_hash     = Column(Text, index=True)
     char_start       = Column(Integer)
     char_end         = Column(Integer)
     parser_version   = Column(Text)
@@ -103,6 +109,7 @@ class ClaimORM(Base):
     updated_at          = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
     neo4j_node_id       = Column(Text)
     opensearch_id       = Column(Text)
+    review_hash         = Column(Text)      # claim_review_hash at the last agent review
 
     subject_entity = relationship("EntityORM", foreign_keys=[subject_entity_id], back_populates="subject_claims")
     object_entity  = relationship("EntityORM", foreign_keys=[object_entity_id],  back_populates="object_claims")
@@ -183,5 +190,67 @@ class MaintenanceRunORM(Base):
     claims_updated  = Column(Integer)
     claims_archived = Column(Integer)
     error           = Column(Text)
+    worker          = Column(Text)          # scheduler instance that ran it; NULL for on-demand runs
     started_at      = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
     finished_at     = Column(DateTime(timezone=True))
+    duration_ms     = Column(Integer)
+
+
+class ScheduledJobORM(Base):
+    """Lease row for a periodic maintenance job, shared by every API worker."""
+    __tablename__ = "scheduled_jobs"
+
+    job_id           = Column(Text, primary_key=True)
+    next_run_at      = Column(DateTime(timezone=True), nullable=False)
+    leased_by        = Column(Text)
+    leased_until     = Column(DateTime(timezone=True))
+    last_started_at  = Column(DateTime(timezone=True))
+    last_finished_at = Column(DateTime(timezone=True))
+    last_status      = Column(Text)
+    last_error       = Column(Text)
+
+
+class ForgetJobORM(Base):
+    """Progress of a bulk forget; each batch commits with the rows it deletes, so a job resumes where it stopped."""
+    __tablename__ = "forget_jobs"
+
+    job_id            = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    request           = Column(JSONB, nullable=False, default=dict)     # ForgetRequest
+    status            = Column(Text, nullable=False, default="queued")
+    phase             = Column(Text, nullable=False, default="claims")
+    cursor            = Column(Text)                                    # last id deleted in this phase
+    total_claims      = Column(Integer, nullable=False, default=0)      # matching claims when queued
+    claims_deleted    = Column(Integer, nullable=False, default=0)
+    entities_deleted  = Column(Integer, nullable=False, default=0)
+    artifacts_deleted = Column(Integer, nullable=False, default=0)
+    sources_deleted   = Column(Integer, nullable=False, default=0)
+    batches           = Column(Integer, nullable=False, default=0)
+    error             = Column(Text)
+    created_at        = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    updated_at        = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+    finished_at       = Column(DateTime(timezone=True))
+
+
+class OutboxEventORM(Base):
+    """Pending OpenSearch / Neo4j write, committed with the Postgres change it mirrors."""
+    __tablename__ = "memory_outbox"
+
+    event_id        = Column(BigInteger, primary_key=True, autoincrement=True)
+    sink            = Column(String(16), nullable=False)
+    op              = Column(String(32), nullable=False)
+    aggregate_id    = Column(Text, nullable=False)
+    payload         = Column(JSONB, nullable=False, default=dict)
+    status          = Column(String(16), nullable=False, default="pending")
+    attempts        = Column(Integer, nullable=False, default=0)
+    last_error      = Column(Text)
+    created_at      = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+class MemoryCacheVersionORM(Base):
+    """Per-user counter bumped whenever profile-shaping claims change."""
+    __tablename__ = "memory_cache_versions"
+
+    user_id    = Column(Text, primary_key=True)
+    version    = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
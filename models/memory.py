@@ -279,8 +279,10 @@ class MaintenanceRunSchema(BaseModel):
     claims_updated: Optional[int] = None
     claims_archived: Optional[int] = None
     error: Optional[str] = None
+    worker: Optional[str] = None
     started_at: datetime = Field(default_factory=datetime.utcnow)
     finished_at: Optional[datetime] = None
+    duration_ms: Optional[int] = None
 
     model_config = {"from_attributes": True}
 
@@ -385,12 +387,37 @@ class UpdateClaimRequest(BaseModel):
 
 
 class ForgetRequest(BaseModel):
+    """Explicit claim IDs are always forgotten. The other claim filters
+    (sources, segments, time range, pattern) must all match."""
     claim_ids: Optional[list[UUID]] = None
     entity_ids: Optional[list[UUID]] = None
-    source_ids: Optional[list[UUID]] = None
+    source_ids: Optional[list[UUID]] = None     # also deletes the sources, their artifacts and evidence
+    segments: Optional[list[MemorySegment]] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
     pattern: Optional[str] = None     # fuzzy match on claim_text
 
 
+class ForgetJobSchema(BaseModel):
+    job_id: UUID
+    request: dict[str, Any] = Field(default_factory=dict)
+    status: str = "queued"
+    phase: str = "claims"
+    cursor: Optional[str] = None
+    total_claims: int = 0
+    claims_deleted: int = 0
+    entities_deleted: int = 0
+    artifacts_deleted: int = 0
+    sources_deleted: int = 0
+    batches: int = 0
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = {"from_attributes": True}
+
+
 class GraphExpandRequest(BaseModel):
     entity_id: Optional[UUID] = None
     entity_name: Optional[str] = None
@@ -456,6 +483,8 @@ class IngestDocumentResult(BaseModel):
     entities_created: int
     claims_created: int
     claims_provisional: int
+    deduplicated: bool = False          # identical content already ingested; nothing written
+    chunks_reused: int = 0              # unchanged chunks linked to previously extracted claims
 
 
 class ComposioProfileResult(BaseModel):
@@ -476,3 +505,7 @@ class GmailSyncResult(BaseModel):
     entities_created: int
     claims_created: int
     claims_provisional: int
+    threads_skipped: int = 0
+    threads_failed: int = 0
+    full_resync: bool = True
+    history_id: Optional[str] = None
@@ -53,7 +53,7 @@ async def list_events(
     try:
         token = await _token()
         max_results = request.max_results if request.max_results and request.max_results > 0 else 10
-        items = service.list_events(token, max_results=max_results)
+        items = await service.list_events(token, max_results=max_results)
         return {"events": items}
     except HTTPException:
         raise
@@ -8,6 +8,7 @@ from fastapi import APIRouter, Query
 from sqlalchemy import func, select, cast, Date
 
 from core.db import get_session
+from memory.retrieval.query_planner import get_query_planner
 from models.db.app import AgentEvent, AgentRun, Conversation, SubagentRun, ToolCall
 from models.db.memory import ClaimORM, MaintenanceRunORM, SourceORM
 
@@ -70,6 +71,7 @@ async def get_stats():
             "permanent": claims_by_tier.get("permanent", 0),
             "sources": total_sources,
         },
+        "query_planner": get_query_planner().stats(),
     }
 
 
@@ -356,6 +358,8 @@ async def maintenance_history(limit: int = Query(20, le=100)):
             "claims_archived": r.claims_archived,
             "started_at": r.started_at.isoformat() if r.started_at else None,
             "finished_at": r.finished_at.isoformat() if r.finished_at else None,
+            "duration_ms": r.duration_ms,
+            "worker": r.worker,
         }
         for r in rows
     ]
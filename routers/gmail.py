@@ -50,7 +50,7 @@ async def list_unread_messages(
     try:
         token = await _token()
         max_results = request.max_results if request.max_results and request.max_results > 0 else 10
-        results = service.list_unread_messages(token, max_results=max_results)
+        results = await service.list_unread_messages(token, max_results=max_results)
         return {"messages": results}
     except HTTPException:
         raise
@@ -65,7 +65,7 @@ async def fetch_latest(
     try:
         token = await _token()
         max_results = request.max_results if request.max_results and request.max_results > 0 else 5
-        results = service.fetch_latest_messages(token, max_results=max_results)
+        results = await service.fetch_latest_messages(token, max_results=max_results)
         return {"messages": results}
     except HTTPException:
         raise
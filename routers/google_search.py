@@ -11,6 +11,7 @@ logger = get_logger(__name__)
 class SearchRequest(BaseModel):
     query: str
     max_results: int = 5
+    fetch_top_k: int = 0
 
 
 def get_google_search_service():
@@ -26,7 +27,11 @@ async def google_search(
         if not request.query:
             raise HTTPException(status_code=400, detail="query is required")
 
-        results = service.search(request.query, max_results=request.max_results)
+        results = await service.search(
+            request.query,
+            max_results=request.max_results,
+            fetch_top_k=request.fetch_top_k,
+        )
 
         return {"results": results}
 
@@ -265,11 +265,10 @@ async def _infra_status() -> dict[str, Any]:
         }
     # OpenSearch
     try:
-        from core.clients.opensearch import get_opensearch
+        from core.clients.vector_store import get_vector_store
 
-        c = get_opensearch()
         out["opensearch"] = {
-            "ok": bool(getattr(c, "_client", None)),
+            "ok": get_vector_store().connected,
         }
     except Exception as exc:
         out["opensearch"] = {
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Count store round trips per chat turn: old per-claim loop vs batched pipeline.
+
+Usage:
+    python scripts/benchmark_chat_ingestion.py [--claims 6] [--entities 4]
+        [--new-entities 2] [--store-ms 4] [--embed-ms 60]
+
+No databases or model keys are needed. The batched numbers come from running
+ChatIngestionPipeline.process against counting fakes for the Postgres session,
+OpenSearch, Neo4j and the extractor. The legacy numbers replay the previous
+loop's call sequence (per entity lookup + mirror, per claim flush / embed /
+index / graph writes) against the same fakes. Each fake call sleeps for the
+configured latency so the wall-clock column reflects round trips.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import memory.ingestion.chat as chat  # noqa: E402
+from models.memory import (  # noqa: E402
+    CandidateClaim, CandidateEntity, EntityType, ExtractionResult, IngestChatRequest,
+    MemoryClass, MemorySegment,
+)
+
+
+class Counters:
+    def __init__(self, store_s: float, embed_s: float) -> None:
+        self.store_s = store_s
+        self.embed_s = embed_s
+        self.calls: Counter[str] = Counter()
+
+    def hit(self, name: str) -> None:
+        self.calls[name] += 1
+        time.sleep(self.store_s)
+
+
+class FakeResult:
+    def __init__(self, rows: list) -> None:
+        self._rows = rows
+
+    def scalars(self):
+        return iter(self._rows)
+
+    def scalar_one_or_none(self):
+        return self._rows[0] if self._rows else None
+
+    def __iter__(self):
+        return iter(self._rows)
+
+
+class FakeSession:
+    def __init__(self, c: Counters, known: set[str]) -> None:
+        self.c = c
+        self.known = known
+
+    def add(self, obj) -> None:
+        pass
+
+    def add_all(self, objs) -> None:
+        pass
+
+    async def flush(self) -> None:
+        self.c.hit("pg")
+
+    async def execute(self, stmt):
+        self.c.hit("pg")
+        if getattr(stmt, "is_select", False):
+            # Pretend the first `known` names already exist.
+            return FakeResult([
+                SimpleNamespace(entity_id=uuid.uuid4(), canonical_name=n, aliases=[], description="x")
+                for n in self.known
+            ])
+        if getattr(stmt, "_returning", None):
+            params = stmt.compile().params
+            ids = [v for k, v in params.items() if k.startswith("claim_id")]
+            now = datetime.now(timezone.utc)
+            return FakeResult([SimpleNamespace(claim_id=i, created_at=now) for i in ids])
+        return FakeResult([])
+
+
+class FakeOpenSearch:
+    def __init__(self, c: Counters) -> None:
+        self.c = c
+
+    def bulk_write(self, ops, refresh: bool = True) -> int:
+        self.c.hit("opensearch")
+        return len(ops)
+
+    def index_claim(self, claim_id, *args, **kwargs) -> str:
+        self.c.hit("opensearch")
+        return claim_id
+
+    def index_artifact(self, *args, **kwargs) -> None:
+        self.c.hit("opensearch")
+
+    def index_entity(self, *args, **kwargs) -> None:
+        self.c.hit("opensearch")
+
+
+class FakeNeo4j:
+    def __init__(self, c: Counters) -> None:
+        self.c = c
+
+    async def upsert_entities_batch(self, rows) -> None:
+        if rows:
+            self.c.hit("neo4j")
+
+    async def upsert_claims_batch(self, rows) -> None:
+        if rows:
+            self.c.hit("neo4j")
+
+    async def upsert_entity(self, *args, **kwargs) -> None:
+        self.c.hit("neo4j")
+
+    async def upsert_claim_node(self, *args, **kwargs) -> None:
+        self.c.hit("neo4j")
+
+    async def link_claim_to_entity(self, *args, **kwargs) -> None:
+        self.c.hit("neo4j")
+
+    async def link_claim_to_source(self, *args, **kwargs) -> None:
+        self.c.hit("neo4j")
+
+
+class FakeExtractor:
+    def __init__(self, c: Counters, result: ExtractionResult) -> None:
+        self.c = c
+        self.result = result
+
+    def extract(self, *args, **kwargs) -> ExtractionResult:
+        return self.result
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        self.c.calls["embed"] += 1
+        time.sleep(self.c.embed_s)
+        return [[0.0] * 8 for _ in texts]
+
+    def embed_one(self, text: str) -> list[float]:
+        return self.embed([text])[0]
+
+
+def _turn(n_claims: int, n_entities: int) -> ExtractionResult:
+    names = [f"Entity{i}" for i in range(n_entities)]
+    return ExtractionResult(
+        entities=[CandidateEntity(canonical_name=n, entity_type=EntityType.PROJECT) for n in names],
+        claims=[
+            CandidateClaim(
+                claim_text=f"User works on {names[i % n_entities]} with detail {i}.",
+                predicate="works_on", subject_name="user", object_name=names[i % n_entities],
+                memory_class=MemoryClass.SEMANTIC, segment=MemorySegment.PROJECTS,
+                confidence=0.9, base_importance=0.8,
+            )
+            for i in range(n_claims)
+        ],
+        source_trust=0.9,
+    )
+
+
+async def run_legacy(c: Counters, ex: FakeExtractor, session: FakeSession) -> None:
+    """Replay of the previous per-claim loop's store calls."""
+    os_, neo = FakeOpenSearch(c), FakeNeo4j(c)
+    await session.flush()                                   # source
+    ex.embed_one("turn")
+    await session.flush()                                   # artifact
+    os_.index_artifact()
+    result = ex.extract()
+    entity_ids = {}
+    for cand in result.entities:
+        await session.execute(SimpleNamespace(is_select=False))   # ilike lookup
+        if cand.canonical_name in session.known:
+            entity_ids[cand.canonical_name.lower()] = uuid.uuid4()
+            continue
+        await session.flush()
+        await neo.upsert_entity()
+        ex.embed_one(cand.canonical_name)
+        os_.index_entity()
+        entity_ids[cand.canonical_name.lower()] = uuid.uuid4()
+    for cand, gate in chat._gate.evaluate_batch(result.claims, source_trust=result.source_trust):
+        if gate.decision == chat.GateDecision.REJECT:
+            continue
+        await session.flush()                               # claim
+        ex.embed_one(cand.claim_text)
+        os_.index_claim("id")
+        await neo.upsert_claim_node()
+        if entity_ids.get(cand.subject_name.lower()):
+            await neo.link_claim_to_entity()
+        if cand.object_name and entity_ids.get(cand.object_name.lower()):
+            await neo.link_claim_to_entity()
+        await neo.link_claim_to_source()
+    await session.flush()                                   # evidence on commit
+
+
+async def run_batched(c: Counters, session: FakeSession, req: IngestChatRequest) -> None:
+    @asynccontextmanager
+    async def fake_get_session():
+        yield session
+        await session.flush()                               # commit
+
+    chat.get_session = fake_get_session
+    chat.get_opensearch = lambda: FakeOpenSearch(c)
+    chat.get_neo4j = lambda: FakeNeo4j(c)
+    await chat.ChatIngestionPipeline().process(req)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--claims", type=int, default=6)
+    parser.add_argument("--entities", type=int, default=4)
+    parser.add_argument("--new-entities", type=int, default=2)
+    parser.add_argument("--store-ms", type=float, default=4)
+    parser.add_argument("--embed-ms", type=float, default=60)
+    args = parser.parse_args()
+
+    result = _turn(args.claims, args.entities)
+    known = {e.canonical_name for e in result.entities[: args.entities - args.new_entities]}
+    req = IngestChatRequest(
+        session_id="bench", user_message="hi", assistant_message="hello",
+        timestamp=datetime.now(timezone.utc),
+    )
+    print(f"{'path':<8} {'pg':>4} {'os':>4} {'neo4j':>6} {'embed':>6} {'total':>6} {'wall':>8}")
+    for name in ("legacy", "batched"):
+        c = Counters(args.store_ms / 1000, args.embed_ms / 1000)
+        ex = FakeExtractor(c, result)
+        chat._extractor = ex
+        session = FakeSession(c, known)
+        t0 = time.perf_counter()
+        if name == "legacy":
+            asyncio.run(run_legacy(c, ex, session))
+        else:
+            asyncio.run(run_batched(c, session, req))
+        elapsed = time.perf_counter() - t0
+        total = c.calls["pg"] + c.calls["opensearch"] + c.calls["neo4j"] + c.calls["embed"]
+        print(f"{name:<8} {c.calls['pg']:>4} {c.calls['opensearch']:>4} {c.calls['neo4j']:>6} "
+              f"{c.calls['embed']:>6} {total:>6} {elapsed * 1000:>6.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Compare the token-aware chunker with the old fixed character chunker.
+
+Usage:
+    python scripts/benchmark_chunker.py [CORPUS_DIR ...]
+
+First chunks a built-in short resume and checks that every section keeps its
+own label (header, summary, education, experience, skills). Short sections are
+merged up to the chunk target, so the labels may be combined ("summary+skills")
+but none may be lost. It also checks that Japanese text splits at 。！？.
+
+Then walks the given directories for .pdf, .docx, .txt and .md files, extracts
+text the same way DocumentIngestionPipeline does, and reports chunk counts
+under both strategies. Document ingestion makes one LLM extraction call per
+chunk, so the chunk-count delta is the extraction-call saving. Resumes also
+list the section labels of their chunks.
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from memory.ingestion.chunker import count_tokens  # noqa: E402
+from memory.ingestion.document import (  # noqa: E402
+    _chunker,
+    _extract_text_docx,
+    _extract_text_pdf,
+    _extract_text_plain,
+    _is_resume,
+)
+
+_EXTRACTORS = {
+    ".pdf": _extract_text_pdf,
+    ".docx": _extract_text_docx,
+    ".txt": _extract_text_plain,
+    ".md": _extract_text_plain,
+}
+
+
+RESUME_FIXTURE = """Jane Doe
+jane@example.com | +1 555 0100 | Berlin
+
+Summary
+
+Backend engineer focused on data pipelines.
+
+Education
+
+B.Sc. Computer Science, TU Berlin, 2016-2019.
+
+Experience
+
+Data Engineer, Acme GmbH, 2019-2024. Built the ingestion service.
+
+Skills
+
+Python, SQL, Kafka.
+"""
+RESUME_LABELS = ["header", "summary", "education", "experience", "skills"]
+
+
+def check_resume_labels() -> bool:
+    text = RESUME_FIXTURE
+    resume = _is_resume(text, "jane_doe_resume.txt")
+    chunks = _chunker(resume).split(text)
+    labels = list(dict.fromkeys(part for c in chunks for part in c.section.split("+")))
+    good = resume and labels == RESUME_LABELS
+    print(f"resume fixture: {len(chunks)} chunk(s), labels {[c.section for c in chunks]}  "
+          f"{'ok' if good else 'BAD, expected ' + str(RESUME_LABELS)}")
+    return good
+
+
+CJK_SENTENCE = "本製品は家庭用の電源にのみ接続してください。「注意」の表示を必ず確認してください！"
+
+
+def check_cjk_sentences() -> bool:
+    text = CJK_SENTENCE * 60          # one ~1500-token paragraph, no spaces
+    chunks = _chunker(False).split(text)
+    cut = sum(_mid_sentence(c.text) for c in chunks)
+    good = len(chunks) > 1 and cut == 0
+    print(f"cjk paragraph: {len(chunks)} chunks, {cut} ending mid-sentence  {'ok' if good else 'BAD'}")
+    return good
+
+
+def legacy_chunks(text: str, chunk_size: int, overlap: int) -> list[str]:
+    """The previous character splitter (1200/200, or 800/100 for resumes)."""
+    chunks = []
+    start = 0
+    while start < len(text):
+        chunks.append(text[start:start + chunk_size])
+        start += chunk_size - overlap
+    return [c for c in chunks if c.strip()]
+
+
+def _mid_sentence(chunk: str) -> bool:
+    return not chunk.rstrip().endswith((".", "!", "?", ":", "|", "。", "！", "？", "」"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", nargs="*", type=Path)
+    args = parser.parse_args()
+
+    if not (check_resume_labels() & check_cjk_sentences()):
+        sys.exit(1)
+    if not args.corpus:
+        return
+
+    files = sorted(
+        p for root in args.corpus for p in root.rglob("*")
+        if p.is_file() and p.suffix.lower() in _EXTRACTORS
+    )
+    if not files:
+        sys.exit("no .pdf/.docx/.txt/.md files found")
+
+    print(f"{'file':<40}{'old':>6}{'new':>6}{'saved':>8}{'new avg tok':>13}")
+    old_total = new_total = old_cut = new_cut = 0
+    sizes: list[int] = []
+    t_new = 0.0
+    for path in files:
+        text = _EXTRACTORS[path.suffix.lower()](path.read_bytes())
+        resume = _is_resume(text, path.name)
+        old = legacy_chunks(text, 800, 100) if resume else legacy_chunks(text, 1200, 200)
+        t0 = time.perf_counter()
+        new = _chunker(resume).split(text)
+        t_new += time.perf_counter() - t0
+
+        old_total += len(old)
+        new_total += len(new)
+        old_cut += sum(_mid_sentence(c) for c in old)
+        new_cut += sum(_mid_sentence(c.text) for c in new)
+        sizes.extend(c.token_count for c in new)
+        saved = 1 - len(new) / len(old) if old else 0.0
+        avg = statistics.mean(c.token_count for c in new) if new else 0
+        print(f"{path.name[:39]:<40}{len(old):>6}{len(new):>6}{saved:>8.0%}{avg:>13.0f}")
+        if resume:
+            print(f"    sections: {', '.join(dict.fromkeys(c.section for c in new))}")
+
+    saved = 1 - new_total / old_total if old_total else 0.0
+    print(f"\nfiles={len(files)}  chunks old={old_total} new={new_total}  "
+          f"extraction calls saved={old_total - new_total} ({saved:.0%})")
+    print(f"chunks ending mid-sentence: old={old_cut} new={new_cut}")
+    if sizes:
+        print(f"new chunk tokens p50={statistics.median(sizes):.0f} max={max(sizes)}  "
+              f"chunking time={t_new * 1000:.0f}ms  ({count_tokens.cache_info().hits} cached token counts)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Benchmark the repo-agent code index against `grep -rn` on a synthetic tree.
+
+Usage:
+    python scripts/benchmark_code_index.py [--files 50000] [--keep DIR]
+
+Generates a tree of small Python/TypeScript/Go files with a handful of rare
+identifiers, builds the trigram + symbol index, and reports build time, index
+size and per-query latency for indexed search, symbol lookup and plain grep.
+The tree includes one bundle over MAX_INDEXED_FILE_BYTES; every query's match
+count is compared with grep, so a file left out of the search shows up as a
+mismatch.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.github_crawler.code_index import MAX_INDEXED_FILE_BYTES, CodeIndex  # noqa: E402
+
+_WORDS = [
+    "alpha", "beta", "gamma", "delta", "parse", "render", "fetch", "store",
+    "handler", "client", "session", "token", "buffer", "config", "value",
+]
+
+_QUERIES = [
+    "def handle_rare_event",
+    "RareWidgetFactory",
+    r"fetch_[a-z]+_client\(",
+    "return value",
+    "TODO",
+]
+
+
+def _py_file(rng: random.Random, i: int) -> str:
+    w1, w2 = rng.sample(_WORDS, 2)
+    body = [f'"""Module {i}."""', "", f"CONSTANT_{i} = {i}", ""]
+    body += [f"class {w1.title()}{w2.title()}{i}:", f"    def {w1}_{w2}(self, value):", "        return value", ""]
+    body += [f"def fetch_{w1}_client(session):", f"    return session.{w2}", ""]
+    if i % 5000 == 0:
+        body += ["def handle_rare_event(payload):", "    return payload", ""]
+    return "\n".join(body)
+
+
+def _ts_file(rng: random.Random, i: int) -> str:
+    w1, w2 = rng.sample(_WORDS, 2)
+    lines = [
+        f"export interface {w1.title()}Props{i} {{ {w2}: string }}",
+        f"export function {w1}{w2.title()}{i}(props: {w1.title()}Props{i}) {{",
+        f"  return props.{w2};",
+        "}",
+        f"export const {w2}Handler{i} = async (x: number) => x + {i};",
+    ]
+    if i % 7000 == 0:
+        lines.append("export class RareWidgetFactory {}")
+    if i % 2 == 0:
+        lines.append("// TODO: tighten types")
+    return "\n".join(lines) + "\n"
+
+
+def _go_file(rng: random.Random, i: int) -> str:
+    w1 = rng.choice(_WORDS)
+    return (
+        "package main\n\n"
+        f"type {w1.title()}{i} struct {{ N int }}\n\n"
+        f"func (s *{w1.title()}{i}) Value() int {{ return s.N }}\n\n"
+        f"func fetch_{w1}_client{i}() int {{ return {i} }}\n"
+    )
+
+
+def generate_tree(root: Path, n_files: int, seed: int = 7) -> None:
+    rng = random.Random(seed)
+    makers = [(".py", _py_file), (".ts", _ts_file), (".go", _go_file)]
+    for i in range(n_files):
+        ext, maker = makers[i % len(makers)]
+        directory = root / f"pkg{i % 200:03d}" / f"sub{(i // 200) % 50:02d}"
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"file_{i}{ext}").write_text(maker(rng, i))
+    # A generated bundle too large for the trigram index; search must still see it.
+    bundle = [f"var chunk{n} = {n};" for n in range(MAX_INDEXED_FILE_BYTES // 16)]
+    bundle.insert(len(bundle) // 2, "export class RareWidgetFactory {}")
+    (root / "bundle.js").write_text("\n".join(bundle) + "\n")
+    subprocess.run(["git", "init", "-q"], cwd=root, check=False)
+
+
+def _timed(fn, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--keep", default="", help="Generate into this directory and keep it.")
+    args = parser.parse_args()
+
+    root = Path(args.keep) if args.keep else Path(tempfile.mkdtemp(prefix="code_index_bench_"))
+    try:
+        t0 = time.perf_counter()
+        generate_tree(root, args.files)
+        print(f"generated {args.files:,} files in {time.perf_counter() - t0:.1f}s at {root}")
+
+        t0 = time.perf_counter()
+        index = CodeIndex.build(root)
+        build_s = time.perf_counter() - t0
+        index.save()
+        size_mb = index.index_path.stat().st_size / 1e6
+        t0 = time.perf_counter()
+        CodeIndex.load(root)
+        load_s = time.perf_counter() - t0
+        print(f"index build={build_s:.1f}s load={load_s:.2f}s size={size_mb:.1f}MB "
+              f"trigrams={len(index.postings):,} symbols={len(index.symbols):,} "
+              f"oversized={len(index.oversized)}")
+
+        mismatches = 0
+        print(f"\n{'query':<28}{'candidates':>12}{'index p50 ms':>15}{'grep p50 ms':>14}{'matches':>10}")
+        for q in _QUERIES:
+            candidates = len(index.candidate_files(q))
+            hits = len(index.search(q, max_lines=10**9))
+            grep_out = subprocess.run(["grep", "-rnE", "--color=never", q, "."], cwd=root,
+                                      capture_output=True, text=True).stdout
+            grep_hits = len([line for line in grep_out.splitlines() if not line.startswith("./.git/")])
+            idx_ms = statistics.median(_timed(lambda: index.search(q), args.repeat))
+            grep_ms = statistics.median(_timed(
+                lambda: subprocess.run(["grep", "-rnE", "--color=never", q, "."], cwd=root,
+                                       capture_output=True, text=True),
+                max(1, args.repeat // 2),
+            ))
+            status = f"{hits:,}" if hits == grep_hits else f"{hits:,} BAD, grep found {grep_hits:,}"
+            mismatches += hits != grep_hits
+            print(f"{q:<28}{candidates:>12,}{idx_ms:>15.1f}{grep_ms:>14.1f}{status:>10}")
+
+        print(f"\n{'symbol':<28}{'matches':>12}{'p50 ms':>15}")
+        for name in ("RareWidgetFactory", "handle_rare_event", "parse_render"):
+            hits = len(index.find_symbol(name))
+            ms = statistics.median(_timed(lambda: index.find_symbol(name), args.repeat))
+            print(f"{name:<28}{hits:>12,}{ms:>15.2f}")
+    finally:
+        if not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Time ContextAssembler.assemble and check its token accounting.
+
+Usage:
+    python scripts/benchmark_context_assembler.py [--budget 3000] [--rounds 20]
+
+Runs assembly at 50 / 200 / 1000 candidates (split across semantic results,
+graph items and evidence artifacts) against a fixed profile snapshot, once
+with a cold token cache and then warm. After every run the packed items are
+re-counted from scratch; the reported total must match within one token and
+stay under the budget. A second check confirms that budget left unspent by
+empty sections reaches later ones and that the evidence share is used.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from memory.ingestion.chunker import count_tokens  # noqa: E402
+from memory.retrieval.context_assembler import ContextAssembler  # noqa: E402
+from memory.retrieval.profile_cache import ProfileSnapshot, _build_snapshot  # noqa: E402
+from memory.retrieval.query_planner import QueryPlan  # noqa: E402
+from models.memory import (  # noqa: E402
+    ArtifactSchema,
+    ClaimSchema,
+    ContextPackage,
+    MemoryClass,
+    MemorySearchResult,
+    MemorySegment,
+)
+
+_WORDS = ("user prefers concise answers works on retrieval pipelines lives in pune "
+          "maintains the browser agent deadline next friday reviewed pull request "
+          "migrated postgres schema opensearch index neo4j graph embeddings").split()
+
+
+def _text(rng: random.Random, lo: int, hi: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(lo, hi)))
+
+
+def _claim(rng: random.Random, segment: MemorySegment = MemorySegment.PROJECTS) -> ClaimSchema:
+    return ClaimSchema(claim_text=_text(rng, 6, 30), memory_class=MemoryClass.SEMANTIC, segment=segment)
+
+
+class StaticProfileCache:
+    def __init__(self, snapshot: ProfileSnapshot) -> None:
+        self.snapshot = snapshot
+
+    async def get(self, user_id: str = "default") -> ProfileSnapshot:
+        return self.snapshot
+
+
+def _inputs(rng: random.Random, n: int):
+    n_sem, n_graph = n * 6 // 10, n * 3 // 10
+    results = [MemorySearchResult(claim=_claim(rng), score=rng.random()) for _ in range(n_sem)]
+    graph = []
+    for _ in range(n_graph):
+        c = _claim(rng)
+        graph.append({"claim_id": str(c.claim_id), "claim_text": c.claim_text, "segment": c.segment})
+    evidence = [ArtifactSchema(source_id=c.claim_id, artifact_type="chunk", text=_text(rng, 40, 200))
+                for c in (_claim(rng) for _ in range(n - n_sem - n_graph))]
+    return results, graph, evidence
+
+
+def recount(pkg: ContextPackage) -> int:
+    total = sum(count_tokens(c.claim_text) for c in pkg.procedural_memories)
+    total += sum(count_tokens(line) for line in (pkg.profile_summary or "").split("\n") if line)
+    total += sum(count_tokens(r.claim.claim_text) for r in pkg.semantic_facts)
+    total += sum(count_tokens(i.get("text") or i.get("claim_text") or str(i)) for i in pkg.graph_context)
+    total += sum(count_tokens(a.text) for a in pkg.source_evidence)
+    return total
+
+
+async def run(args: argparse.Namespace) -> bool:
+    rng = random.Random(args.seed)
+    procedural = [_claim(rng, MemorySegment.PREFERENCES) for _ in range(12)]
+    snapshot = _build_snapshot(1, procedural, [_text(rng, 4, 12) for _ in range(10)])
+    assembler = ContextAssembler(args.budget, profile_cache=StaticProfileCache(snapshot))
+    plan = QueryPlan()
+    ok = True
+
+    for n in (50, 200, 1000):
+        results, graph, evidence = _inputs(rng, n)
+        count_tokens.cache_clear()
+
+        t0 = time.perf_counter()
+        pkg = await assembler.assemble("q", plan, results, graph_context=graph, evidence=evidence)
+        cold = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for _ in range(args.rounds):
+            pkg = await assembler.assemble("q", plan, results, graph_context=graph, evidence=evidence)
+        warm = (time.perf_counter() - t0) / args.rounds
+
+        actual = recount(pkg)
+        within = abs(actual - pkg.total_tokens_estimate) <= 1 and pkg.total_tokens_estimate <= args.budget
+        ok &= within
+        print(f"n={n:5d}  cold {cold * 1000:7.2f}ms  warm {warm * 1000:6.2f}ms  "
+              f"used={pkg.total_tokens_estimate}/{args.budget} recount={actual} ok={within}  "
+              f"sem={len(pkg.semantic_facts)} graph={len(pkg.graph_context)} ev={len(pkg.source_evidence)}")
+
+    # Empty procedural/profile/graph sections: their shares must flow onward.
+    bare = ContextAssembler(args.budget, profile_cache=StaticProfileCache(ProfileSnapshot(version=0)))
+    results, _, evidence = _inputs(rng, 1000)
+    pkg = await bare.assemble("q", plan, results, evidence=evidence)
+    sem_used = sum(count_tokens(r.claim.claim_text) for r in pkg.semantic_facts)
+    carried = sem_used > int(0.25 * args.budget) and bool(pkg.source_evidence)
+    ok &= carried
+    print(f"carry-forward: semantic used {sem_used} (> share {int(0.25 * args.budget)}), "
+          f"evidence items {len(pkg.source_evidence)}, total {pkg.total_tokens_estimate}  ok={carried}")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=int, default=3000)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    sys.exit(0 if asyncio.run(run(parser.parse_args())) else 1)
+
+
+if __name__ == "__main__":
+    main()
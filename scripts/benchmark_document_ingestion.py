@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark staged document ingestion against the old per-chunk serial loop.
+
+Usage:
+    python scripts/benchmark_document_ingestion.py [--chunks 60] [--llm-ms 1500]
+        [--embed-ms 150] [--store-ms 8] [--concurrency 4]
+
+Uses a fake extractor (sleeps for the configured LLM / embedding latency and
+returns canned claims) and simulated store round trips, so no model keys or
+databases are needed. The serial path mirrors the previous loop: per chunk
+embed -> index -> extract, then per claim embed -> 3 store writes. The staged
+path runs DocumentIngestionPipeline's own stages: one chunk embed batch,
+concurrent extraction, one claim embed batch and bulk store writes.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from memory.ingestion.chunker import Chunk  # noqa: E402
+from memory.ingestion.document import DocumentIngestionPipeline  # noqa: E402
+from models.memory import (  # noqa: E402
+    CandidateClaim, CandidateEntity, EntityType, ExtractionResult, MemoryClass, MemorySegment,
+)
+
+
+class FakeExtractor:
+    """Blocking fake with injected latency; the pipeline calls it via to_thread."""
+
+    def __init__(self, llm_s: float, embed_s: float, claims_per_chunk: int) -> None:
+        self.llm_s = llm_s
+        self.embed_s = embed_s
+        self.claims_per_chunk = claims_per_chunk
+        self.calls = {"extract": 0, "embed": 0, "embed_one": 0, "summarize": 0}
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        self.calls["embed"] += 1
+        time.sleep(self.embed_s)
+        return [[0.0] * 8 for _ in texts]
+
+    def embed_one(self, text: str) -> list[float]:
+        self.calls["embed_one"] += 1
+        time.sleep(self.embed_s)
+        return [0.0] * 8
+
+    def summarize(self, text: str, max_sentences: int = 3) -> str:
+        self.calls["summarize"] += 1
+        time.sleep(self.llm_s)
+        return text[:200]
+
+    def extract(self, text: str, source_type: str = "chat",
+                trust_level: int = 5, context: str = "") -> ExtractionResult:
+        self.calls["extract"] += 1
+        time.sleep(self.llm_s)
+        return ExtractionResult(
+            entities=[CandidateEntity(canonical_name="Acme", entity_type=EntityType.ORGANIZATION)],
+            claims=[
+                CandidateClaim(
+                    claim_text=f"{text[:24]} fact {i}", predicate="mentions", subject_name="Acme",
+                    memory_class=MemoryClass.SEMANTIC, segment=MemorySegment.PROJECTS,
+                )
+                for i in range(self.claims_per_chunk)
+            ],
+            source_trust=0.7,
+        )
+
+
+def _chunks(n: int) -> list[Chunk]:
+    return [Chunk(f"Chunk {i} text about Acme.", "document", i * 100, i * 100 + 90, 300) for i in range(n)]
+
+
+async def run_serial(ex: FakeExtractor, chunks: list[Chunk], store_s: float) -> None:
+    for chunk in chunks:
+        await asyncio.to_thread(ex.embed_one, chunk.text)
+        await asyncio.sleep(store_s)                      # artifact index
+        result = await asyncio.to_thread(ex.extract, chunk.text)
+        for cand in result.claims:
+            await asyncio.to_thread(ex.embed_one, cand.claim_text)
+            await asyncio.sleep(3 * store_s)              # PG flush, OS index, Neo4j upsert
+    await asyncio.to_thread(ex.summarize, "x" * 600)
+
+
+async def run_staged(ex: FakeExtractor, chunks: list[Chunk], store_s: float, concurrency: int) -> None:
+    pipe = DocumentIngestionPipeline(extractor=ex, extract_concurrency=concurrency)
+    await pipe._embed([c.text for c in chunks])
+    results, _ = await asyncio.gather(
+        pipe._extract_all(chunks, "document", 7, "document"),
+        pipe._summarize("x" * 600),
+    )
+    claims = [c.claim_text for r in results for c in r.claims]
+    await pipe._embed(claims)
+    await asyncio.sleep(4 * store_s)                      # artifacts bulk, PG flush, OS bulk, Neo4j UNWIND
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=60)
+    parser.add_argument("--claims-per-chunk", type=int, default=4)
+    parser.add_argument("--llm-ms", type=float, default=1500)
+    parser.add_argument("--embed-ms", type=float, default=150)
+    parser.add_argument("--store-ms", type=float, default=8)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    chunks = _chunks(args.chunks)
+    store_s = args.store_ms / 1000
+    for name, runner in (
+        ("serial", lambda ex: run_serial(ex, chunks, store_s)),
+        ("staged", lambda ex: run_staged(ex, chunks, store_s, args.concurrency)),
+    ):
+        ex = FakeExtractor(args.llm_ms / 1000, args.embed_ms / 1000, args.claims_per_chunk)
+        t0 = time.perf_counter()
+        asyncio.run(runner(ex))
+        elapsed = time.perf_counter() - t0
+        print(f"{name:<8} {elapsed:8.2f}s  calls={ex.calls}")
+
+
+if __name__ == "__main__":
+    main()
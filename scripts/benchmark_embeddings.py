@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Benchmark query-embedding throughput and latency, per call vs micro-batched.
+
+Usage:
+    python scripts/benchmark_embeddings.py [--requests 2000] [--concurrency 64]
+        [--rtt-ms 80] [--per-text-ms 0.3] [--max-batch 32] [--max-wait-ms 5]
+        [--onnx models/embedding]     # also run a real local model
+
+Simulated providers (time.sleep, so they release the GIL like real I/O):
+  remote  — fixed round trip plus a small per-text cost, like a hosted API;
+            calls overlap freely
+  local   — per-pass overhead plus per-text compute, like a CPU model;
+            one pass at a time
+
+Each provider is driven by `--concurrency` coroutines issuing `--requests`
+queries in total, first with one `asyncio.to_thread(embed_query)` per query
+(the previous request path), then through `EmbeddingBatcher`. Reports
+throughput, p50/p95 latency and mean batch size, and checks every batched
+caller got the vector for its own text and that a provider error reaches
+every caller in the failed batch.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.clients.opensearch import EMBEDDING_DIM  # noqa: E402
+from memory.ingestion.embeddings import EmbeddingBatcher, fit_dimension  # noqa: E402
+
+
+def _vector(text: str) -> list[float]:
+    seed = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+    return fit_dimension(np.random.default_rng(seed).normal(size=(1, 384)), EMBEDDING_DIM)[0].tolist()
+
+
+class SimulatedProvider:
+    def __init__(self, fixed_ms: float, per_text_ms: float, serial: bool = False) -> None:
+        self.dim = EMBEDDING_DIM
+        self.fixed = fixed_ms / 1000
+        self.per_text = per_text_ms / 1000
+        self._lock = threading.Lock() if serial else None
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        cost = self.fixed + self.per_text * len(texts)
+        if self._lock is None:
+            time.sleep(cost)
+        else:
+            with self._lock:            # one forward pass at a time, like a saturated CPU
+                time.sleep(cost)
+        return [_vector(t) for t in texts]
+
+    embed_queries = embed_documents
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+
+async def drive(embed_one, n: int, concurrency: int) -> tuple[float, list[float], bool]:
+    latencies: list[float] = []
+    correct = True
+    queue = iter(range(n))
+
+    async def worker() -> None:
+        nonlocal correct
+        for i in queue:
+            text = f"what did I say about topic {i}"
+            t0 = time.perf_counter()
+            vec = await embed_one(text)
+            latencies.append(time.perf_counter() - t0)
+            correct &= vec == _vector(text)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - t0, latencies, correct
+
+
+def report(label: str, n: int, wall: float, lat: list[float], extra: str = "") -> None:
+    ms = sorted(x * 1000 for x in lat)
+    p95 = ms[int(len(ms) * 0.95) - 1]
+    print(f"  {label:<10} {n / wall:8.0f} q/s   p50 {statistics.median(ms):7.1f}ms   "
+          f"p95 {p95:7.1f}ms{extra}")
+
+
+async def compare(name: str, provider, args) -> bool:
+    print(f"{name}:")
+    wall, lat, ok_direct = await drive(
+        lambda t: asyncio.to_thread(provider.embed_query, t), args.requests, args.concurrency)
+    report("per call", args.requests, wall, lat)
+
+    batcher = EmbeddingBatcher(provider.embed_queries, args.max_batch, args.max_wait_ms)
+    wall, lat, ok_batched = await drive(batcher.embed_one, args.requests, args.concurrency)
+    report("batched", args.requests, wall, lat,
+           f"   mean batch {batcher.texts / max(batcher.batches, 1):.1f}")
+    return ok_direct and ok_batched
+
+
+async def check_errors() -> bool:
+    def boom(texts):
+        raise ConnectionError("injected")
+
+    batcher = EmbeddingBatcher(boom, max_batch=8, max_wait_ms=1)
+    results = await asyncio.gather(*(batcher.embed_one(str(i)) for i in range(20)), return_exceptions=True)
+    return all(isinstance(r, ConnectionError) for r in results)
+
+
+async def run(args: argparse.Namespace) -> bool:
+    ok = True
+    ok &= await compare("remote (simulated)", SimulatedProvider(args.rtt_ms, args.per_text_ms), args)
+    ok &= await compare("local (simulated)", SimulatedProvider(args.local_fixed_ms, args.local_per_text_ms, serial=True), args)
+    if args.onnx:
+        from memory.ingestion.embeddings import OnnxEmbeddingProvider
+        onnx = OnnxEmbeddingProvider(args.onnx)
+        # real vectors cannot match the hash reference, so only timings are shown
+        for label, fn in (("per call", lambda t: asyncio.to_thread(onnx.embed_query, t)),
+                          ("batched", EmbeddingBatcher(onnx.embed_queries, args.max_batch,
+                                                       args.max_wait_ms).embed_one)):
+            wall, lat, _ = await drive(fn, args.requests, args.concurrency)
+            report(f"onnx {label}", args.requests, wall, lat)
+    errors = await check_errors()
+    print(f"each caller got its own vector: {ok}   errors reach every caller: {errors}")
+    return ok and errors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--rtt-ms", type=float, default=80.0)
+    parser.add_argument("--per-text-ms", type=float, default=0.3)
+    parser.add_argument("--local-fixed-ms", type=float, default=2.0)
+    parser.add_argument("--local-per-text-ms", type=float, default=0.4)
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--onnx", default="")
+    sys.exit(0 if asyncio.run(run(parser.parse_args())) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Measure recall and latency of filtered kNN: filtering during the search vs
+over-fetching and filtering the hits afterwards in Python.
+
+Usage:
+    python scripts/benchmark_filtered_knn.py [--docs 20000] [--queries 100] [--k 10]
+        [--overfetch 3] [--opensearch] [--ef 32,64,100,160,256]
+
+The corpus is synthetic claims: topic-clustered embeddings, and segment, tier,
+memory_class, status and created_at spread the way a long-lived memory store
+spreads them (most claims active, recent ones rarer). Ground truth for each
+filter is exact kNN over the rows that match it, from a brute-force
+LocalVectorStore.
+
+Filters, from loose to very selective:
+  status          — active or provisional (~85%)
+  segment         — one segment (~20%)
+  segment & tier  — one segment, short term (~5%)
+  or              — segment A | segment B & long term
+  window 7d       — created in the last 7 days (~3%)
+  segment & 7d    — one segment, created in the last 7 days (<1%)
+
+Compared, per filter:
+  post            — unfiltered kNN for k * overfetch hits, filtered in Python
+                    (the old path); reports recall@k and fill (share of the k
+                    slots it could fill at all)
+  pre (IVF)       — LocalVectorStore with IVF on, filter resolved to rows first
+  opensearch ef=N — with --opensearch: the Lucene engine's efficient filter
+                    inside the knn clause, swept over ef_search; the corpus
+                    is written to a throwaway `<index>_filterbench` index
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.clients.local_vector_store import LocalVectorStore  # noqa: E402
+from core.clients.opensearch import _CLAIM_MAPPING, EMBEDDING_DIM, IDX_CLAIMS  # noqa: E402
+from core.clients.search_filters import Filter, Term, time_window  # noqa: E402
+
+NOW = datetime(2026, 5, 14, tzinfo=timezone.utc)
+_SEGMENTS = ["projects_and_goals", "preferences_and_corrections", "contextual_incidents",
+             "people_and_relationships", "core_identity"]
+
+
+def corpus(n: int, rng: np.random.Generator, prng: random.Random) -> list[tuple[str, dict]]:
+    centres = rng.normal(size=(24, EMBEDDING_DIM))
+    docs = []
+    for i in range(n):
+        emb = centres[prng.randrange(len(centres))] + rng.normal(scale=1.0, size=EMBEDDING_DIM)
+        age_days = min(720.0, prng.expovariate(1 / 180))
+        docs.append((f"c{i}", {
+            "claim_id": f"c{i}", "claim_text": f"claim {i}", "embedding": emb.tolist(),
+            "segment": prng.choice(_SEGMENTS),
+            "tier": prng.choice(["long_term"] * 3 + ["short_term"]),
+            "memory_class": prng.choice(["semantic", "episodic", "procedural"]),
+            "status": prng.choice(["active"] * 16 + ["provisional"] + ["archived"] * 3),
+            "created_at": (NOW - timedelta(days=age_days)).isoformat(),
+        }))
+    return docs
+
+
+def filters(prng: random.Random) -> dict[str, Filter]:
+    seg, other = prng.sample(_SEGMENTS, 2)
+    week = time_window(NOW - timedelta(days=7), NOW + timedelta(days=1), fields=("created_at",))
+    return {
+        "status": Term("status", ["active", "provisional"]),
+        "segment": Term("segment", seg),
+        "segment & tier": Term("segment", seg) & Term("tier", "short_term"),
+        "or": Term("segment", seg) | (Term("segment", other) & Term("tier", "long_term")),
+        "window 7d": week,
+        "segment & 7d": Term("segment", seg) & week,
+    }
+
+
+def recall(got: list[str], want: list[str]) -> float:
+    return len(set(got) & set(want)) / len(want) if want else 1.0
+
+
+def pct(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[max(0, int(len(values) * q) - 1)]
+
+
+def line(name: str, recalls: list[float], lat: list[float], extra: str = "") -> None:
+    ms = [x * 1000 for x in lat]
+    print(f"    {name:<16} recall@k {statistics.mean(recalls):.3f} (min {min(recalls):.2f})   "
+          f"p50 {statistics.median(ms):6.2f}ms  p95 {pct(ms, 0.95):6.2f}ms{extra}")
+
+
+def run_local(args, docs, qs, fs) -> dict[str, dict[str, list[str]]]:
+    exact = LocalVectorStore(ivf_min_rows=10 ** 9)
+    ivf = LocalVectorStore(ivf_min_rows=0)
+    for store in (exact, ivf):
+        store.bulk_index(IDX_CLAIMS, docs)
+    docs_by_id = dict(docs)
+    truth: dict[str, dict[str, list[str]]] = {}
+
+    for fname, f in fs.items():
+        matching = sum(f.matches(d) for _, d in docs)
+        print(f"  {fname}  ({matching / len(docs):.1%} of docs)")
+        truth[fname] = {}
+        post_r, post_fill, post_lat, pre_r, pre_lat = [], [], [], [], []
+        for qi, vec in enumerate(qs):
+            want = [h["_id"] for h in exact.knn_search(IDX_CLAIMS, vec, args.k, f)]
+            truth[fname][qi] = want
+
+            t0 = time.perf_counter()
+            hits = exact.knn_search(IDX_CLAIMS, vec, args.k * args.overfetch)
+            got = [h["_id"] for h in hits if f.matches(docs_by_id[h["_id"]])][: args.k]
+            post_lat.append(time.perf_counter() - t0)
+            post_r.append(recall(got, want))
+            post_fill.append(len(got) / len(want) if want else 1.0)
+
+            t0 = time.perf_counter()
+            got = [h["_id"] for h in ivf.knn_search(IDX_CLAIMS, vec, args.k, f)]
+            pre_lat.append(time.perf_counter() - t0)
+            pre_r.append(recall(got, want))
+        line("post", post_r, post_lat, f"   fill {statistics.mean(post_fill):.2f}")
+        line("pre (IVF)", pre_r, pre_lat)
+    return truth
+
+
+def run_opensearch(args, docs, qs, fs, truth) -> None:
+    from core.clients.opensearch import OpenSearchClient
+
+    index = f"{IDX_CLAIMS}_filterbench"
+    remote = OpenSearchClient()
+    remote.connect()
+    remote.ensure_search_pipeline()
+    if remote.client.indices.exists(index=index):
+        remote.client.indices.delete(index=index)
+    remote.client.indices.create(index=index, body=_CLAIM_MAPPING)
+    try:
+        remote.bulk_index(index, docs)
+        remote.client.indices.forcemerge(index=index, max_num_segments=1)
+        print("\nopensearch (Lucene efficient filtering):")
+        for fname, f in fs.items():
+            print(f"  {fname}")
+            for ef in (int(e) for e in args.ef.split(",")):
+                rs, lat = [], []
+                for qi, vec in enumerate(qs):
+                    t0 = time.perf_counter()
+                    got = [h["_id"] for h in remote.knn_search(index, vec, args.k, f, ef_search=ef)]
+                    lat.append(time.perf_counter() - t0)
+                    rs.append(recall(got, truth[fname][qi]))
+                line(f"ef={ef}", rs, lat)
+    finally:
+        remote.client.indices.delete(index=index)
+        remote.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--overfetch", type=int, default=3)
+    parser.add_argument("--opensearch", action="store_true")
+    parser.add_argument("--ef", default="32,64,100,160,256")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng, prng = np.random.default_rng(args.seed), random.Random(args.seed)
+    docs = corpus(args.docs, rng, prng)
+    qs = [rng.normal(size=EMBEDDING_DIM).tolist() for _ in range(args.queries)]
+    fs = filters(prng)
+    print(f"{args.docs} docs, {args.queries} queries, k={args.k}, post-filter over-fetch x{args.overfetch}")
+    truth = run_local(args, docs, qs, fs)
+    if args.opensearch:
+        run_opensearch(args, docs, qs, fs, truth)
+
+
+if __name__ == "__main__":
+    main()
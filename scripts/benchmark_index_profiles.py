@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Compare kNN index profiles: recall@k, index size and query latency.
+
+Usage:
+    python scripts/benchmark_index_profiles.py [--docs 50000] [--queries 200] [--k 10]
+        [--profiles lucene-hnsw,lucene-sq,faiss-hnsw,faiss-fp16] [--ef 100]
+        [--reindex-check]
+
+Needs an OpenSearch cluster at the configured host; exits 1 if its version
+cannot be read. Profiles the cluster is too old for are skipped. For each profile, a throwaway index
+`memory_claims_profilebench_<profile>` is created with the claims mapping
+built by that profile. It is loaded with the same synthetic corpus
+(topic-clustered, unit-normalised 768-d vectors) and force-merged to one
+segment, then queried. Ground truth is exact cosine kNN in numpy.
+
+Reported per profile:
+  recall@k     — mean and min overlap with the exact top k
+  p50/p95      — client-observed kNN latency, with ef_search=--ef
+  store        — primary store size on disk
+  graph memory — native memory the k-NN plugin reports for loaded graphs
+                 (Faiss only; Lucene graphs live in the JVM heap and page cache)
+  build        — bulk load + refresh + force-merge time
+
+--reindex-check also runs OpenSearchClient.reindex on a throwaway alias,
+moving it between the first two profiles while a writer thread keeps
+indexing, updating and deleting through the alias. It checks that the doc ids
+and sources behind the alias match the writer's final state. Every index the
+script creates is deleted afterwards.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import random
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.clients import opensearch as os_mod  # noqa: E402
+from core.config import get_settings  # noqa: E402
+from core.clients.index_profiles import PROFILES, index_body  # noqa: E402
+from core.clients.opensearch import _CLAIM_MAPPING, EMBEDDING_DIM, IDX_CLAIMS, OpenSearchClient  # noqa: E402
+
+BENCH = f"{IDX_CLAIMS}_profilebench"
+
+
+def corpus(n: int, rng: np.random.Generator) -> np.ndarray:
+    centres = rng.normal(size=(64, EMBEDDING_DIM))
+    vecs = centres[rng.integers(0, len(centres), size=n)] + rng.normal(scale=1.5, size=(n, EMBEDDING_DIM))
+    return (vecs / np.linalg.norm(vecs, axis=1, keepdims=True)).astype(np.float32)
+
+
+def doc(i: int, vec: np.ndarray) -> dict:
+    return {"claim_id": f"c{i}", "claim_text": f"claim {i}", "status": "active",
+            "segment": "core_identity", "embedding": vec.tolist()}
+
+
+def pct(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[max(0, int(len(values) * q) - 1)]
+
+
+def graph_memory_kb(client: OpenSearchClient) -> int:
+    try:
+        nodes = client.client.transport.perform_request("GET", "/_plugins/_knn/stats")["nodes"]
+        return sum(n.get("graph_memory_usage", 0) for n in nodes.values())
+    except Exception:
+        return 0
+
+
+def bench_profile(client: OpenSearchClient, name: str, vecs: np.ndarray, qs: np.ndarray,
+                  truth: list[set[str]], args) -> None:
+    index = f"{BENCH}_{name}"
+    raw = client.client
+    if raw.indices.exists(index=index):
+        raw.indices.delete(index=index)
+    raw.indices.create(index=index, body=index_body(_CLAIM_MAPPING, PROFILES[name]))
+    try:
+        t0 = time.perf_counter()
+        for i in range(0, len(vecs), 2000):
+            client.bulk_index(index, [(f"c{j}", doc(j, vecs[j])) for j in range(i, min(i + 2000, len(vecs)))],
+                              refresh=False)
+        raw.indices.refresh(index=index)
+        raw.indices.forcemerge(index=index, max_num_segments=1, request_timeout=3600)
+        build = time.perf_counter() - t0
+
+        for q in qs[:20]:                                   # load graphs, warm caches
+            client.knn_search(index, q.tolist(), args.k, ef_search=args.ef)
+        recalls, lat = [], []
+        for q, want in zip(qs, truth):
+            t0 = time.perf_counter()
+            hits = client.knn_search(index, q.tolist(), args.k, ef_search=args.ef)
+            lat.append((time.perf_counter() - t0) * 1000)
+            recalls.append(len(want & {h["_id"] for h in hits}) / args.k)
+        store = raw.indices.stats(index=index, metric="store")["indices"][index]["primaries"]["store"]
+        print(f"  {name:<12} recall@{args.k} {statistics.mean(recalls):.3f} (min {min(recalls):.2f})   "
+              f"p50 {statistics.median(lat):6.2f}ms  p95 {pct(lat, 0.95):6.2f}ms   "
+              f"store {store['size_in_bytes'] / 2 ** 20:7.1f} MiB   graph memory {graph_memory_kb(client) / 1024:6.1f} MiB   "
+              f"build {build:6.1f}s")
+    finally:
+        raw.indices.delete(index=index)
+
+
+def reindex_check(client: OpenSearchClient, vecs: np.ndarray, profiles: list[str]) -> bool:
+    alias = f"{BENCH}_alias"
+    os_mod._MAPPINGS[alias] = _CLAIM_MAPPING          # let reindex() accept the throwaway alias
+    body = index_body(_CLAIM_MAPPING, PROFILES[profiles[0]])
+    body["aliases"] = {alias: {}}
+    first = os_mod.physical_index_name(alias)
+    client.client.indices.create(index=first, body=body)
+    n = min(len(vecs), 20000)
+    client.bulk_index(alias, [(f"c{i}", doc(i, vecs[i])) for i in range(n)])
+
+    expected = {f"c{i}": "claim %d" % i for i in range(n)}
+    stop = threading.Event()
+    writes = [0]
+
+    def writer() -> None:
+        rng = random.Random(1)
+        next_id = n
+        while not stop.is_set():
+            op = rng.random()
+            if op < 0.4:
+                doc_id = f"c{next_id}"
+                client.bulk_actions([{"_op_type": "index", "_index": alias, "_id": doc_id,
+                                      "_source": doc(next_id, vecs[next_id % len(vecs)])}], refresh=False)
+                expected[doc_id] = f"claim {next_id}"
+                next_id += 1
+            elif op < 0.7:
+                doc_id = rng.choice(list(expected))
+                text = f"updated {writes[0]}"
+                client.bulk_actions([{"_op_type": "update", "_index": alias, "_id": doc_id,
+                                      "doc": {"claim_text": text}}], refresh=False)
+                expected[doc_id] = text
+            else:
+                doc_id = rng.choice(list(expected))
+                client.bulk_actions([{"_op_type": "delete", "_index": alias, "_id": doc_id}], refresh=False)
+                expected.pop(doc_id)
+            writes[0] += 1
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        result = client.reindex(alias, PROFILES[profiles[1]])
+    finally:
+        time.sleep(1.0)
+        stop.set()
+        thread.join()
+    client.client.indices.refresh(index=alias)
+    got = {h["_id"]: h["_source"]["claim_text"] for h in os_mod.helpers.scan(
+        client.client, index=alias, query={"query": {"match_all": {}}, "_source": ["claim_text"]})}
+    ok = got == expected
+    wrong = sum(got.get(k) != v for k, v in expected.items()) + len(set(got) - set(expected))
+    print(f"\nreindex {profiles[0]} -> {profiles[1]} under {writes[0]} concurrent writes: {result}")
+    print(f"  alias contents match the writer: {ok}  ({wrong} mismatched docs)")
+    for index in client.client.indices.get_alias(name=alias):
+        client.client.indices.delete(index=index)
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ef", type=int, default=100)
+    parser.add_argument("--profiles", default=",".join(PROFILES))
+    parser.add_argument("--reindex-check", action="store_true")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    client = OpenSearchClient()
+    client.connect()
+    # The client logs a full traceback for every failed retry; the exit message is enough.
+    client_log = logging.getLogger("opensearch")
+    level = client_log.level
+    client_log.setLevel(logging.CRITICAL)
+    try:
+        number = client.client.info()["version"]["number"]
+    except Exception as exc:
+        settings = get_settings()
+        sys.exit(f"OpenSearch version probe failed at {settings.opensearch_host}:"
+                 f"{settings.opensearch_port}: {type(exc).__name__}")
+    finally:
+        client_log.setLevel(level)
+    client.ensure_search_pipeline()
+    version = client._version
+    if version == (0, 0):
+        sys.exit(f"OpenSearch version probe failed: cannot parse version {number!r}")
+    profiles = [p for p in args.profiles.split(",") if PROFILES[p].min_version <= version]
+    skipped = sorted(set(args.profiles.split(",")) - set(profiles))
+    print(f"OpenSearch {version[0]}.{version[1]}; {args.docs} docs, {args.queries} queries"
+          + (f"; skipped (cluster too old): {', '.join(skipped)}" if skipped else ""))
+
+    rng = np.random.default_rng(args.seed)
+    vecs = corpus(args.docs, rng)
+    qs = corpus(args.queries, rng)
+    sims = qs @ vecs.T
+    truth = [{f"c{j}" for j in np.argpartition(-row, args.k)[: args.k]} for row in sims]
+
+    for name in profiles:
+        bench_profile(client, name, vecs, qs, truth, args)
+    ok = True
+    if args.reindex_check and len(profiles) >= 2:
+        ok = reindex_check(client, vecs, profiles)
+    client.close()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Benchmark entity-name lookups in Neo4j: the old regex scan vs the full-text index.
+
+Usage:
+    python scripts/benchmark_neo4j_lookup.py [--sizes 1000,10000,50000]
+        [--queries 200] [--keep]
+
+Needs a Neo4j 5 server at the configured neo4j_uri. First, create_constraints()
+runs twice: the first call brings the schema up to date, and the second must
+be a no-op that returns the same version. Then synthetic :Entity nodes are
+seeded in stages up to each size. Every stage waits for the indexes to
+populate and then times:
+
+  legacy    — canonical_name =~ '(?i).*name.*' OR name IN aliases (label scan)
+  fulltext  — find_entity_by_name, one call per mention
+  batched   — find_entities_by_names, 5 mentions per call (per-mention cost)
+
+Each query is one of:
+  * an exact full name
+  * a lower-cased full name
+  * an alias
+  * a full first name with a prefix of the last name
+
+hit@1 is the share of queries whose top result is the seeded entity, and
+hit@10 the share where it appears at all. The legacy query has no ranking,
+so only its hit@10 means anything.
+
+Seeded nodes carry a bench_run property and are deleted afterwards unless
+--keep is given. Real entities in the database are left alone, but they do
+compete in the rankings.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.clients.neo4j import Neo4jClient  # noqa: E402
+
+_SYLLABLES = ["ka", "ro", "mi", "ten", "vel", "sha", "dor", "li", "an", "pre", "zo", "qua",
+              "bel", "nor", "ix", "ta", "mun", "ger", "o", "lys", "fen", "dra", "cu", "wen"]
+_TYPES = ["person", "organization", "project", "location", "tool"]
+
+_LEGACY = """
+MATCH (e:Entity)
+WHERE e.canonical_name =~ $pattern OR $name IN e.aliases
+RETURN e.entity_id AS entity_id
+LIMIT 10
+"""
+
+
+def word(rng: random.Random) -> str:
+    return "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+
+
+def make_entities(n: int, rng: random.Random, seen: set[str]) -> list[dict]:
+    rows = []
+    while len(rows) < n:
+        first, last = word(rng), word(rng)
+        name = f"{first} {last}"
+        if name in seen:
+            continue
+        seen.add(name)
+        rows.append({
+            "entity_id": str(uuid.uuid4()), "entity_type": rng.choice(_TYPES),
+            "canonical_name": name, "description": "", "aliases": [f"{first[0]}. {last}"],
+        })
+    return rows
+
+
+def mentions(entities: list[dict], n: int, rng: random.Random) -> list[tuple[str, str]]:
+    out = []
+    for e in rng.sample(entities, min(n, len(entities))):
+        first, last = e["canonical_name"].split(" ", 1)
+        form = rng.choice(["exact", "lower", "alias", "prefix"])
+        text = {"exact": e["canonical_name"], "lower": e["canonical_name"].lower(),
+                "alias": e["aliases"][0], "prefix": f"{first} {last[:4]}"}[form]
+        out.append((text, e["entity_id"]))
+    return out
+
+
+def pct(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[max(0, int(len(values) * q) - 1)]
+
+
+async def seed(client: Neo4jClient, rows: list[dict], run_id: str) -> None:
+    for i in range(0, len(rows), 2000):
+        await client.upsert_entities_batch(rows[i:i + 2000])
+    await client.run_cypher(
+        "UNWIND $ids AS eid MATCH (e:Entity {entity_id: eid}) SET e.bench_run = $run",
+        {"ids": [r["entity_id"] for r in rows], "run": run_id},
+    )
+    await client.run_cypher("CALL db.awaitIndexes(600)")
+
+
+async def time_queries(client: Neo4jClient, qs: list[tuple[str, str]]) -> dict[str, tuple]:
+    results = {}
+
+    lat, hit10 = [], 0
+    for text, want in qs:
+        t0 = time.perf_counter()
+        rows = await client.run_cypher(_LEGACY, {"pattern": f"(?i).*{text}.*", "name": text})
+        lat.append(time.perf_counter() - t0)
+        hit10 += any(r["entity_id"] == want for r in rows)
+    results["legacy"] = (lat, None, hit10)
+
+    lat, hit1, hit10 = [], 0, 0
+    for text, want in qs:
+        t0 = time.perf_counter()
+        rows = await client.find_entity_by_name(text)
+        lat.append(time.perf_counter() - t0)
+        hit1 += bool(rows) and rows[0]["entity_id"] == want
+        hit10 += any(r["entity_id"] == want for r in rows)
+    results["fulltext"] = (lat, hit1, hit10)
+
+    lat = []
+    for i in range(0, len(qs), 5):
+        chunk = qs[i:i + 5]
+        t0 = time.perf_counter()
+        await client.find_entities_by_names([t for t, _ in chunk])
+        lat.extend([(time.perf_counter() - t0) / len(chunk)] * len(chunk))
+    results["batched"] = (lat, None, None)
+    return results
+
+
+async def run(args: argparse.Namespace) -> bool:
+    client = Neo4jClient()
+    await client.connect()
+    first = await client.create_constraints()
+    again = await client.create_constraints()
+    idempotent = first == again
+    print(f"schema version {first}; second bootstrap a no-op: {idempotent}")
+
+    rng = random.Random(args.seed)
+    run_id = uuid.uuid4().hex
+    seen: set[str] = set()
+    entities: list[dict] = []
+    try:
+        for size in sorted(int(s) for s in args.sizes.split(",")):
+            rows = make_entities(size - len(entities), rng, seen)
+            t0 = time.perf_counter()
+            await seed(client, rows, run_id)
+            entities.extend(rows)
+            print(f"\n{size} entities (seeded {len(rows)} in {time.perf_counter() - t0:.1f}s)")
+            qs = mentions(entities, args.queries, rng)
+            for name, (lat, hit1, hit10) in (await time_queries(client, qs)).items():
+                ms = [x * 1000 for x in lat]
+                hits = ""
+                if hit1 is not None:
+                    hits += f"   hit@1 {hit1 / len(qs):.2f}"
+                if hit10 is not None:
+                    hits += f"   hit@10 {hit10 / len(qs):.2f}"
+                print(f"  {name:<9} p50 {statistics.median(ms):7.2f}ms   p95 {pct(ms, 0.95):7.2f}ms{hits}")
+    finally:
+        if not args.keep:
+            await client.run_cypher(
+                "MATCH (e:Entity {bench_run: $run}) CALL { WITH e DETACH DELETE e } IN TRANSACTIONS OF 10000 ROWS",
+                {"run": run_id},
+            )
+        await client.close()
+    return idempotent
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,50000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--keep", action="store_true")
+    parser.add_argument("--seed", type=int, default=7)
+    sys.exit(0 if asyncio.run(run(parser.parse_args())) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Exercise the memory outbox relay against fake sinks with injected faults.
+
+Usage:
+    python scripts/benchmark_outbox_relay.py [--claims 500] [--search-fail 0.2]
+        [--graph-fail 0.2] [--store-ms 8] [--batch 100]
+
+No databases are needed: events live in an in-memory list and the drain loop
+below stands in for drain_once's poll query, while
+OutboxRelay.deliver / _settle do the real work. The fake OpenSearch sink
+fails individual bulk items (and occasionally the whole request); the fake
+Neo4j sink raises on a share of calls. The run checks that both sinks end up
+with exactly the documents and nodes that were enqueued, and reports the
+request-path cost of inline triple writes vs one outbox commit.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from memory import outbox  # noqa: E402
+from memory.outbox import SINK_GRAPH, SINK_SEARCH, STATUS_DEAD, STATUS_PENDING, OutboxRelay  # noqa: E402
+from models.db.memory import OutboxEventORM  # noqa: E402
+
+
+class FaultyOpenSearch:
+    def __init__(self, item_fail: float, request_fail: float, rng: random.Random) -> None:
+        self.docs: dict[str, dict] = {}
+        self.item_fail = item_fail
+        self.request_fail = request_fail
+        self.rng = rng
+        self.calls = 0
+
+    def bulk_actions(self, actions: list[dict], refresh: bool = True) -> set[str]:
+        self.calls += 1
+        if self.rng.random() < self.request_fail:
+            raise ConnectionError("injected: cluster unavailable")
+        failed: set[str] = set()
+        for a in actions:
+            if self.rng.random() < self.item_fail:
+                failed.add(a["_id"])
+                continue
+            if a["_op_type"] == "index":
+                self.docs[a["_id"]] = dict(a["_source"])
+            elif a["_op_type"] == "update":
+                if a["_id"] not in self.docs:
+                    failed.add(a["_id"])
+                else:
+                    self.docs[a["_id"]].update(a["doc"])
+            elif a["_op_type"] == "delete":
+                self.docs.pop(a["_id"], None)
+        return failed
+
+
+class FaultyNeo4j:
+    def __init__(self, fail: float, rng: random.Random) -> None:
+        self.claims: dict[str, dict] = {}
+        self.entities: dict[str, dict] = {}
+        self.fail = fail
+        self.rng = rng
+        self.calls = 0
+
+    def _maybe_fail(self) -> None:
+        self.calls += 1
+        if self.rng.random() < self.fail:
+            raise ConnectionError("injected: neo4j session expired")
+
+    async def upsert_entities_batch(self, rows: list[dict]) -> None:
+        self._maybe_fail()
+        self.entities.update({r["entity_id"]: r for r in rows})
+
+    async def upsert_claims_batch(self, rows: list[dict]) -> None:
+        self._maybe_fail()
+        self.claims.update({r["claim_id"]: r for r in rows})
+
+    async def link_claims_to_source(self, claim_ids: list[str], source_id: str) -> None:
+        self._maybe_fail()
+
+    async def delete_claims_batch(self, claim_ids: list[str]) -> None:
+        self._maybe_fail()
+        for cid in claim_ids:
+            self.claims.pop(cid, None)
+
+    async def delete_entities_batch(self, entity_ids: list[str]) -> None:
+        self._maybe_fail()
+        for eid in entity_ids:
+            self.entities.pop(eid, None)
+
+
+def _events(n_claims: int) -> list[OutboxEventORM]:
+    now = datetime.now(timezone.utc)
+    events: list[OutboxEventORM] = []
+
+    def add(sink: str, op: str, aggregate: str, payload: dict) -> None:
+        events.append(OutboxEventORM(
+            event_id=len(events) + 1, sink=sink, op=op, aggregate_id=aggregate, payload=payload,
+            status=STATUS_PENDING, attempts=0, created_at=now, next_attempt_at=now,
+        ))
+
+    for i in range(n_claims):
+        cid = f"claim-{i}"
+        add(SINK_SEARCH, "index", cid, {"index": "claims", "id": cid,
+                                        "doc": {"claim_text": f"fact {i}", "status": "active"},
+                                        "embed_text": f"fact {i}"})
+        add(SINK_GRAPH, "upsert_claims", f"source-{i // 10}", {"rows": [{"claim_id": cid}]})
+        if i % 5 == 0:
+            add(SINK_SEARCH, "update", cid, {"index": "claims", "id": cid, "fields": {"status": "archived"}})
+        if i % 25 == 0:
+            add(SINK_SEARCH, "delete", cid, {"index": "claims", "id": cid})
+            add(SINK_GRAPH, "delete_claims", cid, {"ids": [cid]})
+    return events
+
+
+def _due(events: list[OutboxEventORM], now: datetime, batch: int) -> list[OutboxEventORM]:
+    """In-memory stand-in for the relay's poll query."""
+    def key(e: OutboxEventORM) -> str:
+        return SINK_GRAPH if e.sink == SINK_GRAPH else e.aggregate_id
+
+    backing_off = {key(e): e.event_id for e in reversed(events)
+                   if e.status == STATUS_PENDING and e.next_attempt_at > now}
+    out = []
+    for e in events:
+        if e.status != STATUS_PENDING or e.next_attempt_at > now:
+            continue
+        if key(e) in backing_off and backing_off[key(e)] < e.event_id:
+            continue
+        out.append(e)
+        if len(out) >= batch:
+            break
+    return out
+
+
+async def drain(relay: OutboxRelay, events: list[OutboxEventORM], batch: int) -> int:
+    clock = datetime.now(timezone.utc)
+    rounds = 0
+    while any(e.status == STATUS_PENDING for e in events):
+        rounds += 1
+        due = _due(events, clock, batch)
+        if not due:
+            clock += timedelta(seconds=outbox.BACKOFF_BASE_S)   # fast-forward past backoff
+            continue
+        failures, deferred = await relay.deliver(due)
+        relay._settle(due, failures, deferred)
+        for e in due:
+            if e.event_id not in failures and e.event_id not in deferred:
+                e.status = "delivered"
+        # _settle stamps next_attempt_at from the wall clock; re-base on the fake one.
+        for e in due:
+            if e.event_id in failures and e.status == STATUS_PENDING:
+                e.next_attempt_at = clock + (e.next_attempt_at - datetime.now(timezone.utc))
+    return rounds
+
+
+def expected_state(events: list[OutboxEventORM]) -> tuple[dict[str, dict], set[str]]:
+    docs: dict[str, dict] = {}
+    claims: set[str] = set()
+    for e in events:
+        p = e.payload
+        if e.op == "index":
+            docs[p["id"]] = {k: v for k, v in p["doc"].items() if k != "embedding"}
+        elif e.op == "update":
+            docs[p["id"]].update(p["fields"])
+        elif e.op == "delete" and e.sink == SINK_SEARCH:
+            docs.pop(p["id"], None)
+        elif e.op == "upsert_claims":
+            claims.update(r["claim_id"] for r in p["rows"])
+        elif e.op == "delete_claims":
+            claims.difference_update(p["ids"])
+    return docs, claims
+
+
+def request_path(n: int, store_s: float) -> tuple[float, float]:
+    """Per-claim request latency: PG + OS + Neo4j round trips vs one PG commit."""
+    t0 = time.perf_counter()
+    for _ in range(n):
+        time.sleep(3 * store_s)
+    inline = (time.perf_counter() - t0) / n
+    t0 = time.perf_counter()
+    for _ in range(n):
+        time.sleep(store_s)
+    return inline, (time.perf_counter() - t0) / n
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--claims", type=int, default=500)
+    parser.add_argument("--search-fail", type=float, default=0.2)
+    parser.add_argument("--graph-fail", type=float, default=0.2)
+    parser.add_argument("--store-ms", type=float, default=8)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    search = FaultyOpenSearch(args.search_fail, args.search_fail / 4, rng)
+    graph = FaultyNeo4j(args.graph_fail, rng)
+    relay = OutboxRelay(search=search, graph=graph, embed=lambda texts: [[0.1] * 4 for _ in texts],
+                        batch_size=args.batch, max_attempts=1000)
+    events = _events(args.claims)
+
+    rounds = asyncio.run(drain(relay, events, args.batch))
+    want_docs, want_claims = expected_state(events)
+    got_docs = {k: {f: v for f, v in d.items() if f != "embedding"} for k, d in search.docs.items()}
+    missing_emb = [k for k, d in search.docs.items() if not d.get("embedding")]
+
+    print(f"events={len(events)} rounds={rounds} search_calls={search.calls} graph_calls={graph.calls}")
+    print(f"metrics={relay.metrics}")
+    print(f"dead={sum(e.status == STATUS_DEAD for e in events)}")
+    print(f"search consistent: {got_docs == want_docs}  docs={len(got_docs)}  unembedded={len(missing_emb)}")
+    print(f"graph consistent:  {set(graph.claims) == want_claims}  claims={len(graph.claims)}")
+
+    inline, queued = request_path(50, args.store_ms / 1000)
+    print(f"request path per claim: inline {inline * 1000:.1f}ms  outbox {queued * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
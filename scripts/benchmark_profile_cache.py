@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Measure ProfileCache hit rate and check invalidation against an in-memory store.
+
+Usage:
+    python scripts/benchmark_profile_cache.py [--reads 2000] [--write-every 25]
+        [--profile-share 0.3] [--claims 200]
+
+No database is needed: a fake session answers the version lookup, the two
+cached claim queries (matched structurally against the builders in
+memory.graph.traversal) and the bump upsert. Writes follow the same rule the
+real writers use (affects_profile -> bump_profile_version); after every read
+the cached snapshot is compared with a fresh, uncached evaluation, so a missed
+or late invalidation shows up as a mismatch.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy.sql.dml import Insert  # noqa: E402
+
+from memory.graph.traversal import procedural_memories_query, profile_claims_query  # noqa: E402
+from memory.retrieval.profile_cache import (  # noqa: E402
+    ProfileCache,
+    _build_snapshot,
+    affects_profile,
+    bump_profile_version,
+)
+from models.db.memory import MemoryCacheVersionORM  # noqa: E402
+from models.memory import ClaimSchema, ClaimStatus, MemoryClass, MemorySegment, MemoryTier  # noqa: E402
+
+
+class FakeResult:
+    def __init__(self, rows: list) -> None:
+        self._rows = rows
+
+    def scalars(self) -> "FakeResult":
+        return self
+
+    def all(self) -> list:
+        return list(self._rows)
+
+    def scalar_one_or_none(self):
+        return self._rows[0] if self._rows else None
+
+
+class FakeStore:
+    def __init__(self) -> None:
+        self.claims: list[ClaimSchema] = []
+        self.version = 0
+        self.claim_queries = 0
+
+    def procedural(self) -> list[ClaimSchema]:
+        rows = [c for c in self.claims
+                if c.memory_class.value in ("procedural", "semantic")
+                and c.segment.value == "preferences_and_corrections"
+                and c.status.value == "active"]
+        return sorted(rows, key=lambda c: -c.base_importance)[:30]
+
+    def profile(self) -> list[ClaimSchema]:
+        rows = [c for c in self.claims
+                if c.segment.value in ("core_identity", "skills_and_background")
+                and c.status.value == "active"
+                and c.tier.value in ("long_term", "permanent")]
+        return sorted(rows, key=lambda c: -c.base_importance)[:20]
+
+
+class FakeSession:
+    def __init__(self, store: FakeStore) -> None:
+        self.store = store
+
+    async def execute(self, stmt) -> FakeResult:
+        if isinstance(stmt, Insert):
+            self.store.version += 1
+            return FakeResult([])
+        if MemoryCacheVersionORM.__table__ in stmt.get_final_froms():
+            return FakeResult([self.store.version] if self.store.version else [])
+        if stmt.compare(procedural_memories_query()):
+            self.store.claim_queries += 1
+            return FakeResult(self.store.procedural())
+        if stmt.compare(profile_claims_query()):
+            self.store.claim_queries += 1
+            return FakeResult(self.store.profile())
+        raise AssertionError(f"unexpected statement: {stmt}")
+
+
+def session_factory(store: FakeStore):
+    @asynccontextmanager
+    async def factory():
+        yield FakeSession(store)
+    return factory
+
+
+def random_claim(rng: random.Random, profile_share: float) -> ClaimSchema:
+    if rng.random() < profile_share:
+        memory_class, segment = rng.choice([
+            (MemoryClass.PROCEDURAL, MemorySegment.PREFERENCES),
+            (MemoryClass.SEMANTIC, MemorySegment.CORE_IDENTITY),
+            (MemoryClass.SEMANTIC, MemorySegment.SKILLS),
+        ])
+    else:
+        memory_class = rng.choice([MemoryClass.EPISODIC, MemoryClass.SEMANTIC])
+        segment = rng.choice([s for s in MemorySegment if s.value not in
+                              ("core_identity", "preferences_and_corrections", "skills_and_background")])
+    return ClaimSchema(
+        claim_text=f"claim {rng.getrandbits(32):08x} about {segment.value}",
+        memory_class=memory_class,
+        segment=segment,
+        tier=rng.choice([MemoryTier.LONG_TERM, MemoryTier.PERMANENT, MemoryTier.SHORT_TERM]),
+        base_importance=round(rng.random(), 3),
+    )
+
+
+async def run(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    store = FakeStore()
+    for _ in range(args.claims):
+        store.claims.append(random_claim(rng, args.profile_share))
+
+    cache = ProfileCache(session_factory=session_factory(store))
+    mismatches = 0
+    writes = profile_writes = 0
+
+    for i in range(args.reads):
+        if i and i % args.write_every == 0:
+            writes += 1
+            session = FakeSession(store)
+            if rng.random() < 0.5 or not store.claims:
+                claim = random_claim(rng, args.profile_share)
+                store.claims.append(claim)
+            else:
+                claim = rng.choice(store.claims)
+                claim.status = ClaimStatus.SUPERSEDED   # mirrors GraphOperations.mark_supersedes
+            if affects_profile(claim.memory_class, claim.segment):
+                profile_writes += 1
+                await bump_profile_version(session)
+
+        snap = await cache.get()
+        want = _build_snapshot(store.version, store.procedural(), [c.claim_text for c in store.profile()])
+
+        if ([c.claim_id for c in snap.procedural] != [c.claim_id for c in want.procedural]
+                or snap.profile_text != want.profile_text):
+            mismatches += 1
+
+    total = cache.hits + cache.misses
+    print(f"reads={args.reads} writes={writes} profile_writes={profile_writes} version={store.version}")
+    print(f"hits={cache.hits} misses={cache.misses} hit_rate={cache.hits / total:.1%}")
+    print(f"claim queries: cached {store.claim_queries}  uncached {2 * args.reads}")
+    print(f"invalidation correct: {mismatches == 0}  mismatches={mismatches}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reads", type=int, default=2000)
+    parser.add_argument("--write-every", type=int, default=25)
+    parser.add_argument("--profile-share", type=float, default=0.3)
+    parser.add_argument("--claims", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
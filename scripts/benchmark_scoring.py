@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Compare the columnar scorer with score_claim, then time both.
+
+Usage:
+    python scripts/benchmark_scoring.py [--cases 300] [--rounds 5]
+
+The property check draws random candidate sets, including the awkward cases:
+missing or naive timestamps, timestamps in the future, zero and large access
+counts, contradiction counts past the penalty cap, out-of-range RRF scores
+and every tier. It requires score_claims to return bit-identical floats and
+rank_claims to give the same order as sorting the scalar scores. The timing
+part scores 100 / 1k / 10k transient ClaimORM rows each way.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from memory.retrieval.scoring import rank_claims, score_claim, score_claims  # noqa: E402
+from models.db.memory import ClaimORM  # noqa: E402
+from models.memory import MemoryTier  # noqa: E402
+
+NOW = datetime(2026, 6, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _stamp(rng: random.Random):
+    roll = rng.random()
+    if roll < 0.1:
+        return None
+    ts = NOW - timedelta(days=rng.uniform(-2, 900), microseconds=rng.randrange(10**6))
+    if roll < 0.2:
+        return ts.replace(tzinfo=None)
+    if roll < 0.3:
+        return ts.astimezone(timezone(timedelta(hours=5, minutes=30)))
+    return ts
+
+
+def random_claim(rng: random.Random) -> ClaimORM:
+    access = rng.choice([0, 0, 1, rng.randrange(50), rng.randrange(10**6)])
+    return ClaimORM(
+        claim_id=uuid.uuid4(),
+        claim_text="x",
+        memory_class="semantic",
+        segment="projects_and_goals",
+        tier=rng.choice(list(MemoryTier)).value,
+        status="active",
+        base_importance=rng.random(),
+        confidence=rng.random(),
+        trust_score=rng.random(),
+        decay_rate=rng.choice([0.0, 0.001, 0.01, rng.random() * 0.2]),
+        access_count=access,
+        retrieval_hit_count=rng.randrange(access * 2 + 1),
+        contradiction_count=rng.choice([0, 0, 1, 3, rng.randrange(20)]),
+        last_accessed_at=_stamp(rng),
+        created_at=_stamp(rng),
+    )
+
+
+def _inputs(rng: random.Random, n: int):
+    claims = [random_claim(rng) for _ in range(n)]
+    sem = [rng.choice([0.0, rng.random(), 1.0]) for _ in range(n)]
+    graph = [rng.choice([0.0, 0.4]) for _ in range(n)]
+    rrf = [rng.choice([0.0, rng.random() * 0.02, rng.random()]) for _ in range(n)]
+    return claims, sem, graph, rrf
+
+
+def check_identical(cases: int, seed: int) -> bool:
+    rng = random.Random(seed)
+    for case in range(cases):
+        n = rng.choice([1, 2, 7, 50, 400])
+        claims, sem, graph, rrf = _inputs(rng, n)
+        want = [score_claim(c, semantic_sim=s, graph_relevance=g, rrf_score=r, now=NOW)
+                for c, s, g, r in zip(claims, sem, graph, rrf)]
+        got, order = rank_claims(claims, sem, graph, rrf, now=NOW)
+        if got.tolist() != want:
+            bad = next(i for i, (a, b) in enumerate(zip(got.tolist(), want)) if a != b)
+            print(f"case {case}: score mismatch at {bad}: {got[bad]!r} != {want[bad]!r}")
+            return False
+        want_order = sorted(range(n), key=lambda i: want[i], reverse=True)
+        if order.tolist() != want_order:
+            print(f"case {case}: ranking mismatch")
+            return False
+    return True
+
+
+def bench(n: int, rounds: int, rng: random.Random) -> None:
+    claims, sem, graph, rrf = _inputs(rng, n)
+
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        scored = [(c, score_claim(c, semantic_sim=s, graph_relevance=g, rrf_score=r, now=NOW))
+                  for c, s, g, r in zip(claims, sem, graph, rrf)]
+        sorted(scored, key=lambda x: x[1], reverse=True)
+    loop = (time.perf_counter() - t0) / rounds
+
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        rank_claims(claims, sem, graph, rrf, now=NOW)
+    vec = (time.perf_counter() - t0) / rounds
+    print(f"n={n:6d}  loop {loop * 1000:8.2f}ms  columnar {vec * 1000:7.2f}ms  speedup {loop / vec:5.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    ok = check_identical(args.cases, args.seed)
+    print(f"bit-identical over {args.cases} random candidate sets: {ok}")
+    assert score_claims([]).size == 0
+
+    rng = random.Random(args.seed + 1)
+    for n in (100, 1_000, 10_000):
+        bench(n, args.rounds, rng)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
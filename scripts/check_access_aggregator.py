@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Check AccessAggregator bookkeeping under concurrent searches.
+
+Usage:
+    python scripts/check_access_aggregator.py [--searches 2000] [--claims 50]
+        [--flush-fail 0.2]
+
+Many simulated searches record hits concurrently on one event loop while a
+background task flushes into an in-memory store, with some flushes failing
+partway. A fake clock moves forward between steps. When everything has
+settled, the store must match exactly what was recorded: the access count
+per claim, the latest access time per claim, and the number of log rows.
+
+A second run makes one log batch fail with an IntegrityError, the way a
+foreign key violation would. That batch must be dropped, not retried. The
+counters flushed alongside it, and every later batch, must still land.
+
+The real INSERT ... SELECT and UPDATE ... FROM (VALUES ...) statements are
+also compiled for PostgreSQL and printed, so their shape can be reviewed.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import sys
+import uuid
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy.dialects import postgresql  # noqa: E402
+from sqlalchemy.exc import IntegrityError  # noqa: E402
+
+from memory.retrieval.access_log import AccessAggregator, AccessDelta  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def tick(self, seconds: float) -> None:
+        self.now += timedelta(seconds=seconds)
+
+
+class Store:
+    def __init__(self, rng: random.Random, fail: float) -> None:
+        self.access: Counter = Counter()
+        self.last: dict[uuid.UUID, datetime] = {}
+        self.logs = 0
+        self.rng = rng
+        self.fail = fail
+        self.failures = 0
+        self.poison_next_logs = False
+
+
+class RecordingAggregator(AccessAggregator):
+    """Applies each flush to the in-memory store instead of Postgres."""
+
+    def __init__(self, store: Store, clock: FakeClock) -> None:
+        @asynccontextmanager
+        async def factory():
+            yield store
+        super().__init__(session_factory=factory, clock=clock)
+
+    @staticmethod
+    async def write_access(store: Store, access: dict[uuid.UUID, AccessDelta]) -> None:
+        await asyncio.sleep(0)          # let searches run while the batch is in flight
+        if store.rng.random() < store.fail:
+            store.failures += 1
+            raise ConnectionError("injected: connection reset")
+        for cid, d in access.items():
+            store.access[cid] += d.count
+            store.last[cid] = max(store.last.get(cid, d.last_accessed_at), d.last_accessed_at)
+
+    @staticmethod
+    async def write_logs(store: Store, logs) -> None:
+        await asyncio.sleep(0)
+        if store.poison_next_logs:
+            store.poison_next_logs = False
+            raise IntegrityError("INSERT INTO retrieval_log", {}, Exception("injected: foreign key violation"))
+        if store.rng.random() < store.fail:
+            store.failures += 1
+            raise ConnectionError("injected: connection reset")
+        store.logs += len(logs)
+
+
+class SqlCapture:
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+
+    async def execute(self, stmt) -> None:
+        self.statements.append(str(stmt.compile(dialect=postgresql.dialect())))
+
+
+async def run(args: argparse.Namespace) -> bool:
+    rng = random.Random(args.seed)
+    clock = FakeClock()
+    store = Store(rng, args.flush_fail)
+    agg = RecordingAggregator(store, clock)
+    claims = [uuid.uuid4() for _ in range(args.claims)]
+
+    want_access: Counter = Counter()
+    want_last: dict[uuid.UUID, datetime] = {}
+    want_logs = 0
+
+    async def search(i: int) -> None:
+        nonlocal want_logs
+        await asyncio.sleep(0)
+        hits = [(cid, rng.random()) for cid in rng.sample(claims, rng.randint(1, 10))]
+        log = rng.random() < 0.8
+        clock.tick(rng.random())
+        agg.record(f"query {i}", hits, log=log)
+        for cid, _ in hits:
+            want_access[cid] += 1
+            want_last[cid] = clock.now
+        want_logs += len(hits) if log else 0
+
+    async def flusher(stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            try:
+                await agg.flush()
+            except ConnectionError:
+                pass
+            await asyncio.sleep(0)
+
+    stop = asyncio.Event()
+    flush_task = asyncio.create_task(flusher(stop))
+    await asyncio.gather(*(search(i) for i in range(args.searches)))
+    stop.set()
+    await flush_task
+    store.fail = 0.0
+    await agg.flush()
+
+    ok_counts = store.access == want_access
+    ok_last = store.last == want_last
+    ok_logs = store.logs == want_logs
+    print(f"searches={args.searches} flush_failures={store.failures} log_rows={store.logs}/{want_logs}")
+    print(f"access counts exact: {ok_counts}  last_accessed exact: {ok_last}  log rows exact: {ok_logs}")
+    ok_poison = await check_poisoned_batch(claims)
+
+    capture = SqlCapture()
+    sample = AccessAggregator(clock=clock)
+    sample.record("q", [(claims[0], 0.9), (claims[1], 0.5)])
+    logs, access = sample.drain()
+    await AccessAggregator.write_access(capture, access)
+    await AccessAggregator.write_logs(capture, logs)
+    for sql in capture.statements:
+        print("\n" + sql)
+    return ok_counts and ok_last and ok_logs and ok_poison
+
+
+async def check_poisoned_batch(claims: list[uuid.UUID]) -> bool:
+    """A non-transient log failure drops that batch only; counters and later batches land."""
+    clock = FakeClock()
+    store = Store(random.Random(0), 0.0)
+    agg = RecordingAggregator(store, clock)
+    agg.record("before", [(claims[0], 0.9), (claims[1], 0.5)])
+    store.poison_next_logs = True
+    first = await agg.flush()
+    agg.record("after", [(claims[0], 0.7)])
+    second = await agg.flush()
+    ok = (first == 2 and second == 1 and store.access[claims[0]] == 2 and store.access[claims[1]] == 1
+          and store.logs == 1 and agg.dropped_logs == 2 and not agg._logs)
+    print(f"poisoned log batch dropped, counters kept, next batch written: {ok} "
+          f"(dropped_logs={agg.dropped_logs} log_rows={store.logs} access={store.access[claims[0]]})")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--searches", type=int, default=2000)
+    parser.add_argument("--claims", type=int, default=50)
+    parser.add_argument("--flush-fail", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=7)
+    sys.exit(0 if asyncio.run(run(parser.parse_args())) else 1)
+
+
+if __name__ == "__main__":
+    main()
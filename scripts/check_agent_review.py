@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Check the batched maintenance agent review against the one-claim-at-a-time ladder.
+
+Usage:
+    python scripts/check_agent_review.py [--claims 50] [--latency-ms 200] [--batch 10] [--concurrency 4]
+
+Claims are built in memory. Each claim's text names the verdicts the fake
+LLM gives it: what the Curator proposes, whether the Skeptic agrees and
+what the Judge decides. The fake reads claim IDs and texts out of the
+prompt, so it answers single-claim and multi-claim prompts from the same
+canned table. It sleeps --latency-ms on each call and counts calls. Every
+few calls it leaves one claim out of a multi-claim reply, to exercise the
+missing-item fallback.
+
+Reported:
+  * whether the batched path gives every claim the same verdict as the
+    serial ladder. Claims left out of a reply are excluded, since they take
+    that agent's parse-error fallback instead
+  * LLM calls and wall time for the serial and batched paths
+  * whether the review hash stays the same for an untouched claim and
+    changes when a counter the agents see moves
+  * ConsolidationRunner._agent_review_batch over an in-memory SQLite claims
+    table, with the fake leaving an ID out of every multi-claim reply.
+    Claims that only got a fallback verdict must keep their old review hash
+    and be picked up by the next run. Claims with a real verdict must not.
+    A second run with nothing dropped leaves nothing to review. The runs
+    archive and promote preferences claims, so they must bump the profile
+    cache version
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from memory.maintenance import agents as ag  # noqa: E402
+from memory.maintenance import consolidation as cons  # noqa: E402
+from models.db.memory import ClaimORM, MemoryCacheVersionORM  # noqa: E402
+
+PLANS = [
+    # (curator decision, skeptic agrees, judge decision)
+    ("keep", True, None),
+    ("flag_review", True, None),
+    ("archive", True, None),
+    ("archive", False, "keep"),
+    ("delete", False, "archive"),
+    ("promote", True, None),
+    ("promote", False, "promote"),
+]
+
+
+class FakeResponse:
+    def __init__(self, content: str) -> None:
+        self.content = content
+
+
+class FakeLLM:
+    def __init__(self, latency_s: float, drop_every: int = 0) -> None:
+        self.latency_s = latency_s
+        self.drop_every = drop_every
+        self.calls = 0
+        self.dropped: set[str] = set()
+
+    def _answer(self, messages) -> str:
+        self.calls += 1
+        system, prompt = messages[0].content, messages[1].content
+        claims = re.findall(r"ID: (\S+)\nText: plan=(\w+),(\w+),(\w+)", prompt)
+        items = []
+        for cid, curator, agree, judge in claims:
+            if "Curator agent" in system:
+                items.append({"id": cid, "decision": curator, "reasoning": "canned", "confidence": 0.8})
+            elif "Skeptic agent" in system:
+                items.append({"id": cid, "agree": agree == "True", "reasoning": "canned", "confidence": 0.8})
+            else:
+                items.append({"id": cid, "decision": judge, "reasoning": "canned", "confidence": 0.9})
+        if len(claims) == 1 and "several" not in system:
+            return json.dumps({k: v for k, v in items[0].items() if k != "id"})
+        if self.drop_every and self.calls % self.drop_every == 0 and len(items) > 1:
+            self.dropped.add(items.pop()["id"])
+        key = "verdicts" if "Curator agent" in system else "answers" if "Skeptic agent" in system else "decisions"
+        return json.dumps({key: items})
+
+    def invoke(self, messages) -> FakeResponse:
+        time.sleep(self.latency_s)
+        return FakeResponse(self._answer(messages))
+
+    async def ainvoke(self, messages) -> FakeResponse:
+        await asyncio.sleep(self.latency_s)
+        return FakeResponse(f"```json\n{self._answer(messages)}\n```")
+
+
+def make_claims(n: int, rng: random.Random) -> list[ClaimORM]:
+    claims = []
+    for i in range(n):
+        curator, agree, judge = PLANS[i % len(PLANS)]
+        claims.append(ClaimORM(
+            claim_id=uuid.uuid4(), claim_text=f"plan={curator},{agree},{judge}",
+            segment=rng.choice(["projects_and_goals", "preferences_and_corrections"]),
+            memory_class="fact", tier="short_term", status="provisional",
+            confidence=0.7, base_importance=0.5, trust_score=0.6,
+            access_count=rng.randint(0, 5), retrieval_hit_count=0, contradiction_count=0,
+            user_confirmed=False,
+        ))
+    return claims
+
+
+# ── Consolidation re-review ────────────────────────────────────────────────────
+
+class AsyncSessionAdapter:
+    """Just the AsyncSession surface the agent review uses, over a sync Session."""
+
+    def __init__(self, sync: Session) -> None:
+        self.sync = sync
+
+    async def execute(self, stmt, params=None):
+        return self.sync.execute(stmt, params)
+
+
+def sqlite_session(claims: list[ClaimORM]):
+    engine = create_engine("sqlite://")
+    ClaimORM.__table__.create(engine)
+    MemoryCacheVersionORM.__table__.create(engine)
+    start = datetime(2026, 6, 1, tzinfo=timezone.utc)
+    with Session(engine) as sync:
+        for i, claim in enumerate(claims):
+            claim.created_at = start + timedelta(seconds=i)
+            sync.add(claim)
+        sync.commit()
+
+    @asynccontextmanager
+    async def session():
+        with Session(engine, expire_on_commit=False) as sync:
+            try:
+                yield AsyncSessionAdapter(sync)
+                sync.commit()
+            except Exception:
+                sync.rollback()
+                raise
+    return session
+
+
+async def check_fallback_rereview(n: int, batch: int, concurrency: int) -> bool:
+    claims = make_claims(n, random.Random(5))
+    cons.get_session = sqlite_session(claims)
+    runner = cons.ConsolidationRunner()
+
+    dropping = FakeLLM(0, drop_every=1)
+    cons._agents = ag.MaintenanceAgentPipeline(dropping, batch_size=batch, concurrency=concurrency)
+    await runner._agent_review_batch(batch_size=n)
+    again, _ = await runner._claims_to_review(n)
+    again_ids = {str(c.claim_id) for c in again}
+    async with cons.get_session() as session:
+        rows = (await session.execute(select(ClaimORM.claim_id, ClaimORM.status))).all()
+    # A dropped claim the Skeptic fallback let through to archive leaves review for good.
+    expected = dropping.dropped & {str(cid) for cid, status in rows if status in ("provisional", "stale")}
+    good = bool(expected) and again_ids == expected
+
+    cons._agents = ag.MaintenanceAgentPipeline(FakeLLM(0), batch_size=batch, concurrency=concurrency)
+    rereviewed = await runner._agent_review_batch(batch_size=n)
+    left, _ = await runner._claims_to_review(n)
+    async with cons.get_session() as session:
+        version = (await session.execute(select(MemoryCacheVersionORM.version))).scalar()
+    print(f"fallback verdicts re-reviewed: {good and not left}   ({len(dropping.dropped)} dropped, "
+          f"{len(again_ids)} picked up again, {rereviewed} reviewed on the next run, {len(left)} left)")
+    print(f"profile cache version bumped by the review: {bool(version)}   (version {version})")
+    return good and rereviewed == len(again_ids) and not left and bool(version)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--claims", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--batch", type=int, default=ag.REVIEW_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=ag.REVIEW_CONCURRENCY)
+    args = parser.parse_args()
+
+    claims = make_claims(args.claims, random.Random(3))
+
+    serial_llm = FakeLLM(args.latency_ms / 1000)
+    serial = ag.MaintenanceAgentPipeline(serial_llm)
+    t0 = time.perf_counter()
+    expected = {str(c.claim_id): serial.run_claim(c) for c in claims}
+    serial_s = time.perf_counter() - t0
+
+    batched_llm = FakeLLM(args.latency_ms / 1000, drop_every=5)
+    batched = ag.MaintenanceAgentPipeline(batched_llm, batch_size=args.batch, concurrency=args.concurrency)
+    t0 = time.perf_counter()
+    got = asyncio.run(batched.review(claims))
+    batched_s = time.perf_counter() - t0
+
+    # A claim dropped from a reply takes the fallback of the agent that dropped it,
+    # so it can only differ from the serial verdict when it was dropped.
+    mismatched = [cid for cid in expected
+                  if (expected[cid].decision, expected[cid].reasoning) != (got[cid].decision, got[cid].reasoning)
+                  and cid not in batched_llm.dropped]
+    print(f"{len(claims)} claims; same verdict as the serial ladder: {not mismatched} "
+          f"({len(mismatched)} differ, {len(batched_llm.dropped)} dropped from replies)")
+    print(f"serial : {serial_llm.calls:3d} LLM calls  {serial_s:6.2f}s")
+    print(f"batched: {batched_llm.calls:3d} LLM calls  {batched_s:6.2f}s   "
+          f"(batch {args.batch}, concurrency {args.concurrency})")
+
+    claim = claims[0]
+    before = ag.claim_review_hash(claim)
+    stable = ag.claim_review_hash(claim) == before
+    claim.access_count += 1
+    moved = ag.claim_review_hash(claim) != before
+    print(f"review hash stable when untouched: {stable}   changes with access count: {moved}")
+
+    rereview = asyncio.run(check_fallback_rereview(args.claims, args.batch, args.concurrency))
+
+    sys.exit(0 if not mismatched and stable and moved and rereview
+             and batched_llm.calls < serial_llm.calls else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Run bulk forget jobs and check Postgres, OpenSearch and Neo4j agree afterwards.
+
+Usage:
+    python scripts/check_bulk_forget.py [--claims 3000] [--batch 64] [--verbose]
+
+ForgetRunner runs unchanged against an in-memory SQLite copy of the memory
+tables, with foreign keys on so the evidence and relation cascades are
+real. Postgres-only column types are swapped for SQLite ones: JSONB and
+ARRAY become JSON, the BIGINT outbox id becomes INTEGER, and UUID becomes
+CHAR(32) so SQLite never stores a numeric-looking hex id as a number. After each
+job, the outbox rows the job committed are delivered by
+OutboxRelay.deliver to a fake search index and a fake graph. Both fakes
+start as exact mirrors of the seeded tables.
+
+Scenarios, run one after another on the same store:
+  * forgetting sources. Claims the sources are the only evidence for go;
+    claims also supported elsewhere stay
+  * a segment plus a time range
+  * a literal text pattern containing '%', plus explicit claim and entity
+    IDs
+  * a job that fails mid-batch, is resumed with `resume`, and finishes
+  * a job whose worker stops after two batches, run to the end by another
+    runner
+
+Checked after each scenario:
+  * exactly the expected claims, entities, artifacts and sources are gone
+  * no evidence or relation row points at a deleted claim
+  * the job's counters match what was deleted, with nothing counted twice
+    after a resume
+  * the search index and the graph hold exactly the ids left in the tables
+
+Also reported: search _bulk requests and graph calls, against the two
+store round trips per claim of deleting one at a time.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import sys
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import JSON, Integer, Uuid, create_engine, event, insert, select  # noqa: E402
+from sqlalchemy.dialects.postgresql import UUID  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from sqlalchemy.sql.dml import Delete  # noqa: E402
+
+from core.clients.opensearch import IDX_ARTIFACTS, IDX_CLAIMS, IDX_ENTITIES  # noqa: E402
+from memory import forget as fg  # noqa: E402
+from memory.outbox import OutboxRelay  # noqa: E402
+from models.db.memory import (  # noqa: E402
+    ArtifactORM, ClaimORM, ClaimRelationORM, EntityORM, EvidenceORM, ForgetJobORM,
+    MemoryCacheVersionORM, OutboxEventORM, SourceORM,
+)
+from models.memory import ForgetRequest, MemorySegment  # noqa: E402
+
+NOW = datetime(2026, 6, 1, 12, 0, tzinfo=timezone.utc)
+TABLES = [SourceORM, ArtifactORM, EntityORM, ClaimORM, EvidenceORM, ClaimRelationORM,
+          OutboxEventORM, ForgetJobORM, MemoryCacheVersionORM]
+
+
+# ── SQLite stand-in ────────────────────────────────────────────────────────────
+
+def sqlite_engine():
+    for col in (OutboxEventORM.payload, ForgetJobORM.request, SourceORM.metadata_, EntityORM.aliases):
+        col.property.columns[0].type = JSON()
+    OutboxEventORM.event_id.property.columns[0].type = Integer()
+    for model in TABLES:
+        for col in model.__table__.columns:
+            if isinstance(col.type, UUID):
+                col.type = Uuid()
+    engine = create_engine("sqlite://")
+
+    @event.listens_for(engine, "connect")
+    def _fk_on(dbapi_conn, _):
+        dbapi_conn.execute("PRAGMA foreign_keys=ON")
+
+    for model in TABLES:
+        model.__table__.create(engine)
+    return engine
+
+
+class Crash(RuntimeError):
+    pass
+
+
+class AsyncSessionAdapter:
+    """Just the AsyncSession surface ForgetRunner uses, over a sync Session."""
+
+    def __init__(self, sync: Session, faults: dict) -> None:
+        self.sync = sync
+        self.faults = faults
+
+    async def execute(self, stmt):
+        result = self.sync.execute(stmt)
+        if isinstance(stmt, Delete) and self.faults.get("crash_on_delete") is not None:
+            self.faults["crash_on_delete"] -= 1
+            if self.faults["crash_on_delete"] == 0:
+                self.faults["crash_on_delete"] = None
+                result.close()
+                raise Crash("injected crash after DELETE, before commit")
+        return result
+
+    def add(self, obj) -> None:
+        self.sync.add(obj)
+
+    async def flush(self) -> None:
+        self.sync.flush()
+
+    async def refresh(self, obj) -> None:
+        self.sync.refresh(obj)
+
+
+def session_factory(engine, faults: dict):
+    @asynccontextmanager
+    async def session():
+        with Session(engine, expire_on_commit=False) as sync:
+            try:
+                yield AsyncSessionAdapter(sync, faults)
+                sync.commit()
+            except Exception:
+                sync.rollback()
+                raise
+    return session
+
+
+# ── Fake mirrors ───────────────────────────────────────────────────────────────
+
+class FakeSearch:
+    def __init__(self) -> None:
+        self.docs: dict[str, set[str]] = {IDX_CLAIMS: set(), IDX_ENTITIES: set(), IDX_ARTIFACTS: set()}
+        self.requests = 0
+
+    def bulk_actions(self, actions: list[dict], refresh: bool = True) -> set[str]:
+        self.requests += 1
+        for a in actions:
+            if a["_op_type"] == "delete":
+                self.docs[a["_index"]].discard(a["_id"])
+            elif a["_op_type"] == "index":
+                self.docs[a["_index"]].add(a["_id"])
+        return set()
+
+
+class FakeGraph:
+    """Nodes by label plus SUPPORTED_BY / SUBJECT edges; DETACH DELETE drops a node's edges."""
+
+    def __init__(self) -> None:
+        self.claims: set[str] = set()
+        self.entities: set[str] = set()
+        self.sources: set[str] = set()
+        self.edges: set[tuple[str, str]] = set()
+        self.calls = 0
+
+    def _detach(self, nodes: set[str], ids: list[str]) -> None:
+        self.calls += 1
+        gone = set(ids)
+        nodes -= gone
+        self.edges = {(a, b) for a, b in self.edges if a not in gone and b not in gone}
+
+    async def delete_claims_batch(self, claim_ids: list[str]) -> None:
+        self._detach(self.claims, claim_ids)
+
+    async def delete_entities_batch(self, entity_ids: list[str]) -> None:
+        self._detach(self.entities, entity_ids)
+
+    async def delete_sources_batch(self, source_ids: list[str]) -> None:
+        self._detach(self.sources, source_ids)
+
+    async def upsert_entities_batch(self, rows) -> None: ...
+    async def upsert_claims_batch(self, rows) -> None: ...
+    async def link_claims_to_source(self, claim_ids, source_id) -> None: ...
+
+
+# ── Seed ───────────────────────────────────────────────────────────────────────
+
+def seed(engine, n_claims: int, rng: random.Random, search: FakeSearch, graph: FakeGraph) -> None:
+    sources = [uuid.uuid4() for _ in range(40)]
+    artifacts = [(uuid.uuid4(), s) for s in sources for _ in range(3)]
+    entities = [uuid.uuid4() for _ in range(60)]
+    segments = [s.value for s in MemorySegment]
+    claims, evidence, relations = [], [], set()
+    for i in range(n_claims):
+        cid = uuid.uuid4()
+        text = f"fact {i} about topic {i % 37}" + (" at 100% certainty" if i % 41 == 0 else "") \
+            + (" at 1000 certainty" if i % 43 == 0 else "")
+        claims.append({
+            "claim_id": cid, "claim_text": text, "memory_class": rng.choice(["fact", "preference", "procedural"]),
+            "segment": rng.choice(segments), "tier": "short_term", "status": "active",
+            "subject_entity_id": rng.choice(entities),
+            "created_at": NOW - timedelta(days=rng.uniform(0, 120)), "last_accessed_at": NOW,
+        })
+        roll = rng.random()
+        backing = [] if roll < 0.05 else rng.sample(sources, 2 if roll > 0.8 else 1)
+        for s in backing:
+            evidence.append({"evidence_id": uuid.uuid4(), "claim_id": cid, "source_id": s,
+                             "artifact_id": rng.choice([a for a, src in artifacts if src == s])})
+    for _ in range(n_claims):
+        a, b = rng.sample(claims, 2)
+        relations.add((a["claim_id"], b["claim_id"], rng.choice(["supports", "contradicts"])))
+
+    with engine.begin() as conn:
+        conn.execute(insert(SourceORM), [{"source_id": s, "source_type": "document", "metadata_": {}}
+                                         for s in sources])
+        conn.execute(insert(ArtifactORM), [{"artifact_id": a, "source_id": s, "artifact_type": "chunk",
+                                            "text": "x"} for a, s in artifacts])
+        conn.execute(insert(EntityORM), [{"entity_id": e, "entity_type": "topic", "canonical_name": str(e),
+                                          "aliases": []} for e in entities])
+        conn.execute(insert(ClaimORM), claims)
+        conn.execute(insert(EvidenceORM), evidence)
+        conn.execute(insert(ClaimRelationORM), [{"from_claim_id": a, "to_claim_id": b, "relation_type": t}
+                                                for a, b, t in relations])
+
+    search.docs[IDX_CLAIMS] = {str(c["claim_id"]) for c in claims}
+    search.docs[IDX_ENTITIES] = {str(e) for e in entities}
+    search.docs[IDX_ARTIFACTS] = {str(a) for a, _ in artifacts}
+    graph.claims, graph.entities, graph.sources = (set(search.docs[IDX_CLAIMS]), set(search.docs[IDX_ENTITIES]),
+                                                   {str(s) for s in sources})
+    graph.edges = {(str(e["claim_id"]), str(e["source_id"])) for e in evidence} \
+        | {(str(c["claim_id"]), str(c["subject_entity_id"])) for c in claims}
+
+
+# ── Expectations and checks ────────────────────────────────────────────────────
+
+def snapshot(engine) -> dict:
+    with engine.connect() as conn:
+        def ids(col):
+            return {str(v) for v in conn.execute(select(col)).scalars()}
+        claims = {str(r.claim_id): r for r in conn.execute(
+            select(ClaimORM.claim_id, ClaimORM.claim_text, ClaimORM.segment, ClaimORM.created_at))}
+        evidence = [(str(c), str(s)) for c, s in conn.execute(select(EvidenceORM.claim_id, EvidenceORM.source_id))]
+        relations = [(str(a), str(b)) for a, b in conn.execute(
+            select(ClaimRelationORM.from_claim_id, ClaimRelationORM.to_claim_id))]
+        return {"claims": claims, "evidence": evidence, "relations": relations,
+                "entities": ids(EntityORM.entity_id), "artifacts": ids(ArtifactORM.artifact_id),
+                "sources": ids(SourceORM.source_id),
+                "artifact_source": {str(a): str(s) for a, s in conn.execute(
+                    select(ArtifactORM.artifact_id, ArtifactORM.source_id))}}
+
+
+def expected_claims(req: ForgetRequest, snap: dict) -> set[str]:
+    """The claim selection rules as plain Python."""
+    forgotten = {str(s) for s in req.source_ids or []}
+    by_claim: dict[str, set[str]] = {}
+    for c, s in snap["evidence"]:
+        by_claim.setdefault(c, set()).add(s)
+    out = {str(c) for c in req.claim_ids or [] if str(c) in snap["claims"]}
+    has_filter = any([req.source_ids, req.segments, req.created_after, req.created_before, req.pattern])
+    for cid, row in snap["claims"].items():
+        if not has_filter:
+            break
+        created = row.created_at.replace(tzinfo=timezone.utc)
+        if req.source_ids and not (by_claim.get(cid) and by_claim[cid] <= forgotten):
+            continue
+        if req.segments and row.segment not in {s.value for s in req.segments}:
+            continue
+        if req.created_after and created < req.created_after:
+            continue
+        if req.created_before and created >= req.created_before:
+            continue
+        if req.pattern and req.pattern.lower() not in row.claim_text.lower():
+            continue
+        out.add(cid)
+    return out
+
+
+async def deliver(engine, relay: OutboxRelay) -> int:
+    """Hand the committed outbox rows to the relay in its own batch size, like drain_once."""
+    with Session(engine, expire_on_commit=False) as s:
+        events = s.execute(select(OutboxEventORM).order_by(OutboxEventORM.event_id)).scalars().all()
+        for i in range(0, len(events), relay.batch_size):
+            failures, deferred = await relay.deliver(events[i:i + relay.batch_size])
+            assert not failures and not deferred, (failures, deferred)
+        for e in events:
+            s.delete(e)
+        s.commit()
+    return len(events)
+
+
+def check(label: str, req: ForgetRequest, before: dict, after: dict, job, search: FakeSearch,
+          graph: FakeGraph, events: int) -> bool:
+    want_claims = expected_claims(req, before)
+    want_entities = {str(e) for e in req.entity_ids or [] if str(e) in before["entities"]}
+    want_sources = {str(s) for s in req.source_ids or [] if str(s) in before["sources"]}
+    want_artifacts = {a for a, s in before["artifact_source"].items() if s in want_sources}
+    gone_claims = set(before["claims"]) - set(after["claims"])
+    problems = []
+    for name, want, gone in (
+        ("claims", want_claims, gone_claims),
+        ("entities", want_entities, before["entities"] - after["entities"]),
+        ("artifacts", want_artifacts, before["artifacts"] - after["artifacts"]),
+        ("sources", want_sources, before["sources"] - after["sources"]),
+    ):
+        if want != gone:
+            problems.append(f"{name}: {len(want - gone)} missed, {len(gone - want)} wrongly deleted")
+    dangling_ev = sum(1 for c, s in after["evidence"] if c not in after["claims"] or s not in after["sources"])
+    dangling_rel = sum(1 for a, b in after["relations"] if a not in after["claims"] or b not in after["claims"])
+    if dangling_ev or dangling_rel:
+        problems.append(f"dangling rows: evidence {dangling_ev}, relations {dangling_rel}")
+    counts = (job.claims_deleted, job.entities_deleted, job.artifacts_deleted, job.sources_deleted)
+    if job.status != fg.COMPLETED or counts != (len(want_claims), len(want_entities), len(want_artifacts),
+                                                len(want_sources)):
+        problems.append(f"job {job.status} counts {counts}")
+    if job.total_claims != len(want_claims):
+        problems.append(f"total_claims {job.total_claims} != {len(want_claims)}")
+    mirrors = {
+        "search claims": (search.docs[IDX_CLAIMS], set(after["claims"])),
+        "search entities": (search.docs[IDX_ENTITIES], after["entities"]),
+        "search artifacts": (search.docs[IDX_ARTIFACTS], after["artifacts"]),
+        "graph claims": (graph.claims, set(after["claims"])),
+        "graph entities": (graph.entities, after["entities"]),
+        "graph sources": (graph.sources, after["sources"]),
+    }
+    for name, (mirror, table) in mirrors.items():
+        if mirror != table:
+            problems.append(f"{name}: {len(mirror - table)} stale, {len(table - mirror)} missing")
+    live = set(after["claims"]) | after["entities"] | after["sources"]
+    if any(a not in live or b not in live for a, b in graph.edges):
+        problems.append("graph edges left on deleted nodes")
+    print(f"{label:<34} claims -{len(gone_claims):4d}  entities -{len(want_entities):2d}  "
+          f"artifacts -{len(want_artifacts):3d}  sources -{len(want_sources):2d}  "
+          f"batches {job.batches:3d}  outbox rows {events:5d}  {'ok' if not problems else 'BAD'}")
+    for p in problems:
+        print(f"   {p}")
+    return not problems
+
+
+# ── Scenarios ──────────────────────────────────────────────────────────────────
+
+async def main_async(args) -> bool:
+    rng = random.Random(11)
+    engine = sqlite_engine()
+    search, graph = FakeSearch(), FakeGraph()
+    seed(engine, args.claims, rng, search, graph)
+    relay = OutboxRelay(search=search, graph=graph)
+    faults: dict = {}
+    runner = fg.ForgetRunner(batch_size=args.batch, session=session_factory(engine, faults))
+    ok = True
+    claims_forgotten = 0
+
+    async def scenario(label: str, req: ForgetRequest, drive) -> None:
+        nonlocal ok, claims_forgotten
+        before = snapshot(engine)
+        job = await runner.create(req)
+        await drive(job.job_id)
+        job = await runner.get(job.job_id)
+        events = await deliver(engine, relay)
+        after = snapshot(engine)
+        claims_forgotten += len(before["claims"]) - len(after["claims"])
+        ok &= check(label, req, before, after, job, search, graph, events)
+        if args.verbose:
+            print(f"   {job.model_dump(exclude={'request'})}")
+
+    snap = snapshot(engine)
+    sources = sorted(snap["sources"])
+    await scenario("sources", ForgetRequest(source_ids=[uuid.UUID(s) for s in sources[:6]]), runner.run)
+
+    await scenario("segment + time range", ForgetRequest(
+        segments=[MemorySegment.CONTEXTUAL], created_before=NOW - timedelta(days=60),
+    ), runner.run)
+
+    snap = snapshot(engine)
+    await scenario("literal pattern + explicit ids", ForgetRequest(
+        pattern="100%", claim_ids=[uuid.UUID(c) for c in sorted(snap["claims"])[:20]],
+        entity_ids=[uuid.UUID(e) for e in sorted(snap["entities"])[:10]],
+    ), runner.run)
+
+    async def crash_then_resume(job_id) -> None:
+        faults["crash_on_delete"] = 3
+        await runner.run(job_id)
+        job = await runner.get(job_id)
+        assert job.status == fg.FAILED and "injected" in job.error, job
+        resumed = await runner.resume(job_id)
+        assert resumed is not None and resumed.status == fg.QUEUED and resumed.cursor == job.cursor
+        await runner.run(job_id)
+    await scenario("failed mid-batch, resumed", ForgetRequest(
+        segments=[MemorySegment.REFLECTIONS, MemorySegment.PEOPLE],
+    ), crash_then_resume)
+
+    async def worker_stops(job_id) -> None:
+        for _ in range(2):
+            await runner.step(job_id)
+        other = fg.ForgetRunner(batch_size=args.batch, session=session_factory(engine, faults))
+        await other.run(job_id)
+    await scenario("worker stopped, taken over", ForgetRequest(
+        segments=[MemorySegment.COMMUNICATIONS], created_after=NOW - timedelta(days=90),
+        source_ids=[uuid.UUID(s) for s in sources[6:8]],
+    ), worker_stops)
+
+    try:
+        await runner.create(ForgetRequest())
+        ok = False
+        print("empty request was accepted")
+    except ValueError:
+        pass
+
+    print(f"{claims_forgotten} claims forgotten with {search.requests} search _bulk requests and "
+          f"{graph.calls} graph calls; one at a time would take {claims_forgotten} of each")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--claims", type=int, default=3000)
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(main_async(args)) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Check entity community detection and incremental re-summarisation.
+
+Usage:
+    python scripts/check_community_detection.py [--communities 12] [--size 15]
+        [--p-in 0.4] [--p-out 0.01] [--seeds 5] [--moved 2]
+
+Builds planted-partition graphs: `--communities` groups of `--size`
+entities, where each pair inside a group is linked with probability `--p-in`
+and each pair across groups with probability `--p-out`. Weights are small
+integers, the way claim co-occurrence counts come out of Neo4j.
+
+Reported:
+  * Louvain accuracy against the planted groups: normalised mutual
+    information, and the share of entities whose community is mostly their
+    own planted group
+  * p50 partition time for the graph
+  * LLM calls on a first run (every community is new) and on a second run
+    after `--moved` entities change groups. The second run reuses stored
+    communities by Jaccard match and membership hash, so only communities
+    that gained or lost members are summarised again. A stub summariser
+    counts the calls.
+"""
+from __future__ import annotations
+
+import argparse
+import math
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from memory.graph import communities as cm  # noqa: E402
+
+
+def planted(groups: list[list[str]], p_in: float, p_out: float, seed: int) -> list[tuple[str, str, float]]:
+    """Each pair draws from its own seeded stream, so moving one entity only changes its own edges."""
+    nodes = sorted((n, g) for g, members in enumerate(groups) for n in members)
+    edges = []
+    for i, (a, ga) in enumerate(nodes):
+        for b, gb in nodes[i + 1:]:
+            rng = random.Random(f"{seed}:{a}:{b}")
+            if rng.random() < (p_in if ga == gb else p_out):
+                edges.append((a, b, float(rng.randint(1, 3))))
+    return edges
+
+
+def nmi(truth: dict[str, int], found: dict[str, int]) -> float:
+    found = {x: found.get(x, f"isolated:{x}") for x in truth}
+    n = len(truth)
+    joint = Counter((truth[x], found[x]) for x in truth)
+    pt, pf = Counter(truth.values()), Counter(found.values())
+    mi = sum(c / n * math.log(c * n / (pt[a] * pf[b])) for (a, b), c in joint.items())
+    h = lambda p: -sum(c / n * math.log(c / n) for c in p.values())  # noqa: E731
+    return 2 * mi / (h(pt) + h(pf)) if h(pt) + h(pf) else 1.0
+
+
+def accuracy(truth: dict[str, int], parts: list[list[str]]) -> float:
+    good = len(set(truth) - {m for members in parts for m in members})     # isolated entities
+    for members in parts:
+        label, count = Counter(truth[m] for m in members).most_common(1)[0]
+        good += count
+    return good / len(truth)
+
+
+def summarize_run(stored: list[cm.StoredCommunity], parts: list[list[str]], summarizer) -> list[cm.StoredCommunity]:
+    """What CommunitySummarizer.run does, without the database."""
+    plan = cm.plan_updates(stored, parts)
+    for _, members in plan.changed + plan.created:
+        summarizer(", ".join(members))
+    return [cm.StoredCommunity(key, frozenset(members), cm.membership_hash(members))
+            for key, members in plan.unchanged + plan.changed + plan.created]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--communities", type=int, default=12)
+    parser.add_argument("--size", type=int, default=15)
+    parser.add_argument("--p-in", type=float, default=0.4)
+    parser.add_argument("--p-out", type=float, default=0.01)
+    parser.add_argument("--seeds", type=int, default=5)
+    parser.add_argument("--moved", type=int, default=2)
+    args = parser.parse_args()
+
+    ok = True
+    for seed in range(args.seeds):
+        rng = random.Random(seed)
+        groups = [[f"e{g}_{i}" for i in range(args.size)] for g in range(args.communities)]
+        truth = {n: g for g, members in enumerate(groups) for n in members}
+        edges = planted(groups, args.p_in, args.p_out, seed)
+
+        timings = []
+        for _ in range(5):
+            t0 = time.perf_counter()
+            parts = cm.louvain(edges, seed=seed)
+            timings.append((time.perf_counter() - t0) * 1000)
+        found = {n: i for i, members in enumerate(parts) for n in members}
+        score, acc = nmi(truth, found), accuracy(truth, parts)
+
+        calls = [0]
+
+        def stub(text: str) -> str:
+            calls[0] += 1
+            return text[:40]
+
+        stored = summarize_run([], parts, stub)
+        first = calls[0]
+
+        # Move a few entities to another group, then re-detect and re-summarise.
+        moved = rng.sample(sorted(truth), args.moved)
+        for n in moved:
+            groups[truth[n]].remove(n)
+            target = (truth[n] + 1) % args.communities
+            groups[target].append(n)
+            truth[n] = target
+        parts2 = cm.louvain(planted(groups, args.p_in, args.p_out, seed), seed=seed)
+        calls[0] = 0
+        summarize_run(stored, parts2, stub)
+        second = calls[0]
+        calls[0] = 0
+        summarize_run(summarize_run([], parts2, lambda t: None), parts2, stub)
+        repeat = calls[0]
+
+        print(f"seed {seed}: {len(edges)} edges  {len(parts)} communities  NMI {score:.3f}  accuracy {acc:.3f}  "
+              f"p50 {statistics.median(timings):.1f}ms   LLM calls run 1: {first}  run 2: {second} "
+              f"(saved {len(parts2) - second})  unchanged rerun: {repeat}")
+        ok &= score >= 0.9 and repeat == 0 and second < len(parts2)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
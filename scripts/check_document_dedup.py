@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Check that re-ingesting a document costs no extraction or embedding calls.
+
+Usage:
+    python scripts/check_document_dedup.py [--verbose]
+
+DocumentIngestionPipeline runs unchanged over an in-memory SQLite copy of
+the memory tables. Postgres-only column types are swapped for SQLite ones.
+The extractor is a counting fake: extract returns one claim per chunk, and
+embed and summarize return canned values.
+
+Ingested in order, as .txt bytes:
+  * the fixture: extracted and embedded, source stored
+  * the same bytes again
+  * a whitespace variant: CRLF line endings, doubled spaces, trailing
+    blanks and extra blank lines
+  * a Unicode variant: compatibility characters that NFKC folds back to the
+    fixture's text (ligatures, full-width digits, no-break spaces) and
+    decomposed accents
+  * an edited copy with one section changed
+  * the fixture again, after a segment forget deleted every claim (the
+    claims and, as the Postgres cascade would, their evidence)
+
+Checked:
+  * the three copies return deduplicated=True with the first source's id,
+    make zero extractor, embedding or summary calls, and add no rows
+  * the edited copy is a new source. Only its changed chunks are
+    extracted, and the rest are reported as chunks_reused
+  * no claim text is stored twice
+  * after the forget, the fixture is ingested again: no chunk is reused,
+    every chunk is extracted, and the next copy dedups against the new source
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import unicodedata
+from collections import Counter
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import JSON, Integer, create_engine, delete, func, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from memory.ingestion import document as doc  # noqa: E402
+from models.db.memory import (  # noqa: E402
+    ArtifactORM, ClaimORM, EntityORM, EvidenceORM, MemoryCacheVersionORM, OutboxEventORM, SourceORM,
+)
+from models.memory import CandidateClaim, ExtractionResult, MemoryClass, MemorySegment  # noqa: E402
+
+TABLES = [SourceORM, ArtifactORM, EntityORM, ClaimORM, EvidenceORM, OutboxEventORM, MemoryCacheVersionORM]
+
+# Each section is over MIN_SECTION_TOKENS, so the chunker keeps one chunk per section.
+SECTIONS = [
+    ("1. Overview", "The field office in Zürich finished the migration in 2024. "
+                    "Every service now reports through the shared pipeline, and the old "
+                    "collectors were retired after a two-week overlap. The on-call rota "
+                    "moved to the platform team at the same time, and the runbooks were "
+                    "rewritten for the new alert routing. Nobody reported missing data "
+                    "during the overlap, and the error budget for the quarter was not "
+                    "touched."),
+    ("2. Timeline", "Planning started in January 2024. The pilot ran for six weeks on the "
+                    "billing service. The full rollout finished in October 2024, one month "
+                    "later than the first estimate. Most of the delay came from the payments "
+                    "team, who needed an extra audit before switching. The last collector "
+                    "was switched off on the first of November, after a final check of the "
+                    "billing totals against the old reports."),
+    ("3. Costs", "Hosting costs fell by 18 percent. The final figure was 4200 euros a "
+                 "month, down from 5100 euros before the migration. Storage is now the "
+                 "largest line item, followed by network egress. The team expects a "
+                 "further small saving once the old backups expire in the spring and "
+                 "the archive bucket can be deleted. Compute spend stayed flat over the "
+                 "whole project, even with the pilot running in parallel for six "
+                 "weeks."),
+    ("4. Open issues", "Two dashboards still read from the retired collectors. The team "
+                       "will fix them before the end of the first quarter. Alert thresholds "
+                       "for the ingest queue were copied from the old system and are too "
+                       "noisy. A review of the retention policy is also pending, because "
+                       "legal asked for a longer window on audit logs. None of these block "
+                       "the sign-off, and the owners for each one were agreed at the last "
+                       "steering meeting."),
+]
+
+
+def fixture(sections: list[tuple[str, str]]) -> str:
+    return "\n\n".join(f"{heading}\n\n{body}" for heading, body in sections) + "\n"
+
+
+def whitespace_variant(text: str) -> str:
+    out = []
+    for line in text.split("\n"):
+        out.append(line.replace(". ", ".  ") + "   ")
+        if not line:
+            out.append("")
+    return "\r\n".join(out)
+
+
+def unicode_variant(text: str) -> str:
+    wide = str.maketrans("0123456789", "".join(chr(0xFF10 + d) for d in range(10)))
+    text = text.replace("fi", "\ufb01").replace("ff", "\ufb00").translate(wide)
+    return unicodedata.normalize("NFD", text).replace(" euros", "\u00a0euros")
+
+
+def report(name: str, good: bool, detail: str = "") -> bool:
+    print(f"  {'ok ' if good else 'BAD'} {name}{': ' + detail if detail else ''}")
+    return good
+
+
+# ── SQLite stand-in ────────────────────────────────────────────────────────────
+
+def sqlite_engine():
+    for col in (OutboxEventORM.payload, SourceORM.metadata_, EntityORM.aliases):
+        col.property.columns[0].type = JSON()
+    OutboxEventORM.event_id.property.columns[0].type = Integer()
+    engine = create_engine("sqlite://")
+    for model in TABLES:
+        model.__table__.create(engine)
+    return engine
+
+
+class AsyncSessionAdapter:
+    """Just the AsyncSession surface document ingestion uses, over a sync Session."""
+
+    def __init__(self, sync: Session) -> None:
+        self.sync = sync
+
+    async def execute(self, stmt, params=None):
+        return self.sync.execute(stmt, params)
+
+    def add(self, obj) -> None:
+        self.sync.add(obj)
+
+    def add_all(self, objs) -> None:
+        self.sync.add_all(objs)
+
+    async def flush(self) -> None:
+        self.sync.flush()
+
+
+def session_factory(engine):
+    @asynccontextmanager
+    async def session():
+        with Session(engine, expire_on_commit=False) as sync:
+            try:
+                yield AsyncSessionAdapter(sync)
+                sync.commit()
+            except Exception:
+                sync.rollback()
+                raise
+    return session
+
+
+# ── Counting extractor ─────────────────────────────────────────────────────────
+
+class CountingExtractor:
+    def __init__(self) -> None:
+        self.calls: Counter = Counter()
+        self.extracted: list[str] = []
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        self.calls["embed"] += 1
+        return [[0.0] * 8 for _ in texts]
+
+    def summarize(self, text: str, max_sentences: int = 3) -> str:
+        self.calls["summarize"] += 1
+        return text[:200]
+
+    def extract(self, text: str, source_type: str = "chat",
+                trust_level: int = 5, context: str = "") -> ExtractionResult:
+        self.calls["extract"] += 1
+        self.extracted.append(text)
+        return ExtractionResult(
+            entities=[],
+            claims=[CandidateClaim(
+                claim_text=f"The report says: {text.split(chr(10))[-1][:80]}", predicate="states",
+                subject_name="report", memory_class=MemoryClass.SEMANTIC, segment=MemorySegment.PROJECTS,
+                confidence=0.95, importance=0.8,
+            )],
+            source_trust=0.9,
+        )
+
+    def take(self) -> tuple[Counter, list[str]]:
+        calls, extracted = self.calls, self.extracted
+        self.calls, self.extracted = Counter(), []
+        return calls, extracted
+
+
+# ── Run ────────────────────────────────────────────────────────────────────────
+
+async def run(args) -> bool:
+    engine = sqlite_engine()
+    doc.get_session = session_factory(engine)
+    extractor = CountingExtractor()
+    pipeline = doc.DocumentIngestionPipeline(extractor=extractor)
+
+    def rows() -> dict[str, int]:
+        with Session(engine) as s:
+            return {m.__tablename__: s.scalar(select(func.count()).select_from(m))
+                    for m in (SourceORM, ArtifactORM, ClaimORM, EvidenceORM)}
+
+    def claim_texts() -> list[str]:
+        with Session(engine) as s:
+            return list(s.scalars(select(ClaimORM.claim_text)))
+
+    text = fixture(SECTIONS)
+    ok = True
+    print("first ingest")
+    first = await pipeline.ingest_bytes(text.encode(), "migration-report.txt", "text/plain")
+    calls, _ = extractor.take()
+    ok &= report("extracted and stored", not first.deduplicated and calls["extract"] > 0 and calls["embed"] > 0,
+                 f"{dict(calls)}, {first.claims_created + first.claims_provisional} claims")
+    stored = rows()
+
+    variants = [
+        ("identical bytes", text),
+        ("whitespace variant", whitespace_variant(text)),
+        ("Unicode variant (NFKC)", unicode_variant(text)),
+    ]
+    print("re-ingest")
+    for name, variant in variants:
+        if name != "identical bytes" and variant == text:
+            ok &= report(f"{name} differs from the fixture", False)
+            continue
+        again = await pipeline.ingest_bytes(variant.encode(), "migration-report (copy).txt", "text/plain")
+        calls, _ = extractor.take()
+        ok &= report(f"{name}: deduplicated, no model calls",
+                     again.deduplicated and again.source_id == first.source_id and not calls
+                     and rows() == stored, f"{dict(calls) or 'no calls'}")
+
+    print("edited copy")
+    edited = list(SECTIONS)
+    edited[2] = ("3. Costs", "Hosting costs fell by 22 percent after the storage tier was resized. "
+                             "The final figure was 3980 euros a month, down from 5100 euros before "
+                             "the migration. Network egress is now the largest line item, ahead of "
+                             "storage. The team expects no further savings this year, since the old "
+                             "backups must be kept until the audit closes. Compute spend stayed flat "
+                             "over the whole project.")
+    result = await pipeline.ingest_bytes(fixture(edited).encode(), "migration-report-v2.txt", "text/plain")
+    calls, extracted = extractor.take()
+    ok &= report("only the changed chunks are extracted",
+                 not result.deduplicated and result.chunks_reused > 0
+                 and extracted and all("22 percent" in t for t in extracted),
+                 f"{calls['extract']} extracted, {result.chunks_reused} reused")
+
+    texts = claim_texts()
+    ok &= report("no claim stored twice", len(texts) == len(set(texts)), f"{len(texts)} claims")
+
+    print("after a segment forget")
+    with Session(engine) as s:
+        forgotten = select(ClaimORM.claim_id).where(ClaimORM.segment == MemorySegment.PROJECTS.value)
+        s.execute(delete(EvidenceORM).where(EvidenceORM.claim_id.in_(forgotten)))
+        s.execute(delete(ClaimORM).where(ClaimORM.claim_id.in_(forgotten)))
+        s.commit()
+    again = await pipeline.ingest_bytes(text.encode(), "migration-report.txt", "text/plain")
+    calls, extracted = extractor.take()
+    ok &= report("re-ingested, nothing reused",
+                 not again.deduplicated and again.source_id != first.source_id
+                 and again.chunks_reused == 0 and len(extracted) == calls["extract"] == len(SECTIONS),
+                 f"{calls['extract']} extracted, {again.chunks_reused} reused, {len(claim_texts())} claims")
+    copy = await pipeline.ingest_bytes(text.encode(), "migration-report (copy).txt", "text/plain")
+    calls, _ = extractor.take()
+    ok &= report("next copy dedups against the new source",
+                 copy.deduplicated and copy.source_id == again.source_id and not calls)
+    if args.verbose:
+        for t in sorted(texts):
+            print(f"    {t}")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(run(args)) else 1)
+
+
+if __name__ == "__main__":
+    main()
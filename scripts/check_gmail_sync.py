@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+Check incremental Gmail sync against a recording fake Gmail service.
+
+Usage:
+    python scripts/check_gmail_sync.py [--threads 12] [--verbose]
+
+GmailIngestionPipeline runs unchanged over an in-memory SQLite copy of the
+memory tables and app_settings. Postgres-only column types are swapped
+for SQLite ones. The Gmail service is a fake mailbox that records every
+API call: getProfile, threads.list, threads.get and history.list. It keeps
+a history id that moves with each added message and pages history.list
+one record at a time. Messages carry labels, and threads.get can be made to
+answer an error for chosen threads. The extractor is a counting fake that
+returns one claim per message body.
+
+Scenarios, run one after another on the same store:
+  * first sync with no stored cursor: full listing, every message
+    extracted once, and gmail_history:<email> stored
+  * a reply to one thread and one new thread, then a second sync: only
+    history.list plus threads.get for those two threads, and only the two
+    new messages extracted
+  * a third sync with nothing new: history.list only, nothing extracted
+  * an expired cursor (history.list answers 404): full listing, and
+    threads whose historyId is unchanged are not fetched
+  * legacy thread sources with no message_ids in their metadata: messages
+    up to the source's ingested_at are not extracted again, newer replies
+    are, and the ids are backfilled
+  * a thread whose threads.get always fails and one that answers 404: the
+    cursor still advances and other threads land. The 404 thread is skipped.
+    The failing one is fetched again on each later sync until it is given
+    up. A thread that fails once is picked up by the next sync
+  * a delta sync filtered by two labels fetches only threads whose new
+    messages carry both
+
+Checked throughout: no claim text is stored twice.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import sys
+import threading
+import uuid
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import JSON, Integer, create_engine, func, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from memory.ingestion import gmail as gm  # noqa: E402
+from models.db.app import AppSetting  # noqa: E402
+from models.db.memory import (  # noqa: E402
+    ArtifactORM, ClaimORM, EntityORM, EvidenceORM, MemoryCacheVersionORM, OutboxEventORM, SourceORM,
+)
+from models.memory import (  # noqa: E402
+    CandidateClaim, ExtractionResult, MemoryClass, MemorySegment, SourceType,
+)
+from services import app_state  # noqa: E402
+
+USER = "me@example.com"
+START = datetime(2026, 3, 1, 9, 0, tzinfo=timezone.utc)
+TABLES = [SourceORM, ArtifactORM, EntityORM, ClaimORM, EvidenceORM, OutboxEventORM,
+          MemoryCacheVersionORM, AppSetting]
+
+
+def report(name: str, good: bool, detail: str = "") -> bool:
+    print(f"  {'ok ' if good else 'BAD'} {name}{': ' + detail if detail else ''}")
+    return good
+
+
+# ── SQLite stand-in ────────────────────────────────────────────────────────────
+
+def sqlite_engine():
+    for col in (OutboxEventORM.payload, SourceORM.metadata_, EntityORM.aliases):
+        col.property.columns[0].type = JSON()
+    AppSetting.__table__.c.value.type = JSON()
+    OutboxEventORM.event_id.property.columns[0].type = Integer()
+    engine = create_engine("sqlite://")
+    for model in TABLES:
+        model.__table__.create(engine)
+    return engine
+
+
+class AsyncSessionAdapter:
+    """Just the AsyncSession surface the Gmail pipeline uses, over a sync Session."""
+
+    def __init__(self, sync: Session) -> None:
+        self.sync = sync
+
+    async def execute(self, stmt, params=None):
+        return self.sync.execute(stmt, params)
+
+    async def get(self, model, ident):
+        return self.sync.get(model, ident)
+
+    def add(self, obj) -> None:
+        self.sync.add(obj)
+
+    async def flush(self) -> None:
+        self.sync.flush()
+
+
+def session_factory(engine):
+    @asynccontextmanager
+    async def session():
+        with Session(engine, expire_on_commit=False) as sync:
+            try:
+                yield AsyncSessionAdapter(sync)
+                sync.commit()
+            except Exception:
+                sync.rollback()
+                raise
+    return session
+
+
+# ── Fake Gmail ─────────────────────────────────────────────────────────────────
+
+class HttpError(Exception):
+    def __init__(self, status: int) -> None:
+        super().__init__(f"HTTP {status}")
+        self.status_code = status
+
+
+class Mailbox:
+    """Threads, a moving history id and the history records since `oldest_history`."""
+
+    def __init__(self) -> None:
+        self.threads: dict[str, list[dict]] = {}
+        self.thread_history: dict[str, int] = {}
+        self.history: list[tuple[int, dict]] = []
+        self.history_id = 1000
+        self.oldest_history = 1000
+        self.get_status: dict[str, int] = {}
+        self.calls: list[tuple[str, str]] = []
+        self._lock = threading.Lock()
+        self._n = 0
+
+    def add(self, thread_id: str, sender: str, body: str, when: datetime,
+            labels: tuple[str, ...] = ("INBOX",)) -> str:
+        self._n += 1
+        mid = f"msg-{self._n:04d}"
+        self.history_id += 1
+        msg = {
+            "id": mid, "threadId": thread_id, "snippet": body[:40], "labelIds": list(labels),
+            "internalDate": str(int(when.timestamp() * 1000)),
+            "payload": {
+                "mimeType": "text/plain",
+                "headers": [{"name": "Subject", "value": f"About {thread_id}"},
+                            {"name": "From", "value": sender}, {"name": "To", "value": USER}],
+                "body": {"data": base64.urlsafe_b64encode(body.encode()).decode()},
+            },
+        }
+        self.threads.setdefault(thread_id, []).append(msg)
+        self.thread_history[thread_id] = self.history_id
+        self.history.append((self.history_id, {"id": str(self.history_id),
+                                               "messagesAdded": [{"message": {"id": mid, "threadId": thread_id,
+                                                                              "labelIds": list(labels)}}]}))
+        return mid
+
+    def record(self, method: str, arg: str = "") -> None:
+        with self._lock:
+            self.calls.append((method, arg))
+
+    def take_calls(self) -> list[tuple[str, str]]:
+        with self._lock:
+            calls, self.calls = self.calls, []
+        return calls
+
+
+class _Request:
+    def __init__(self, fn) -> None:
+        self._fn = fn
+
+    def execute(self):
+        return self._fn()
+
+
+class FakeGmailService:
+    def __init__(self, box: Mailbox) -> None:
+        self.box = box
+
+    def users(self):
+        return self
+
+    def threads(self):
+        return _Threads(self.box)
+
+    def history(self):
+        return _History(self.box)
+
+    def getProfile(self, userId: str):
+        def run():
+            self.box.record("getProfile")
+            return {"emailAddress": USER, "historyId": str(self.box.history_id)}
+        return _Request(run)
+
+
+class _Threads:
+    def __init__(self, box: Mailbox) -> None:
+        self.box = box
+
+    def list(self, userId: str, maxResults: int = 100, labelIds=None):
+        def run():
+            self.box.record("threads.list")
+            ids = sorted(self.box.threads, key=lambda t: -self.box.thread_history[t])[:maxResults]
+            return {"threads": [{"id": t, "historyId": str(self.box.thread_history[t])} for t in ids]}
+        return _Request(run)
+
+    def get(self, userId: str, id: str, format: str = "full"):
+        def run():
+            self.box.record("threads.get", id)
+            if id in self.box.get_status:
+                raise HttpError(self.box.get_status[id])
+            return {"id": id, "historyId": str(self.box.thread_history[id]),
+                    "messages": list(self.box.threads[id])}
+        return _Request(run)
+
+
+class _History:
+    PAGE = 1
+
+    def __init__(self, box: Mailbox) -> None:
+        self.box = box
+
+    def list(self, userId: str, startHistoryId: str, historyTypes=None, labelId=None, pageToken=None):
+        def run():
+            self.box.record("history.list")
+            start = int(startHistoryId)
+            if start < self.box.oldest_history:
+                raise HttpError(404)
+            records = [r for hid, r in self.box.history if hid > start
+                       and (labelId is None or labelId in r["messagesAdded"][0]["message"]["labelIds"])]
+            offset = int(pageToken or 0)
+            page = records[offset:offset + self.PAGE]
+            resp = {"history": page, "historyId": str(self.box.history_id)}
+            if offset + self.PAGE < len(records):
+                resp["nextPageToken"] = str(offset + self.PAGE)
+            return resp
+        return _Request(run)
+
+
+# ── Fake extractor ─────────────────────────────────────────────────────────────
+
+class CountingExtractor:
+    def __init__(self) -> None:
+        self.bodies: list[str] = []
+        self.summaries = 0
+
+    def summarize(self, text: str, max_sentences: int = 3) -> str:
+        self.summaries += 1
+        return text[:120]
+
+    def extract(self, text: str, source_type: str = "chat",
+                trust_level: int = 5, context: str = "") -> ExtractionResult:
+        self.bodies.append(text)
+        return ExtractionResult(
+            entities=[],
+            claims=[CandidateClaim(
+                claim_text=f"The sender said: {text}", predicate="said", subject_name="sender",
+                memory_class=MemoryClass.EPISODIC, segment=MemorySegment.PROJECTS,
+                confidence=0.95, importance=0.8,
+            )],
+            source_trust=0.9,
+        )
+
+    def take(self) -> list[str]:
+        bodies, self.bodies = self.bodies, []
+        return bodies
+
+
+# ── Scenarios ──────────────────────────────────────────────────────────────────
+
+def kinds(calls: list[tuple[str, str]]) -> Counter:
+    return Counter(method for method, _ in calls)
+
+
+def fetched(calls: list[tuple[str, str]]) -> set[str]:
+    return {arg for method, arg in calls if method == "threads.get"}
+
+
+async def run(args) -> bool:
+    engine = sqlite_engine()
+    gm.get_session = app_state.get_session = session_factory(engine)
+    extractor = CountingExtractor()
+    gm._extractor = extractor
+    box = Mailbox()
+    pipeline = gm.GmailIngestionPipeline(USER, service_factory=lambda: FakeGmailService(box))
+
+    def claim_texts() -> list[str]:
+        with Session(engine) as s:
+            return list(s.scalars(select(ClaimORM.claim_text)))
+
+    def no_duplicates() -> bool:
+        texts = claim_texts()
+        return len(texts) == len(set(texts))
+
+    ok = True
+    when = START
+    for i in range(args.threads):
+        for j in range(1 + i % 3):
+            when += timedelta(minutes=7)
+            box.add(f"thread-{i:02d}", f"contact{i}@example.com", f"Thread {i} message {j}: ship on day {i + j}.",
+                    when)
+    total = sum(len(m) for m in box.threads.values())
+
+    print("first sync")
+    result = await pipeline.sync({}, max_threads=100)
+    calls = box.take_calls()
+    bodies = extractor.take()
+    cursor = await app_state.AppStateService().get_setting(gm._history_state_key(USER))
+    ok &= report("full listing, every thread fetched once",
+                 result.full_resync and kinds(calls)["getProfile"] == 1 and kinds(calls)["threads.list"] == 1
+                 and kinds(calls)["threads.get"] == args.threads, f"{dict(kinds(calls))}")
+    ok &= report("every message extracted once", len(bodies) == total == len(set(bodies)),
+                 f"{len(bodies)} extractions for {total} messages")
+    ok &= report("cursor stored", cursor is not None and cursor["history_id"] == str(box.history_id))
+
+    print("delta sync")
+    when += timedelta(hours=1)
+    reply = "Thread 1 reply: moved to day 40."
+    box.add("thread-01", "contact1@example.com", reply, when)
+    box.add("thread-new", "someone@example.com", "New thread: lunch on Friday.", when + timedelta(minutes=1))
+    result = await pipeline.sync({}, max_threads=100)
+    calls = box.take_calls()
+    bodies = extractor.take()
+    ok &= report("only history.list and the changed threads' get",
+                 set(kinds(calls)) == {"history.list", "threads.get"} and kinds(calls)["history.list"] == 2
+                 and fetched(calls) == {"thread-01", "thread-new"}
+                 and not result.full_resync, f"{dict(kinds(calls))} fetched {sorted(fetched(calls))}")
+    ok &= report("known message ids not re-extracted",
+                 sorted(bodies) == sorted([reply, "New thread: lunch on Friday."]), f"{len(bodies)} extractions")
+    ok &= report("no claim stored twice", no_duplicates())
+
+    print("quiet sync")
+    await pipeline.sync({}, max_threads=100)
+    calls = box.take_calls()
+    ok &= report("history.list only, nothing extracted",
+                 set(kinds(calls)) == {"history.list"} and not extractor.take(), f"{dict(kinds(calls))}")
+
+    print("expired cursor")
+    box.oldest_history = box.history_id + 1
+    result = await pipeline.sync({}, max_threads=100)
+    calls = box.take_calls()
+    ok &= report("404 falls back to a full listing that skips unchanged threads",
+                 result.full_resync and kinds(calls)["threads.list"] == 1 and not fetched(calls)
+                 and not extractor.take(), f"{dict(kinds(calls))}, {result.threads_skipped} skipped")
+    box.oldest_history = 0
+
+    print("legacy sources")
+    # Written before message ids were recorded: metadata has no message_ids.
+    when += timedelta(hours=1)
+    old = [box.add("legacy-a", "old@example.com", f"Legacy A message {j}.", when + timedelta(minutes=j))
+           for j in range(2)]
+    box.add("legacy-b", "old@example.com", "Legacy B only message.", when + timedelta(minutes=3))
+    cutoff = when + timedelta(minutes=10)
+    with Session(engine) as s:
+        for tid in ("legacy-a", "legacy-b"):
+            s.add(SourceORM(source_id=uuid.uuid4(), source_type=SourceType.EMAIL.value, external_id=tid,
+                            title=f"About {tid}", trust_level=4, ingested_at=cutoff, metadata_={}))
+        s.commit()
+    box.take_calls()
+    newer = "Legacy A reply after the old ingest."
+    box.add("legacy-a", "old@example.com", newer, cutoff + timedelta(minutes=5))
+    await pipeline.sync({}, max_threads=100, full_resync=True)
+    bodies = extractor.take()
+    with Session(engine) as s:
+        metas = {src.external_id: src.metadata_ for src in s.scalars(
+            select(SourceORM).where(SourceORM.external_id.in_(["legacy-a", "legacy-b"])))}
+        legacy_sources = s.scalar(select(func.count()).select_from(SourceORM)
+                                  .where(SourceORM.external_id.in_(["legacy-a", "legacy-b"])))
+    ok &= report("only messages newer than the legacy ingest are extracted", bodies == [newer],
+                 f"{bodies}")
+    ok &= report("message ids backfilled, no second source per thread",
+                 legacy_sources == 2 and set(old) <= set(metas["legacy-a"].get("message_ids", []))
+                 and len(metas["legacy-b"].get("message_ids", [])) == 1)
+    await pipeline.sync({}, max_threads=100, full_resync=True)
+    ok &= report("next full resync extracts nothing", not extractor.take())
+    ok &= report("no claim stored twice", no_duplicates(), f"{len(claim_texts())} claims")
+
+    print("failing threads")
+    state = app_state.AppStateService()
+    when += timedelta(hours=1)
+    box.add("thread-bad", "bad@example.com", "Bad thread message.", when)
+    box.add("thread-gone", "gone@example.com", "Deleted thread message.", when + timedelta(minutes=1))
+    reply = "Thread 2 reply: all good."
+    box.add("thread-02", "contact2@example.com", reply, when + timedelta(minutes=2))
+    box.get_status.update({"thread-bad": 500, "thread-gone": 404})
+    box.take_calls()
+    result = await pipeline.sync({}, max_threads=100)
+    cursor = await state.get_setting(gm._history_state_key(USER))
+    ok &= report("cursor advances past a failing thread, the rest lands",
+                 cursor["history_id"] == str(box.history_id) and extractor.take() == [reply]
+                 and result.threads_failed == 1, f"retry {cursor.get('retry_threads')}")
+    ok &= report("404 thread skipped, failing thread kept for retry",
+                 cursor.get("retry_threads") == {"thread-bad": 1})
+    retried = 1
+    for _ in range(gm._MAX_THREAD_RETRIES + 1):
+        await pipeline.sync({}, max_threads=100)
+        if "thread-bad" in fetched(box.take_calls()):
+            retried += 1
+    cursor = await state.get_setting(gm._history_state_key(USER))
+    ok &= report("failing thread retried on later syncs, then given up",
+                 retried == gm._MAX_THREAD_RETRIES and not cursor.get("retry_threads"),
+                 f"fetched on {retried} syncs (limit {gm._MAX_THREAD_RETRIES})")
+
+    flaky = "Flaky thread message."
+    box.add("thread-flaky", "flaky@example.com", flaky, when + timedelta(minutes=3))
+    box.get_status["thread-flaky"] = 503
+    await pipeline.sync({}, max_threads=100)
+    first = extractor.take()
+    del box.get_status["thread-flaky"]
+    await pipeline.sync({}, max_threads=100)
+    cursor = await state.get_setting(gm._history_state_key(USER))
+    ok &= report("a thread that fails once lands on the next sync",
+                 not first and extractor.take() == [flaky] and not cursor.get("retry_threads"))
+
+    print("labels")
+    when += timedelta(hours=1)
+    box.add("thread-inbox", "a@example.com", "Inbox only.", when)
+    work = "Inbox and work."
+    box.add("thread-work", "b@example.com", work, when + timedelta(minutes=1), labels=("INBOX", "Label_work"))
+    box.take_calls()
+    await pipeline.sync({}, max_threads=100, label_ids=["INBOX", "Label_work"])
+    calls = box.take_calls()
+    ok &= report("delta sync keeps only threads matching every label",
+                 fetched(calls) == {"thread-work"} and extractor.take() == [work], f"fetched {sorted(fetched(calls))}")
+    ok &= report("no claim stored twice", no_duplicates(), f"{len(claim_texts())} claims")
+    if args.verbose:
+        for text in sorted(claim_texts()):
+            print(f"    {text}")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=12)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(run(args)) else 1)
+
+
+if __name__ == "__main__":
+    main()
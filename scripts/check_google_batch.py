@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Check Gmail batch fetching and its concurrent fallback offline.
+
+Usage:
+    python scripts/check_google_batch.py [--messages 250] [--latency-ms 5]
+
+GoogleAPIClient runs over an httpx.MockTransport that plays Gmail. The
+fake answers batch POSTs with real multipart/mixed replies, one part per
+sub-request. It can give any message a per-part 429 or 500, drop its part,
+fail the whole batch, or fail the single-message GET. It counts batch
+calls, sub-requests and GETs, and tracks how many GETs are in flight.
+
+Checked:
+  * parse_batch_response on hand-written replies: CRLF and bare-LF line
+    endings, a quoted boundary, per-part 429/500 with JSON error bodies,
+    a non-JSON body, and a part without a Content-ID
+  * --messages ids go out in batches of at most 100, each sub-request
+    keeps the fields mask, and nothing falls back when every part is 200.
+    Results come back in id order
+  * parts answered 429 or 500, or left out of the reply, are fetched again
+    with single GETs, and only those
+  * when a whole batch fails, every message is fetched with concurrent GETs,
+    never more than fallback_concurrency at once
+  * a message whose GET fails as well is left out. The rest are returned
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+
+from core.clients import google_api as ga  # noqa: E402
+
+TOKEN = "test-token"
+
+
+def report(name: str, good: bool, detail: str = "") -> bool:
+    print(f"  {'ok ' if good else 'BAD'} {name}{': ' + detail if detail else ''}")
+    return good
+
+
+def message(mid: str) -> dict:
+    return {"id": mid, "threadId": f"t-{mid}", "snippet": f"snippet {mid}",
+            "payload": {"headers": [{"name": "Subject", "value": f"Subject {mid}"}]}}
+
+
+# ── Fake Gmail ─────────────────────────────────────────────────────────────────
+
+class FakeGmail:
+    """Batch and single-message endpoints; `part_status`/`get_status` map ids to failures."""
+
+    def __init__(self, latency: float, part_status: dict[str, int] | None = None,
+                 get_status: dict[str, int] | None = None, drop_parts: set[str] | None = None,
+                 batch_status: int = 200) -> None:
+        self.latency = latency
+        self.part_status = part_status or {}
+        self.get_status = get_status or {}
+        self.drop_parts = drop_parts or set()
+        self.batch_status = batch_status
+        self.batch_sizes: list[int] = []
+        self.sub_queries: list[dict] = []
+        self.gets: list[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        if request.headers.get("authorization") != f"Bearer {TOKEN}":
+            return httpx.Response(401, json={"error": "no token"})
+        if request.method == "POST" and str(request.url) == ga.GMAIL_BATCH_URL:
+            return self._batch(request)
+        m = re.match(r"/gmail/v1/users/me/messages/([^/?]+)$", request.url.path)
+        if request.method == "GET" and m:
+            return await self._get(m.group(1))
+        return httpx.Response(404, json={"error": "unknown endpoint"})
+
+    def _batch(self, request: httpx.Request) -> httpx.Response:
+        boundary = re.search(r"boundary=(\S+)", request.headers["content-type"]).group(1)
+        body, closed, _ = request.content.decode().partition(f"--{boundary}--")
+        if not closed:
+            return httpx.Response(400, text="unterminated multipart body")
+        paths = re.findall(r"^GET (\S+)", body, re.MULTILINE)
+        self.batch_sizes.append(len(paths))
+        if self.batch_status != 200:
+            return httpx.Response(self.batch_status, text="backend error")
+        out = "batch_reply_boundary"
+        parts = []
+        for i, path in enumerate(paths):
+            url = urlsplit(path)
+            mid = url.path.rsplit("/", 1)[-1]
+            self.sub_queries.append(parse_qs(url.query))
+            if mid in self.drop_parts:
+                continue
+            status = self.part_status.get(mid, 200)
+            payload = message(mid) if status == 200 else {"error": {"code": status, "message": "try later"}}
+            parts.append(
+                f"--{out}\r\nContent-Type: application/http\r\nContent-ID: <response-item{i}>\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                f"Content-Type: application/json; charset=UTF-8\r\n\r\n{json.dumps(payload)}\r\n"
+            )
+        parts.append(f"--{out}--\r\n")
+        return httpx.Response(200, content="".join(parts).encode(),
+                              headers={"Content-Type": f"multipart/mixed; boundary={out}"})
+
+    async def _get(self, mid: str) -> httpx.Response:
+        self.gets.append(mid)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        status = self.get_status.get(mid, 200)
+        if status != 200:
+            return httpx.Response(status, json={"error": {"code": status}})
+        return httpx.Response(200, json=message(mid))
+
+
+def client_for(fake: FakeGmail, concurrency: int = ga.FALLBACK_CONCURRENCY) -> ga.GoogleAPIClient:
+    return ga.GoogleAPIClient(transport=httpx.MockTransport(fake.handler), fallback_concurrency=concurrency)
+
+
+# ── Checks ─────────────────────────────────────────────────────────────────────
+
+def check_parser() -> bool:
+    ok = True
+    body = (
+        "--b1\r\nContent-Type: application/http\r\nContent-ID: <response-item0>\r\n\r\n"
+        "HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n\r\n{\"id\": \"a\"}\r\n"
+        "--b1\r\nContent-Type: application/http\r\nContent-ID: <response-item1>\r\n\r\n"
+        "HTTP/1.1 429 Too Many Requests\r\nContent-Type: application/json\r\n\r\n"
+        "{\"error\": {\"code\": 429}}\r\n"
+        "--b1\r\nContent-Type: application/http\r\nContent-ID: <response-item2>\r\n\r\n"
+        "HTTP/1.1 500 Internal Server Error\r\nContent-Type: text/plain\r\n\r\nbackend exploded\r\n"
+        "--b1\r\nContent-Type: application/http\r\n\r\nHTTP/1.1 200 OK\r\n\r\n{}\r\n"
+        "--b1--\r\n"
+    )
+    parsed = ga.parse_batch_response('multipart/mixed; boundary="b1"', body.encode())
+    ok &= report("CRLF reply with a quoted boundary",
+                 parsed == {0: (200, {"id": "a"}), 1: (429, {"error": {"code": 429}}),
+                            2: (500, "backend exploded")}, str(parsed))
+    parsed = ga.parse_batch_response("multipart/mixed; boundary=b1", body.replace("\r\n", "\n").encode())
+    ok &= report("bare-LF reply", sorted(parsed) == [0, 1, 2] and parsed[1][0] == 429)
+    try:
+        ga.parse_batch_response("multipart/mixed", body.encode())
+        ok &= report("missing boundary raises ValueError", False)
+    except ValueError:
+        ok &= report("missing boundary raises ValueError", True)
+    return ok
+
+
+async def check_batching(n: int, latency: float) -> bool:
+    ok = True
+    ids = [f"m{i:04d}" for i in range(n)]
+    fake = FakeGmail(latency)
+    client = client_for(fake)
+    got = await client.gmail_get_messages(TOKEN, ids)
+    await client.close()
+    masks = all(q.get("fields") == [ga.MESSAGE_METADATA_FIELDS] and q.get("format") == ["metadata"]
+                for q in fake.sub_queries)
+    ok &= report("all parts 200: batched, no fallback",
+                 max(fake.batch_sizes) <= ga.BATCH_MAX and sum(fake.batch_sizes) == n and not fake.gets,
+                 f"{n} messages in {len(fake.batch_sizes)} batch calls {fake.batch_sizes}")
+    ok &= report("sub-requests keep the fields mask", masks)
+    ok &= report("results in id order", [m["id"] for m in got] == ids)
+    return ok
+
+
+async def check_part_failures(n: int, latency: float) -> bool:
+    ids = [f"m{i:04d}" for i in range(n)]
+    part_status = {mid: (429 if i % 2 else 500) for i, mid in enumerate(ids) if i % 17 == 3}
+    dropped = {ids[5], ids[n - 1]}
+    fake = FakeGmail(latency, part_status=part_status, drop_parts=dropped)
+    client = client_for(fake)
+    got = await client.gmail_get_messages(TOKEN, ids)
+    await client.close()
+    retried = set(part_status) | dropped
+    return report("429/500 and missing parts fall back to single GETs, only those",
+                  sorted(fake.gets) == sorted(retried) and [m["id"] for m in got] == ids,
+                  f"{len(part_status)} failed parts, {len(dropped)} dropped, {len(fake.gets)} GETs")
+
+
+async def check_batch_failure(n: int, latency: float) -> bool:
+    ok = True
+    ids = [f"m{i:04d}" for i in range(n)]
+    concurrency = 6
+    fake = FakeGmail(latency, batch_status=503, get_status={ids[7]: 404, ids[8]: 500})
+    client = client_for(fake, concurrency)
+    got = await client.gmail_get_messages(TOKEN, ids)
+    await client.close()
+    ok &= report("failed batch: every message fetched concurrently",
+                 sorted(fake.gets) == sorted(ids) and 1 < fake.max_in_flight <= concurrency,
+                 f"{len(fake.gets)} GETs, at most {fake.max_in_flight} in flight (limit {concurrency})")
+    ok &= report("messages whose GET fails too are left out",
+                 [m["id"] for m in got] == [mid for mid in ids if mid not in (ids[7], ids[8])])
+    return ok
+
+
+async def main_async(args) -> bool:
+    latency = args.latency_ms / 1000
+    ok = True
+    print("parse_batch_response")
+    ok &= check_parser()
+    print("gmail_get_messages")
+    ok &= await check_batching(args.messages, latency)
+    ok &= await check_part_failures(args.messages, latency)
+    ok &= await check_batch_failure(args.messages, latency)
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=250)
+    parser.add_argument("--latency-ms", type=float, default=5)
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(main_async(args)) else 1)
+
+
+if __name__ == "__main__":
+    main()
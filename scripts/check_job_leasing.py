@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Run several maintenance schedulers side by side and check each job runs on one at a time.
+
+Usage:
+    python scripts/check_job_leasing.py [--workers 4] [--seconds 8] [--postgres]
+
+Starts --workers JobScheduler instances in one process, all pointed at one
+lease store, with a short lease and poll interval. By default the store is
+in memory and follows the same rules as PostgresLeaseStore (due, and lease
+free or expired). With --postgres the instances share the configured
+database instead, using `check_leasing_*` job ids that are deleted
+afterwards.
+
+Jobs:
+  fast     every 0.5s, runs 0.1s
+  slow     every 1s, runs 1.5s, longer than the lease, so it stays held
+           only through heartbeats
+  crashy   every 1s, runs 2s. The worker running its first run "crashes":
+           its store connection dies and its tasks are cancelled without
+           releasing the lease.
+
+Checked:
+  * no two runs of the same job overlap, and no due time runs twice
+  * every job kept running for the whole window
+  * after the crash, another worker takes crashy over once the lease has
+    expired and marks the dead worker's run abandoned
+  * every finished run recorded its worker (and, with --postgres, its
+    duration_ms in maintenance_runs)
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from apscheduler.triggers.interval import IntervalTrigger  # noqa: E402
+
+from memory.maintenance.scheduler import JobScheduler, Lease, PostgresLeaseStore, current_worker  # noqa: E402
+
+PREFIX = "check_leasing_"
+LEASE_S = 1.0
+POLL_S = 0.05
+
+
+@dataclass
+class Row:
+    next_run_at: datetime
+    leased_by: Optional[str] = None
+    leased_until: Optional[datetime] = None
+
+
+@dataclass
+class MemoryLeaseStore:
+    rows: dict[str, Row] = field(default_factory=dict)
+    runs: list[dict] = field(default_factory=list)
+
+    async def register(self, due: dict[str, datetime]) -> None:
+        for job_id, at in due.items():
+            self.rows.setdefault(job_id, Row(at))
+
+    async def acquire(self, job_id: str, owner: str, lease_s: float) -> Optional[Lease]:
+        now = datetime.now(timezone.utc)
+        row = self.rows[job_id]
+        if row.next_run_at > now or (row.leased_until is not None and row.leased_until >= now):
+            return None
+        lease = Lease(job_id, row.next_run_at, row.leased_by)
+        row.leased_by, row.leased_until = owner, now + timedelta(seconds=lease_s)
+        return lease
+
+    async def renew(self, job_id: str, owner: str, lease_s: float) -> bool:
+        row = self.rows[job_id]
+        if row.leased_by != owner:
+            return False
+        row.leased_until = datetime.now(timezone.utc) + timedelta(seconds=lease_s)
+        return True
+
+    async def release(self, job_id, owner, next_run_at, status, error=None) -> None:
+        row = self.rows[job_id]
+        if row.leased_by == owner:
+            row.leased_by = row.leased_until = None
+            if next_run_at is not None:
+                row.next_run_at = next_run_at
+
+    async def abandon_runs(self, owner: str) -> int:
+        hit = [r for r in self.runs if r["worker"] == owner and r["status"] == "running"]
+        for r in hit:
+            r["status"] = "abandoned"
+        return len(hit)
+
+    async def start_run(self, run_type: str) -> dict:
+        run = {"run_type": run_type, "worker": current_worker.get(), "status": "running"}
+        self.runs.append(run)
+        return run
+
+    async def finish_run(self, run: dict) -> None:
+        if run["status"] == "running":
+            run["status"] = "completed"
+
+
+class PostgresChecks(PostgresLeaseStore):
+    """PostgresLeaseStore plus real maintenance_runs rows through the consolidation helpers."""
+
+    async def start_run(self, run_type: str):
+        from memory.maintenance.consolidation import _start_run
+        return await _start_run(run_type)
+
+    async def finish_run(self, run_id) -> None:
+        from memory.maintenance.consolidation import _finish_run
+        await _finish_run(run_id, {})
+
+    async def runs(self) -> list[dict]:
+        from sqlalchemy import select
+        from core.db import get_session
+        from models.db.memory import MaintenanceRunORM
+        async with get_session() as session:
+            rows = (await session.execute(
+                select(MaintenanceRunORM).where(MaintenanceRunORM.run_type.like(f"{PREFIX}%"))
+            )).scalars().all()
+        return [{"run_type": r.run_type, "worker": r.worker, "status": r.status,
+                 "duration_ms": r.duration_ms} for r in rows]
+
+    async def cleanup(self) -> None:
+        from sqlalchemy import delete
+        from core.db import get_session
+        from models.db.memory import MaintenanceRunORM, ScheduledJobORM
+        async with get_session() as session:
+            await session.execute(delete(ScheduledJobORM).where(ScheduledJobORM.job_id.like(f"{PREFIX}%")))
+            await session.execute(delete(MaintenanceRunORM).where(MaintenanceRunORM.run_type.like(f"{PREFIX}%")))
+
+
+class Crashable:
+    """One worker's view of the shared store; `dead` makes every call fail like a lost connection."""
+
+    def __init__(self, inner) -> None:
+        self.inner = inner
+        self.dead = False
+
+    def __getattr__(self, name):
+        attr = getattr(self.inner, name)
+        if not callable(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            if self.dead:
+                raise ConnectionError("worker crashed")
+            return await attr(*args, **kwargs)
+        return call
+
+
+async def main_async(args) -> bool:
+    shared = PostgresChecks() if args.postgres else MemoryLeaseStore()
+    if args.postgres:
+        from core.db import init_db
+        await init_db()
+        await shared.cleanup()
+
+    log: list[tuple[str, str, float, float]] = []          # job, worker, start, end
+    crash: dict[str, Optional[str]] = {"worker": None}
+    schedulers: dict[str, JobScheduler] = {}
+    views: dict[str, Crashable] = {}
+
+    def job(name: str, run_s: float):
+        async def body() -> None:
+            worker = current_worker.get()
+            run = await views[worker].start_run(f"{PREFIX}{name}")
+            start = time.monotonic()
+            if name == "crashy" and crash["worker"] is None:
+                crash["worker"] = worker
+            try:
+                await asyncio.sleep(run_s)
+            finally:
+                log.append((name, worker, start, time.monotonic()))
+            await views[worker].finish_run(run)
+        return body
+
+    for i in range(args.workers):
+        worker = f"w{i}-{uuid.uuid4().hex[:4]}"
+        views[worker] = Crashable(shared)
+        sched = JobScheduler(store=views[worker], worker_id=worker, lease_s=LEASE_S, poll_interval=POLL_S)
+        for name, every, run_s in (("fast", 0.5, 0.1), ("slow", 1.0, 1.5), ("crashy", 1.0, 2.0)):
+            sched.add_job(f"{PREFIX}{name}", job(name, run_s), IntervalTrigger(seconds=every))
+        schedulers[worker] = sched
+
+    for sched in schedulers.values():
+        await sched.start()
+
+    crashed_at = None
+    deadline = time.monotonic() + args.seconds
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+        if crashed_at is None and crash["worker"] is not None:
+            victim = schedulers[crash["worker"]]
+            views[crash["worker"]].dead = True
+            for task in [victim._task, *victim._running.values()]:
+                task.cancel()
+            crashed_at = time.monotonic()
+    for worker, sched in schedulers.items():
+        if worker != crash["worker"]:
+            await sched.stop()
+
+    ok = True
+    for name in ("fast", "slow", "crashy"):
+        runs = sorted((s, e, w) for n, w, s, e in log if n == name)
+        overlaps = sum(1 for (s1, e1, _), (s2, _, _) in zip(runs, runs[1:]) if s2 < e1 - 1e-3)
+        workers = sorted({w for *_, w in runs})
+        print(f"{name:<7} runs {len(runs):3d}  overlapping {overlaps}  workers {', '.join(workers)}")
+        ok &= overlaps == 0 and len(runs) >= 2
+
+    takeover = [(s, w) for n, w, s, _ in log if n == "crashy" and crashed_at and s > crashed_at]
+    delay = takeover[0][0] - crashed_at if takeover else None
+    runs = await shared.runs() if args.postgres else shared.runs
+    abandoned = [r for r in runs if r["worker"] == crash["worker"] and r["status"] == "abandoned"]
+    print(f"crash of {crash['worker']}: taken over after {delay and round(delay, 2)}s by "
+          f"{takeover[0][1] if takeover else None}; runs marked abandoned: {len(abandoned)}")
+    ok &= bool(takeover) and takeover[0][1] != crash["worker"] and delay <= LEASE_S + 1.0 and len(abandoned) >= 1
+
+    finished = [r for r in runs if r["status"] == "completed"]
+    recorded = all(r["worker"] for r in finished)
+    if args.postgres:
+        recorded &= all(r["duration_ms"] is not None for r in finished)
+        await shared.cleanup()
+    print(f"finished runs recording their worker{' and duration' if args.postgres else ''}: "
+          f"{sum(1 for r in finished if r['worker'])}/{len(finished)}")
+    return ok and recorded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=8.0)
+    parser.add_argument("--postgres", action="store_true")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(main_async(args)) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Check OpenSearchClient.hybrid_search request construction and fallbacks.
+
+Usage:
+    python scripts/check_opensearch_hybrid.py
+
+No cluster is needed. The real opensearch-py client runs on a fake transport
+that records every HTTP request and answers the way a cluster with a given
+feature set would:
+
+  rrf           — 2.19+: the score-ranker pipeline installs, hybrid queries work
+  normalization — 2.10+: only the normalization pipeline installs
+  none          — older, or no neural-search plugin: both pipelines are rejected
+  deleted       — the pipeline installs, but searches then get 404 (deleted later)
+
+Checked:
+  * one HTTP request per hybrid_search in every mode
+  * the expected pipeline mode is picked for each cluster
+  * term/terms filters reach both the BM25 leg and the kNN leg
+  * ef_search reaches the kNN leg on 2.16+ clusters only
+  * Filter trees (and/or/not, date ranges) compile to bool/range clauses
+  * `_rrf_score` is on the fuse_rrf scale
+  * _msearch results equal fuse_rrf of the two legs
+  * a 404 from the pipeline falls back within the same call, and later
+    calls go straight to _msearch
+  * a connection error propagates and does not change the mode
+"""
+from __future__ import annotations
+
+import json
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from opensearchpy import ConnectionError as OSConnectionError  # noqa: E402
+from opensearchpy import NotFoundError, OpenSearch, RequestError, Transport  # noqa: E402
+
+from core.clients import opensearch as os_mod  # noqa: E402
+from core.clients.opensearch import HYBRID_PIPELINE, OpenSearchClient  # noqa: E402
+from core.clients.search_filters import Range, Term, filter_clauses, time_window  # noqa: E402
+from core.clients.vector_store import RRF_K, fuse_rrf  # noqa: E402
+
+INDEX = "memory_claims"
+FILTERS = {"status": ["active", "provisional"], "tier": ["long_term"], "segment": "core_identity"}
+
+
+def _hits(prefix: str, n: int) -> dict:
+    return {"hits": {"hits": [
+        {"_id": f"{prefix}{i}", "_score": 1.0 / (i + 1), "_source": {"claim_text": f"{prefix} {i}"}}
+        for i in range(n)
+    ]}}
+
+
+KNN_RESPONSE = _hits("v", 6)
+VERSIONS = {"rrf": "2.19.1", "normalization": "2.12.0", "none": "2.9.0", "deleted": "2.19.1"}
+TEXT_RESPONSE = {"hits": {"hits": KNN_RESPONSE["hits"]["hits"][3:] + _hits("t", 3)["hits"]["hits"]}}
+HYBRID_RESPONSE = {"hits": {"hits": [
+    {"_id": "v0", "_score": 0.032, "_source": {}}, {"_id": "t0", "_score": 0.016, "_source": {}}]}}
+
+
+def make_client(cluster: str) -> tuple[OpenSearchClient, list]:
+    calls: list[tuple[str, str, dict, object]] = []
+
+    class FakeTransport(Transport):
+        fail_next_search: Exception | None = None
+
+        def perform_request(self, method, url, params=None, body=None, headers=None, **kw):
+            if isinstance(body, (bytes, str)):
+                text = body.decode() if isinstance(body, bytes) else body
+                body = [json.loads(line) for line in text.splitlines() if line.strip()]
+            calls.append((method, url, dict(params or {}), body))
+
+            if url == "/":
+                return {"version": {"number": VERSIONS[cluster]}}
+            if url.startswith("/_search/pipeline/"):
+                processor = next(iter(body["phase_results_processors"][0]))
+                ok = (cluster in ("rrf", "deleted") or
+                      (cluster == "normalization" and processor == "normalization-processor"))
+                if not ok:
+                    raise RequestError(400, "illegal_argument_exception", {"processor": processor})
+                return {"acknowledged": True}
+            if url.endswith("/_msearch"):
+                return {"responses": [KNN_RESPONSE, TEXT_RESPONSE]}
+            if url.endswith("/_search"):
+                if FakeTransport.fail_next_search is not None:
+                    exc, FakeTransport.fail_next_search = FakeTransport.fail_next_search, None
+                    raise exc
+                if (params or {}).get("search_pipeline"):
+                    if cluster == "deleted":
+                        raise NotFoundError(404, "resource_not_found_exception", {})
+                    return HYBRID_RESPONSE
+                return KNN_RESPONSE
+            raise AssertionError(f"unexpected request {method} {url}")
+
+    client = OpenSearchClient()
+    client._client = OpenSearch(hosts=[{"host": "fake", "port": 9200}], transport_class=FakeTransport)
+    client.transport_class = FakeTransport
+    return client, calls
+
+
+def searches(calls) -> list:
+    return [c for c in calls if not c[1].startswith("/_search/pipeline/")]
+
+
+def check(label: str, cond: bool) -> bool:
+    print(f"  {'ok ' if cond else 'FAIL'} {label}")
+    return cond
+
+
+def run() -> bool:
+    ok = True
+    emb = [0.1] * 8
+
+    for cluster, want_mode in (("rrf", "rrf"), ("normalization", "normalization"), ("none", "msearch")):
+        print(f"{cluster} cluster:")
+        client, calls = make_client(cluster)
+        mode = client.ensure_search_pipeline()
+        ok &= check(f"pipeline mode {mode!r}", mode == want_mode)
+        calls.clear()
+        hits = client.hybrid_search(INDEX, "coffee order", emb, k=5, filters=FILTERS, ef_search=128)
+        ok &= check("one HTTP request", len(calls) == 1)
+        method, url, params, body = calls[0]
+
+        if want_mode == "msearch":
+            ok &= check("sent to _msearch with two legs", url.endswith("/_msearch") and len(body) == 4)
+            knn_leg, text_leg = body[1]["query"], body[3]["query"]
+            want = fuse_rrf(os_mod._hits(KNN_RESPONSE), os_mod._hits(TEXT_RESPONSE), 5)
+            ok &= check("results equal fuse_rrf of both legs", hits == want)
+        else:
+            ok &= check("hybrid query through the pipeline",
+                        url == f"/{INDEX}/_search" and params.get("search_pipeline") == HYBRID_PIPELINE)
+            text_leg, knn_leg = body["query"]["hybrid"]["queries"]
+            scale = 1.0 if want_mode == "rrf" else 1.0 / RRF_K
+            ok &= check("_rrf_score on the fuse_rrf scale",
+                        [h["_rrf_score"] for h in hits] == [h["_score"] * scale for h in HYBRID_RESPONSE["hits"]["hits"]])
+        want_clauses = filter_clauses(FILTERS)
+        ok &= check("filters on the BM25 leg", text_leg["bool"]["filter"] == want_clauses)
+        ok &= check("filters inside the kNN leg",
+                    knn_leg["knn"]["embedding"]["filter"] == {"bool": {"filter": want_clauses}})
+        ef = knn_leg["knn"]["embedding"].get("method_parameters")
+        ok &= check(f"ef_search sent: {ef is not None}",
+                    (ef == {"ef_search": 128}) if cluster == "rrf" else ef is None)
+
+    print("pipeline deleted after install:")
+    client, calls = make_client("deleted")
+    client.ensure_search_pipeline()
+    calls.clear()
+    hits = client.hybrid_search(INDEX, "coffee", emb, k=5)
+    ok &= check("404 falls back to _msearch in the same call",
+                [c[1] for c in calls] == [f"/{INDEX}/_search", "/_msearch"] and len(hits) == 5)
+    calls.clear()
+    client.hybrid_search(INDEX, "coffee", emb, k=5)
+    ok &= check("later calls go straight to _msearch", [c[1] for c in calls] == ["/_msearch"])
+
+    print("connection error:")
+    client, calls = make_client("rrf")
+    client.ensure_search_pipeline()
+    client.transport_class.fail_next_search = OSConnectionError("N/A", "connection refused", None)
+    try:
+        client.hybrid_search(INDEX, "coffee", emb, k=5)
+        raised = False
+    except OSConnectionError:
+        raised = True
+    ok &= check("propagates, mode kept", raised and client._hybrid_mode == "rrf")
+
+    print("filter clauses:")
+    ok &= check("scalar -> term, list -> terms",
+                filter_clauses({"a": 1, "b": ["x", "y"]}) == [{"term": {"a": 1}}, {"terms": {"b": ["x", "y"]}}])
+    start, end = datetime(2026, 5, 1, tzinfo=timezone.utc), datetime(2026, 5, 8, tzinfo=timezone.utc)
+    tree = (Term("status", "active") & (Term("tier", "long_term") | ~Term("segment", "noise"))
+            & time_window(start, end))
+    ok &= check("and/or/not/range tree", filter_clauses(tree) == [
+        {"term": {"status": "active"}},
+        {"bool": {"should": [{"term": {"tier": "long_term"}},
+                             {"bool": {"must_not": [{"term": {"segment": "noise"}}]}}],
+                  "minimum_should_match": 1}},
+        {"bool": {"should": [{"range": {f: {"gte": start.isoformat(), "lt": end.isoformat()}}}
+                             for f in ("created_at", "valid_from")], "minimum_should_match": 1}},
+    ])
+    doc = {"status": "active", "segment": "noise", "tier": "long_term", "created_at": "2026-05-03T10:00:00"}
+    ok &= check("the same tree matches documents",
+                tree.matches(doc) and not tree.matches({**doc, "created_at": "2026-05-09"})
+                and not Range("created_at", gte=start).matches({"created_at": None}))
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run() else 1)
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Run several outbox relays side by side and check only one drains, in event order.
+
+Usage:
+    python scripts/check_outbox_relay.py [--relays 3] [--claims 120] [--latency-ms 15]
+
+OutboxRelay runs unchanged against an in-memory SQLite copy of the outbox
+table. Postgres-only column types are swapped for SQLite ones: JSONB becomes
+JSON, and the BIGINT event id becomes INTEGER. The relays share an in-memory
+lease store that follows the same rules as PostgresLeaseStore (due, and lease
+free or expired), with a short lease. The fake search index and graph sleep
+on every call and count how many calls are in flight at once.
+
+While the relays run, claims are written in waves: an index and a graph
+upsert for each, then an update for every fifth and a delete (search and
+graph) for every third. Halfway through, the leader "crashes": its lease
+store connection dies and its task is cancelled without releasing the lease.
+
+Checked:
+  * at most one relay holds the lease at any moment, and the sinks never
+    see two calls at once
+  * after the crash, another relay takes over once the lease has expired
+  * the index and the graph end up exactly as the events describe, so no
+    deleted claim came back, and the outbox is empty
+  * a failed item is written back with attempts=1 and a backoff, in the
+    settle transaction after the sink calls
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import threading
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import JSON, DateTime, Integer, create_engine, func, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from sqlalchemy.types import TypeDecorator  # noqa: E402
+
+from memory import outbox  # noqa: E402
+from memory.maintenance.scheduler import Lease  # noqa: E402
+from memory.outbox import OutboxRelay, enqueue_delete, enqueue_graph, enqueue_index, enqueue_update  # noqa: E402
+from models.db.memory import OutboxEventORM  # noqa: E402
+
+LEASE_S = 0.6
+POLL_S = 0.02
+
+
+def report(name: str, good: bool, detail: str = "") -> bool:
+    print(f"  {'ok ' if good else 'BAD'} {name}{': ' + detail if detail else ''}")
+    return good
+
+
+# ── SQLite stand-in ────────────────────────────────────────────────────────────
+
+class UtcDateTime(TypeDecorator):
+    """SQLite drops tzinfo; hand values back as UTC like Postgres timestamptz."""
+    impl = DateTime
+    cache_ok = True
+
+    def process_result_value(self, value, dialect):
+        return value.replace(tzinfo=timezone.utc) if value is not None else None
+
+
+def sqlite_engine():
+    OutboxEventORM.payload.property.columns[0].type = JSON()
+    OutboxEventORM.event_id.property.columns[0].type = Integer()
+    for col in (OutboxEventORM.created_at, OutboxEventORM.next_attempt_at):
+        col.property.columns[0].type = UtcDateTime()
+    engine = create_engine("sqlite://")
+    OutboxEventORM.__table__.create(engine)
+    return engine
+
+
+class AsyncSessionAdapter:
+    """Just the AsyncSession surface the relay and the enqueue helpers use, over a sync Session."""
+
+    def __init__(self, sync: Session) -> None:
+        self.sync = sync
+
+    async def execute(self, stmt, params=None):
+        return self.sync.execute(stmt, params)
+
+    def add(self, obj) -> None:
+        self.sync.add(obj)
+
+    def add_all(self, objs) -> None:
+        self.sync.add_all(objs)
+
+
+def session_factory(engine):
+    @asynccontextmanager
+    async def session():
+        with Session(engine, expire_on_commit=False) as sync:
+            try:
+                yield AsyncSessionAdapter(sync)
+                sync.commit()
+            except Exception:
+                sync.rollback()
+                raise
+    return session
+
+
+# ── Lease store ────────────────────────────────────────────────────────────────
+
+@dataclass
+class Row:
+    next_run_at: datetime
+    leased_by: Optional[str] = None
+    leased_until: Optional[datetime] = None
+
+
+@dataclass
+class MemoryLeaseStore:
+    rows: dict[str, Row] = field(default_factory=dict)
+
+    async def register(self, due: dict[str, datetime]) -> None:
+        for job_id, at in due.items():
+            self.rows.setdefault(job_id, Row(at))
+
+    async def acquire(self, job_id: str, owner: str, lease_s: float) -> Optional[Lease]:
+        now = datetime.now(timezone.utc)
+        row = self.rows[job_id]
+        if row.next_run_at > now or (row.leased_until is not None and row.leased_until >= now):
+            return None
+        lease = Lease(job_id, row.next_run_at, row.leased_by)
+        row.leased_by, row.leased_until = owner, now + timedelta(seconds=lease_s)
+        return lease
+
+    async def renew(self, job_id: str, owner: str, lease_s: float) -> bool:
+        row = self.rows[job_id]
+        if row.leased_by != owner:
+            return False
+        row.leased_until = datetime.now(timezone.utc) + timedelta(seconds=lease_s)
+        return True
+
+    async def release(self, job_id, owner, next_run_at, status, error=None) -> None:
+        row = self.rows[job_id]
+        if row.leased_by == owner:
+            row.leased_by = row.leased_until = None
+            if next_run_at is not None:
+                row.next_run_at = next_run_at
+
+
+class Crashable:
+    """One relay's view of the shared store; once `dead`, every call fails."""
+
+    def __init__(self, store: MemoryLeaseStore) -> None:
+        self.store = store
+        self.dead = False
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.store, name)
+
+        async def call(*args, **kwargs):
+            if self.dead:
+                raise ConnectionError("worker crashed")
+            return await attr(*args, **kwargs)
+        return call
+
+
+# ── Fake sinks ─────────────────────────────────────────────────────────────────
+
+class Sinks:
+    """Search and graph fakes sharing one in-flight counter."""
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.docs: dict[str, dict] = {}
+        self.claims: set[str] = set()
+        self.fail_once: set[str] = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def _enter(self) -> None:
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def _leave(self) -> None:
+        with self.lock:
+            self.in_flight -= 1
+
+    def bulk_actions(self, actions: list[dict], refresh: bool = True) -> set[str]:
+        self._enter()
+        try:
+            time.sleep(self.latency)
+            failed: set[str] = set()
+            for a in actions:
+                if a["_id"] in self.fail_once:
+                    self.fail_once.discard(a["_id"])
+                    failed.add(a["_id"])
+                elif a["_op_type"] == "index":
+                    self.docs[a["_id"]] = dict(a["_source"])
+                elif a["_op_type"] == "update":
+                    self.docs.setdefault(a["_id"], {}).update(a["doc"])
+                else:
+                    self.docs.pop(a["_id"], None)
+            return failed
+        finally:
+            self._leave()
+
+    async def _call(self) -> None:
+        self._enter()
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self._leave()
+
+    async def upsert_claims_batch(self, rows: list[dict]) -> None:
+        await self._call()
+        self.claims.update(r["claim_id"] for r in rows)
+
+    async def delete_claims_batch(self, claim_ids: list[str]) -> None:
+        await self._call()
+        self.claims.difference_update(claim_ids)
+
+
+# ── Checks ─────────────────────────────────────────────────────────────────────
+
+async def write_claims(session_maker, ids: list[str], op: str) -> None:
+    async with session_maker() as session:
+        for cid in ids:
+            if op == "index":
+                enqueue_index(session, "claims", cid, {"claim_text": f"fact {cid}", "status": "active",
+                                                       "embedding": [0.1]})
+                enqueue_graph(session, "upsert_claims", cid, rows=[{"claim_id": cid}])
+            elif op == "update":
+                enqueue_update(session, "claims", cid, {"status": "archived"})
+            else:
+                enqueue_delete(session, "claims", cid)
+                enqueue_graph(session, "delete_claims", cid, ids=[cid])
+
+
+async def check_single_drainer(engine, args) -> bool:
+    ok = True
+    session_maker = outbox.get_session
+    sinks = Sinks(args.latency_ms / 1000)
+    shared = MemoryLeaseStore()
+    views = {f"r{i}": Crashable(shared) for i in range(args.relays)}
+    relays = {name: OutboxRelay(search=sinks, graph=sinks, batch_size=20, poll_interval=POLL_S,
+                                lease_store=view, worker_id=name, lease_s=LEASE_S)
+              for name, view in views.items()}
+    for relay in relays.values():
+        relay.start()
+
+    leaders_seen: list[int] = []
+    stop_sampling = asyncio.Event()
+
+    async def sample() -> None:
+        while not stop_sampling.is_set():
+            leaders_seen.append(sum(r.is_leader for r in relays.values()))
+            await asyncio.sleep(0.005)
+
+    sampler = asyncio.create_task(sample())
+    ids = [f"claim-{i:04d}" for i in range(args.claims)]
+    waves = [ids[i:i + 20] for i in range(0, len(ids), 20)]
+    crashed, crashed_at, takeover = None, None, None
+    for n, wave in enumerate(waves):
+        await write_claims(session_maker, wave, "index")
+        await write_claims(session_maker, [c for c in wave if int(c[-4:]) % 5 == 0], "update")
+        await write_claims(session_maker, [c for c in wave if int(c[-4:]) % 3 == 0], "delete")
+        for relay in relays.values():
+            relay.wake()
+        await asyncio.sleep(0.05)
+        if n == len(waves) // 2 and crashed is None:
+            crashed = next((name for name, r in relays.items() if r.is_leader), None)
+            if crashed is not None:
+                victim = relays[crashed]
+                views[crashed].dead = True
+                victim._task.cancel()
+                crashed_at = time.monotonic()
+
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        if crashed_at is not None and takeover is None:
+            takeover = next(((name, time.monotonic() - crashed_at) for name, r in relays.items()
+                             if name != crashed and r.is_leader), None)
+        with Session(engine) as s:
+            if not s.scalar(select(func.count()).select_from(OutboxEventORM)) and takeover:
+                break
+        await asyncio.sleep(0.02)
+    stop_sampling.set()
+    await sampler
+    for name, relay in relays.items():
+        if name != crashed:
+            await relay.stop()
+
+    drained = sorted(name for name, r in relays.items() if r.metrics.batches)
+    ok &= report("one lease holder at a time",
+                 max(leaders_seen) == 1, f"{len(leaders_seen)} samples, relays that drained: {drained}")
+    ok &= report("sinks never called concurrently", sinks.max_in_flight == 1,
+                 f"at most {sinks.max_in_flight} call in flight")
+    ok &= report("crashed leader taken over after its lease expired",
+                 crashed is not None and takeover is not None and LEASE_S * 0.5 <= takeover[1] <= LEASE_S + 1.0,
+                 f"{crashed} crashed, {takeover and takeover[0]} took over after "
+                 f"{takeover and round(takeover[1], 2)}s (lease {LEASE_S}s)")
+
+    deleted = {c for c in ids if int(c[-4:]) % 3 == 0}
+    archived = {c for c in ids if int(c[-4:]) % 5 == 0} - deleted
+    want = {c: "archived" if c in archived else "active" for c in ids if c not in deleted}
+    got = {c: d.get("status") for c, d in sinks.docs.items()}
+    with Session(engine) as s:
+        left = s.scalar(select(func.count()).select_from(OutboxEventORM))
+    ok &= report("index matches the events, no deleted claim came back", got == want,
+                 f"{len(got)} docs, {len(set(got) & deleted)} deleted ones present")
+    ok &= report("graph matches the events", sinks.claims == set(want), f"{len(sinks.claims)} claims")
+    ok &= report("outbox drained", left == 0, f"{left} rows left")
+    return ok
+
+
+async def check_settle(engine, args) -> bool:
+    sinks = Sinks(0)
+    relay = OutboxRelay(search=sinks, graph=sinks, lease_store=MemoryLeaseStore(), worker_id="solo")
+    await write_claims(outbox.get_session, ["retry-1", "retry-2"], "index")
+    sinks.fail_once.add("retry-1")
+    handled = await relay.drain_once()
+    with Session(engine) as s:
+        rows = s.execute(select(OutboxEventORM.aggregate_id, OutboxEventORM.sink, OutboxEventORM.attempts,
+                                OutboxEventORM.next_attempt_at)).all()
+    now = datetime.now(timezone.utc)
+    failed = [r for r in rows if r.aggregate_id == "retry-1" and r.sink == outbox.SINK_SEARCH]
+    return report("failed item written back with a backoff, the rest deleted",
+                  handled == 4 and len(rows) == 1 and failed and failed[0].attempts == 1
+                  and failed[0].next_attempt_at > now,
+                  f"{handled} handled, left {[(r.aggregate_id, r.sink, r.attempts) for r in rows]}")
+
+
+async def main_async(args) -> bool:
+    engine = sqlite_engine()
+    outbox.get_session = session_factory(engine)
+    ok = True
+    print("relays")
+    ok &= await check_single_drainer(engine, args)
+    print("settle")
+    ok &= await check_settle(engine, args)
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--relays", type=int, default=3)
+    parser.add_argument("--claims", type=int, default=120)
+    parser.add_argument("--latency-ms", type=float, default=15)
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(main_async(args)) else 1)
+
+
+if __name__ == "__main__":
+    main()
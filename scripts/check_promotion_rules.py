@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Seed a grid of claims and check the promotion engine's exact tier transitions.
+
+Usage:
+    python scripts/check_promotion_rules.py [--batch 997] [--verbose]
+
+Runs the engine's own statements (`batch_ids` keyset batches, then the
+`tier_update` UPDATE ... RETURNING) against an in-memory SQLite copy of the
+claims table. The seed covers every combination of tier, status, access
+count, retrieval hits, confidence, contradictions, idle time and
+confirmation, including the values right at each threshold.
+
+Checked:
+  * named boundary cases land on exactly the expected tier and
+    user_confirmed value
+  * every row of the grid matches a plain Python statement of the rules,
+    both in the rows RETURNING reports and in the table afterwards
+  * a second pass over the result moves each claim at most one more step.
+    For example, short-term to long-term, then long-term to permanent on
+    the next run.
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import Uuid, create_engine, insert, select  # noqa: E402
+from sqlalchemy.dialects.postgresql import UUID  # noqa: E402
+
+from memory.maintenance import promotion as pm  # noqa: E402
+from models.db.memory import ClaimORM  # noqa: E402
+
+NOW = datetime(2026, 6, 1, 12, 0, tzinfo=timezone.utc)
+ST, LT, PERM = "short_term", "long_term", "permanent"
+
+
+def expected(row: dict) -> tuple[str, bool]:
+    """The rules as plain Python: (tier, user_confirmed) after one run."""
+    tier, confirmed = row["tier"], row["user_confirmed"]
+    if row["status"] not in ("active", "provisional") or tier == PERM:
+        return tier, confirmed
+    a, h, c = row["access_count"], row["retrieval_hit_count"], row["confidence"]
+    if tier == ST:
+        return (LT if a >= 3 and h >= 2 and c >= 0.55 else ST), confirmed
+    if a >= 8 and h >= 5 and c >= 0.75 and row["contradiction_count"] == 0:
+        return PERM, confirmed or c >= 0.8
+    last = row["last_accessed_at"] or row["created_at"]
+    if (NOW - last).days >= 30 and h / max(a, 1) < 0.1:
+        return ST, confirmed
+    return LT, confirmed
+
+
+def claim(tier: str, access: int, hits: int, conf: float, idle_days: float = 1.0, status: str = "active",
+          contradictions: int = 0, confirmed: bool = False) -> dict:
+    return {
+        "claim_id": uuid.uuid4(), "claim_text": "x", "memory_class": "fact", "segment": "core_identity",
+        "tier": tier, "status": status, "access_count": access, "retrieval_hit_count": hits,
+        "confidence": conf, "contradiction_count": contradictions, "user_confirmed": confirmed,
+        "created_at": NOW - timedelta(days=40),
+        "last_accessed_at": NOW - timedelta(days=idle_days),
+    }
+
+
+BOUNDARIES = [
+    # (name, claim, expected tier, expected user_confirmed)
+    ("ST at every threshold", claim(ST, 3, 2, 0.55), LT, False),
+    ("ST one access short", claim(ST, 2, 2, 0.9), ST, False),
+    ("ST just under confidence", claim(ST, 3, 2, 0.5499), ST, False),
+    ("ST meeting PERM thresholds moves one step", claim(ST, 20, 10, 0.95), LT, False),
+    ("provisional ST promotes", claim(ST, 3, 2, 0.6, status="provisional"), LT, False),
+    ("stale ST untouched", claim(ST, 30, 20, 0.9, status="stale"), ST, False),
+    ("LT at every PERM threshold", claim(LT, 8, 5, 0.75), PERM, False),
+    ("LT to PERM auto-confirms at 0.8", claim(LT, 8, 5, 0.8), PERM, True),
+    ("LT with a contradiction stays", claim(LT, 8, 5, 0.9, contradictions=1), LT, False),
+    ("promotion wins over demotion", claim(LT, 60, 5, 0.8, idle_days=45), PERM, True),
+    ("LT idle 30d, hit rate exactly 0.1", claim(LT, 30, 3, 0.6, idle_days=30), LT, False),
+    ("LT idle 30d, hit rate under 0.1", claim(LT, 31, 3, 0.6, idle_days=30), ST, False),
+    ("LT idle 29.9d", claim(LT, 31, 0, 0.6, idle_days=29.9), LT, False),
+    ("LT never accessed, idle 40d", claim(LT, 0, 0, 0.6, idle_days=40), ST, False),
+    ("LT demotion keeps confirmation", claim(LT, 0, 0, 0.6, idle_days=60, confirmed=True), ST, True),
+    ("PERM never auto-demotes", claim(PERM, 0, 0, 0.1, idle_days=400), PERM, False),
+]
+
+
+def grid() -> list[dict]:
+    rows = []
+    for tier, status, access, hits, conf, contra, idle, confirmed in itertools.product(
+        (ST, LT, PERM), ("active", "provisional", "stale"), (0, 2, 3, 7, 8, 20, 60), (0, 1, 2, 4, 5, 6),
+        (0.5, 0.55, 0.7499, 0.75, 0.8), (0, 1), (1, 29.9, 30, 45), (False, True),
+    ):
+        rows.append(claim(tier, access, hits, conf, idle, status, contra, confirmed))
+    return rows
+
+
+def run_pass(conn, batch_size: int) -> tuple[dict, int]:
+    """One PromotionEngine.run, statement for statement, on a sync connection."""
+    returned, after, batches = {}, None, 0
+    while True:
+        ids = conn.execute(pm.batch_ids(after, batch_size)).scalars().all()
+        if not ids:
+            break
+        batches += 1
+        for claim_id, tier, confirmed, *_ in conn.execute(pm.tier_update(ids, NOW)).all():
+            returned[claim_id] = (tier, confirmed)
+        after = ids[-1]
+        if len(ids) < batch_size:
+            break
+    return returned, batches
+
+
+def table(conn) -> dict:
+    cols = [c for c in ClaimORM.__table__.c if c.name in
+            ("claim_id", "tier", "status", "access_count", "retrieval_hit_count", "confidence",
+             "contradiction_count", "user_confirmed", "created_at", "last_accessed_at")]
+    out = {}
+    for r in conn.execute(select(*cols)).mappings():
+        row = dict(r)
+        for key in ("created_at", "last_accessed_at"):
+            if row[key] is not None and row[key].tzinfo is None:
+                row[key] = row[key].replace(tzinfo=timezone.utc)
+        out[row["claim_id"]] = row
+    return out
+
+
+def check_pass(conn, before: dict, batch_size: int, label: str, verbose: bool) -> bool:
+    t0 = time.perf_counter()
+    returned, batches = run_pass(conn, batch_size)
+    elapsed = time.perf_counter() - t0
+    after = table(conn)
+    wrong = []
+    for cid, row in before.items():
+        want = expected(row)
+        got = (after[cid]["tier"], after[cid]["user_confirmed"])
+        moved = want != (row["tier"], row["user_confirmed"])
+        if got != want or (moved and returned.get(cid) != want) or (not moved and cid in returned):
+            wrong.append((row, want, got, returned.get(cid)))
+    moves = {}
+    for cid, (tier, _) in returned.items():
+        key = f"{before[cid]['tier']}->{tier}"
+        moves[key] = moves.get(key, 0) + 1
+    print(f"{label}: {len(before)} claims in {batches} batches, {elapsed * 1000:.0f}ms; "
+          f"moves {dict(sorted(moves.items()))}; wrong {len(wrong)}")
+    for row, want, got, ret in wrong[: 10 if verbose else 3]:
+        print(f"   {row['tier']} a={row['access_count']} h={row['retrieval_hit_count']} c={row['confidence']} "
+              f"x={row['contradiction_count']} last={row['last_accessed_at']} -> want {want} got {got} returned {ret}")
+    return not wrong
+
+
+def sqlite_engine():
+    """Fresh claims table. UUID columns become CHAR(32) so SQLite never stores a numeric-looking hex id as a number."""
+    for col in ClaimORM.__table__.columns:
+        if isinstance(col.type, UUID):
+            col.type = Uuid()
+    engine = create_engine("sqlite://")
+    ClaimORM.__table__.create(engine)
+    return engine
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, default=997)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    engine = sqlite_engine()
+    ok = True
+
+    with engine.begin() as conn:
+        conn.execute(insert(ClaimORM), [c for _, c, _, _ in BOUNDARIES])
+        run_pass(conn, args.batch)
+        after = table(conn)
+        for name, c, tier, confirmed in BOUNDARIES:
+            got = (after[c["claim_id"]]["tier"], after[c["claim_id"]]["user_confirmed"])
+            good = got == (tier, confirmed)
+            ok &= good
+            if args.verbose or not good:
+                print(f"  {'ok ' if good else 'BAD'} {name}: want {(tier, confirmed)} got {got}")
+        print(f"boundary cases: {len(BOUNDARIES)} checked, all exact: {ok}")
+
+    engine = sqlite_engine()
+    with engine.begin() as conn:
+        conn.execute(insert(ClaimORM), grid())
+        ok &= check_pass(conn, table(conn), args.batch, "grid pass 1", args.verbose)
+        ok &= check_pass(conn, table(conn), args.batch, "grid pass 2", args.verbose)
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
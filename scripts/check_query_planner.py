@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Score the rule-based query planner against a labelled fixture set.
+
+Usage:
+    python scripts/check_query_planner.py [--threshold 0.6] [--verbose]
+
+Each fixture has the expected query type, entity mentions and time
+constraint. The planner runs with a fixed clock, a gazetteer loaded from the
+fixture entities, and a stub LLM that returns the labelled answer and counts
+calls. So the LLM stage is assumed perfect: the numbers show how often the
+rules alone get it right, and how often they hand off to the LLM.
+
+Reported:
+  * rule accuracy for query type on the queries the rules kept, and the
+    number of confidently-wrong plans (wrong type, not escalated), which
+    the LLM never gets to fix
+  * rule accuracy for entity set and time constraint on every query
+  * escalation rate
+  * a repeat pass where every plan must come from the cache
+  * a cache hit six hours later for queries ending at the present ("today",
+    "last 3 days", "this week", "recently"). The cached plan's time window
+    must still match a claim created after the plan was made
+  * p50/p95 planning time for a rules-only plan
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.clients.search_filters import time_window  # noqa: E402
+from memory.retrieval import query_planner as qp  # noqa: E402
+from memory.retrieval.query_planner import EntityGazetteer, QueryPlanner  # noqa: E402
+from models.memory import QueryType as Q  # noqa: E402
+
+NOW = datetime(2026, 5, 14, 15, 0, tzinfo=timezone.utc)          # a Thursday
+
+ENTITIES = [
+    ("Priya Sharma", ["Priya"]),
+    ("Alex Chen", ["Alex"]),
+    ("Acme Corp", ["Acme"]),
+    ("Agentic Browser", ["the browser project"]),
+    ("OpenSearch", []),
+    ("Berlin", []),
+    ("Google", []),
+    ("Rust", []),
+    ("Dr. Mehta", ["Mehta"]),
+    ("PyCon", []),
+]
+
+# (query, query type, entities, time constraint)
+FIXTURES: list[tuple[str, Q, list[str], str]] = [
+    ("did the recruiter from Google reply to my email?", Q.EMAIL_SPECIFIC, ["Google"], "none"),
+    ("any emails from Acme last week", Q.EMAIL_SPECIFIC, ["Acme Corp"], "past"),
+    ("what did Priya send me in my inbox yesterday", Q.EMAIL_SPECIFIC, ["Priya Sharma"], "recent"),
+    ("show the gmail thread about the offer", Q.EMAIL_SPECIFIC, [], "none"),
+    ("what's on my resume about Rust", Q.PROFILE, ["Rust"], "none"),
+    ("where did I study for my degree", Q.PROFILE, [], "none"),
+    ("summarise my work experience", Q.PROFILE, [], "none"),
+    ("what is my educational background", Q.PROFILE, [], "none"),
+    ("I prefer dark mode in every app", Q.PREFERENCE_SENSITIVE, [], "none"),
+    ("never suggest meetings before 10am", Q.PREFERENCE_SENSITIVE, [], "none"),
+    ("what's my favourite coffee order", Q.PREFERENCE_SENSITIVE, [], "none"),
+    ("remember that I don't eat meat", Q.PREFERENCE_SENSITIVE, [], "none"),
+    ("who is Alex Chen", Q.RELATIONAL, ["Alex Chen"], "none"),
+    ("how does Priya know Alex", Q.RELATIONAL, ["Priya Sharma", "Alex Chen"], "none"),
+    ("which colleagues work with Dr. Mehta", Q.RELATIONAL, ["Dr. Mehta"], "none"),
+    ("who introduced me to the Acme team", Q.RELATIONAL, ["Acme Corp"], "none"),
+    ("my sister's birthday", Q.RELATIONAL, [], "none"),
+    ("when did I last talk to Priya", Q.TEMPORAL, ["Priya Sharma"], "none"),
+    ("when was the PyCon talk", Q.TEMPORAL, ["PyCon"], "none"),
+    ("what happened on 2026-03-02", Q.FACTUAL_RECALL, [], "specific_date"),
+    ("what did I do two weeks ago", Q.TEMPORAL, [], "past"),
+    ("timeline of the Berlin trip", Q.TEMPORAL, ["Berlin"], "none"),
+    ("history of changes to the browser project since March", Q.TEMPORAL, ["Agentic Browser"], "specific_date"),
+    ("what am I working on this week", Q.PLANNING, [], "recent"),
+    ("next steps for the Agentic Browser roadmap", Q.PLANNING, ["Agentic Browser"], "none"),
+    ("deadlines for the OpenSearch migration task", Q.PLANNING, ["OpenSearch"], "none"),
+    ("my goals for this year", Q.PLANNING, [], "recent"),
+    ("draft a reply thanking Alex", Q.ACTION_TASK, ["Alex Chen"], "none"),
+    ("schedule a call with Priya on Monday", Q.ACTION_TASK, ["Priya Sharma"], "specific_date"),
+    ("book a hotel in Berlin for the conference", Q.ACTION_TASK, ["Berlin"], "none"),
+    ("remind me to renew the passport", Q.ACTION_TASK, [], "none"),
+    ("what is OpenSearch used for in my setup", Q.FACTUAL_RECALL, ["OpenSearch"], "none"),
+    ("where is the Acme office", Q.FACTUAL_RECALL, ["Acme Corp"], "none"),
+    ("how many talks did I give in 2025", Q.FACTUAL_RECALL, [], "specific_date"),
+    ("tell me about the Berlin trip in April", Q.FACTUAL_RECALL, ["Berlin"], "specific_date"),
+    ("what did I say about Rust recently", Q.FACTUAL_RECALL, ["Rust"], "recent"),
+    ("did I pay the Acme invoice in the last 3 days", Q.FACTUAL_RECALL, ["Acme Corp"], "recent"),
+    ("hi", Q.CONVERSATIONAL, [], "none"),
+    ("thanks!", Q.CONVERSATIONAL, [], "none"),
+    ("ok cool", Q.CONVERSATIONAL, [], "none"),
+    ("good morning", Q.CONVERSATIONAL, [], "none"),
+    # weak or no rule cues
+    ("the thing from before about the other stuff I mentioned", Q.FACTUAL_RECALL, [], "none"),
+    ("could you go over everything related to that idea again", Q.FACTUAL_RECALL, [], "none"),
+    ("compare it to what Priya suggested about the browser project", Q.FACTUAL_RECALL,
+     ["Priya Sharma", "Agentic Browser"], "none"),
+]
+
+
+OPEN_ENDED = ["notes I saved today", "what did Alex say in the last 3 days",
+              "meetings this week", "what have I been reading recently"]
+
+
+class FixedDatetime(datetime):
+    current = NOW
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threshold", type=float, default=qp.ESCALATE_BELOW)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    qp.datetime = FixedDatetime
+    labels = {q: (qt, ents, tc) for q, qt, ents, tc in FIXTURES}
+
+    def stub_llm(query: str) -> dict:
+        qt, ents, tc = labels[query]
+        return {"query_type": qt.value, "entity_mentions": ents, "time_constraint": tc}
+
+    gazetteer = EntityGazetteer()
+    gazetteer.load(ENTITIES)
+    planner = QueryPlanner(gazetteer=gazetteer, llm_plan=stub_llm, escalate_below=args.threshold)
+
+    kept = type_ok = ent_ok = time_ok = confident_wrong = final_ok = 0
+    for query, want_type, want_ents, want_time in FIXTURES:
+        rules = qp.heuristic_plan(query, gazetteer.trie, NOW)
+        plan = planner.plan(query)
+        final_ok += plan.query_type == want_type
+        escalated = plan.source == "llm"
+        marks = []
+        if not escalated:
+            kept += 1
+            type_ok += rules.query_type == want_type
+            confident_wrong += rules.query_type != want_type
+        ent_ok += sorted(rules.entity_mentions) == sorted(want_ents)
+        time_ok += rules.time_constraint == want_time
+        if rules.query_type != want_type:
+            marks.append(f"type={rules.query_type.value}")
+        if sorted(rules.entity_mentions) != sorted(want_ents):
+            marks.append(f"entities={rules.entity_mentions}")
+        if rules.time_constraint != want_time:
+            marks.append(f"time={rules.time_constraint}")
+        if args.verbose or (marks and not escalated):
+            flag = "LLM " if escalated else "    "
+            print(f"  {flag}{rules.confidence:.2f}  {query!r}  {' '.join(marks)}")
+
+    n = len(FIXTURES)
+    stats = planner.stats()
+    print(f"\nfixtures: {n}   kept by rules: {kept}   escalated: {stats['escalations']} "
+          f"({stats['escalation_rate']:.1%})")
+    print(f"rule query-type accuracy (kept): {type_ok}/{kept}   confidently wrong: {confident_wrong}")
+    print(f"rule entity accuracy (all): {ent_ok}/{n}   time-constraint accuracy (all): {time_ok}/{n}")
+    print(f"final query-type accuracy with stub LLM: {final_ok}/{n}")
+
+    for query, *_ in FIXTURES:
+        planner.plan(query)
+    repeat = planner.stats()
+    cache_ok = repeat["cache_hits"] == n and repeat["escalations"] == stats["escalations"]
+    print(f"repeat pass served from cache: {cache_ok}")
+
+    for query in OPEN_ENDED:
+        planner.plan(query)
+    hits = planner.cache_hits
+    FixedDatetime.current = NOW + timedelta(hours=6)
+    later = [planner.plan(query) for query in OPEN_ENDED]
+    written = {"created_at": NOW + timedelta(hours=5)}
+    fresh_ok = (planner.cache_hits == hits + len(OPEN_ENDED)
+                and all(p.time_range and time_window(*p.time_range).matches(written) for p in later))
+    FixedDatetime.current = NOW
+    print(f"cached relative ranges still match claims written hours later: {fresh_ok}")
+
+    timings = []
+    for _ in range(20):
+        for query, *_ in FIXTURES:
+            t0 = time.perf_counter()
+            qp.heuristic_plan(query, gazetteer.trie, NOW)
+            timings.append((time.perf_counter() - t0) * 1e6)
+    timings.sort()
+    print(f"rules-only plan: p50 {statistics.median(timings):.0f}us  p95 {timings[int(len(timings) * .95)]:.0f}us")
+
+    ok = cache_ok and fresh_ok and confident_wrong <= max(1, n // 20) and ent_ok >= n - 2 and time_ok >= n - 2
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Run the same kNN, BM25, filtered and hybrid queries against each VectorStore.
+
+Usage:
+    python scripts/check_vector_store_parity.py [--docs 5000] [--queries 50]
+        [--opensearch]        # also compare against the configured cluster
+
+Always compared:
+  * local brute force vs an exact numpy reference: ids, order and scores
+  * local IVF (forced on) vs the same reference: recall@k
+  * local store persisted to disk, closed and reopened: results unchanged
+  * update / delete / bulk_actions semantics (404 delete ok, missing update fails)
+
+With --opensearch the corpus is also written to a throwaway index
+(`<index>_parity`) on the configured cluster, which is deleted afterwards,
+and the overlap of the top-k results is reported per query type. OpenSearch's
+HNSW search is approximate and its analyser is full Porter, so exact equality
+is not expected.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.clients.local_vector_store import LocalVectorStore  # noqa: E402
+from core.clients.opensearch import _CLAIM_MAPPING, EMBEDDING_DIM, IDX_CLAIMS  # noqa: E402
+from core.clients.vector_store import HYBRID_TEXT_FIELDS  # noqa: E402
+
+_TOPICS = {
+    "work": "maintains retrieval pipeline browser agent postgres migration deploys service",
+    "food": "prefers vegetarian dinner spicy curry coffee morning tea bakery",
+    "travel": "flying berlin conference hotel booked train tickets visa passport",
+    "people": "sister birthday friend alex mentor meeting colleague manager",
+    "health": "running marathon knee injury physiotherapy sleep schedule gym",
+}
+_SEGMENTS = ["projects_and_goals", "preferences_and_corrections", "contextual_incidents",
+             "people_and_relationships", "core_identity"]
+
+
+def corpus(n: int, rng: np.random.Generator, prng: random.Random):
+    centres = {t: rng.normal(size=EMBEDDING_DIM) for t in _TOPICS}
+    docs = []
+    for i in range(n):
+        topic = prng.choice(list(_TOPICS))
+        words = prng.sample(_TOPICS[topic].split(), 4) + prng.sample(_TOPICS[prng.choice(list(_TOPICS))].split(), 2)
+        emb = centres[topic] + rng.normal(scale=1.2, size=EMBEDDING_DIM)
+        docs.append((f"c{i}", {
+            "claim_id": f"c{i}", "claim_text": " ".join(words), "embedding": emb.tolist(),
+            "segment": prng.choice(_SEGMENTS), "status": prng.choice(["active"] * 4 + ["archived"]),
+            "memory_class": "semantic", "tier": "long_term", "confidence": 0.5,
+            "created_at": f"2026-01-{1 + i % 28:02d}T00:00:00Z",
+        }))
+    return docs, centres
+
+
+def reference_knn(docs, query: np.ndarray, k: int, filters=None) -> list[tuple[str, float]]:
+    ids, mat = [], []
+    for did, d in docs:
+        if filters and any(d.get(f) != v for f, v in filters.items()):
+            continue
+        ids.append(did)
+        mat.append(d["embedding"])
+    m = np.asarray(mat, dtype=np.float32)
+    m /= np.linalg.norm(m, axis=1, keepdims=True)
+    q = (query / np.linalg.norm(query)).astype(np.float32)
+    sims = m @ q
+    order = np.argsort(-sims, kind="stable")[:k]
+    return [(ids[i], float((1 + sims[i]) / 2)) for i in order]
+
+
+def overlap(a: list[dict], b: list[dict]) -> float:
+    ia, ib = {h["_id"] for h in a}, {h["_id"] for h in b}
+    return len(ia & ib) / max(len(ia), 1)
+
+
+def queries(n: int, centres, rng: np.random.Generator, prng: random.Random):
+    out = []
+    for _ in range(n):
+        topic = prng.choice(list(_TOPICS))
+        vec = centres[topic] + rng.normal(scale=1.2, size=EMBEDDING_DIM)
+        text = " ".join(prng.sample(_TOPICS[topic].split(), 2))
+        filters = prng.choice([None, {"status": "active"}, {"segment": prng.choice(_SEGMENTS)}])
+        out.append((vec, text, filters))
+    return out
+
+
+def check_local(args, docs, qs) -> bool:
+    ok = True
+    brute = LocalVectorStore()
+    ivf = LocalVectorStore(ivf_min_rows=0, nprobe=args.nprobe)
+    for store in (brute, ivf):
+        store.bulk_index(IDX_CLAIMS, docs)
+
+    exact, recalls = 0, []
+    t_ref = t_brute = t_ivf = 0.0
+    for vec, _, filters in qs:
+        t0 = time.perf_counter()
+        want = reference_knn(docs, vec, args.k, filters)
+        t_ref += time.perf_counter() - t0
+        t0 = time.perf_counter()
+        got = brute.knn_search(IDX_CLAIMS, vec.tolist(), args.k, filters)
+        t_brute += time.perf_counter() - t0
+        t0 = time.perf_counter()
+        approx = ivf.knn_search(IDX_CLAIMS, vec.tolist(), args.k)
+        t_ivf += time.perf_counter() - t0
+        if [h["_id"] for h in got] == [w[0] for w in want] and \
+                np.allclose([h["_score"] for h in got], [w[1] for w in want], atol=1e-6):
+            exact += 1
+        truth = {w[0] for w in reference_knn(docs, vec, args.k)}
+        recalls.append(len(truth & {h["_id"] for h in approx}) / args.k)
+    n = len(qs)
+    ok &= exact == n
+    print(f"brute kNN == reference: {exact}/{n}   "
+          f"per query: reference {t_ref / n * 1000:.1f}ms  brute {t_brute / n * 1000:.1f}ms  "
+          f"ivf {t_ivf / n * 1000:.1f}ms")
+    print(f"IVF recall@{args.k} (nprobe={args.nprobe}): mean {np.mean(recalls):.3f}  min {min(recalls):.2f}")
+
+    # filters are honoured by every query type
+    for vec, text, filters in qs:
+        if not filters:
+            continue
+        for hits in (brute.knn_search(IDX_CLAIMS, vec.tolist(), args.k, filters),
+                     brute.text_search(IDX_CLAIMS, text, HYBRID_TEXT_FIELDS, args.k, filters),
+                     brute.hybrid_search(IDX_CLAIMS, text, vec.tolist(), args.k, filters)):
+            ok &= all(h[f] == v for h in hits for f, v in filters.items())
+    print(f"filters respected by knn/text/hybrid: {ok}")
+
+    # persistence round trip
+    with tempfile.TemporaryDirectory() as tmp:
+        disk = LocalVectorStore(tmp)
+        disk.bulk_index(IDX_CLAIMS, docs)
+        disk.update_document(IDX_CLAIMS, "c1", {"status": "archived"})
+        disk.delete_document(IDX_CLAIMS, "c2")
+        before = [disk.hybrid_search(IDX_CLAIMS, t, v.tolist(), args.k, f) for v, t, f in qs[:10]]
+        disk.close()
+        reopened = LocalVectorStore(tmp)
+        after = [reopened.hybrid_search(IDX_CLAIMS, t, v.tolist(), args.k, f) for v, t, f in qs[:10]]
+        same = [[h["_id"] for h in a] for a in before] == [[h["_id"] for h in b] for b in after]
+        same &= reopened.get_document(IDX_CLAIMS, "c2") is None
+        same &= reopened.get_document(IDX_CLAIMS, "c1")["status"] == "archived"
+        reopened.close()
+    ok &= same
+    print(f"persisted, reopened, results unchanged: {same}")
+
+    # bulk_actions semantics mirror the OpenSearch client
+    failed = brute.bulk_actions([
+        {"_op_type": "delete", "_index": IDX_CLAIMS, "_id": "missing"},
+        {"_op_type": "update", "_index": IDX_CLAIMS, "_id": "missing-too", "doc": {"status": "x"}},
+        {"_op_type": "update", "_index": IDX_CLAIMS, "_id": "c3", "doc": {"status": "archived"}},
+    ])
+    semantics = failed == {"missing-too"} and brute.get_document(IDX_CLAIMS, "c3")["status"] == "archived"
+    ok &= semantics
+    print(f"bulk_actions semantics (404 delete ok, missing update fails): {semantics}")
+    return ok
+
+
+def check_opensearch(args, docs, qs) -> None:
+    from core.clients.opensearch import OpenSearchClient
+
+    index = f"{IDX_CLAIMS}_parity"
+    remote = OpenSearchClient()
+    remote.connect()
+    if remote.client.indices.exists(index=index):
+        remote.client.indices.delete(index=index)
+    remote.client.indices.create(index=index, body=_CLAIM_MAPPING)
+    try:
+        remote.bulk_index(index, docs)
+        local = LocalVectorStore()
+        local.bulk_index(IDX_CLAIMS, docs)
+        stats = {"knn": [], "text": [], "hybrid": []}
+        for vec, text, filters in qs:
+            stats["knn"].append(overlap(local.knn_search(IDX_CLAIMS, vec.tolist(), args.k, filters),
+                                        remote.knn_search(index, vec.tolist(), args.k, filters)))
+            stats["text"].append(overlap(local.text_search(IDX_CLAIMS, text, HYBRID_TEXT_FIELDS, args.k, filters),
+                                         remote.text_search(index, text, HYBRID_TEXT_FIELDS, args.k, filters)))
+            stats["hybrid"].append(overlap(local.hybrid_search(IDX_CLAIMS, text, vec.tolist(), args.k, filters),
+                                           remote.hybrid_search(index, text, vec.tolist(), args.k, filters)))
+        for name, vals in stats.items():
+            print(f"opensearch top-{args.k} overlap [{name}]: mean {np.mean(vals):.3f}  min {min(vals):.2f}")
+    finally:
+        remote.client.indices.delete(index=index)
+        remote.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--opensearch", action="store_true")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng, prng = np.random.default_rng(args.seed), random.Random(args.seed)
+    docs, centres = corpus(args.docs, rng, prng)
+    qs = queries(args.queries, centres, rng, prng)
+    ok = check_local(args, docs, qs)
+    if args.opensearch:
+        check_opensearch(args, docs, qs)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Check the web search service's cache, in-flight coalescing and error handling offline.
+
+Usage:
+    python scripts/check_web_search.py [--callers 20] [--latency-ms 50]
+
+A WebSearchService runs over FixtureSearchProvider, which also serves as its
+page fetcher, with a hand-driven clock. The fixture records every provider
+and page call.
+
+Checked:
+  * --callers concurrent identical searches make one provider call. The
+    searches vary only in case and whitespace. Every caller gets the same
+    results
+  * cancelling the caller that started a fetch does not cancel the
+    callers coalesced onto it. Cancelling every caller still lets the fetch
+    finish and fill the cache
+  * cache hits until the TTL passes, then a miss. Results handed out are
+    copies. Empty results are not cached
+  * fetch_top_k fills page bodies for the top results only
+  * a provider error reaches every coalesced caller and is not cached, so
+    the next search retries. `web_search` and GoogleSearchService.search
+    return [] for it
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.google_search import search_service as ss  # noqa: E402
+
+RESULTS = [{"url": f"https://example.com/{i}", "title": f"Result {i}", "md_body_content": f"snippet {i}"}
+           for i in range(8)]
+PAGES = {r["url"]: f"# Page {i}\nfull body" for i, r in enumerate(RESULTS)}
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make(latency: float, **fixture_kwargs):
+    provider = ss.FixtureSearchProvider({"python asyncio": RESULTS, "nothing here": []}, pages=PAGES,
+                                        latency=latency, **fixture_kwargs)
+    clock = Clock()
+    service = ss.WebSearchService(provider=provider, page_fetcher=provider, ttl_seconds=60, clock=clock)
+    return service, provider, clock
+
+
+def report(name: str, good: bool, detail: str = "") -> bool:
+    print(f"  {'ok ' if good else 'BAD'} {name}{': ' + detail if detail else ''}")
+    return good
+
+
+async def check_coalescing(callers: int, latency: float) -> bool:
+    service, provider, _ = make(latency)
+    queries = ["python asyncio", "  Python   asyncio ", "PYTHON ASYNCIO"]
+    got = await asyncio.gather(*(service.search(queries[i % 3], max_results=5) for i in range(callers)))
+    same = all(r == got[0] for r in got) and len(got[0]) == 5
+    return report("concurrent identical searches", len(provider.calls) == 1 and same,
+                  f"{callers} callers, {len(provider.calls)} provider call, stats {service.stats}")
+
+
+async def check_cancel(latency: float) -> bool:
+    ok = True
+    service, provider, _ = make(latency)
+    leader = asyncio.create_task(service.search("python asyncio"))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(service.search("python asyncio"))
+    await asyncio.sleep(latency / 4)
+    leader.cancel()
+    try:
+        results = await follower
+        survived = len(results) == 5
+    except asyncio.CancelledError:
+        survived = False
+    ok &= report("leader cancelled, follower still served", survived and leader.cancelled()
+                 and len(provider.calls) == 1)
+
+    service, provider, _ = make(latency)
+    waiters = [asyncio.create_task(service.search("python asyncio")) for _ in range(3)]
+    await asyncio.sleep(latency / 4)
+    for w in waiters:
+        w.cancel()
+    await asyncio.gather(*waiters, return_exceptions=True)
+    await asyncio.sleep(latency * 2)
+    await service.search("python asyncio")
+    ok &= report("every caller cancelled, fetch still fills the cache",
+                 len(provider.calls) == 1 and service.stats["hits"] == 1, f"stats {service.stats}")
+    return ok
+
+
+async def check_cache(latency: float) -> bool:
+    ok = True
+    service, provider, clock = make(latency)
+    first = await service.search("python asyncio")
+    first[0]["title"] = "mutated by caller"
+    second = await service.search("python   ASYNCIO")
+    ok &= report("repeat search is a cache hit with an untouched copy",
+                 len(provider.calls) == 1 and second[0]["title"] == "Result 0")
+    clock.now += 61
+    await service.search("python asyncio")
+    ok &= report("expired entry is fetched again", len(provider.calls) == 2)
+    await service.search("python asyncio", max_results=3)
+    ok &= report("different parameters are a separate entry", len(provider.calls) == 3)
+    await service.search("nothing here")
+    await service.search("nothing here")
+    ok &= report("empty results are not cached", len(provider.calls) == 5)
+
+    service, provider, _ = make(latency)
+    results = await service.search("python asyncio", max_results=5, fetch_top_k=2)
+    filled = [r["md_body_content"].startswith("# Page") for r in results]
+    ok &= report("fetch_top_k fills the top bodies only",
+                 filled == [True, True, False, False, False] and len(provider.page_calls) == 2)
+    return ok
+
+
+async def check_errors(callers: int, latency: float) -> bool:
+    ok = True
+    service, provider, _ = make(latency, errors={"python asyncio": ConnectionError("provider down")})
+    got = await asyncio.gather(*(service.search("python asyncio") for _ in range(callers)),
+                               return_exceptions=True)
+    ok &= report("provider error reaches every coalesced caller",
+                 all(isinstance(g, ConnectionError) for g in got) and len(provider.calls) == 1)
+    try:
+        await service.search("python asyncio")
+    except ConnectionError:
+        pass
+    ok &= report("failed search is retried, not cached", len(provider.calls) == 2)
+
+    from services.google_search_service import GoogleSearchService
+    ss._service = service
+    try:
+        helper = await ss.web_search("python asyncio")
+        routed = await GoogleSearchService().search("python asyncio")
+    finally:
+        ss._service = None
+    ok &= report("web_search and GoogleSearchService return [] on provider errors",
+                 helper == [] and routed == [])
+    return ok
+
+
+async def main_async(args) -> bool:
+    latency = args.latency_ms / 1000
+    ok = True
+    print("coalescing")
+    ok &= await check_coalescing(args.callers, latency)
+    ok &= await check_cancel(latency)
+    print("cache")
+    ok &= await check_cache(latency)
+    print("errors")
+    ok &= await check_errors(args.callers, latency)
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--callers", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(main_async(args)) else 1)
+
+
+if __name__ == "__main__":
+    main()
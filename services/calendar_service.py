@@ -6,9 +6,9 @@ logger = get_logger(__name__)
 
 
 class CalendarService:
-    def list_events(self, access_token: str, max_results: int = 10):
+    async def list_events(self, access_token: str, max_results: int = 10):
         try:
-            return get_calendar_events(
+            return await get_calendar_events(
                 access_token,
                 max_results=max_results,
             )
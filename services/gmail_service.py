@@ -8,9 +8,9 @@ logger = get_logger(__name__)
 
 
 class GmailService:
-    def list_unread_messages(self, access_token: str, max_results: int = 10):
+    async def list_unread_messages(self, access_token: str, max_results: int = 10):
         try:
-            return list_unread(
+            return await list_unread(
                 access_token,
                 max_results=max_results,
             )
@@ -19,9 +19,9 @@ class GmailService:
             logger.exception("Error listing unread messages: %s", e)
             raise
 
-    def fetch_latest_messages(self, access_token: str, max_results: int = 5):
+    async def fetch_latest_messages(self, access_token: str, max_results: int = 5):
         try:
-            return get_latest_emails(
+            return await get_latest_emails(
                 access_token,
                 max_results=max_results,
             )
@@ -1,18 +1,19 @@
 from core import get_logger
-from tools.google_search.seach_agent import web_search_pipeline
+from tools.google_search.search_service import web_search
 
 logger = get_logger(__name__)
 
 
 class GoogleSearchService:
-    def search(self, query: str, max_results: int = 5):
+    async def search(self, query: str, max_results: int = 5, fetch_top_k: int = 0):
         try:
             logger.info(
                 "google_search request received: query=%s, max_results=%s",
                 query,
                 max_results,
             )
-            results = web_search_pipeline(query, max_results=max_results)
+            # Provider errors are logged and come back as [], as before the shared service.
+            results = await web_search(query, max_results=max_results, fetch_top_k=fetch_top_k)
 
             if not results:
                 logger.warning("google_search returned no results for query: %s", query)
@@ -1,26 +1,20 @@
-import requests
+import asyncio
 import datetime
 import sys
 
+from core.clients.google_api import get_google_api
 
-def get_calendar_events(access_token: str, max_results: int = 10):
+
+async def get_calendar_events(access_token: str, max_results: int = 10):
     """Fetch user's upcoming calendar events."""
-    url = "https://www.googleapis.com/calendar/v3/calendars/primary/events"
-    headers = {"Authorization": f"Bearer {access_token}"}
-
-    params = {
-        "maxResults": max_results,
-        "orderBy": "startTime",
-        "singleEvents": True,
-        "timeMin": datetime.datetime.utcnow().isoformat() + "Z",
-    }
-
-    response = requests.get(url, headers=headers, params=params, timeout=8)
-    if response.status_code != 200:
-        raise Exception(
-            f"Failed to get calendar events: {response.status_code} {response.text}"
+    try:
+        return await get_google_api().calendar_list_events(
+            access_token,
+            time_min=datetime.datetime.utcnow().isoformat() + "Z",
+            max_results=max_results,
         )
-    return response.json().get("items", [])
+    except Exception as e:
+        raise Exception(f"Failed to get calendar events: {e}") from e
 
 
 def main():
@@ -30,9 +24,15 @@ def main():
 
     access_token = sys.argv[1]
 
+    async def _run():
+        try:
+            return await get_calendar_events(access_token)
+        finally:
+            await get_google_api().close()
+
     try:
         print("\nFetching updated calendar events...")
-        events = get_calendar_events(access_token)
+        events = asyncio.run(_run())
         if not events:
             print("No upcoming events found.")
         else:
@@ -0,0 +1,372 @@
+"""
+Code index for cloned repositories — a trigram inverted index for substring and
+regex search plus a symbol table of definitions.
+
+The index is built once at clone time and persisted inside the clone's `.git`
+directory, so the repo agent's `search_files` and `find_symbol` tools only scan
+files that can possibly match instead of grepping the whole checkout per call.
+"""
+
+from __future__ import annotations
+
+import ast
+import fnmatch
+import gzip
+import json
+import os
+import re
+import subprocess
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+try:  # Python 3.11+ exposes the regex parser under the private `re` package.
+    from re import _constants as _sre_constants
+    from re import _parser as _sre_parse
+except ImportError:  # pragma: no cover - older interpreters
+    import sre_constants as _sre_constants  # type: ignore[no-redef]
+    import sre_parse as _sre_parse  # type: ignore[no-redef]
+
+from core.config import get_logger
+
+logger = get_logger(__name__)
+
+INDEX_VERSION = 2
+INDEX_FILENAME = "agentic_code_index.json.gz"
+
+MAX_INDEXED_FILE_BYTES = 1_000_000
+MAX_SEARCH_LINES = 150
+MAX_SYMBOL_RESULTS = 50
+
+_SKIP_DIRS = {
+    ".git", "node_modules", ".venv", "venv", "__pycache__", "dist", "build",
+    ".next", ".mypy_cache", ".pytest_cache", ".tox", "target", "vendor",
+}
+
+# Lightweight definition patterns for languages without a stdlib parser.
+_SYMBOL_PATTERNS: dict[str, list[tuple[str, re.Pattern[str]]]] = {
+    "js": [
+        ("function", re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*([A-Za-z_$][\w$]*)")),
+        ("class", re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:abstract\s+)?class\s+([A-Za-z_$][\w$]*)")),
+        ("function", re.compile(r"^\s*(?:export\s+)?(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*=\s*(?:async\s+)?(?:\([^)]*\)|[A-Za-z_$][\w$]*)\s*=>")),
+        ("interface", re.compile(r"^\s*(?:export\s+)?interface\s+([A-Za-z_$][\w$]*)")),
+        ("type", re.compile(r"^\s*(?:export\s+)?type\s+([A-Za-z_$][\w$]*)\s*(?:<[^>]*>)?\s*=")),
+        ("enum", re.compile(r"^\s*(?:export\s+)?(?:const\s+)?enum\s+([A-Za-z_$][\w$]*)")),
+    ],
+    "go": [
+        ("function", re.compile(r"^func\s+(?:\([^)]*\)\s*)?([A-Za-z_]\w*)")),
+        ("type", re.compile(r"^type\s+([A-Za-z_]\w*)")),
+    ],
+    "rust": [
+        ("function", re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:async\s+)?(?:unsafe\s+)?fn\s+([A-Za-z_]\w*)")),
+        ("struct", re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?struct\s+([A-Za-z_]\w*)")),
+        ("enum", re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?enum\s+([A-Za-z_]\w*)")),
+        ("trait", re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?trait\s+([A-Za-z_]\w*)")),
+    ],
+    "jvm": [
+        ("class", re.compile(r"^\s*(?:(?:public|private|protected|internal|abstract|final|static|sealed|data|open)\s+)*(?:class|interface|enum|record|object)\s+([A-Za-z_]\w*)")),
+        ("function", re.compile(r"^\s*(?:(?:public|private|protected|internal|override|suspend|static|final)\s+)*fun\s+(?:<[^>]*>\s*)?([A-Za-z_]\w*)")),
+    ],
+    "ruby": [
+        ("function", re.compile(r"^\s*def\s+(?:self\.)?([A-Za-z_]\w*[?!=]?)")),
+        ("class", re.compile(r"^\s*(?:class|module)\s+([A-Z]\w*)")),
+    ],
+    "c": [
+        ("struct", re.compile(r"^\s*(?:typedef\s+)?(?:struct|union|enum|class)\s+([A-Za-z_]\w*)\s*[{:]")),
+        ("function", re.compile(r"^[A-Za-z_][\w\s\*&:<>,]*?\b([A-Za-z_]\w*)\s*\([^;]*\)\s*(?:const\s*)?\{?\s*$")),
+    ],
+}
+
+_EXT_LANG = {
+    ".js": "js", ".jsx": "js", ".mjs": "js", ".cjs": "js", ".ts": "js", ".tsx": "js",
+    ".go": "go",
+    ".rs": "rust",
+    ".java": "jvm", ".kt": "jvm", ".kts": "jvm", ".scala": "jvm", ".cs": "jvm",
+    ".rb": "ruby",
+    ".c": "c", ".h": "c", ".cc": "c", ".cpp": "c", ".hpp": "c", ".cxx": "c",
+}
+
+
+@dataclass
+class Symbol:
+    name: str
+    kind: str
+    path: str
+    line: int
+    qualname: str = ""
+
+
+# ── Trigram helpers ────────────────────────────────────────────────────────────
+
+def _trigrams(text: str) -> set[str]:
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _literal_runs(pattern: str) -> Optional[list[str]]:
+    """Return literal substrings every regex match must contain.
+
+    Only the top-level sequence is inspected: consecutive literal characters
+    form a run, anything else (classes, repeats, groups) ends it. Returns None
+    when the pattern cannot be narrowed (alternation at top level or parse
+    failure), which means "scan every file".
+    """
+    try:
+        parsed = _sre_parse.parse(pattern)
+    except (re.error, _sre_constants.error, TypeError):
+        return None
+
+    runs: list[str] = []
+    current: list[str] = []
+    for op, arg in parsed:
+        if op is _sre_constants.LITERAL:
+            current.append(chr(arg))
+            continue
+        if op is _sre_constants.BRANCH:
+            return None
+        if current:
+            runs.append("".join(current))
+            current = []
+    if current:
+        runs.append("".join(current))
+    return runs
+
+
+# ── Symbol extraction ──────────────────────────────────────────────────────────
+
+def _python_symbols(rel_path: str, source: str) -> list[Symbol]:
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return _regex_symbols(rel_path, source, [
+            ("function", re.compile(r"^\s*(?:async\s+)?def\s+([A-Za-z_]\w*)")),
+            ("class", re.compile(r"^\s*class\s+([A-Za-z_]\w*)")),
+        ])
+
+    symbols: list[Symbol] = []
+
+    def _visit(nodes: Iterable[ast.AST], prefix: str, in_class: bool) -> None:
+        for node in nodes:
+            if isinstance(node, ast.ClassDef):
+                qual = f"{prefix}{node.name}"
+                symbols.append(Symbol(node.name, "class", rel_path, node.lineno, qual))
+                _visit(node.body, f"{qual}.", True)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                qual = f"{prefix}{node.name}"
+                kind = "method" if in_class else "function"
+                symbols.append(Symbol(node.name, kind, rel_path, node.lineno, qual))
+                _visit(node.body, f"{qual}.", False)
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)) and not prefix:
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                for target in targets:
+                    if isinstance(target, ast.Name) and target.id.isupper():
+                        symbols.append(Symbol(target.id, "constant", rel_path, node.lineno, target.id))
+
+    _visit(tree.body, "", False)
+    return symbols
+
+
+def _regex_symbols(rel_path: str, source: str,
+                   patterns: list[tuple[str, re.Pattern[str]]]) -> list[Symbol]:
+    symbols: list[Symbol] = []
+    for lineno, line in enumerate(source.splitlines(), start=1):
+        for kind, rx in patterns:
+            m = rx.match(line)
+            if m:
+                symbols.append(Symbol(m.group(1), kind, rel_path, lineno, m.group(1)))
+                break
+    return symbols
+
+
+def _extract_symbols(rel_path: str, source: str) -> list[Symbol]:
+    ext = os.path.splitext(rel_path)[1].lower()
+    if ext in (".py", ".pyi"):
+        return _python_symbols(rel_path, source)
+    lang = _EXT_LANG.get(ext)
+    if lang is None:
+        return []
+    return _regex_symbols(rel_path, source, _SYMBOL_PATTERNS[lang])
+
+
+# ── Index ──────────────────────────────────────────────────────────────────────
+
+class CodeIndex:
+    """Trigram + symbol index over a checked-out repository."""
+
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root).resolve()
+        self.revision = ""
+        self.files: list[str] = []
+        self.oversized: list[str] = []      # text files over MAX_INDEXED_FILE_BYTES, scanned directly
+        self.postings: dict[str, set[int]] = {}
+        self.symbols: list[Symbol] = []
+        self._symbols_by_name: dict[str, list[Symbol]] = {}
+
+    # ── Build / persist ────────────────────────────────────────────────────────
+
+    @classmethod
+    def build(cls, root: str | Path) -> "CodeIndex":
+        index = cls(root)
+        index.revision = _git_revision(index.root)
+        for rel_path, text in index._iter_source_files():
+            file_id = len(index.files)
+            index.files.append(rel_path)
+            for tri in _trigrams(text):
+                index.postings.setdefault(tri, set()).add(file_id)
+            index.symbols.extend(_extract_symbols(rel_path, text))
+        index._rebuild_symbol_map()
+        logger.info(
+            "Code index built for %s: files=%d oversized=%d trigrams=%d symbols=%d",
+            index.root, len(index.files), len(index.oversized), len(index.postings), len(index.symbols),
+        )
+        return index
+
+    @classmethod
+    def load(cls, root: str | Path) -> Optional["CodeIndex"]:
+        index = cls(root)
+        path = index.index_path
+        if not path.exists():
+            return None
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError) as exc:
+            logger.warning("Ignoring unreadable code index %s: %s", path, exc)
+            return None
+        if data.get("version") != INDEX_VERSION:
+            return None
+        index.revision = data.get("revision", "")
+        index.files = data["files"]
+        index.oversized = data["oversized"]
+        index.postings = {tri: set(ids) for tri, ids in data["postings"].items()}
+        index.symbols = [Symbol(**s) for s in data["symbols"]]
+        index._rebuild_symbol_map()
+        return index
+
+    @classmethod
+    def load_or_build(cls, root: str | Path) -> "CodeIndex":
+        """Reuse the persisted index when it matches the checkout's HEAD."""
+        cached = cls.load(root)
+        if cached is not None and cached.revision == _git_revision(cached.root):
+            return cached
+        index = cls.build(root)
+        index.save()
+        return index
+
+    @property
+    def index_path(self) -> Path:
+        git_dir = self.root / ".git"
+        base = git_dir if git_dir.is_dir() else self.root
+        return base / INDEX_FILENAME
+
+    def save(self) -> None:
+        data = {
+            "version": INDEX_VERSION,
+            "revision": self.revision,
+            "files": self.files,
+            "oversized": self.oversized,
+            "postings": {tri: sorted(ids) for tri, ids in self.postings.items()},
+            "symbols": [asdict(s) for s in self.symbols],
+        }
+        try:
+            with gzip.open(self.index_path, "wt", encoding="utf-8", compresslevel=1) as fh:
+                json.dump(data, fh, separators=(",", ":"))
+        except OSError as exc:
+            logger.warning("Could not persist code index to %s: %s", self.index_path, exc)
+
+    def _iter_source_files(self) -> Iterable[tuple[str, str]]:
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if d not in _SKIP_DIRS]
+            for name in filenames:
+                full = Path(dirpath) / name
+                try:
+                    if full.is_symlink():
+                        continue
+                    if full.stat().st_size > MAX_INDEXED_FILE_BYTES:
+                        with full.open("rb") as fh:
+                            if b"\x00" not in fh.read(8192):
+                                self.oversized.append(full.relative_to(self.root).as_posix())
+                        continue
+                    raw = full.read_bytes()
+                except OSError:
+                    continue
+                if b"\x00" in raw[:8192]:
+                    continue  # binary
+                yield full.relative_to(self.root).as_posix(), raw.decode("utf-8", errors="replace")
+
+    def _rebuild_symbol_map(self) -> None:
+        self._symbols_by_name = {}
+        for sym in self.symbols:
+            self._symbols_by_name.setdefault(sym.name.lower(), []).append(sym)
+
+    # ── Queries ────────────────────────────────────────────────────────────────
+
+    def candidate_files(self, pattern: str, file_glob: str = "") -> list[str]:
+        """Files that may contain a match, narrowed by the trigram index."""
+        runs = _literal_runs(pattern)
+        ids: Optional[set[int]] = None
+        for run in runs or []:
+            for tri in _trigrams(run):
+                posting = self.postings.get(tri, set())
+                ids = set(posting) if ids is None else ids & posting
+                if not ids:
+                    return []
+        paths = self.files if ids is None else [self.files[i] for i in sorted(ids)]
+        if file_glob:
+            paths = [p for p in paths if fnmatch.fnmatch(os.path.basename(p), file_glob)]
+        return paths
+
+    def search(self, pattern: str, file_glob: str = "",
+               max_lines: int = MAX_SEARCH_LINES) -> list[str]:
+        """grep -rn style search restricted to trigram candidates.
+
+        Files too large for the index are always scanned directly, after the
+        indexed candidates.
+        """
+        regex = re.compile(pattern)
+        out: list[str] = []
+        oversized = self.oversized
+        if file_glob:
+            oversized = [p for p in oversized if fnmatch.fnmatch(os.path.basename(p), file_glob)]
+        for rel_path in self.candidate_files(pattern, file_glob) + oversized:
+            try:
+                with (self.root / rel_path).open(errors="replace") as fh:
+                    for lineno, line in enumerate(fh, start=1):
+                        line = line.rstrip("\r\n")
+                        if regex.search(line):
+                            out.append(f"./{rel_path}:{lineno}:{line}")
+                            if len(out) >= max_lines:
+                                return out
+            except OSError:
+                continue
+        return out
+
+    def find_symbol(self, name: str, kind: str = "",
+                    limit: int = MAX_SYMBOL_RESULTS) -> list[Symbol]:
+        """Exact (case-insensitive) definition matches first, then substring matches."""
+        key = name.lower()
+        exact = list(self._symbols_by_name.get(key, []))
+        if "." in name:
+            exact += [s for s in self.symbols if s.qualname.lower() == key and s not in exact]
+        partial: list[Symbol] = []
+        if len(exact) < limit:
+            partial = [
+                s for n, syms in self._symbols_by_name.items()
+                if n != key and key in n
+                for s in syms
+            ]
+        matches = exact + partial
+        if kind:
+            matches = [s for s in matches if s.kind == kind]
+        return matches[:limit]
+
+
+def _git_revision(root: Path) -> str:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True, text=True, timeout=10, cwd=str(root),
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return ""
+    return result.stdout.strip() if result.returncode == 0 else ""
@@ -7,6 +7,7 @@ from __future__ import annotations
 
 import asyncio
 import json
+import re
 import shutil
 import subprocess
 import tempfile
@@ -20,7 +21,11 @@ from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode, tools_condition
 from pydantic import BaseModel, Field
 
+from core.config import get_logger
 from core.llm import get_default_llm
+from tools.github_crawler.code_index import CodeIndex, MAX_SYMBOL_RESULTS
+
+logger = get_logger(__name__)
 
 _SYSTEM_PROMPT = """\
 You are an expert GitHub repository analyst. The repository has been cloned to: {repo_dir}
@@ -28,7 +33,8 @@ You are an expert GitHub repository analyst. The repository has been cloned to:
 Your task:
 1. Start by listing the root directory to understand the project structure.
 2. Read key files (README, package.json, pyproject.toml, main entry points, etc.).
-3. Search for relevant patterns or symbols when needed.
+3. Use `find_symbol` to jump to definitions and `search_files` for patterns; read only the
+   line ranges you need with `read_file(path, start_line, end_line)`.
 4. Synthesize your findings into a clear, accurate answer referencing specific files and code.
 
 Be thorough but efficient — read what you need, then answer decisively.
@@ -36,6 +42,7 @@ Be thorough but efficient — read what you need, then answer decisively.
 
 MAX_FILE_BYTES = 200_000
 MAX_SEARCH_LINES = 150
+MAX_RANGE_LINES = 400
 
 
 class _BashInput(BaseModel):
@@ -45,6 +52,8 @@ class _BashInput(BaseModel):
 
 class _ReadFileInput(BaseModel):
     path: str = Field(..., description="File path relative to repository root (e.g. 'src/main.py').")
+    start_line: Optional[int] = Field(default=None, description="First line to read (1-based, inclusive).")
+    end_line: Optional[int] = Field(default=None, description="Last line to read (1-based, inclusive).")
 
 
 class _SearchInput(BaseModel):
@@ -52,7 +61,12 @@ class _SearchInput(BaseModel):
     file_glob: str = Field(default="", description="Optional glob to limit files (e.g. '*.py', '*.ts').")
 
 
-def _make_repo_tools(repo_dir: str) -> list[StructuredTool]:
+class _FindSymbolInput(BaseModel):
+    name: str = Field(..., description="Symbol name or dotted qualname (e.g. 'parse', 'Parser.parse').")
+    kind: str = Field(default="", description="Optional kind filter: class, function, method, constant, interface, type, struct, enum, trait.")
+
+
+def _make_repo_tools(repo_dir: str, index: Optional[CodeIndex] = None) -> list[StructuredTool]:
     root = Path(repo_dir).resolve()
 
     async def _bash(command: str, timeout: int = 30) -> str:
@@ -81,7 +95,8 @@ def _make_repo_tools(repo_dir: str) -> list[StructuredTool]:
         except Exception as exc:
             return f"bash error: {exc}"
 
-    async def _read_file(path: str) -> str:
+    async def _read_file(path: str, start_line: Optional[int] = None,
+                         end_line: Optional[int] = None) -> str:
         try:
             target = (root / path).resolve()
             if not str(target).startswith(str(root)):
@@ -90,17 +105,44 @@ def _make_repo_tools(repo_dir: str) -> list[StructuredTool]:
                 return f"File not found: {path}"
             if not target.is_file():
                 return f"Not a file: {path}"
+            ranged = start_line is not None or end_line is not None
             size = target.stat().st_size
-            if size > MAX_FILE_BYTES:
-                return (
-                    f"File is large ({size:,} bytes). Use bash with `head -n 100 {path}` "
-                    f"or `grep` to read specific sections."
-                )
-            return target.read_text(errors="replace")
+            if not ranged:
+                if size > MAX_FILE_BYTES:
+                    return (
+                        f"File is large ({size:,} bytes). Pass start_line/end_line to read "
+                        f"a section, or use find_symbol/search_files to locate one."
+                    )
+                return target.read_text(errors="replace")
+
+            lines = target.read_text(errors="replace").splitlines()
+            start = max(start_line or 1, 1)
+            end = min(end_line or len(lines), len(lines), start + MAX_RANGE_LINES - 1)
+            if start > len(lines):
+                return f"{path} has only {len(lines)} lines."
+            body = "\n".join(f"{n}: {lines[n - 1]}" for n in range(start, end + 1))
+            return f"{path} lines {start}-{end} of {len(lines)}:\n{body}"
         except Exception as exc:
             return f"read_file error: {exc}"
 
     async def _search(pattern: str, file_glob: str = "") -> str:
+        if index is not None:
+            def _run_indexed() -> str:
+                lines = index.search(pattern, file_glob, max_lines=MAX_SEARCH_LINES + 1)
+                if not lines:
+                    return "No matches found."
+                if len(lines) > MAX_SEARCH_LINES:
+                    lines = lines[:MAX_SEARCH_LINES]
+                    lines.append(f"... output truncated (showing {MAX_SEARCH_LINES} of many matches)")
+                return "\n".join(lines)
+
+            try:
+                return await asyncio.to_thread(_run_indexed)
+            except re.error as exc:
+                return f"search_files error: invalid regex: {exc}"
+            except Exception as exc:
+                return f"search_files error: {exc}"
+
         cmd = ["grep", "-rn", "--color=never"]
         if file_glob:
             cmd += ["--include", file_glob]
@@ -130,6 +172,17 @@ def _make_repo_tools(repo_dir: str) -> list[StructuredTool]:
         except Exception as exc:
             return f"search_files error: {exc}"
 
+    async def _find_symbol(name: str, kind: str = "") -> str:
+        if index is None:
+            return "Symbol index unavailable for this repository; use search_files instead."
+        matches = index.find_symbol(name, kind=kind)
+        if not matches:
+            return f"No definitions found for '{name}'."
+        lines = [f"{m.kind} {m.qualname or m.name} — {m.path}:{m.line}" for m in matches]
+        if len(matches) >= MAX_SYMBOL_RESULTS:
+            lines.append(f"... showing first {MAX_SYMBOL_RESULTS} matches")
+        return "\n".join(lines)
+
     return [
         StructuredTool(
             name="bash",
@@ -142,14 +195,27 @@ def _make_repo_tools(repo_dir: str) -> list[StructuredTool]:
         ),
         StructuredTool(
             name="read_file",
-            description="Read a file's full contents by its path relative to the repository root.",
+            description=(
+                "Read a file by its path relative to the repository root. "
+                "Pass start_line/end_line (1-based, inclusive) to read only a line range; "
+                "ranged output is prefixed with line numbers."
+            ),
             coroutine=_read_file,
             args_schema=_ReadFileInput,
         ),
+        StructuredTool(
+            name="find_symbol",
+            description=(
+                "Locate definitions (classes, functions, methods, types) by name using the "
+                "repository's symbol index. Returns kind, qualified name, file and line."
+            ),
+            coroutine=_find_symbol,
+            args_schema=_FindSymbolInput,
+        ),
         StructuredTool(
             name="search_files",
             description=(
-                "Search for a regex pattern across the repository using grep. "
+                "Search for a regex pattern across the repository (trigram-indexed, grep -rn output). "
                 "Optionally restrict to a file glob like '*.py' or '*.ts'."
             ),
             coroutine=_search,
@@ -201,7 +267,13 @@ async def run_github_repo_agent(
                 f"Details: {clone.stderr.strip()}"
             )
 
-        tools = _make_repo_tools(tmp_dir)
+        try:
+            index: Optional[CodeIndex] = await asyncio.to_thread(CodeIndex.load_or_build, tmp_dir)
+        except Exception as exc:
+            logger.warning("Code index build failed for %s, falling back to grep: %s", url, exc)
+            index = None
+
+        tools = _make_repo_tools(tmp_dir, index)
         llm = get_default_llm().client.bind_tools(tools)
         system_prompt = _SYSTEM_PROMPT.format(repo_dir=tmp_dir)
 
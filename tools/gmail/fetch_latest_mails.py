@@ -1,41 +1,25 @@
-import requests
-import datetime
+import asyncio
 import sys
-def get_latest_emails(access_token, max_results=5):
-    """Fetch user's latest Gmail messages."""
-    base_url = "https://gmail.googleapis.com/gmail/v1/users/me"
-    headers = {"Authorization": f"Bearer {access_token}"}
 
-    params = {"maxResults": max_results, "labelIds": ["INBOX"], "q": "is:inbox"}
-    response = requests.get(f"{base_url}/messages", headers=headers, params=params, timeout=8)
+from core.clients.google_api import get_google_api, message_headers
 
-    if response.status_code != 200:
-        raise Exception(f"Failed to list messages: {response.status_code} {response.text}")
 
-    messages = response.json().get("messages", [])
-    if not messages:
+async def get_latest_emails(access_token, max_results=5):
+    """Fetch user's latest Gmail messages."""
+    api = get_google_api()
+    ids = await api.gmail_list_message_ids(
+        access_token, max_results=max_results, q="is:inbox", label_ids=["INBOX"]
+    )
+    if not ids:
         return []
 
     emails = []
-    for msg in messages:
-        msg_id = msg["id"]
-        msg_response = requests.get(f"{base_url}/messages/{msg_id}", headers=headers, timeout=8)
-        if msg_response.status_code != 200:
-            continue
-
-        msg_data = msg_response.json()
-        headers_list = msg_data.get("payload", {}).get("headers", [])
-        email_info = {"id": msg_id}
-
-        for h in headers_list:
-            name = h["name"].lower()
-            if name == "subject":
-                email_info["subject"] = h["value"]
-            elif name == "from":
-                email_info["from"] = h["value"]
-            elif name == "date":
-                email_info["date"] = h["value"]
-
+    for msg_data in await api.gmail_get_messages(access_token, ids):
+        headers = message_headers(msg_data)
+        email_info = {"id": msg_data["id"]}
+        for name in ("subject", "from", "date"):
+            if name in headers:
+                email_info[name] = headers[name]
         email_info["snippet"] = msg_data.get("snippet", "")
         emails.append(email_info)
 
@@ -43,19 +27,25 @@ def get_latest_emails(access_token, max_results=5):
 
 def main():
     if len(sys.argv) < 2:
-        print("Usage: python google_user_calendar.py <ACCESS_TOKEN>")
+        print("Usage: python fetch_latest_mails.py <ACCESS_TOKEN> [max_results]")
         sys.exit(1)
 
     access_token = sys.argv[1]
+    maxr = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    async def _run():
+        try:
+            return await get_latest_emails(access_token, maxr)
+        finally:
+            await get_google_api().close()
 
     try:
-        print("Fetching user info...")
-        user_info = get_user_info(access_token)
-        print(f"Logged in as: {user_info.get('email')}\n")
+        for it in asyncio.run(_run()):
+            print(f"- {it['id']} | {it.get('date', '')} | From: {it.get('from', '')} | Subject: {it.get('subject', '(no subject)')}")
 
     except Exception as e:
         print("\nError:", e)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
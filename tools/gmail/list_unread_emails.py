@@ -1,49 +1,29 @@
-import requests
+import asyncio
 import sys
 
+from core.clients.google_api import get_google_api, message_headers
+
 """List unread Gmail messages and print basic info.
 
 Usage: python list_unread_emails.py <ACCESS_TOKEN> [max_results]
 """
 
 
-def list_unread(access_token, max_results=10):
-    base_url = "https://gmail.googleapis.com/gmail/v1/users/me"
-    headers = {"Authorization": f"Bearer {access_token}"}
-
-    params = {"maxResults": max_results, "q": "is:unread"}
-    resp = requests.get(
-        f"{base_url}/messages", headers=headers, params=params, timeout=8
+async def list_unread(access_token, max_results=10):
+    api = get_google_api()
+    ids = await api.gmail_list_message_ids(
+        access_token, max_results=max_results, q="is:unread"
     )
-    if resp.status_code != 200:
-        raise Exception(f"Failed to list messages: {resp.status_code} {resp.text}")
+    if not ids:
+        return []
 
-    messages = resp.json().get("messages", [])
     results = []
-    for m in messages:
-        msg_id = m["id"]
-        msg_resp = requests.get(
-            f"{base_url}/messages/{msg_id}",
-            headers=headers,
-            timeout=8,
-            params={
-                "format": "metadata",
-                "metadataHeaders": ["Subject", "From", "Date"],
-            },
-        )
-        if msg_resp.status_code != 200:
-            continue
-        data = msg_resp.json()
-        headers_list = data.get("payload", {}).get("headers", [])
-        info = {"id": msg_id, "snippet": data.get("snippet", "")}
-        for h in headers_list:
-            name = h.get("name", "").lower()
-            if name == "subject":
-                info["subject"] = h.get("value")
-            elif name == "from":
-                info["from"] = h.get("value")
-            elif name == "date":
-                info["date"] = h.get("value")
+    for data in await api.gmail_get_messages(access_token, ids):
+        headers = message_headers(data)
+        info = {"id": data["id"], "snippet": data.get("snippet", "")}
+        for name in ("subject", "from", "date"):
+            if name in headers:
+                info[name] = headers[name]
         results.append(info)
     return results
 
@@ -55,8 +35,14 @@ def main():
     token = sys.argv[1]
     maxr = int(sys.argv[2]) if len(sys.argv) > 2 else 10
 
+    async def _run():
+        try:
+            return await list_unread(token, maxr)
+        finally:
+            await get_google_api().close()
+
     try:
-        items = list_unread(token, maxr)
+        items = asyncio.run(_run())
         if not items:
             print("No unread messages found.")
             return
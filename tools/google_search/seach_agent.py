@@ -1,64 +1,39 @@
-import os
-import sys
+"""Synchronous web search entry point for scripts and the CLI."""
+import asyncio
 from typing import Optional
 
-from langchain_tavily import TavilySearch
 from core.config import get_logger
+from tools.google_search.search_service import WebSearchService
 
 logger = get_logger(__name__)
 
-# Initialize TavilySearch - max_results will be overridden in invoke
-tavily_tool = TavilySearch(topic="general")
-
 
 def web_search_pipeline(
     query: str,
     search_url: Optional[str] = None,
     max_results: int = 5,
+    fetch_top_k: int = 0,
 ) -> list[dict]:
     """
-    Run the web search using Tavily.
-    Returns a list of dictionaries with url and md_body_content (mapped from Tavily's content).
-    """
-    logger.info("Starting Tavily search for query: %s", query)
-
-    try:
-        # Update max_results for this specific call
-        tavily_tool.max_results = max_results
+    Run the web search synchronously (scripts / CLI use).
+    Returns a list of dictionaries with url, title and md_body_content.
 
-        # Invoke Tavily Search
-        response = tavily_tool.invoke({"query": query})
-
-        # Check if response is a dict and has 'results' key (raw output format)
-        results = []
-        if isinstance(response, dict) and "results" in response:
-            raw_results = response["results"]
-        # If it returns a list directly (depends on LangChain version/wrapper)
-        elif isinstance(response, list):
-            raw_results = response
-        else:
-            logger.warning("Unexpected Tavily response format: %s", type(response))
-            return []
-
-        # Map results to expected format
-        for res in raw_results:
-            # Tavily returns 'content', we map it to 'md_body_content'
-            # It also returns 'url', 'title'
-            results.append(
-                {
-                    "url": res.get("url", ""),
-                    "md_body_content": res.get("content", ""),
-                    "title": res.get(
-                        "title", ""
-                    ),  # Adding title as it might be useful, though original only seemed to emphasize url and content
-                }
-            )
+    Async code should await `tools.google_search.search_service.web_search`
+    instead so it shares the process-wide cache and in-flight coalescing.
+    """
+    logger.info("Starting web search for query: %s", query)
 
-        logger.info("Tavily search returned %d results", len(results))
-        return results
+    async def _run() -> list[dict]:
+        service = WebSearchService()
+        try:
+            return await service.search(query, max_results=max_results, fetch_top_k=fetch_top_k)
+        finally:
+            await service.aclose()
 
+    try:
+        return asyncio.run(_run())
     except Exception as e:
-        logger.exception("An error occurred during Tavily search: %s", e)
+        logger.exception("An error occurred during web search: %s", e)
         return []
 
 
@@ -0,0 +1,323 @@
+"""Concurrency-safe web search service.
+
+Every call builds an immutable `SearchRequest`; results are cached by the
+normalized request with a TTL, identical in-flight requests share one provider
+call, and page bodies for the top results are fetched concurrently under a
+bounded semaphore. Providers implement `SearchProvider`, so the Tavily backend
+can be swapped for `FixtureSearchProvider` to run offline.
+"""
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Optional, Protocol
+
+import httpx
+
+from core.config import get_logger
+
+logger = get_logger(__name__)
+
+CACHE_TTL_SECONDS = 300.0
+CACHE_MAX_ENTRIES = 512
+PAGE_FETCH_CONCURRENCY = 4
+PAGE_FETCH_TIMEOUT = 10.0
+MAX_PAGE_CHARS = 20_000
+
+
+@dataclass(frozen=True)
+class SearchRequest:
+    query: str
+    max_results: int = 5
+    topic: str = "general"
+    fetch_top_k: int = 0
+
+    @property
+    def cache_key(self) -> tuple[str, int, str, int]:
+        return (normalize_query(self.query), self.max_results, self.topic, self.fetch_top_k)
+
+
+def normalize_query(query: str) -> str:
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+class SearchProvider(Protocol):
+    name: str
+
+    async def search(self, request: SearchRequest) -> list[dict[str, Any]]:
+        """Return results as dicts with `url`, `title` and `md_body_content`."""
+        ...
+
+
+class PageFetcher(Protocol):
+    async def fetch(self, url: str) -> str:
+        """Return the page body as markdown, or "" when unavailable."""
+        ...
+
+
+# ── Providers ─────────────────────────────────────────────────────────────────
+
+def _map_results(raw_results: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    # Tavily returns 'content'; callers expect it as 'md_body_content'.
+    return [
+        {
+            "url": res.get("url", ""),
+            "md_body_content": res.get("content", ""),
+            "title": res.get("title", ""),
+        }
+        for res in raw_results
+    ]
+
+
+@lru_cache(maxsize=32)
+def _tavily_tool(max_results: int, topic: str):
+    # One configured instance per parameter set; instances are never mutated,
+    # so concurrent requests cannot observe each other's max_results.
+    from langchain_tavily import TavilySearch
+
+    return TavilySearch(max_results=max_results, topic=topic)
+
+
+class TavilySearchProvider:
+    name = "tavily"
+
+    async def search(self, request: SearchRequest) -> list[dict[str, Any]]:
+        tool = _tavily_tool(request.max_results, request.topic)
+        response = await tool.ainvoke({"query": request.query})
+
+        if isinstance(response, dict) and "results" in response:
+            raw_results = response["results"]
+        elif isinstance(response, list):
+            raw_results = response
+        else:
+            logger.warning("Unexpected Tavily response format: %s", type(response))
+            return []
+        return _map_results(raw_results)
+
+
+class HttpxPageFetcher:
+    """Fetch pages over a shared keep-alive client and convert HTML to markdown."""
+
+    def __init__(self, timeout: float = PAGE_FETCH_TIMEOUT) -> None:
+        self._timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self._timeout,
+                follow_redirects=True,
+                headers={"User-Agent": "Mozilla/5.0 (compatible; AgenticBrowser/0.1)"},
+            )
+        return self._client
+
+    async def fetch(self, url: str) -> str:
+        resp = await self._get_client().get(url)
+        resp.raise_for_status()
+        if "html" not in resp.headers.get("content-type", "html"):
+            return resp.text[:MAX_PAGE_CHARS]
+        from tools.website_context.html_md import return_html_md
+
+        markdown = await asyncio.to_thread(return_html_md, resp.text)
+        return markdown[:MAX_PAGE_CHARS]
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class FixtureSearchProvider:
+    """Offline provider backed by canned results, for tests and benchmarks.
+
+    `fixtures` maps a normalized query to its results; `pages` maps URLs to
+    page bodies. `errors` maps a normalized query to the exception its search
+    raises. `latency` simulates network time per call and `calls` records
+    every provider hit so cache/coalescing behavior can be asserted.
+    """
+
+    name = "fixture"
+
+    def __init__(
+        self,
+        fixtures: dict[str, list[dict[str, Any]]],
+        pages: Optional[dict[str, str]] = None,
+        latency: float = 0.0,
+        errors: Optional[dict[str, Exception]] = None,
+    ) -> None:
+        self._fixtures = {normalize_query(q): r for q, r in fixtures.items()}
+        self._errors = {normalize_query(q): e for q, e in (errors or {}).items()}
+        self._pages = pages or {}
+        self._latency = latency
+        self.calls: list[SearchRequest] = []
+        self.page_calls: list[str] = []
+
+    async def search(self, request: SearchRequest) -> list[dict[str, Any]]:
+        self.calls.append(request)
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        error = self._errors.get(normalize_query(request.query))
+        if error is not None:
+            raise error
+        results = self._fixtures.get(normalize_query(request.query), [])
+        return [dict(r) for r in results[: request.max_results]]
+
+    async def fetch(self, url: str) -> str:
+        self.page_calls.append(url)
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        return self._pages.get(url, "")
+
+
+# ── Service ───────────────────────────────────────────────────────────────────
+
+class WebSearchService:
+    def __init__(
+        self,
+        provider: Optional[SearchProvider] = None,
+        page_fetcher: Optional[PageFetcher] = None,
+        ttl_seconds: float = CACHE_TTL_SECONDS,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        fetch_concurrency: int = PAGE_FETCH_CONCURRENCY,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._provider = provider or TavilySearchProvider()
+        self._fetcher = page_fetcher or HttpxPageFetcher()
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._fetch_concurrency = max(1, fetch_concurrency)
+        self._clock = clock
+        self._cache: OrderedDict[tuple, tuple[float, list[dict[str, Any]]]] = OrderedDict()
+        self._inflight: dict[tuple, asyncio.Task] = {}
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0}
+
+    async def search(
+        self,
+        query: str,
+        max_results: int = 5,
+        topic: str = "general",
+        fetch_top_k: int = 0,
+    ) -> list[dict[str, Any]]:
+        request = SearchRequest(
+            query=query.strip(),
+            max_results=max_results,
+            topic=topic,
+            fetch_top_k=min(fetch_top_k, max_results),
+        )
+        return await self.run(request)
+
+    async def run(self, request: SearchRequest) -> list[dict[str, Any]]:
+        key = request.cache_key
+        cached = self._cache_get(key)
+        if cached is not None:
+            self.stats["hits"] += 1
+            return cached
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+        else:
+            self.stats["misses"] += 1
+            task = asyncio.create_task(self._fetch(key, request), name=f"web-search:{key[0][:40]}")
+            task.add_done_callback(_retrieve)
+            self._inflight[key] = task
+        # The fetch is its own task: a caller that is cancelled stops waiting,
+        # but the fetch, and every other caller waiting on it, carries on.
+        return _copy(await asyncio.shield(task))
+
+    async def _fetch(self, key: tuple, request: SearchRequest) -> list[dict[str, Any]]:
+        try:
+            results = await self._execute(request)
+            self._cache_put(key, results)
+            return results
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _execute(self, request: SearchRequest) -> list[dict[str, Any]]:
+        logger.info("Web search (%s) for query: %s", self._provider.name, request.query)
+        results = await self._provider.search(request)
+        if request.fetch_top_k > 0 and results:
+            await self._fetch_bodies(results[: request.fetch_top_k])
+        logger.info("Web search returned %d results", len(results))
+        return results
+
+    async def _fetch_bodies(self, results: list[dict[str, Any]]) -> None:
+        sem = asyncio.Semaphore(self._fetch_concurrency)
+
+        async def _one(item: dict[str, Any]) -> None:
+            url = item.get("url")
+            if not url:
+                return
+            async with sem:
+                try:
+                    body = await self._fetcher.fetch(url)
+                except Exception as exc:
+                    logger.debug("Page fetch failed for %s: %s", url, exc)
+                    return
+            if body:
+                item["md_body_content"] = body
+
+        await asyncio.gather(*(_one(item) for item in results))
+
+    def _cache_get(self, key: tuple) -> Optional[list[dict[str, Any]]]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires_at, results = entry
+        if self._clock() >= expires_at:
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return _copy(results)
+
+    def _cache_put(self, key: tuple, results: list[dict[str, Any]]) -> None:
+        if not results:
+            return  # don't pin transient empty responses for the whole TTL
+        self._cache[key] = (self._clock() + self._ttl, results)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self._max_entries:
+            self._cache.popitem(last=False)
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
+
+    async def aclose(self) -> None:
+        aclose = getattr(self._fetcher, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+def _retrieve(task: asyncio.Task) -> None:
+    # Mark a failure as retrieved, so a fetch whose callers all went away doesn't warn.
+    if not task.cancelled():
+        task.exception()
+
+
+def _copy(results: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    # Callers may mutate result dicts; never hand out the cached objects.
+    return [dict(r) for r in results]
+
+
+_service: Optional[WebSearchService] = None
+
+
+def get_web_search_service() -> WebSearchService:
+    global _service
+    if _service is None:
+        _service = WebSearchService()
+    return _service
+
+
+async def web_search(query: str, max_results: int = 5, fetch_top_k: int = 0) -> list[dict[str, Any]]:
+    """Search through the shared service; returns [] on provider errors."""
+    try:
+        return await get_web_search_service().search(
+            query, max_results=max_results, fetch_top_k=fetch_top_k,
+        )
+    except Exception as exc:
+        logger.exception("An error occurred during web search: %s", exc)
+        return []